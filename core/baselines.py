@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Adaptive Baselines
+Rolling per-agency and per-award-type statistics of award amounts (mean and variance
+of log amounts, a t-digest of amounts, no-bid rate), updated as contracts are saved.
+Older awards fade with an exponential half-life on award_date, so a baseline follows
+the agency's recent norm without re-reading history: each award is weighted by
+2^(days since EPOCH / half-life), and since every statistic is a ratio of such weights
+nothing has to be rescaled as time passes (forward decay). Detectors load the table once
+per pass and score each contract against its baseline in constant time.
+"""
+
+import re
+import json
+import math
+import sqlite3
+import hashlib
+import logging
+from datetime import date
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+from sketches import TDigest
+
+logger = logging.getLogger(__name__)
+
+HALF_LIFE_DAYS = 365
+EPOCH = date(2000, 1, 1).toordinal()
+MIN_WEIGHT = 30               # effective awards before a baseline is trusted over a broader one
+THRESHOLD_TOLERANCE = 0.05    # thresholds moving less than this keep Baselines.version() unchanged
+
+ALL_AGENCIES = 0              # agency_id of the rollup rows (real keys start at 1)
+ALL_TYPES = ''                # award_type of the per-agency rows
+
+NO_BID_PATTERN = re.compile(r'sole.*source|no.*bid|not.*competed', re.IGNORECASE)
+
+def _forward_weight(day: int) -> float:
+    return 2.0 ** ((day - EPOCH) / HALF_LIFE_DAYS)
+
+def _day(award_date: Optional[str]) -> Optional[int]:
+    try:
+        return date.fromisoformat(award_date[:10]).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+class Baseline:
+    """Exponentially decayed statistics for one (agency, award type)"""
+
+    def __init__(self):
+        self.weight = 0.0
+        self.mean_log = 0.0                  # weighted mean of log10(amount)
+        self.m2_log = 0.0                    # weighted sum of squared deviations of log10(amount)
+        self.amount_sum = 0.0
+        self.no_bid = 0.0
+        self.digest = TDigest()
+        self._thresholds: Dict[float, float] = {}
+
+    def add(self, amount: float, no_bid: bool, day: Optional[int], today: int):
+        # Undated and future-dated awards count as today's
+        weight = _forward_weight(min(day, today) if day is not None else today)
+        value = math.log10(amount)
+        self.weight += weight
+        delta = value - self.mean_log
+        self.mean_log += delta * weight / self.weight
+        self.m2_log += weight * delta * (value - self.mean_log)
+        self.amount_sum += weight * amount
+        self.no_bid += weight if no_bid else 0.0
+        self.digest.add(amount, weight)
+        self._thresholds = {}
+
+    def effective_weight(self, today: int) -> float:
+        """Number of awards the baseline is worth today, older ones counted fractionally"""
+        return self.weight / _forward_weight(today)
+
+    @property
+    def std_log(self) -> float:
+        return math.sqrt(self.m2_log / self.weight) if self.weight else 0.0
+
+    @property
+    def mean_amount(self) -> float:
+        return self.amount_sum / self.weight if self.weight else 0.0
+
+    @property
+    def no_bid_rate(self) -> float:
+        return self.no_bid / self.weight if self.weight else 0.0
+
+    def threshold(self, q: float) -> float:
+        """Amount at quantile q, cached so repeated comparisons are a dict lookup"""
+        if q not in self._thresholds:
+            self._thresholds[q] = self.digest.quantile(q).value
+        return self._thresholds[q]
+
+    def percentile_rank(self, amount: float) -> float:
+        return self.digest.cdf(amount)
+
+    def zscore(self, amount: float) -> float:
+        """Standard deviations above the mean, on log amounts (award sizes are roughly log-normal)"""
+        if amount is None or amount <= 0 or not self.std_log:
+            return 0.0
+        return (math.log10(amount) - self.mean_log) / self.std_log
+
+    _FIELDS = ('weight', 'mean_log', 'm2_log', 'amount_sum', 'no_bid')
+
+    def to_row(self) -> Tuple:
+        return tuple(getattr(self, field) for field in self._FIELDS) + (self.digest.to_bytes(),)
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> 'Baseline':
+        baseline = cls()
+        for field, value in zip(cls._FIELDS, row):
+            setattr(baseline, field, value)
+        baseline.digest = TDigest.from_bytes(row[len(cls._FIELDS)])
+        return baseline
+
+class Baselines:
+    """A loaded snapshot of every baseline, looked up by agency name and award type"""
+
+    def __init__(self, rows: Dict[Tuple[Optional[str], str], Baseline], today: Optional[int] = None):
+        self.rows = rows
+        self.today = today or date.today().toordinal()
+
+    def __bool__(self):
+        return bool(self.rows)
+
+    def lookup(self, agency: Optional[str], award_type: Optional[str]) -> Optional[Baseline]:
+        """The narrowest trusted baseline: agency and award type, then agency, then every contract"""
+        for key in ((agency, award_type or ALL_TYPES), (agency, ALL_TYPES), (None, ALL_TYPES)):
+            baseline = self.rows.get(key)
+            if baseline is not None and baseline.effective_weight(self.today) >= MIN_WEIGHT:
+                return baseline
+        return None
+
+    def is_large(self, agency: Optional[str], award_type: Optional[str], amount: Optional[float],
+                 q: float, fallback: float) -> bool:
+        """amount is above quantile q of its baseline (or above fallback while no baseline is trusted)"""
+        if amount is None or amount != amount:
+            return False
+        baseline = self.lookup(agency, award_type)
+        return amount > (baseline.threshold(q) if baseline else fallback)
+
+    def percentile_rank(self, agency: Optional[str], award_type: Optional[str],
+                        amount: Optional[float]) -> Optional[float]:
+        baseline = self.lookup(agency, award_type)
+        if baseline is None or amount is None or amount != amount:
+            return None
+        return baseline.percentile_rank(amount)
+
+    def version(self, quantiles: Sequence[float], tolerance: float = THRESHOLD_TOLERANCE) -> str:
+        """
+        Changes when any trusted baseline's threshold at one of quantiles moves by more than about
+        tolerance, or a baseline becomes (un)trusted. Thresholds drift with every saved award, so
+        incremental analyzers put this in their fingerprint rather than the raw statistics.
+        """
+        step = math.log1p(tolerance)
+        trusted = []
+        for (agency, award_type), baseline in sorted(self.rows.items(), key=lambda item: (item[0][0] or '', item[0][1])):
+            if baseline.effective_weight(self.today) >= MIN_WEIGHT:
+                trusted.append([agency, award_type] + [round(math.log(max(baseline.threshold(q), 1.0)) / step)
+                                                       for q in quantiles])
+        return hashlib.sha1(json.dumps(trusted).encode()).hexdigest()[:16]
+
+    def floor(self, q: float, fallback: float) -> float:
+        """Smallest quantile-q threshold of any trusted baseline: a SQL pre-filter for is_large"""
+        thresholds = [baseline.threshold(q) for baseline in self.rows.values()
+                      if baseline.effective_weight(self.today) >= MIN_WEIGHT]
+        return min(thresholds + [fallback])
+
+class BaselineStore:
+    """
+    amount_baselines rows keyed by agency_id (ALL_AGENCIES for the rollup) and award_type
+    (ALL_TYPES for the per-agency rows). Writers fold contracts in on their own connection
+    and transaction, like SketchStore; amounts an update replaced stay until a rebuild.
+    """
+
+    _COLUMNS = 'weight, mean_log, m2_log, amount_sum, no_bid, digest'
+
+    def __init__(self, db_path: str = "government_monitor.db"):
+        self.db_path = db_path
+
+    @staticmethod
+    def init_tables(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS amount_baselines (
+                agency_id INTEGER NOT NULL,
+                award_type TEXT NOT NULL,
+                weight REAL,
+                mean_log REAL,
+                m2_log REAL,
+                amount_sum REAL,
+                no_bid REAL,
+                digest BLOB,
+                PRIMARY KEY (agency_id, award_type)
+            )
+        ''')
+
+    @staticmethod
+    def is_built(conn) -> bool:
+        try:
+            return conn.execute('SELECT 1 FROM amount_baselines WHERE agency_id = ? AND award_type = ?',
+                                (ALL_AGENCIES, ALL_TYPES)).fetchone() is not None
+        except sqlite3.OperationalError:
+            return False
+
+    def ensure_built(self, conn) -> bool:
+        """One-time build for a database that has contracts but no baselines yet"""
+        self.init_tables(conn)
+        if self.is_built(conn) or not conn.execute('SELECT 1 FROM contract_facts LIMIT 1').fetchone():
+            return False
+        self.rebuild(conn)
+        return True
+
+    def rebuild(self, conn):
+        """Recompute every baseline from contract_facts (pass a query_log connection to include archives)"""
+        self.init_tables(conn)
+        rows = conn.execute('''
+            SELECT agency_id, award_type, competition_type, award_date, award_amount FROM contract_facts
+        ''')
+        baselines = self._fold(rows, {})
+        conn.execute('DELETE FROM amount_baselines')
+        self._write(conn, baselines)
+        logger.info(f"Rebuilt {len(baselines)} amount baselines")
+
+    def observe(self, conn, award_ids: Sequence[str]):
+        """Fold newly inserted contracts into their baselines (re-collected awards are left out by the caller)"""
+        if not award_ids:
+            return
+        if not self.is_built(conn):
+            self.rebuild(conn)
+            return
+        facts = []
+        for i in range(0, len(award_ids), 500):
+            chunk = list(award_ids[i:i + 500])
+            placeholders = ','.join('?' * len(chunk))
+            facts.extend(conn.execute(f'''
+                SELECT agency_id, award_type, competition_type, award_date, award_amount
+                FROM contract_facts WHERE award_id IN ({placeholders})
+            ''', chunk))
+        keys = {key for agency_id, award_type, *_ in facts for key in self._keys(agency_id, award_type)}
+        baselines = self._fold(facts, self._load(conn, keys))
+        self._write(conn, baselines)
+
+    @staticmethod
+    def _keys(agency_id: Optional[int], award_type: Optional[str]):
+        keys = [(ALL_AGENCIES, ALL_TYPES)]
+        if agency_id is not None:
+            keys.append((agency_id, ALL_TYPES))
+            if award_type:
+                keys.append((agency_id, award_type))
+        return keys
+
+    def _fold(self, facts: Iterable, baselines: Dict) -> Dict:
+        today = date.today().toordinal()
+        for agency_id, award_type, competition_type, award_date, amount in facts:
+            # log amounts need a positive value; negative amounts are de-obligations, not awards
+            if amount is None or amount <= 0:
+                continue
+            no_bid = bool(competition_type and NO_BID_PATTERN.search(competition_type))
+            day = _day(award_date)
+            for key in self._keys(agency_id, award_type):
+                if key not in baselines:
+                    baselines[key] = Baseline()
+                baselines[key].add(amount, no_bid, day, today)
+        return baselines
+
+    def _load(self, conn, keys: Iterable[Tuple[int, str]]) -> Dict:
+        baselines = {}
+        for agency_id, award_type in keys:
+            row = conn.execute(f'SELECT {self._COLUMNS} FROM amount_baselines WHERE agency_id = ? AND award_type = ?',
+                               (agency_id, award_type)).fetchone()
+            if row:
+                baselines[(agency_id, award_type)] = Baseline.from_row(row)
+        return baselines
+
+    @staticmethod
+    def _write(conn, baselines: Dict):
+        conn.executemany('''
+            INSERT OR REPLACE INTO amount_baselines
+            (agency_id, award_type, weight, mean_log, m2_log, amount_sum, no_bid, digest)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(agency_id, award_type) + baseline.to_row() for (agency_id, award_type), baseline in baselines.items()])
+
+    def load(self, conn) -> Baselines:
+        """Every baseline, keyed by (agency name or None for the rollup, award_type); empty when not built"""
+        if not self.is_built(conn):
+            return Baselines({})
+        rows = {}
+        for agency, award_type, *values in conn.execute(f'''
+            SELECT a.name, b.award_type, {', '.join('b.' + column for column in self._COLUMNS.split(', '))}
+            FROM amount_baselines b
+            LEFT JOIN agencies a ON a.id = b.agency_id
+        '''):
+            rows[(agency, award_type)] = Baseline.from_row(values)
+        return Baselines(rows)
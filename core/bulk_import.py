@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Bulk Award Import
+Loads USASpending bulk award downloads (CSV, or ZIP archives of CSVs) without the
+live API: the file is streamed and cut into chunks of whole CSV records, worker
+processes parse and map each chunk onto Contract rows, and the main process writes
+them in file order through DatabaseManager.save_contracts, checkpointing the byte
+offset after every chunk so an interrupted import resumes where it stopped. Summary
+sketches and amount baselines are rebuilt once at the end instead of per chunk.
+"""
+
+import io
+import os
+import csv
+import sqlite3
+import zipfile
+import gzip
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from run_metrics import RunMetrics
+
+logger = logging.getLogger(__name__)
+
+CHUNK_BYTES = 8 * 1024 * 1024      # bulk files have ~300 columns: roughly 3-5k awards per chunk
+READ_BLOCK = 1024 * 1024
+
+# Contract field -> bulk download headers, first present wins (award summary files first,
+# then transaction files, then the column names of the website's custom downloads)
+COLUMN_MAP = {
+    'award_id': ['award_id_piid', 'contract_award_unique_key', 'award_id', 'Award ID'],
+    'recipient_name': ['recipient_name', 'recipient_name_raw', 'Recipient Name'],
+    'award_amount': ['total_dollars_obligated', 'total_obligated_amount', 'federal_action_obligation',
+                     'current_total_value_of_award', 'Award Amount'],
+    'awarding_agency': ['awarding_agency_name', 'Awarding Agency'],
+    'award_date': ['period_of_performance_start_date', 'award_base_action_date', 'action_date', 'Start Date'],
+    'award_type': ['award_type', 'Award Type'],
+    'competition_type': ['extent_competed', 'Contract Award Type'],
+    'description': ['prime_award_base_transaction_description', 'award_description',
+                    'transaction_description', 'Description']
+}
+
+# Used when extent_competed is blank, so no-bid detection still sees sole-source awards
+FALLBACK_COMPETITION_COLUMNS = ['other_than_full_and_open_competition', 'solicitation_procedures']
+
+# Assistance (grant/loan) files share the archive layout but are not contracts
+ASSISTANCE_MARKERS = ('assistance_type_code', 'assistance_award_unique_key')
+
+class NotAContractFile(ValueError):
+    """The CSV header has no award id/amount columns, or describes assistance awards"""
+
+def resolve_columns(header: Sequence[str]) -> Dict[str, int]:
+    """Map each Contract field to its column index in this file"""
+    if any(marker in header for marker in ASSISTANCE_MARKERS):
+        raise NotAContractFile("assistance award file")
+    positions = {name: i for i, name in enumerate(header)}
+    columns = {}
+    for field, candidates in COLUMN_MAP.items():
+        columns[field] = next((positions[name] for name in candidates if name in positions), None)
+    if columns['award_id'] is None or columns['award_amount'] is None:
+        raise NotAContractFile("no award id or amount column")
+    columns['fallback_competition'] = [positions[name] for name in FALLBACK_COMPETITION_COLUMNS
+                                       if name in positions]
+    return columns
+
+def classify_competition(row: Sequence[str], columns: Dict) -> str:
+    competition = _cell(row, columns['competition_type'])
+    if competition:
+        return competition
+    for index in columns['fallback_competition']:
+        value = _cell(row, index)
+        if value:
+            # e.g. "ONLY ONE SOURCE - OTHER" / "SOLE SOURCE": keep the detectors' vocabulary
+            return 'SOLE SOURCE' if 'ONE SOURCE' in value.upper() else value
+    return ''
+
+def _cell(row: Sequence[str], index: Optional[int]) -> str:
+    return row[index].strip() if index is not None and index < len(row) else ''
+
+def parse_chunk(header: Sequence[str], data: bytes) -> Tuple[List[Tuple], int]:
+    """
+    Worker: parse whole CSV records into Contract-ordered tuples, keeping the last row per
+    award (transaction files repeat awards). Returns (rows, records skipped as unusable).
+    """
+    columns = resolve_columns(header)
+    awards: Dict[str, Tuple] = {}
+    skipped = 0
+    for row in csv.reader(io.StringIO(data.decode('utf-8', errors='replace'))):
+        award_id = _cell(row, columns['award_id'])
+        try:
+            amount = float(_cell(row, columns['award_amount']))
+        except ValueError:
+            amount = None
+        if not award_id or amount is None:
+            skipped += 1
+            continue
+        awards[award_id] = (
+            award_id,
+            _cell(row, columns['recipient_name']),
+            amount,
+            _cell(row, columns['awarding_agency']),
+            _cell(row, columns['award_date'])[:10],
+            _cell(row, columns['award_type']),
+            classify_competition(row, columns),
+            _cell(row, columns['description'])
+        )
+    return list(awards.values()), skipped
+
+def record_chunks(stream, chunk_bytes: int = CHUNK_BYTES, start: int = 0) -> Iterator[Tuple[bytes, int]]:
+    """
+    Yield (data, end offset) pieces of at least chunk_bytes that end on a record boundary.
+    Quoted fields may hold newlines, so a line only ends a record when the quotes seen
+    so far are balanced.
+    """
+    pending = b''
+    lines: List[bytes] = []
+    size = 0
+    offset = start
+    in_quotes = False
+    while True:
+        block = stream.read(READ_BLOCK)
+        if not block:
+            break
+        pieces = (pending + block).split(b'\n')
+        pending = pieces.pop()
+        for line in pieces:
+            lines.append(line)
+            size += len(line) + 1
+            if line.count(b'"') % 2:
+                in_quotes = not in_quotes
+            if size >= chunk_bytes and not in_quotes:
+                offset += size
+                yield b'\n'.join(lines) + b'\n', offset
+                lines, size = [], 0
+    if pending:
+        lines.append(pending)
+        size += len(pending)
+    if lines:
+        yield b'\n'.join(lines), offset + size
+
+def archive_members(path: str) -> List[str]:
+    """CSV members of a ZIP archive in name order, or [''] for a plain/gzipped CSV"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            return sorted(name for name in archive.namelist() if name.lower().endswith('.csv'))
+    return ['']
+
+def open_member(path: str, member: str) -> Tuple[io.IOBase, Optional[int]]:
+    """
+    Binary stream of one CSV and its uncompressed size when known. Every stream is seekable;
+    ZIP and gzip members seek by decompressing forward.
+    """
+    if member:
+        archive = zipfile.ZipFile(path)
+        return archive.open(member), archive.getinfo(member).file_size
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb'), None
+    return open(path, 'rb'), os.path.getsize(path)
+
+class BulkImporter:
+    """Streams bulk award files into the database with bounded memory and resumable progress"""
+
+    def __init__(self, db_manager, workers: int = 1, chunk_bytes: int = CHUNK_BYTES):
+        self.db = db_manager
+        self.db_path = db_manager.db_path
+        self.workers = workers
+        self.chunk_bytes = chunk_bytes
+        conn = sqlite3.connect(self.db_path)
+        self.init_table(conn)
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def init_table(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS bulk_imports (
+                source TEXT,
+                member TEXT,
+                file_size INTEGER,
+                file_mtime REAL,
+                byte_offset INTEGER,
+                rows_read INTEGER,
+                rows_written INTEGER,
+                rows_skipped INTEGER,
+                status TEXT,
+                started_date TEXT,
+                updated_date TEXT,
+                PRIMARY KEY (source, member)
+            )
+        ''')
+
+    def status(self) -> List[Dict]:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        rows = [dict(row) for row in conn.execute('SELECT * FROM bulk_imports ORDER BY started_date, source, member')]
+        conn.close()
+        return rows
+
+    def _checkpoint(self, source: str, member: str) -> Optional[Dict]:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        row = conn.execute('SELECT * FROM bulk_imports WHERE source = ? AND member = ?', (source, member)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def _save_checkpoint(self, source: str, member: str, stat, state: Dict, status: str):
+        conn = sqlite3.connect(self.db_path)
+        now = datetime.now().isoformat()
+        conn.execute('''
+            INSERT INTO bulk_imports
+            (source, member, file_size, file_mtime, byte_offset, rows_read, rows_written, rows_skipped,
+             status, started_date, updated_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (source, member) DO UPDATE SET
+                file_size = excluded.file_size, file_mtime = excluded.file_mtime,
+                byte_offset = excluded.byte_offset, rows_read = excluded.rows_read,
+                rows_written = excluded.rows_written, rows_skipped = excluded.rows_skipped,
+                status = excluded.status, updated_date = excluded.updated_date
+        ''', (source, member, stat.st_size, stat.st_mtime, state['offset'], state['rows_read'],
+              state['rows_written'], state['rows_skipped'], status, now, now))
+        conn.commit()
+        conn.close()
+
+    def import_files(self, paths: Sequence[str], restart: bool = False,
+                     progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Import every CSV in paths. Finished members are skipped and interrupted ones resume
+        from their last checkpoint unless restart=True. progress(state) is called per chunk.
+        """
+        from government_monitor_system import Contract
+
+        metrics = RunMetrics('bulk_import', self.db_path)
+        totals = {'files': 0, 'rows_read': 0, 'rows_written': 0, 'rows_skipped': 0, 'skipped_files': []}
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            for path in paths:
+                source = os.path.abspath(path)
+                stat = os.stat(source)
+                for member in archive_members(source):
+                    label = f"{os.path.basename(source)}{':' + member if member else ''}"
+                    checkpoint = None if restart else self._checkpoint(source, member)
+                    if checkpoint and (checkpoint['file_size'], checkpoint['file_mtime']) != (stat.st_size, stat.st_mtime):
+                        logger.warning(f"{label} changed since its last import; starting it over")
+                        checkpoint = None
+                    if checkpoint and checkpoint['status'] == 'done':
+                        logger.info(f"{label} already imported; skipping")
+                        continue
+                    try:
+                        state = self._import_member(source, member, label, stat, checkpoint, pool, Contract,
+                                                    metrics, progress)
+                    except NotAContractFile as e:
+                        logger.warning(f"Skipping {label}: {e}")
+                        totals['skipped_files'].append(label)
+                        continue
+                    totals['files'] += 1
+                    for key in ('rows_read', 'rows_written', 'rows_skipped'):
+                        totals[key] += state[key]
+            if totals['rows_written']:
+                with metrics.measure('rebuild_summaries'):
+                    self.db.rebuild_summaries()
+        finally:
+            if pool:
+                pool.shutdown()
+            totals['run_metrics'] = metrics.finish()
+        return totals
+
+    def _import_member(self, source, member, label, stat, checkpoint, pool, contract_type, metrics, progress) -> Dict:
+        stream, total_bytes = open_member(source, member)
+        try:
+            header_line = stream.readline()
+            header = next(csv.reader([header_line.decode('utf-8-sig', errors='replace')]), [])
+            resolve_columns(header)
+            state = {
+                'label': label,
+                'offset': len(header_line),
+                'rows_read': 0,
+                'rows_written': 0,
+                'rows_skipped': 0,
+                'total_bytes': total_bytes
+            }
+            if checkpoint:
+                for key in ('rows_read', 'rows_written', 'rows_skipped'):
+                    state[key] = checkpoint[key]
+                state['offset'] = checkpoint['byte_offset']
+                stream.seek(state['offset'])
+                logger.info(f"Resuming {label} at byte {state['offset']:,} ({state['rows_written']:,} rows written)")
+            self._save_checkpoint(source, member, stat, state, 'running')
+
+            for (rows, skipped), end in self._parsed(header, record_chunks(stream, self.chunk_bytes, state['offset']), pool):
+                with metrics.measure('write', label):
+                    self.db.save_contracts([contract_type(*row) for row in rows], update_summaries=False)
+                metrics.add('write', label, rows_written=len(rows), items=len(rows) + skipped)
+                state['offset'] = end
+                state['rows_read'] += len(rows) + skipped
+                state['rows_written'] += len(rows)
+                state['rows_skipped'] += skipped
+                self._save_checkpoint(source, member, stat, state, 'running')
+                if progress:
+                    progress(state)
+            self._save_checkpoint(source, member, stat, state, 'done')
+            logger.info(f"Imported {label}: {state['rows_written']:,} contracts, {state['rows_skipped']:,} rows skipped")
+            return state
+        finally:
+            stream.close()
+
+    def _parsed(self, header, chunks, pool) -> Iterator[Tuple[Tuple[List[Tuple], int], int]]:
+        """Parse chunks in order; with a pool, at most two chunks per worker are in flight"""
+        if pool is None:
+            for data, end in chunks:
+                yield parse_chunk(header, data), end
+            return
+        in_flight = deque()
+        for data, end in chunks:
+            in_flight.append((pool.submit(parse_chunk, header, data), end))
+            if len(in_flight) >= 2 * self.workers:
+                future, chunk_end = in_flight.popleft()
+                yield future.result(), chunk_end
+        while in_flight:
+            future, chunk_end = in_flight.popleft()
+            yield future.result(), chunk_end
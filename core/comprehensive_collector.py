@@ -11,9 +11,11 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'archive'))
 
 from enhanced_collectors import ComprehensiveCollector
 from missing_sources_collectors import MissingSourcesCollector
+from ingest_pipeline import IngestPipeline
+from run_metrics import RunMetrics
+import query_log
 from datetime import datetime
 import logging
-import time
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -21,71 +23,87 @@ logger = logging.getLogger(__name__)
 class UltimateGovernmentMonitor(GovernmentMonitor):
     """Ultimate monitor with ALL available data sources"""
     
-    def __init__(self, email_config=None):
-        super().__init__(email_config)
+    def __init__(self, email_config=None, db_path: str = "government_monitor.db"):
+        super().__init__(email_config, db_path)
         self.enhanced_collector = ComprehensiveCollector()
         self.missing_sources_collector = MissingSourcesCollector()
+        # Callables run on each batch of newly written contracts
+        self.post_write_hooks = [self._detect_at_ingest]
+        self._ingest_alert_count = 0
     
-    def run_ultimate_collection(self, days_back=30):
-        """Collect from ALL available government data sources"""
+    def run_ultimate_collection(self, days_back=30, trace_path=None):
+        """
+        Collect from ALL available government data sources. Per-phase/per-source timing,
+        HTTP, DB and memory figures are saved to run_metrics and returned under 'run_metrics';
+        trace_path additionally writes a trace-event JSON timeline of the run.
+        """
         logger.info("=== ULTIMATE Multi-Source Collection ===")
         print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("🚀 Collecting from MAXIMUM available government data sources...")
         print()
         
-        all_source_results = {}
-        total_collected = 0
+        self._ingest_alert_count = 0
+        metrics = RunMetrics('ultimate_collection', self.db.db_path)
+        metrics.instrument_collector(self.enhanced_collector, 'enhanced')
+        metrics.instrument_collector(self.missing_sources_collector, 'missing')
         
         try:
-            # 1. Enhanced collectors (USASpending.gov, DoD, Data.gov)
+            # 1-4. Fetch, normalize, deduplicate and save as one overlapping pipeline:
+            #      both collector phases fetch concurrently while earlier batches are
+            #      normalized, deduplicated and written
             print("📊 Phase 1: Enhanced USASpending.gov + DoD + Data.gov...")
-            enhanced_results = self.enhanced_collector.collect_all_available_data(days_back)
-            all_source_results.update(enhanced_results)
-            
-            enhanced_total = sum(len(contracts) for contracts in enhanced_results.values())
-            total_collected += enhanced_total
-            print(f"   ✅ Enhanced sources: {enhanced_total} contracts")
-            
-            time.sleep(3)  # Rate limiting between phases
-            
-            # 2. Missing sources (Federal Register, Agency Press, Small Business)
             print("📋 Phase 2: Federal Register + Agency Press + Small Business...")
-            missing_results = self.missing_sources_collector.collect_all_missing_sources(days_back)
+            print("🔄 Phase 3: Streaming merge, dedup and save across ALL sources...")
+            pipeline = IngestPipeline(self.db, self._create_contract_signature,
+                                      post_write_hooks=self.post_write_hooks, metrics=metrics)
+            with metrics.measure('ingest', process_cpu=True):
+                ingest = pipeline.run([
+                    ('enhanced', lambda: self.enhanced_collector.collect_all_available_data(days_back)),
+                    # Prefix keys to avoid conflicts
+                    ('missing', lambda: {f"missing_{key}": value for key, value in
+                                         self.missing_sources_collector.collect_all_missing_sources(days_back).items()})
+                ])
+            metrics.add('ingest', items=ingest['total_collected'], rows_written=ingest['new_contracts_saved'])
             
-            # Prefix keys to avoid conflicts
-            for key, value in missing_results.items():
-                all_source_results[f"missing_{key}"] = value
-            
-            missing_total = sum(len(contracts) for contracts in missing_results.values())
-            total_collected += missing_total
+            enhanced_total = ingest['phase_totals'].get('enhanced', 0)
+            missing_total = ingest['phase_totals'].get('missing', 0)
+            print(f"   ✅ Enhanced sources: {enhanced_total} contracts")
             print(f"   ✅ Missing sources: {missing_total} contracts")
             
-            # 3. Merge and deduplicate ALL sources
-            print("🔄 Phase 3: Merging and deduplicating across ALL sources...")
-            all_contracts = self._merge_all_sources(all_source_results)
-            
-            # 4. Save new contracts to database
-            new_contracts = self._save_new_contracts(all_contracts)
+            print(f"   📊 Deduplication results:")
+            for source, stats in ingest['source_stats'].items():
+                print(f"      {source}: {stats['unique']}/{stats['total']} unique")
+            print(f"   ⏱️  Pipeline stages ({ingest['elapsed_seconds']}s wall):")
+            for stage in ingest['stage_stats']:
+                print(f"      {stage['stage']}: {stage['items_in']} in, {stage['items_out']} out, "
+                      f"{stage['busy_seconds']}s busy, {stage['blocked_seconds']}s blocked")
+            logger.info(f"Merged to {ingest['unique_contracts']} unique contracts from "
+                        f"{len(ingest['contracts_by_source'])} sources, saved {ingest['new_contracts_saved']} new")
             
-            # 5. Run pattern analysis on ALL data
+            # 5. Run pattern analysis on ALL data (rapid accumulation already ran at ingest)
             print("🔍 Phase 4: Running pattern analysis...")
-            rapid_alerts = self.analyzer.detect_rapid_accumulation()
-            no_bid_alerts = self.analyzer.detect_no_bid_patterns()
-            all_alerts = rapid_alerts + no_bid_alerts
-            self.alert_manager.process_alerts(all_alerts)
+            print(f"   ⚡ Rapid accumulation alerts raised at ingest: {self._ingest_alert_count}")
+            # Only contracts changed by this run (or aged out of the window) are re-checked
+            with metrics.measure('analysis'):
+                no_bid_alerts = self.analyzer.detect_no_bid_patterns(incremental=True)
+            with metrics.measure('alerts'):
+                self.alert_manager.process_alerts(no_bid_alerts)
             
             # Generate comprehensive results
             results = {
                 'collection_type': 'ULTIMATE',
-                'sources_used': list(all_source_results.keys()),
-                'contracts_by_source': {k: len(v) for k, v in all_source_results.items()},
-                'total_collected': total_collected,
-                'unique_contracts': len(all_contracts),
-                'new_contracts_saved': new_contracts,
-                'alerts_generated': len(all_alerts),
+                'sources_used': list(ingest['contracts_by_source'].keys()),
+                'contracts_by_source': ingest['contracts_by_source'],
+                'total_collected': ingest['total_collected'],
+                'unique_contracts': ingest['unique_contracts'],
+                'new_contracts_saved': ingest['new_contracts_saved'],
+                'alerts_generated': self._ingest_alert_count + len(no_bid_alerts),
                 'collection_timestamp': datetime.now().isoformat(),
                 'phase_1_enhanced': enhanced_total,
-                'phase_2_missing': missing_total
+                'phase_2_missing': missing_total,
+                'pipeline_stages': ingest['stage_stats'],
+                'run_id': metrics.run_id,
+                'run_metrics': metrics.finish(trace_path)
             }
             
             self._print_ultimate_summary(results)
@@ -102,74 +120,28 @@ class UltimateGovernmentMonitor(GovernmentMonitor):
                 'unique_contracts': 0,
                 'new_contracts_saved': 0,
                 'alerts_generated': 0,
-                'error': str(e)
+                'error': str(e),
+                'run_id': metrics.run_id,
+                'run_metrics': metrics.finish(trace_path)
             }
     
-    def _merge_all_sources(self, all_source_results):
-        """Merge contracts from ALL sources with advanced deduplication"""
-        all_contracts = []
-        seen_signatures = set()
-        source_stats = {}
-        
-        for source_name, contracts in all_source_results.items():
-            source_stats[source_name] = {'total': len(contracts), 'unique': 0}
-            
-            for contract in contracts:
-                # Create comprehensive signature for deduplication
-                signature = self._create_contract_signature(contract)
-                
-                if signature not in seen_signatures:
-                    contract.data_source = source_name
-                    all_contracts.append(contract)
-                    seen_signatures.add(signature)
-                    source_stats[source_name]['unique'] += 1
-        
-        print(f"   📊 Deduplication results:")
-        for source, stats in source_stats.items():
-            print(f"      {source}: {stats['unique']}/{stats['total']} unique")
-        
-        logger.info(f"Merged to {len(all_contracts)} unique contracts from {len(all_source_results)} sources")
-        return all_contracts
+    def _detect_at_ingest(self, contracts):
+        """Post-write hook: update accumulation windows and raise alerts immediately"""
+        alerts = self.streaming_detector.observe(contracts)
+        if alerts:
+            self.alert_manager.process_alerts(alerts)
+            self._ingest_alert_count += len(alerts)
     
     def _create_contract_signature(self, contract):
         """Create comprehensive signature for deduplication"""
-        # Normalize company name
-        company = contract.recipient_name.lower().strip()
-        company = company.replace('inc.', 'inc').replace('corp.', 'corp').replace('llc.', 'llc')
+        # Company as its resolved entity, so name variants across sources ("The Acme Corporation",
+        # "ACME CORP.") sign alike; unseen names fall back to their normalized match key
+        company = self.db.entities.signature_key(contract.recipient_name)
         
         # Create signature with multiple fields
         signature = f"{company}_{contract.award_amount}_{contract.award_date}_{contract.awarding_agency.lower()[:20]}"
         return signature
     
-    def _save_new_contracts(self, all_contracts):
-        """Save new contracts to database"""
-        if not all_contracts:
-            return 0
-        
-        existing_ids = self._get_existing_contract_ids()
-        new_contracts_list = []
-        
-        for contract in all_contracts:
-            if contract.award_id not in existing_ids:
-                new_contracts_list.append(contract)
-        
-        if new_contracts_list:
-            self.db.save_contracts(new_contracts_list)
-            logger.info(f"Saved {len(new_contracts_list)} new contracts to database")
-            return len(new_contracts_list)
-        
-        return 0
-    
-    def _get_existing_contract_ids(self):
-        """Get set of existing contract IDs"""
-        import sqlite3
-        conn = sqlite3.connect(self.db.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT award_id FROM contracts')
-        existing_ids = {row[0] for row in cursor.fetchall()}
-        conn.close()
-        return existing_ids
-    
     def _print_ultimate_summary(self, results):
         """Print comprehensive collection summary"""
         print(f"\n🎉 ULTIMATE Collection Complete!")
@@ -193,6 +165,19 @@ class UltimateGovernmentMonitor(GovernmentMonitor):
                 print(f"   • {source}: {count} contracts")
         print()
         
+        print(f"⏱️  RUN METRICS ({results['run_id']}):")
+        for row in results['run_metrics']:
+            label = f"{row['phase']} / {row['source']}" if row['source'] else row['phase']
+            details = f"{row['wall_seconds']}s wall, {row['cpu_seconds']}s CPU"
+            if row['http_requests']:
+                details += f", {row['http_requests']} requests, {row['http_bytes'] / 1024:.0f} KiB"
+            if row['rows_written']:
+                details += f", {row['rows_written']} rows, {row['db_seconds']}s DB"
+            print(f"   • {label}: {details}")
+        if results['run_metrics']:
+            print(f"   • Peak RSS: {max(row['peak_rss_mb'] or 0 for row in results['run_metrics'])} MB")
+        print()
+        
         # Database status
         database_stats = self._get_database_stats()
         print(f"💾 DATABASE STATUS:")
@@ -211,7 +196,7 @@ class UltimateGovernmentMonitor(GovernmentMonitor):
         import sqlite3
         import os
         
-        conn = sqlite3.connect(self.db.db_path)
+        conn = query_log.connect(self.db.db_path)
         cursor = conn.cursor()
         
         # Total contracts
@@ -237,17 +222,10 @@ class UltimateGovernmentMonitor(GovernmentMonitor):
     
     def get_comprehensive_source_breakdown(self):
         """Get detailed breakdown by all data sources"""
-        import sqlite3
-        conn = sqlite3.connect(self.db.db_path)
+        conn = query_log.connect(self.db.db_path)
         cursor = conn.cursor()
         
-        # Add data_source column if it doesn't exist
-        try:
-            cursor.execute('ALTER TABLE contracts ADD COLUMN data_source TEXT')
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
+        # data_source is a contract_facts column, so the names the contracts view joins in aren't needed
         cursor.execute('''
             SELECT 
                 COALESCE(data_source, 'original') as source,
@@ -256,7 +234,7 @@ class UltimateGovernmentMonitor(GovernmentMonitor):
                 AVG(award_amount) as avg_amount,
                 MIN(award_date) as earliest_date,
                 MAX(award_date) as latest_date
-            FROM contracts 
+            FROM contract_facts 
             GROUP BY data_source
             ORDER BY count DESC
         ''')
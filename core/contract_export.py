@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Streaming Contract Export
+Full contract rows matching the listing filters, written as CSV or NDJSON in
+chunks of a few thousand rows pulled from an open cursor with fetchmany(), so
+an extract of any size runs in constant memory and the first bytes go out as
+soon as SQLite produces the first rows. Used by /api/contracts/export and
+`view_contracts.py export`.
+"""
+
+import io
+import csv
+import json
+from pathlib import Path
+from typing import Any, Iterator, List, Sequence, Tuple
+
+import query_log
+from contract_listing import ORDERINGS, ListingFilters
+from star_schema import CONTRACT_COLUMNS
+
+EXPORT_BATCH_ROWS = 2000
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+def export_query(filters: ListingFilters, order: str = 'date',
+                 columns: Sequence[str] = CONTRACT_COLUMNS) -> Tuple[str, List[Any]]:
+    """
+    SQL and params for every matching contract, newest/largest first like the listings.
+    Unlike a page there is no keyset bound or limit, and rows with a NULL sort key come last.
+    """
+    if order not in ORDERINGS:
+        raise ValueError(f"order must be one of {sorted(ORDERINGS)}")
+    sort_column = ORDERINGS[order]
+    clauses, params = filters.to_sql()
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    query = f'''
+        SELECT {', '.join(columns)}
+        FROM contracts
+        {where}
+        ORDER BY {sort_column} DESC, award_id DESC
+    '''
+    return query, params
+
+def open_reader(db_path: str):
+    """
+    A read-only connection of its own for one export, so a long download doesn't hold a
+    dashboard pool slot. Reads still go through the partition router (archives included).
+    """
+    uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+    return query_log.connect(uri, uri=True, check_same_thread=False)
+
+def _batches(cursor, batch_rows: int) -> Iterator[List[tuple]]:
+    while True:
+        rows = cursor.fetchmany(batch_rows)
+        if not rows:
+            return
+        yield rows
+
+def _csv_chunks(names: Sequence[str], batches: Iterator[List[tuple]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(names)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _ndjson_chunks(names: Sequence[str], batches: Iterator[List[tuple]]) -> Iterator[str]:
+    # One object per line with the columns in select order; NULLs stay null (no pandas NaN here)
+    encode = json.JSONEncoder(ensure_ascii=True, separators=(',', ':')).encode
+    for rows in batches:
+        yield ''.join(encode(dict(zip(names, row))) + '\n' for row in rows)
+
+def stream_export(db_path: str, fmt: str, filters: ListingFilters, order: str = 'date',
+                  columns: Sequence[str] = CONTRACT_COLUMNS, batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[str]:
+    """
+    Text chunks of the export in fmt ('csv' with a header row, or 'ndjson'). Arguments are
+    checked here (ValueError); the connection is opened on the first chunk and closed when
+    the stream ends or is abandoned (a client disconnect closes the generator).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {sorted(FORMATS)}")
+    query, params = export_query(filters, order, columns)
+    return _stream(db_path, fmt, query, params, batch_rows)
+
+def _stream(db_path: str, fmt: str, query: str, params: List[Any], batch_rows: int) -> Iterator[str]:
+    conn = open_reader(db_path)
+    try:
+        cursor = conn.execute(query, params)
+        names = [column[0] for column in cursor.description]
+        chunks = _csv_chunks if fmt == 'csv' else _ndjson_chunks
+        yield from chunks(names, _batches(cursor, batch_rows))
+        cursor.close()
+    finally:
+        conn.close()
+
+def export_filename(fmt: str, filters: ListingFilters) -> str:
+    parts = ['contracts'] + [value for value in (filters.start_date, filters.end_date) if value]
+    return f"{'_'.join(parts)}.{fmt}"
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Keyset Pagination for Contract Listings
+Builds filtered, cursor-paged queries ordered by (award_date, award_id) or
+(award_amount, award_id), so every page is an index range scan that starts
+where the previous page ended instead of rescanning from the top
+"""
+
+import json
+import sqlite3
+import base64
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import star_schema
+
+# Sort key -> column paired with award_id in the keyset
+ORDERINGS = {
+    'date': 'award_date',
+    'amount': 'award_amount'
+}
+
+COMPETITION_CLASSES = {
+    'no_bid': '''(LOWER(competition_type) LIKE '%sole%source%'
+                  OR LOWER(competition_type) LIKE '%no%bid%'
+                  OR LOWER(competition_type) LIKE '%not%competed%')''',
+    'competed': '''NOT (COALESCE(LOWER(competition_type), '') LIKE '%sole%source%'
+                        OR COALESCE(LOWER(competition_type), '') LIKE '%no%bid%'
+                        OR COALESCE(LOWER(competition_type), '') LIKE '%not%competed%')''',
+    'emergency': '''(LOWER(competition_type) LIKE '%sole%source%'
+                     OR LOWER(competition_type) LIKE '%no%bid%'
+                     OR LOWER(description) LIKE '%emergency%'
+                     OR LOWER(description) LIKE '%urgent%')'''
+}
+
+MAX_PAGE_SIZE = 500
+
+@dataclass
+class ListingFilters:
+    agency: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    min_amount: Optional[float] = None
+    competition: Optional[str] = None
+
+    @classmethod
+    def from_args(cls, args, **defaults) -> 'ListingFilters':
+        """Build filters from request query args; args that are absent fall back to defaults"""
+        filters = cls(**defaults)
+        for name in ('agency', 'start_date', 'end_date', 'competition'):
+            if args.get(name):
+                setattr(filters, name, args.get(name))
+        if args.get('min_amount'):
+            try:
+                filters.min_amount = float(args.get('min_amount'))
+            except ValueError:
+                raise ValueError("min_amount must be a number")
+        if filters.competition and filters.competition not in COMPETITION_CLASSES:
+            raise ValueError(f"competition must be one of {sorted(COMPETITION_CLASSES)}")
+        return filters
+
+    def to_sql(self) -> Tuple[List[str], List[Any]]:
+        clauses, params = [], []
+        if self.agency:
+            # By key, so the (agency_id, award_date) index applies instead of a name lookup per row
+            clauses.append('agency_id = (SELECT id FROM agencies WHERE name = ?)')
+            params.append(self.agency)
+        if self.start_date:
+            clauses.append('award_date >= ?')
+            params.append(self.start_date)
+        if self.end_date:
+            clauses.append('award_date <= ?')
+            params.append(self.end_date)
+        if self.min_amount is not None:
+            clauses.append('award_amount >= ?')
+            params.append(self.min_amount)
+        if self.competition:
+            clauses.append(COMPETITION_CLASSES[self.competition])
+        return clauses, params
+
+def encode_cursor(order: str, sort_value: Any, award_id: str) -> str:
+    payload = json.dumps([order, sort_value, award_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, order: str) -> Tuple[Any, str]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_order, sort_value, award_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_order != order:
+        raise ValueError("Cursor does not belong to this listing")
+    return sort_value, award_id
+
+def ensure_indexes(db_path: str):
+    """Star schema with the fact indexes backing both keyset orderings"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        star_schema.ensure_star_schema(conn)
+    finally:
+        conn.close()
+
+def page_query(columns: List[str], order: str, filters: ListingFilters, cursor: Optional[str] = None,
+               limit: int = 50) -> Tuple[str, List[Any], int]:
+    """
+    SQL and params for one page, newest/largest first. One extra row is fetched so the
+    caller can tell whether another page exists; pass the rows to next_cursor().
+    """
+    if order not in ORDERINGS:
+        raise ValueError(f"order must be one of {sorted(ORDERINGS)}")
+    sort_column = ORDERINGS[order]
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    clauses, params = filters.to_sql()
+    # NULL sort keys can't take part in a keyset comparison
+    clauses.append(f'{sort_column} IS NOT NULL')
+    if cursor:
+        sort_value, award_id = decode_cursor(cursor, order)
+        clauses.append(f'({sort_column}, award_id) < (?, ?)')
+        params.extend([sort_value, award_id])
+
+    select = ',\n               '.join(columns + [f'{sort_column} AS _sort_value', 'award_id AS _award_id'])
+    query = f'''
+        SELECT {select}
+        FROM contracts
+        WHERE {' AND '.join(clauses)}
+        ORDER BY {sort_column} DESC, award_id DESC
+        LIMIT ?
+    '''
+    params.append(limit + 1)
+    return query, params, limit
+
+def next_cursor(records: List[Dict], order: str, limit: int) -> Tuple[List[Dict], Optional[str]]:
+    """Trim the look-ahead row and keyset columns; return (page records, cursor for the next page or None)"""
+    has_more = len(records) > limit
+    records = records[:limit]
+    cursor = None
+    if has_more and records:
+        last = records[-1]
+        sort_value = last['_sort_value']
+        if hasattr(sort_value, 'item'):
+            sort_value = sort_value.item()
+        cursor = encode_cursor(order, sort_value, last['_award_id'])
+    for record in records:
+        record.pop('_sort_value', None)
+        record.pop('_award_id', None)
+    return records, cursor
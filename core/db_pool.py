@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+SQLite Connection Pool
+Bounded pool of read-only connections for the dashboards. Connections are
+sqlite3.Connection subclasses, so existing code keeps calling
+conn.execute()/conn.cursor()/conn.close(); close() hands the connection back
+to the pool instead of closing it. Every statement is timed into a
+per-caller query histogram and the query log.
+"""
+
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+from metrics import QUERY_BUCKETS, REGISTRY, MetricsRegistry
+from query_log import LoggedConnection
+
+logger = logging.getLogger(__name__)
+
+class TimedConnection(LoggedConnection):
+    """Connection whose statements are timed and whose close() returns it to its pool"""
+
+    _pool: Optional['ConnectionPool'] = None
+    _checked_out = False
+
+    def _observe(self, sql: str, params, caller: str, seconds: float):
+        super()._observe(sql, params, caller, seconds)
+        if self._pool is not None:
+            self._pool.query_seconds.observe(seconds, pool=self._pool.name, query=caller)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool._release(self)
+        else:
+            super().close()
+
+    def _really_close(self):
+        super().close()
+
+    def __del__(self):
+        # A connection dropped without close() (e.g. a query raised mid-route) frees its pool slot
+        if self._checked_out and self._pool is not None:
+            self._pool._discard()
+
+class ConnectionPool:
+    """
+    Up to `size` connections shared by request threads. Checkout blocks (up to `timeout`
+    seconds) when all are in use; wait counts and time are exported as metrics.
+    """
+
+    def __init__(self, db_path: str, size: int = 8, read_only: bool = True, timeout: float = 30.0,
+                 name: str = 'dashboard', registry: MetricsRegistry = REGISTRY):
+        self.db_path = db_path
+        self.size = size
+        self.read_only = read_only
+        self.timeout = timeout
+        self.name = name
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+        self.query_seconds = registry.histogram('govmon_sqlite_query_duration_seconds',
+                                                'SQLite statement time by calling function',
+                                                ['pool', 'query'], buckets=QUERY_BUCKETS)
+        self.waits = registry.counter('govmon_db_pool_waits_total',
+                                      'Checkouts that had to wait for a free connection', ['pool'])
+        self.wait_seconds = registry.counter('govmon_db_pool_wait_seconds_total',
+                                             'Time spent waiting for a free connection', ['pool'])
+        registry.register_collector(self._collect)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # SQLite connections must not cross a fork: forked server workers start with an empty pool
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> TimedConnection:
+        if self.read_only:
+            uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, factory=TimedConnection)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=TimedConnection)
+        conn._pool = self
+        return conn
+
+    def _try_checkout(self) -> Optional[TimedConnection]:
+        """An idle connection, a newly opened one if below size, or None"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            return self._open()
+        except sqlite3.Error:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def connect(self) -> TimedConnection:
+        """Check out a connection; call conn.close() to return it"""
+        conn = self._try_checkout()
+        if conn is None:
+            start = time.perf_counter()
+            self.waits.inc(pool=self.name)
+            try:
+                # Poll so a slot freed by a discarded connection is noticed too
+                while conn is None:
+                    if time.perf_counter() - start > self.timeout:
+                        raise sqlite3.OperationalError(f"Timed out waiting for a {self.name} pool connection")
+                    try:
+                        conn = self._idle.get(timeout=0.05)
+                    except queue.Empty:
+                        conn = self._try_checkout()
+            finally:
+                self.wait_seconds.inc(time.perf_counter() - start, pool=self.name)
+        conn._checked_out = True
+        with self._lock:
+            self._in_use += 1
+        return conn
+
+    def _release(self, conn: TimedConnection):
+        if not conn._checked_out:
+            return  # closed twice
+        conn._checked_out = False
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(conn)
+
+    def _discard(self):
+        with self._lock:
+            self._in_use -= 1
+            self._created -= 1
+
+    def close(self):
+        """Close idle connections, e.g. before forking or after the database file was replaced"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn._really_close()
+            with self._lock:
+                self._created -= 1
+
+    def _collect(self):
+        with self._lock:
+            in_use, created = self._in_use, self._created
+        labels = {'pool': self.name}
+        return [
+            ('govmon_db_pool_size', 'gauge', 'Maximum connections in the pool', [(labels, self.size)]),
+            ('govmon_db_pool_open', 'gauge', 'Connections currently open', [(labels, created)]),
+            ('govmon_db_pool_in_use', 'gauge', 'Connections currently checked out', [(labels, in_use)])
+        ]
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Recipient Entity Resolution
+Groups recipient name variants ("The Boeing Company", "BOEING CO.", "Boeing Co dba
+Boeing Defense") under one canonical entity. Names are reduced to a match key
+(case, punctuation, a leading THE, DBA names and legal-form words dropped), and a
+new recipient joins an existing entity with the same key or, for spelling
+variants, one found through MinHash LSH band keys and confirmed by trigram
+similarity. Each new name costs a few indexed lookups instead of a comparison with
+every known recipient. The alias table (recipient_id -> entity_id) is extended as
+contracts are saved, so dedup and per-company totals group on entity_id.
+"""
+
+import re
+import sqlite3
+import struct
+import hashlib
+import logging
+import unicodedata
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MINHASH_PERMUTATIONS = 32
+LSH_BANDS = 8                 # 8 bands of 4 rows: pairs at 0.8 trigram similarity collide ~98% of the time
+MATCH_SIMILARITY = 0.8        # trigram Jaccard a band collision must reach to count as the same entity
+
+# Everything after a trade-name marker is the trade name; the legal name before it is matched
+_DBA = re.compile(r'\s(?:D\s?/?\s?B\s?/?\s?A|DOING BUSINESS AS|T\s?/\s?A|TRADING AS|A\s?/?\s?K\s?/?\s?A|FKA|F\s?/\s?K\s?/\s?A)\s.*$')
+_INITIALS = re.compile(r'\b(?:[A-Z]\.){2,}')
+_NON_WORD = re.compile(r'[^A-Z0-9 ]+')
+_SPACE = re.compile(r'\s+')
+
+WORD_FORMS = {
+    'CORPORATION': 'CORP', 'INCORPORATED': 'INC', 'COMPANY': 'CO', 'LIMITED': 'LTD',
+    'INTERNATIONAL': 'INTL', 'ASSOCIATES': 'ASSOC', 'MANAGEMENT': 'MGMT'
+}
+LEGAL_FORMS = {'INC', 'CORP', 'CO', 'LLC', 'LC', 'LTD', 'LP', 'LLP', 'LLLP', 'PLC', 'PC', 'PLLC',
+               'GMBH', 'AG', 'SA', 'NV', 'BV', 'SRL', 'SPA', 'PTY'}
+
+def match_key(name: Optional[str]) -> str:
+    """
+    The part of a recipient name that identifies the entity: 'The Acme Corporation, Inc.'
+    and 'ACME CORP' both give 'ACME'. A name made only of legal-form words keeps them.
+    """
+    if not name:
+        return ''
+    text = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode().upper()
+    text = _DBA.sub('', f' {text} '.replace(',', ' ')).strip()
+    text = _INITIALS.sub(lambda m: m.group(0).replace('.', ''), text)    # L.L.C. -> LLC, U.S. -> US
+    text = text.replace('&', ' AND ').replace("'", '')
+    tokens = [WORD_FORMS.get(token, token) for token in _NON_WORD.sub(' ', text).split()]
+    # 'The Boeing Company' and 'BOEING COMPANY, THE'
+    if len(tokens) > 1 and tokens[0] == 'THE':
+        tokens = tokens[1:]
+    elif len(tokens) > 1 and tokens[-1] == 'THE':
+        tokens.pop()
+    # 'Booz, Allen & Hamilton' and 'Booz Allen Hamilton'
+    tokens = [token for token in tokens if token != 'AND'] or tokens
+    while len(tokens) > 1 and tokens[-1] in LEGAL_FORMS:
+        tokens.pop()
+    return _SPACE.sub(' ', ' '.join(tokens)).strip()
+
+def trigrams(key: str) -> FrozenSet[str]:
+    padded = f'  {key} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def similarity(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+def _numbers(key: str) -> Tuple[str, ...]:
+    return tuple(token for token in key.split() if token.isdigit())
+
+def band_keys(key: str) -> List[int]:
+    """LSH band keys of the key's trigram MinHash signature; similar keys share at least one"""
+    # One SHAKE digest per trigram supplies all the independent hash functions at once
+    hashes = (struct.unpack(f'<{MINHASH_PERMUTATIONS}Q', hashlib.shake_128(gram.encode()).digest(8 * MINHASH_PERMUTATIONS))
+              for gram in trigrams(key))
+    signature = list(map(min, zip(*hashes)))
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    keys = []
+    for band in range(LSH_BANDS):
+        packed = struct.pack(f'<B{rows}Q', band, *signature[band * rows:(band + 1) * rows])
+        keys.append(int.from_bytes(hashlib.blake2b(packed, digest_size=8).digest(), 'big', signed=True))
+    return keys
+
+class EntityResolver:
+    """
+    entities (canonical name and match key), entity_aliases (recipient_id -> entity_id) and
+    entity_blocks (LSH band key -> entity_id). Writers resolve new recipients on their own
+    connection and transaction, like SketchStore; existing assignments never move, so entity
+    ids stay stable between runs. rebuild() starts over from the current recipients.
+    """
+
+    def __init__(self, db_path: str = "government_monitor.db"):
+        self.db_path = db_path
+        self._by_name: Optional[Dict[str, int]] = None
+        self._by_key: Dict[str, int] = {}
+
+    @staticmethod
+    def init_tables(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS entities (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                match_key TEXT NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS entity_aliases (
+                recipient_id INTEGER PRIMARY KEY,
+                entity_id INTEGER NOT NULL,
+                match_key TEXT NOT NULL,
+                method TEXT NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_entity_aliases_key ON entity_aliases (match_key)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_entity_aliases_entity ON entity_aliases (entity_id)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS entity_blocks (
+                block INTEGER NOT NULL,
+                entity_id INTEGER NOT NULL,
+                PRIMARY KEY (block, entity_id)
+            ) WITHOUT ROWID
+        ''')
+
+    def ensure_built(self, conn) -> int:
+        """Tables, plus entities for every recipient not resolved yet (all of them on first use)"""
+        self.init_tables(conn)
+        return self.update(conn)
+
+    def rebuild(self, conn) -> int:
+        """Forget every assignment and resolve all recipients again, oldest first"""
+        self.init_tables(conn)
+        for table in ('entity_blocks', 'entity_aliases', 'entities'):
+            conn.execute(f'DELETE FROM {table}')
+        self._by_name = None
+        return self.update(conn)
+
+    def update(self, conn) -> int:
+        """Resolve recipients that have no alias row yet; returns how many were resolved"""
+        pending = conn.execute('''
+            SELECT r.id, r.name FROM recipients r
+            LEFT JOIN entity_aliases a ON a.recipient_id = r.id
+            WHERE a.recipient_id IS NULL
+            ORDER BY r.id
+        ''').fetchall()
+        if not pending:
+            return 0
+        aliases = []
+        for recipient_id, name in pending:
+            key = match_key(name)
+            entity_id, method = self._same_key(conn, key), 'key'
+            if entity_id is None:
+                blocks = band_keys(key)
+                entity_id, method = self._similar(conn, key, blocks), 'lsh'
+            if entity_id is None:
+                entity_id = conn.execute('INSERT INTO entities (name, match_key) VALUES (?, ?)',
+                                         (name, key)).lastrowid
+                method = 'new'
+                conn.executemany('INSERT OR IGNORE INTO entity_blocks (block, entity_id) VALUES (?, ?)',
+                                 [(block, entity_id) for block in blocks])
+            # Written as we go so later names in the same batch can match this one
+            conn.execute('INSERT INTO entity_aliases (recipient_id, entity_id, match_key, method) VALUES (?, ?, ?, ?)',
+                         (recipient_id, entity_id, key, method))
+            aliases.append((name, key, entity_id, method))
+        if self._by_name is not None:
+            for name, key, entity_id, _ in aliases:
+                self._by_name[name] = entity_id
+                self._by_key.setdefault(key, entity_id)
+        merged = sum(1 for *_, method in aliases if method != 'new')
+        logger.info(f"Resolved {len(pending)} new recipients, {merged} as aliases of an existing entity")
+        return len(pending)
+
+    @staticmethod
+    def _same_key(conn, key: str) -> Optional[int]:
+        row = conn.execute('SELECT entity_id FROM entity_aliases WHERE match_key = ? LIMIT 1', (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _similar(conn, key: str, blocks: List[int]) -> Optional[int]:
+        """The most similar entity sharing an LSH band with the key, if similar enough"""
+        candidates = conn.execute(f'''
+            SELECT e.id, e.match_key FROM entities e
+            WHERE e.id IN (SELECT entity_id FROM entity_blocks WHERE block IN ({','.join('?' * len(blocks))}))
+            ORDER BY e.id
+        ''', blocks).fetchall()
+        grams = trigrams(key)
+        best, best_score = None, 0.0
+        for entity_id, other in candidates:
+            # 'ACME 2' and 'ACME 3' are near-identical strings but different entities
+            if _numbers(other) != _numbers(key):
+                continue
+            score = similarity(grams, trigrams(other))
+            if score >= MATCH_SIMILARITY and score > best_score:
+                best, best_score = entity_id, score
+        return best
+
+    def _load(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        by_name, by_key = {}, {}
+        try:
+            for name, key, entity_id in conn.execute('''
+                SELECT r.name, a.match_key, a.entity_id FROM entity_aliases a
+                JOIN recipients r ON r.id = a.recipient_id
+                ORDER BY a.recipient_id
+            '''):
+                by_name[name] = entity_id
+                by_key.setdefault(key, entity_id)
+        except sqlite3.OperationalError:
+            pass  # not built yet: every name falls back to its match key
+        finally:
+            conn.close()
+        self._by_key = by_key
+        self._by_name = by_name
+
+    def signature_key(self, name: Optional[str]) -> str:
+        """
+        Dedup key for a recipient name: its entity when the name (or its match key) is known,
+        else the match key, so variants of a not-yet-saved name still collapse together
+        """
+        if self._by_name is None:
+            self._load()
+        entity_id = self._by_name.get(name)
+        if entity_id is None:
+            key = match_key(name)
+            entity_id = self._by_key.get(key)
+            if entity_id is None:
+                return f'~{key}'
+        return f'e{entity_id}'
+
+    @staticmethod
+    def aliases(conn, entity_id: int) -> List[Dict]:
+        """Every recipient name under an entity, with how it was matched and its contract count"""
+        return [{'recipient_id': recipient_id, 'name': name, 'method': method, 'contract_count': count}
+                for recipient_id, name, method, count in conn.execute('''
+                    SELECT a.recipient_id, r.name, a.method,
+                           (SELECT COUNT(*) FROM contract_facts f WHERE f.recipient_id = a.recipient_id)
+                    FROM entity_aliases a
+                    JOIN recipients r ON r.id = a.recipient_id
+                    WHERE a.entity_id = ?
+                    ORDER BY a.recipient_id
+                ''', (entity_id,))]
+
+    @staticmethod
+    def find(conn, name: str) -> Optional[int]:
+        """Entity of a recipient name, by exact name and then by match key"""
+        row = conn.execute('''
+            SELECT a.entity_id FROM recipients r JOIN entity_aliases a ON a.recipient_id = r.id WHERE r.name = ?
+        ''', (name,)).fetchone() or conn.execute('SELECT entity_id FROM entity_aliases WHERE match_key = ? LIMIT 1',
+                                                 (match_key(name),)).fetchone()
+        return row[0] if row else None
+
+def ensure_entities(db_path: str) -> int:
+    """Entity tables and assignments for a reader (e.g. a dashboard) that may open the database before any writer"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        resolved = EntityResolver(db_path).ensure_built(conn)
+        conn.commit()
+        return resolved
+    finally:
+        conn.close()
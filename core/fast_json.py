@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Fast JSON Serialization
+Turns SQLite cursor tuples straight into JSON-ready records and JSON
+responses, skipping the DataFrame round trip. Output matches
+pd.read_sql_query(...).to_dict('records') followed by flask.jsonify:
+sorted keys, ASCII escapes, compact separators, and NULLs in numeric
+columns rendered as NaN
+"""
+
+import sys
+import json
+import math
+import uuid
+import decimal
+import operator
+import dataclasses
+import functools
+from datetime import date
+from typing import Any, Dict, List, Sequence
+
+_NUMERIC = {int, float}
+_FLOAT, _STRING = 'float', 'string'
+
+@functools.lru_cache(maxsize=None)
+def _string_nulls_as_nan() -> bool:
+    """pandas 3 infers a string dtype whose missing value is NaN; pandas 2 keeps None"""
+    pd = sys.modules.get('pandas')
+    if pd is not None:
+        try:
+            return bool(pd.get_option('future.infer_string'))
+        except Exception:
+            return False
+    # Avoid importing pandas just to answer this
+    try:
+        from importlib.metadata import version
+        return int(version('pandas').split('.')[0]) >= 3
+    except Exception:
+        return False
+
+def _column_kind(values: Sequence[Any]) -> str:
+    """
+    The NULL handling read_sql_query would apply to one column: float64 columns (only numbers,
+    with at least one float or NULL) get ints widened and NULL -> NaN; all-string columns
+    get NULL -> NaN under pandas' string dtype. Anything else is left as-is.
+    """
+    types = set(map(type, values))
+    has_none = type(None) in types
+    types.discard(type(None))
+    if types and types <= _NUMERIC and (float in types or has_none):
+        return _FLOAT
+    if has_none and types == {str} and _string_nulls_as_nan():
+        return _STRING
+    return None
+
+def records_from_rows(names: Sequence[str], rows: List[tuple]) -> List[Dict[str, Any]]:
+    """Dicts with keys in sorted order and pandas-compatible value types"""
+    if not rows:
+        return []
+
+    # Work column-wise: type inference and NULL conversion are per column, as in pandas
+    columns = list(zip(*rows))
+    nan = math.nan
+    for i, values in enumerate(columns):
+        kind = _column_kind(values)
+        if kind == _FLOAT:
+            columns[i] = [nan if v is None else float(v) for v in values]
+        elif kind == _STRING:
+            columns[i] = [nan if v is None else v for v in values]
+
+    # Pre-sorting keys keeps sort_keys=True cheap when the payload is encoded
+    order = sorted(range(len(names)), key=lambda i: names[i])
+    sorted_names = [names[i] for i in order]
+    return [dict(zip(sorted_names, values)) for values in zip(*[columns[i] for i in order])]
+
+def records_from_cursor(cursor) -> List[Dict[str, Any]]:
+    names = [column[0] for column in cursor.description]
+    return records_from_rows(names, cursor.fetchall())
+
+def query_records(conn, query: str, params: Sequence = ()) -> List[Dict[str, Any]]:
+    """Drop-in for pd.read_sql_query(query, conn, params=params).to_dict('records')"""
+    return records_from_cursor(conn.execute(query, params))
+
+def _default(o):
+    # Same fallbacks as Flask's DefaultJSONProvider
+    if isinstance(o, date):
+        from werkzeug.http import http_date
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    if hasattr(o, 'item'):
+        # numpy scalars from any remaining DataFrame-based payloads
+        return o.item()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def dumps(obj: Any, indent: int = None) -> str:
+    if indent is not None:
+        return json.dumps(obj, default=_default, ensure_ascii=True, sort_keys=True, indent=indent)
+    return json.dumps(obj, default=_default, ensure_ascii=True, sort_keys=True, separators=(',', ':'))
+
+def json_response(obj: Any, status: int = 200):
+    """flask.jsonify equivalent for already JSON-ready payloads"""
+    from flask import current_app
+
+    indent = 2 if current_app.debug else None
+    return current_app.response_class(f"{dumps(obj, indent)}\n", status=status, mimetype='application/json')
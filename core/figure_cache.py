@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Dashboard Figure Cache
+Builds Plotly figure JSON (data + layout) once per data version and reuses it
+across requests, processes and restarts instead of re-querying and
+re-serializing chart data on every page load
+"""
+
+import sqlite3
+import json
+import threading
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def data_version(db_path: str) -> str:
+    """
+    Cheap token that changes whenever contracts are written or the day rolls over.
+    INSERT OR REPLACE assigns a new rowid, so MAX(rowid) of contract_facts (the table behind the
+    contracts view) moves on updates as well as inserts; the date covers charts whose windows are
+    relative to date('now').
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        max_rowid, today = conn.execute("SELECT MAX(rowid), date('now') FROM contract_facts").fetchone()
+    except sqlite3.OperationalError:
+        max_rowid, today = None, None
+    finally:
+        conn.close()
+    return f"{max_rowid or 0}:{today}"
+
+class FigureCache:
+    """
+    Per-process memory cache backed by a shared figure_cache table. When the database
+    can't be written (a read-only file or mount) the cache stays memory-only.
+    """
+
+    def __init__(self, db_path: str = "government_monitor.db"):
+        self.db_path = db_path
+        self._memory: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = True
+        self.init_table()
+
+    def init_table(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS figure_cache (
+                    name TEXT PRIMARY KEY,
+                    data_version TEXT,
+                    figure_json TEXT,
+                    built_date TEXT
+                )
+            ''')
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            self.shared = False
+            logger.warning(f"Figure cache is memory-only: can't create figure_cache in {self.db_path} ({e})")
+        finally:
+            conn.close()
+
+    def _load(self, name: str) -> Optional[Tuple[str, str]]:
+        if not self.shared:
+            return None
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute('SELECT data_version, figure_json FROM figure_cache WHERE name = ?',
+                                (name,)).fetchone()
+        except sqlite3.OperationalError:
+            return None  # locked; rebuilding is only slower
+        finally:
+            conn.close()
+
+    def _store(self, name: str, version: str, figure_json: str):
+        if not self.shared:
+            return
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('''
+                INSERT OR REPLACE INTO figure_cache (name, data_version, figure_json, built_date)
+                VALUES (?, ?, ?, ?)
+            ''', (name, version, figure_json, datetime.now().isoformat()))
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            logger.debug(f"Figure {name} not shared: {e}")
+        finally:
+            conn.close()
+
+    def get(self, name: str, builder: Callable[[], Dict], version: Optional[str] = None) -> str:
+        """Figure JSON for name at the current data version, building it with builder() on a miss"""
+        version = version or data_version(self.db_path)
+
+        with self._lock:
+            cached = self._memory.get(name)
+            if cached and cached[0] == version:
+                self.hits += 1
+                return cached[1]
+
+        row = self._load(name)
+        if row and row[0] == version:
+            figure_json = row[1]
+            with self._lock:
+                self.hits += 1
+                self._memory[name] = (version, figure_json)
+            return figure_json
+
+        # NaN is kept as a bare literal: the JSON is embedded in <script>, where NaN is valid
+        figure_json = json.dumps(builder(), default=str)
+        self._store(name, version, figure_json)
+
+        with self._lock:
+            self.misses += 1
+            self._memory[name] = (version, figure_json)
+        logger.info(f"Built figure {name} for data version {version}")
+        return figure_json
+
+    def invalidate(self):
+        with self._lock:
+            self._memory.clear()
+        if not self.shared:
+            return
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('DELETE FROM figure_cache')
+            conn.commit()
+        finally:
+            conn.close()
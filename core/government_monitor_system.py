@@ -6,21 +6,35 @@ Personal use system for tracking federal contracting patterns
 
 import requests
 import sqlite3
-import pandas as pd
 import json
 from datetime import datetime, timedelta
 import time
 import logging
 from dataclasses import dataclass
 from typing import List, Dict, Optional
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from notification_queue import NotificationQueue, NotificationWorker
+import streaming_detector
+from streaming_detector import StreamingAccumulationDetector
+from incremental_analysis import ChangeTracker, IncrementalAnalysis
+from sketches import SketchStore
+from baselines import BaselineStore, Baselines
+from entity_resolution import EntityResolver
+from run_metrics import RunMetrics
+import query_log
+import partitions
+import star_schema
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# No-bid awards above these percentiles of their agency/award-type baseline are alerted on (high above the second);
+# the dollar amounts apply while an agency has too few awards for a baseline
+LARGE_AWARD_PERCENTILE = 0.95
+HUGE_AWARD_PERCENTILE = 0.99
+NO_BID_MIN_AMOUNT = 10_000_000
+NO_BID_HIGH_AMOUNT = 50_000_000
+
 @dataclass
 class Contract:
     award_id: str
@@ -36,27 +50,20 @@ class DatabaseManager:
     def __init__(self, db_path: str = "government_monitor.db"):
         self.db_path = db_path
         self.init_database()
+        self.change_tracker = ChangeTracker(db_path)
+        self.sketches = SketchStore(db_path)
+        self.baselines = BaselineStore(db_path)
+        self.entities = EntityResolver(db_path)
+        self._build_summaries()
     
     def init_database(self):
         """Initialize SQLite database with required tables"""
+        # Contracts: recipients/agencies dimensions, contract_facts, and the contracts view over them.
+        # A database with the old flat contracts table raises until scripts/upgrade_database.py converts it.
         conn = sqlite3.connect(self.db_path)
+        star_schema.ensure_star_schema(conn)
         cursor = conn.cursor()
         
-        # Contracts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS contracts (
-                award_id TEXT PRIMARY KEY,
-                recipient_name TEXT,
-                award_amount REAL,
-                awarding_agency TEXT,
-                award_date TEXT,
-                award_type TEXT,
-                competition_type TEXT,
-                description TEXT,
-                collected_date TEXT
-            )
-        ''')
-        
         # Company tracking table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS company_tracking (
@@ -86,29 +93,77 @@ class DatabaseManager:
         conn.commit()
         conn.close()
     
-    def save_contracts(self, contracts: List[Contract]):
-        """Save contracts to database"""
+    def _build_summaries(self):
+        """
+        Build the summary sketches and amount baselines once for a database that predates them
+        (archives included), and resolve any recipients not yet assigned to an entity
+        """
+        conn = query_log.connect(self.db_path, timeout=30)
+        try:
+            self.sketches.ensure_built(conn)
+            self.baselines.ensure_built(conn)
+            self.entities.ensure_built(conn)
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def rebuild_summaries(self):
+        """
+        Recompute the summary sketches and amount baselines from every contract (archives included),
+        resolve recipients added since the last update (existing entity assignments are kept) and
+        log recent awards for the streaming accumulation windows
+        """
+        conn = query_log.connect(self.db_path, timeout=30)
+        try:
+            self.sketches.rebuild(conn)
+            self.baselines.rebuild(conn)
+            self.entities.update(conn)
+            streaming_detector.record_events(conn)
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def save_contracts(self, contracts: List[Contract], update_summaries: bool = True):
+        """
+        Save contracts to database. Bulk loads pass update_summaries=False and call
+        rebuild_summaries() once at the end, which is much cheaper than per-batch upkeep.
+        """
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         
-        for contract in contracts:
-            cursor.execute('''
-                INSERT OR REPLACE INTO contracts 
-                (award_id, recipient_name, award_amount, awarding_agency, 
-                 award_date, award_type, competition_type, description, collected_date)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                contract.award_id, contract.recipient_name, contract.award_amount,
-                contract.awarding_agency, contract.award_date, contract.award_type,
-                contract.competition_type, contract.description, datetime.now().isoformat()
-            ))
+        # Sealed fiscal years are read-only; re-saving an archived award would add a second row in the hot table
+        archived = partitions.archived_award_ids(conn, contracts)
+        if archived:
+            logger.warning(f"Skipping {len(archived)} contracts already sealed in fiscal-year archives")
+            contracts = [contract for contract in contracts if contract.award_id not in archived]
+        
+        # Log what this write touches so analyzers can re-score only the dirty set
+        existing = self.change_tracker.record(conn, contracts)
+        
+        # Names resolve to surrogate keys once per batch rather than per row
+        collected = datetime.now().isoformat()
+        star_schema.insert_contracts(conn, [(
+            contract.award_id, contract.recipient_name, contract.award_amount,
+            contract.awarding_agency, contract.award_date, contract.award_type,
+            contract.competition_type, contract.description, collected,
+            getattr(contract, 'data_source', None)  # set by the ingest pipeline's normalize stage
+        ) for contract in contracts])
+        
+        # Distinct-recipient sketches, amount baselines, recipient entities and the streaming
+        # accumulation event log stay current in the same transaction
+        if update_summaries:
+            award_ids = [contract.award_id for contract in contracts]
+            new_ids = [award_id for award_id in award_ids if award_id not in existing]
+            self.sketches.observe(conn, award_ids, new_ids)
+            self.baselines.observe(conn, new_ids)
+            self.entities.update(conn)
+            streaming_detector.record_events(conn, award_ids)
         
         conn.commit()
         conn.close()
     
     def get_company_summary(self, company_name: str) -> Dict:
         """Get summary statistics for a specific company"""
-        conn = sqlite3.connect(self.db_path)
+        conn = query_log.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -119,7 +174,7 @@ class DatabaseManager:
                 MAX(award_date) as last_contract,
                 COUNT(CASE WHEN competition_type LIKE '%no%bid%' THEN 1 END) as no_bid_count
             FROM contracts 
-            WHERE recipient_name LIKE ?
+            WHERE recipient_id IN (SELECT id FROM recipients WHERE name LIKE ?)
         ''', (f'%{company_name}%',))
         
         result = cursor.fetchone()
@@ -200,19 +255,28 @@ class PatternAnalyzer:
     
     def detect_rapid_accumulation(self, days: int = 30, min_contracts: int = 3) -> List[Dict]:
         """Detect companies getting multiple contracts quickly"""
-        conn = sqlite3.connect(self.db.db_path)
+        import pandas as pd
         
+        conn = query_log.connect(self.db.db_path)
+        
+        # Grouped on the resolved entity, so name variants count as one company; names are joined onto the result rows only
         query = '''
-            SELECT recipient_name, 
-                   COUNT(*) as contract_count,
-                   SUM(award_amount) as total_amount,
-                   MIN(award_date) as first_date,
-                   MAX(award_date) as last_date
-            FROM contracts 
-            WHERE award_date >= date('now', '-{} days')
-            GROUP BY recipient_name
-            HAVING COUNT(*) >= {}
-            ORDER BY contract_count DESC, total_amount DESC
+            SELECT e.name as recipient_name,
+                   g.contract_count, g.total_amount, g.first_date, g.last_date
+            FROM (
+                SELECT a.entity_id,
+                       COUNT(*) as contract_count,
+                       SUM(f.award_amount) as total_amount,
+                       MIN(f.award_date) as first_date,
+                       MAX(f.award_date) as last_date
+                FROM contract_facts f
+                JOIN entity_aliases a ON a.recipient_id = f.recipient_id
+                WHERE f.award_date >= date('now', '-{} days')
+                GROUP BY a.entity_id
+                HAVING COUNT(*) >= {}
+            ) g
+            LEFT JOIN entities e ON e.id = g.entity_id
+            ORDER BY g.contract_count DESC, g.total_amount DESC
         '''.format(days, min_contracts)
         
         df = pd.read_sql_query(query, conn)
@@ -231,12 +295,16 @@ class PatternAnalyzer:
         
         return alerts
     
-    def detect_no_bid_patterns(self, min_amount: float = 10_000_000) -> List[Dict]:
-        """Detect large no-bid contracts"""
-        conn = sqlite3.connect(self.db.db_path)
+    def detect_no_bid_patterns(self, min_amount: Optional[float] = None, incremental: bool = False) -> List[Dict]:
+        """
+        Detect no-bid contracts that are large for their agency and award type: above the 95th
+        percentile of its baseline ('high' above the 99th). A fixed min_amount restores the old
+        absolute cutoff. incremental=True re-checks only changed contracts and returns new alerts.
+        """
+        import pandas as pd
         
         query = '''
-            SELECT recipient_name, award_amount, awarding_agency, 
+            SELECT award_id, recipient_name, award_amount, awarding_agency, award_type,
                    award_date, competition_type, description
             FROM contracts 
             WHERE (competition_type LIKE '%sole%source%' 
@@ -244,29 +312,66 @@ class PatternAnalyzer:
                    OR competition_type LIKE '%not%competed%')
               AND award_amount >= ?
               AND award_date >= date('now', '-30 days')
+              {scope}
             ORDER BY award_amount DESC
         '''
         
-        df = pd.read_sql_query(query, conn, params=[min_amount])
+        def compute(conn, scope_sql):
+            baselines = BaselineStore(self.db.db_path).load(conn) if min_amount is None else Baselines({})
+            floor = min_amount if min_amount is not None else baselines.floor(LARGE_AWARD_PERCENTILE, NO_BID_MIN_AMOUNT)
+            df = pd.read_sql_query(query.format(scope=scope_sql), conn, params=[floor])
+            results = []
+            for _, row in df.iterrows():
+                amount = float(row['award_amount'])
+                if min_amount is not None:
+                    high = amount >= NO_BID_HIGH_AMOUNT
+                else:
+                    agency, award_type = row['awarding_agency'], row['award_type']
+                    if not baselines.is_large(agency, award_type, amount, LARGE_AWARD_PERCENTILE, NO_BID_MIN_AMOUNT):
+                        continue
+                    high = baselines.is_large(agency, award_type, amount, HUGE_AWARD_PERCENTILE, NO_BID_HIGH_AMOUNT)
+                alert = {
+                    'type': 'large_no_bid',
+                    'company': row['recipient_name'],
+                    'amount': amount,
+                    'agency': row['awarding_agency'],
+                    'date': row['award_date'],
+                    'competition_type': row['competition_type'],
+                    'severity': 'high' if high else 'medium'
+                }
+                rank = baselines.percentile_rank(row['awarding_agency'], row['award_type'], amount)
+                if rank is not None:
+                    alert['agency_percentile'] = round(rank * 100, 1)
+                results.append((row['award_id'], row['award_date'], amount, alert))
+            return results
+        
+        if incremental:
+            if min_amount is not None:
+                fingerprint = str(min_amount)
+            else:
+                # Alerts already stored were scored against the thresholds of their day, so a full
+                # pass is forced once the baselines have moved past the tolerance
+                conn = query_log.connect(self.db.db_path)
+                quantiles = [LARGE_AWARD_PERCENTILE, HUGE_AWARD_PERCENTILE]
+                version = BaselineStore(self.db.db_path).load(conn).version(quantiles)
+                conn.close()
+                fingerprint = f'baseline:{LARGE_AWARD_PERCENTILE}:{HUGE_AWARD_PERCENTILE}:{version}'
+            analysis = IncrementalAnalysis(self.db.db_path, 'large_no_bid', '-30 days', 'award_id',
+                                           fingerprint=fingerprint)
+            _, new_alerts = analysis.run(compute)
+            return new_alerts
+        
+        conn = query_log.connect(self.db.db_path)
+        alerts = [result[3] for result in compute(conn, '')]
         conn.close()
         
-        alerts = []
-        for _, row in df.iterrows():
-            alerts.append({
-                'type': 'large_no_bid',
-                'company': row['recipient_name'],
-                'amount': row['award_amount'],
-                'agency': row['awarding_agency'],
-                'date': row['award_date'],
-                'competition_type': row['competition_type'],
-                'severity': 'high' if row['award_amount'] >= 50_000_000 else 'medium'
-            })
-        
         return alerts
     
     def analyze_trends(self) -> Dict:
         """Analyze overall trends in contracting"""
-        conn = sqlite3.connect(self.db.db_path)
+        import pandas as pd
+        
+        conn = query_log.connect(self.db.db_path)
         
         # Total spending trends
         monthly_spending = pd.read_sql_query('''
@@ -281,14 +386,20 @@ class PatternAnalyzer:
         
         # Top contractors by amount
         top_contractors = pd.read_sql_query('''
-            SELECT recipient_name,
-                   COUNT(*) as contract_count,
-                   SUM(award_amount) as total_amount
-            FROM contracts 
-            WHERE award_date >= date('now', '-90 days')
-            GROUP BY recipient_name
-            ORDER BY total_amount DESC
-            LIMIT 20
+            SELECT e.name as recipient_name, g.contract_count, g.total_amount
+            FROM (
+                SELECT a.entity_id,
+                       COUNT(*) as contract_count,
+                       SUM(f.award_amount) as total_amount
+                FROM contract_facts f
+                JOIN entity_aliases a ON a.recipient_id = f.recipient_id
+                WHERE f.award_date >= date('now', '-90 days')
+                GROUP BY a.entity_id
+                ORDER BY total_amount DESC
+                LIMIT 20
+            ) g
+            LEFT JOIN entities e ON e.id = g.entity_id
+            ORDER BY g.total_amount DESC
         ''', conn)
         
         # No-bid ratio trends
@@ -316,6 +427,8 @@ class AlertManager:
     def __init__(self, db_manager: DatabaseManager, email_config: Optional[Dict] = None):
         self.db = db_manager
         self.email_config = email_config
+        self.notification_queue = NotificationQueue(db_manager.db_path) if email_config else None
+        self._notification_worker = None
     
     def process_alerts(self, alerts: List[Dict]):
         """Process and store alerts"""
@@ -351,82 +464,107 @@ class AlertManager:
             return f"{alert['company']} received {alert['contract_count']} contracts worth ${alert['total_amount']:,.0f} in {alert['time_span_days']} days"
         elif alert['type'] == 'large_no_bid':
             return f"{alert['company']} received ${alert['amount']:,.0f} no-bid contract from {alert['agency']}"
+        elif alert['type'] == 'connected_accumulation':
+            return f"{alert['company']} (risk {alert['risk_score']}) received {alert['contract_count']} contracts worth ${alert['amount']:,.0f} in {alert['time_span_days']} days"
         else:
             return f"Unknown alert type: {alert}"
     
     def _send_email_alerts(self, alerts: List[Dict]):
-        """Send email notifications for alerts"""
+        """Queue email notifications for alerts; delivery happens on the background worker"""
         if not self.email_config:
             return
         
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.email_config['from_email']
-            msg['To'] = self.email_config['to_email']
-            msg['Subject'] = f"Government Contract Alerts - {len(alerts)} new alerts"
-            
-            body = "New government contracting alerts:\n\n"
-            for alert in alerts:
-                body += f"• {self._format_alert_message(alert)}\n"
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            server = smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port'])
-            server.starttls()
-            server.login(self.email_config['username'], self.email_config['password'])
-            server.send_message(msg)
-            server.quit()
-            
-            logger.info(f"Sent email alert with {len(alerts)} alerts")
+            self.notification_queue.enqueue(
+                self.email_config['to_email'],
+                [self._format_alert_message(alert) for alert in alerts],
+                alerts
+            )
+            self._ensure_notification_worker().wake()
+            logger.info(f"Queued {len(alerts)} alerts for email delivery")
             
         except Exception as e:
-            logger.error(f"Failed to send email alerts: {e}")
+            logger.error(f"Failed to queue email alerts: {e}")
+    
+    def _ensure_notification_worker(self) -> NotificationWorker:
+        """Start the delivery worker on first use"""
+        if self._notification_worker is None or not self._notification_worker.is_alive():
+            self._notification_worker = NotificationWorker(self.notification_queue, self.email_config)
+            self._notification_worker.start()
+        return self._notification_worker
+    
+    def close(self, flush: bool = True, timeout: Optional[float] = 30.0):
+        """Stop the delivery worker, sending any pending digests first when flush is set"""
+        if self._notification_worker is not None:
+            self._notification_worker.stop(flush=flush, timeout=timeout)
+            self._notification_worker = None
 
 class GovernmentMonitor:
-    def __init__(self, email_config: Optional[Dict] = None):
-        self.db = DatabaseManager()
+    def __init__(self, email_config: Optional[Dict] = None, db_path: str = "government_monitor.db"):
+        self.db = DatabaseManager(db_path)
         self.collector = USASpendingCollector()
         self.analyzer = PatternAnalyzer(self.db)
         self.alert_manager = AlertManager(self.db, email_config)
+        # Rapid accumulation is evaluated incrementally as contracts are written
+        self.streaming_detector = StreamingAccumulationDetector(self.db.db_path)
     
-    def run_daily_collection(self):
+    def run_daily_collection(self, trace_path: Optional[str] = None):
         """Main daily collection and analysis routine"""
         logger.info("Starting daily government contract collection...")
+        metrics = RunMetrics('daily_collection', self.db.db_path)
+        metrics.instrument_session(self.collector.session, 'usaspending')
         
-        # Collect new contracts
-        contracts = self.collector.collect_recent_contracts(days_back=1)
-        if contracts:
-            self.db.save_contracts(contracts)
-        
-        # Run pattern analysis
-        rapid_alerts = self.analyzer.detect_rapid_accumulation()
-        no_bid_alerts = self.analyzer.detect_no_bid_patterns()
-        
-        # Process alerts
-        all_alerts = rapid_alerts + no_bid_alerts
-        self.alert_manager.process_alerts(all_alerts)
-        
-        # Generate summary
-        trends = self.analyzer.analyze_trends()
+        try:
+            # Collect new contracts
+            with metrics.measure('fetch', 'usaspending'):
+                contracts = self.collector.collect_recent_contracts(days_back=1)
+            metrics.add('fetch', 'usaspending', items=len(contracts))
+            rapid_alerts = []
+            if contracts:
+                with metrics.measure('write'):
+                    write_start = time.perf_counter()
+                    self.db.save_contracts(contracts)
+                    metrics.add('write', rows_written=len(contracts), db_seconds=time.perf_counter() - write_start)
+                with metrics.measure('streaming_detection'):
+                    rapid_alerts = self.streaming_detector.observe(contracts)
+            
+            # Run pattern analysis
+            with metrics.measure('analysis'):
+                no_bid_alerts = self.analyzer.detect_no_bid_patterns()
+            
+            # Process alerts
+            all_alerts = rapid_alerts + no_bid_alerts
+            with metrics.measure('alerts'):
+                self.alert_manager.process_alerts(all_alerts)
+            
+            # Generate summary
+            with metrics.measure('trends'):
+                trends = self.analyzer.analyze_trends()
+        finally:
+            run_metrics = metrics.finish(trace_path)
         logger.info(f"Collection complete. Found {len(all_alerts)} new alerts.")
         
         return {
             'contracts_collected': len(contracts),
             'alerts_generated': len(all_alerts),
-            'trends': trends
+            'trends': trends,
+            'run_id': metrics.run_id,
+            'run_metrics': run_metrics
         }
     
     def get_company_report(self, company_name: str) -> Dict:
         """Generate detailed report for specific company"""
+        import pandas as pd
+        
         summary = self.db.get_company_summary(company_name)
         
         # Get recent contracts
-        conn = sqlite3.connect(self.db.db_path)
+        conn = query_log.connect(self.db.db_path)
         recent_contracts = pd.read_sql_query('''
             SELECT award_id, award_amount, awarding_agency, 
                    award_date, competition_type, description
             FROM contracts 
-            WHERE recipient_name LIKE ?
+            WHERE recipient_id IN (SELECT id FROM recipients WHERE name LIKE ?)
               AND award_date >= date('now', '-90 days')
             ORDER BY award_date DESC
         ''', conn, params=[f'%{company_name}%'])
@@ -436,6 +574,10 @@ class GovernmentMonitor:
             'summary': summary,
             'recent_contracts': recent_contracts.to_dict('records')
         }
+    
+    def close(self):
+        """Release background resources such as the notification worker"""
+        self.alert_manager.close()
 
 def main():
     """Example usage"""
@@ -447,7 +589,8 @@ def main():
         'username': 'your-email@gmail.com',
         'password': 'your-app-password',
         'from_email': 'your-email@gmail.com',
-        'to_email': 'your-email@gmail.com'
+        'to_email': 'your-email@gmail.com',
+        'digest_window': 300  # Seconds to coalesce alerts into one email
     }
     
     # Initialize monitor (remove email_config if you don't want email alerts)
@@ -456,6 +599,7 @@ def main():
     # Run daily collection
     results = monitor.run_daily_collection()
     print(f"Results: {results}")
+    monitor.close()
     
     # Get report for specific company
     # company_report = monitor.get_company_report("Palantir")
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Incremental Re-Analysis
+Records which contracts, recipients and agencies each write touched, and lets
+analyzers recompute results for only that dirty set (plus anything that aged
+out of their window), merging into results persisted from earlier runs
+"""
+
+import sqlite3
+import json
+import uuid
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import query_log
+
+logger = logging.getLogger(__name__)
+
+# entity_id is the resolved recipient entity (entity_resolution.py); compute() queries must expose it
+# through an entity_aliases join
+KEY_COLUMNS = ('award_id', 'recipient_name', 'awarding_agency', 'entity_id')
+
+# Changes older than this are dropped even if some analyzer never consumed them (e.g. one that is
+# no longer run); an analyzer last evaluated before the cutoff does a full pass instead
+CHANGE_RETENTION_DAYS = 30
+
+@dataclass
+class ChangeSet:
+    award_ids: Set[str] = field(default_factory=set)
+    recipients: Set[str] = field(default_factory=set)
+    agencies: Set[str] = field(default_factory=set)
+    entities: Set[int] = field(default_factory=set)
+
+    def keys_for(self, key_column: str) -> Set:
+        return {
+            'award_id': self.award_ids,
+            'recipient_name': self.recipients,
+            'awarding_agency': self.agencies,
+            'entity_id': self.entities
+        }[key_column]
+
+    def __len__(self):
+        return len(self.award_ids)
+
+class ChangeTracker:
+    """
+    Append-only log of contract inserts/updates, consumed by incremental analyzers. Entries are
+    removed once every analyzer has consumed them, or after CHANGE_RETENTION_DAYS
+    """
+
+    def __init__(self, db_path: str = "government_monitor.db"):
+        self.db_path = db_path
+        self.run_id = uuid.uuid4().hex[:12]
+        conn = sqlite3.connect(self.db_path)
+        self.init_tables(conn)
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def init_tables(conn):
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS contract_changes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT,
+                award_id TEXT,
+                recipient_name TEXT,
+                awarding_agency TEXT,
+                change_type TEXT,
+                changed_date TEXT
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_contract_changes_date ON contract_changes (changed_date)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_results (
+                analyzer TEXT,
+                result_key TEXT,
+                award_date TEXT,
+                sort_value REAL,
+                payload TEXT,
+                updated_date TEXT,
+                PRIMARY KEY (analyzer, result_key)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_watermarks (
+                analyzer TEXT PRIMARY KEY,
+                last_change_id INTEGER,
+                window_start TEXT,
+                fingerprint TEXT,
+                evaluated_date TEXT
+            )
+        ''')
+
+    def record(self, conn, contracts: List[Any]):
+        """
+        Log changes for contracts about to be written on conn (call before the INSERT OR REPLACE).
+        Returns the award_ids that already existed.
+        """
+        if not contracts:
+            return set()
+
+        previous = {}
+        award_ids = [contract.award_id for contract in contracts]
+        for i in range(0, len(award_ids), 500):
+            chunk = award_ids[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for award_id, recipient, agency in conn.execute(f'''
+                SELECT award_id, recipient_name, awarding_agency FROM contracts WHERE award_id IN ({placeholders})
+            ''', chunk):
+                previous[award_id] = (recipient, agency)
+
+        now = datetime.now().isoformat()
+        rows = []
+        for contract in contracts:
+            old = previous.get(contract.award_id)
+            change_type = 'update' if old else 'insert'
+            rows.append((self.run_id, contract.award_id, contract.recipient_name,
+                         contract.awarding_agency, change_type, now))
+            # A re-attributed award also dirties the recipient/agency it moved away from
+            if old and (old[0] != contract.recipient_name or old[1] != contract.awarding_agency):
+                rows.append((self.run_id, contract.award_id, old[0], old[1], 'moved', now))
+
+        conn.executemany('''
+            INSERT INTO contract_changes
+            (run_id, award_id, recipient_name, awarding_agency, change_type, changed_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self.prune(conn)
+        return set(previous)
+
+    @staticmethod
+    def prune(conn) -> int:
+        """Delete changes every analyzer has consumed and any older than the retention cutoff"""
+        pruned = conn.execute('''
+            DELETE FROM contract_changes
+            WHERE id <= (SELECT MIN(last_change_id) FROM analysis_watermarks)
+        ''').rowcount
+        pruned += conn.execute('DELETE FROM contract_changes WHERE changed_date < ?',
+                               (retention_cutoff(),)).rowcount
+        return pruned
+
+def retention_cutoff() -> str:
+    return (datetime.now() - timedelta(days=CHANGE_RETENTION_DAYS)).isoformat()
+
+class IncrementalAnalysis:
+    """Keeps one analyzer's results current by recomputing only dirty keys"""
+
+    def __init__(self, db_path: str, name: str, window: str, key_column: str, fingerprint: str = ''):
+        if key_column not in KEY_COLUMNS:
+            raise ValueError(f"key_column must be one of {KEY_COLUMNS}")
+        self.db_path = db_path
+        self.name = name
+        self.window = window
+        self.key_column = key_column
+        self.fingerprint = fingerprint
+
+    def run(self, compute: Callable[[Any, str], List[Tuple[str, str, float, Dict]]],
+            full: bool = False) -> Tuple[List[Dict], List[Dict]]:
+        """
+        compute(conn, scope_sql) returns (key, award_date, sort_value, payload) rows;
+        scope_sql is '' for a full pass or an "AND <key> IN (...)" fragment to append to WHERE.
+        Returns (all current payloads, payloads that are new or changed in this run).
+        """
+        conn = query_log.connect(self.db_path, isolation_level=None)
+        try:
+            ChangeTracker.init_tables(conn)
+            conn.execute('BEGIN IMMEDIATE')
+            window_start = conn.execute('SELECT date(?, ?)', ('now', self.window)).fetchone()[0]
+            last_change_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM contract_changes').fetchone()[0]
+            state = conn.execute('''
+                SELECT last_change_id, window_start, fingerprint, evaluated_date
+                FROM analysis_watermarks WHERE analyzer = ?
+            ''', (self.name,)).fetchone()
+
+            # Changes since an evaluation older than the retention cutoff may already be pruned
+            if full or state is None or state[2] != self.fingerprint or (state[3] or '') < retention_cutoff():
+                changed = self._full_pass(conn, compute)
+            else:
+                changed = self._incremental_pass(conn, compute, state[0], state[1], window_start)
+
+            conn.execute('''
+                INSERT OR REPLACE INTO analysis_watermarks
+                (analyzer, last_change_id, window_start, fingerprint, evaluated_date)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (self.name, last_change_id, window_start, self.fingerprint, datetime.now().isoformat()))
+
+            ChangeTracker.prune(conn)
+
+            all_results = [json.loads(row[0]) for row in conn.execute('''
+                SELECT payload FROM analysis_results WHERE analyzer = ?
+                ORDER BY sort_value DESC, result_key
+            ''', (self.name,))]
+            conn.execute('COMMIT')
+            return all_results, changed
+
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def _full_pass(self, conn, compute) -> List[Dict]:
+        rows = compute(conn, '')
+        conn.execute('DELETE FROM analysis_results WHERE analyzer = ?', (self.name,))
+        self._upsert(conn, rows)
+        logger.info(f"{self.name}: full evaluation produced {len(rows)} results")
+        return [row[3] for row in rows]
+
+    def _incremental_pass(self, conn, compute, since_change_id: int, previous_start: str,
+                          window_start: str) -> List[Dict]:
+        changes = self._pending_changes(conn, since_change_id)
+        dirty = set(changes.keys_for(self.key_column))
+
+        if self.key_column == 'award_id':
+            # Per-contract results simply drop out once their award leaves the window
+            conn.execute('''
+                DELETE FROM analysis_results WHERE analyzer = ? AND award_date < ?
+            ''', (self.name, window_start))
+        elif previous_start and previous_start < window_start:
+            # Aggregates for keys with awards that just aged out must be recomputed
+            source = ('a.entity_id FROM contracts c JOIN entity_aliases a ON a.recipient_id = c.recipient_id'
+                      if self.key_column == 'entity_id' else f'c.{self.key_column} FROM contracts c')
+            dirty.update(row[0] for row in conn.execute(f'''
+                SELECT DISTINCT {source}
+                WHERE c.award_date >= ? AND c.award_date < ?
+            ''', (previous_start, window_start)))
+
+        dirty.discard(None)
+        if not dirty:
+            return []
+
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS dirty_keys (key TEXT PRIMARY KEY)')
+        conn.execute('DELETE FROM temp.dirty_keys')
+        conn.executemany('INSERT OR IGNORE INTO temp.dirty_keys (key) VALUES (?)', [(key,) for key in dirty])
+
+        rows = compute(conn, f'AND {self.key_column} IN (SELECT key FROM temp.dirty_keys)')
+
+        previous = {}
+        for key, payload in conn.execute('''
+            SELECT result_key, payload FROM analysis_results
+            WHERE analyzer = ? AND result_key IN (SELECT key FROM temp.dirty_keys)
+        ''', (self.name,)):
+            previous[key] = payload
+
+        conn.execute('''
+            DELETE FROM analysis_results WHERE analyzer = ? AND result_key IN (SELECT key FROM temp.dirty_keys)
+        ''', (self.name,))
+        self._upsert(conn, rows)
+
+        changed = [row[3] for row in rows if previous.get(row[0]) != json.dumps(row[3], default=str)]
+        logger.info(f"{self.name}: re-evaluated {len(dirty)} dirty keys, {len(changed)} new/changed results")
+        return changed
+
+    def _pending_changes(self, conn, since_change_id: int) -> ChangeSet:
+        changes = ChangeSet()
+        for award_id, recipient, agency in conn.execute('''
+            SELECT award_id, recipient_name, awarding_agency FROM contract_changes WHERE id > ?
+        ''', (since_change_id,)):
+            changes.award_ids.add(award_id)
+            changes.recipients.add(recipient)
+            changes.agencies.add(agency)
+        if self.key_column == 'entity_id':
+            # Writers resolve recipients before analyzers run; a moved award dirties its old entity too
+            changes.entities.update(row[0] for row in conn.execute('''
+                SELECT DISTINCT a.entity_id FROM contract_changes ch
+                JOIN recipients r ON r.name = ch.recipient_name
+                JOIN entity_aliases a ON a.recipient_id = r.id
+                WHERE ch.id > ?
+            ''', (since_change_id,)))
+        return changes
+
+    def _upsert(self, conn, rows):
+        now = datetime.now().isoformat()
+        conn.executemany('''
+            INSERT OR REPLACE INTO analysis_results
+            (analyzer, result_key, award_date, sort_value, payload, updated_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(self.name, key, award_date, sort_value, json.dumps(payload, default=str), now)
+              for key, award_date, sort_value, payload in rows])
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Staged Ingest Pipeline
+fetch -> normalize/classify -> dedup -> write -> post-write hooks, each stage on
+its own thread and connected by bounded queues so network, CPU and disk work overlap
+"""
+
+import queue
+import threading
+import time
+import logging
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import query_log
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+@dataclass
+class StageStats:
+    name: str
+    items_in: int = 0
+    items_out: int = 0
+    batches: int = 0
+    busy_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            'stage': self.name,
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'batches': self.batches,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'blocked_seconds': round(self.blocked_seconds, 3),
+            'items_per_second': round(self.items_in / self.busy_seconds, 1) if self.busy_seconds else None,
+            'errors': self.errors
+        }
+
+class PipelineAborted(Exception):
+    """Raised inside stages when another stage has failed"""
+
+class IngestPipeline:
+    """Bounded-queue producer/consumer pipeline for collected contracts"""
+
+    def __init__(self, db_manager, signature_func: Callable[[Any], str], queue_size: int = 8,
+                 batch_size: int = 500, post_write_hooks: Optional[List[Callable[[List], Any]]] = None,
+                 metrics=None):
+        self.db = db_manager
+        self.signature_func = signature_func
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.post_write_hooks = post_write_hooks or []
+        # Optional RunMetrics: per-stage, per-source wall/CPU time, rows written and DB time
+        self.metrics = metrics
+        self._abort = threading.Event()
+        self._failure = None
+
+    def _put(self, q: queue.Queue, item, stats: StageStats, lock: Optional[threading.Lock] = None):
+        """Blocking put that records backpressure time and gives up if the pipeline aborted"""
+        start = time.perf_counter()
+        while True:
+            if self._abort.is_set():
+                raise PipelineAborted()
+            try:
+                q.put(item, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        # Stats shared by several producer threads are updated under their lock
+        with lock or nullcontext():
+            stats.blocked_seconds += time.perf_counter() - start
+
+    def _wait(self, event: threading.Event):
+        while not event.wait(0.5):
+            if self._abort.is_set():
+                raise PipelineAborted()
+
+    def _measure(self, phase: str, source: str = ''):
+        return self.metrics.measure(phase, source) if self.metrics else nullcontext()
+
+    def _record(self, phase: str, source: str, **counters):
+        if self.metrics:
+            self.metrics.add(phase, source, **counters)
+
+    def _get(self, q: queue.Queue):
+        while True:
+            if self._abort.is_set():
+                raise PipelineAborted()
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+    def _run_stage(self, stats: StageStats, inbox: queue.Queue, outbox: Optional[queue.Queue],
+                   handler: Callable[[str, List], Optional[List]]):
+        """Generic consumer loop: pull batches, process, forward results downstream"""
+        try:
+            while True:
+                item = self._get(inbox)
+                if item is _DONE:
+                    break
+                source_name, batch = item
+                start = time.perf_counter()
+                with self._measure(stats.name, source_name):
+                    result = handler(source_name, batch)
+                stats.busy_seconds += time.perf_counter() - start
+                stats.batches += 1
+                stats.items_in += len(batch)
+                if result:
+                    stats.items_out += len(result)
+                    if outbox is not None:
+                        self._put(outbox, (source_name, result), stats)
+            if outbox is not None:
+                self._put(outbox, _DONE, stats)
+        except PipelineAborted:
+            pass
+        except Exception as e:
+            stats.errors.append(str(e))
+            self._fail(stats.name, e)
+
+    def _fail(self, stage_name: str, error: Exception):
+        if self._failure is None:
+            self._failure = (stage_name, error)
+        logger.error(f"Ingest pipeline stage {stage_name} failed: {error}")
+        self._abort.set()
+
+    def run(self, sources: List[Tuple[str, Callable[[], Dict[str, List]]]]) -> Dict:
+        """
+        Run every source through the pipeline and return per-source and per-stage counts.
+        sources are (name, collect) pairs in priority order: a contract returned by several
+        sources is stored once, from the first of them.
+        """
+        fetched_q = queue.Queue(self.queue_size)
+        normalized_q = queue.Queue(self.queue_size)
+        unique_q = queue.Queue(self.queue_size)
+        written_q = queue.Queue(self.queue_size)
+
+        fetch_stats = StageStats('fetch')
+        normalize_stats = StageStats('normalize')
+        dedup_stats = StageStats('dedup')
+        write_stats = StageStats('write')
+        hook_stats = StageStats('post_write')
+
+        contracts_by_source: Dict[str, int] = {}
+        source_stats: Dict[str, Dict[str, int]] = {}
+        phase_totals: Dict[str, int] = {}
+        seen_signatures = set()
+        queued_ids = set()
+        stats_lock = threading.Lock()
+        # Only the dedup thread uses this connection; it is opened here so it can be closed after join.
+        # It goes through the query log so the existing-ID check also sees fiscal-year archives
+        dedup_conn = query_log.connect(self.db.db_path, check_same_thread=False)
+
+        # Sources are fetched concurrently but handed on in the order given, so when two sources
+        # return the same contract the earlier (higher-priority) one always wins signature dedup
+        # and its data_source is the one stored, whichever fetch finished first
+        handed_off = [threading.Event() for _ in sources]
+
+        def fetch_source(position, phase_name, collect):
+            try:
+                start = time.perf_counter()
+                with self._measure('fetch', phase_name):
+                    results = collect()
+                with stats_lock:
+                    fetch_stats.busy_seconds += time.perf_counter() - start
+                    phase_totals[phase_name] = sum(len(contracts) for contracts in results.values())
+                if position:
+                    self._wait(handed_off[position - 1])
+                for source_name, contracts in results.items():
+                    with stats_lock:
+                        contracts_by_source[source_name] = len(contracts)
+                        source_stats[source_name] = {'total': len(contracts), 'unique': 0}
+                        fetch_stats.items_in += len(contracts)
+                        fetch_stats.items_out += len(contracts)
+                    self._record('fetch', source_name, items=len(contracts))
+                    for i in range(0, len(contracts), self.batch_size):
+                        with stats_lock:
+                            fetch_stats.batches += 1
+                        self._put(fetched_q, (source_name, contracts[i:i + self.batch_size]), fetch_stats, stats_lock)
+            except PipelineAborted:
+                pass
+            except Exception as e:
+                # One failing source should not sink the others
+                with stats_lock:
+                    fetch_stats.errors.append(f"{phase_name}: {e}")
+                logger.error(f"Source {phase_name} failed during fetch: {e}")
+            finally:
+                handed_off[position].set()
+
+        def normalize(source_name, batch):
+            for contract in batch:
+                contract.data_source = source_name
+                contract.recipient_name = (contract.recipient_name or '').strip()
+                contract.awarding_agency = (contract.awarding_agency or '').strip()
+                contract.award_amount = float(contract.award_amount or 0)
+                contract.signature = self.signature_func(contract)
+            return batch
+
+        def dedup(source_name, batch):
+            unique = []
+            for contract in batch:
+                if contract.signature not in seen_signatures:
+                    seen_signatures.add(contract.signature)
+                    unique.append(contract)
+            source_stats[source_name]['unique'] += len(unique)
+
+            if not unique:
+                return []
+
+            # Existing-ID check scoped to this batch instead of loading every award_id
+            award_ids = [contract.award_id for contract in unique]
+            placeholders = ','.join('?' * len(award_ids))
+            start = time.perf_counter()
+            cursor = dedup_conn.execute(
+                f'SELECT award_id FROM contracts WHERE award_id IN ({placeholders})', award_ids)
+            existing_ids = {row[0] for row in cursor.fetchall()}
+            self._record('dedup', source_name, db_seconds=time.perf_counter() - start)
+
+            new_contracts = []
+            for contract in unique:
+                if contract.award_id not in existing_ids and contract.award_id not in queued_ids:
+                    queued_ids.add(contract.award_id)
+                    new_contracts.append(contract)
+            return new_contracts
+
+        def write(source_name, batch):
+            start = time.perf_counter()
+            self.db.save_contracts(batch)
+            self._record('write', source_name, rows_written=len(batch), db_seconds=time.perf_counter() - start)
+            return batch
+
+        def run_hooks(source_name, batch):
+            for hook in self.post_write_hooks:
+                try:
+                    hook(batch)
+                except Exception as e:
+                    hook_stats.errors.append(str(e))
+                    logger.error(f"Post-write hook {getattr(hook, '__name__', hook)} failed: {e}")
+            return batch
+
+        threads = [
+            threading.Thread(target=self._run_stage, name='ingest-normalize',
+                             args=(normalize_stats, fetched_q, normalized_q, normalize)),
+            threading.Thread(target=self._run_stage, name='ingest-dedup',
+                             args=(dedup_stats, normalized_q, unique_q, dedup)),
+            threading.Thread(target=self._run_stage, name='ingest-write',
+                             args=(write_stats, unique_q, written_q, write)),
+            threading.Thread(target=self._run_stage, name='ingest-post-write',
+                             args=(hook_stats, written_q, None, run_hooks)),
+        ]
+        fetchers = [threading.Thread(target=fetch_source, name=f'ingest-fetch-{name}', args=(position, name, collect))
+                    for position, (name, collect) in enumerate(sources)]
+
+        start = time.perf_counter()
+        for thread in threads + fetchers:
+            thread.start()
+        for thread in fetchers:
+            thread.join()
+        try:
+            self._put(fetched_q, _DONE, fetch_stats)
+        except PipelineAborted:
+            pass
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        dedup_conn.close()
+
+        if self._failure is not None:
+            stage_name, error = self._failure
+            raise RuntimeError(f"Ingest pipeline failed in {stage_name} stage: {error}") from error
+
+        return {
+            'contracts_by_source': contracts_by_source,
+            'source_stats': source_stats,
+            'phase_totals': phase_totals,
+            'total_collected': sum(contracts_by_source.values()),
+            'unique_contracts': len(seen_signatures),
+            'new_contracts_saved': write_stats.items_in,
+            'elapsed_seconds': round(elapsed, 3),
+            'stage_stats': [stats.to_dict() for stats in
+                            (fetch_stats, normalize_stats, dedup_stats, write_stats, hook_stats)]
+        }
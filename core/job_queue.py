@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Dashboard Job Queue
+Runs heavy analysis requested from the dashboards on a bounded worker pool
+instead of the request thread. Submitting returns a job ID at once; the job's
+progress and result are polled via its status. Identical requests made while
+one is queued or running coalesce onto that job.
+"""
+
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    key: str
+    status: str = 'queued'
+    progress: float = 0.0
+    message: str = ''
+    created: Optional[str] = None
+    started: Optional[str] = None
+    finished: Optional[str] = None
+    duration: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    finished_at: float = 0.0
+
+    def to_status(self) -> Dict:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': round(self.progress, 3),
+            'message': self.message,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'duration': self.duration,
+            'result': self.result,
+            'error': self.error
+        }
+
+class JobQueue:
+    """
+    Job kinds are registered up front as func(progress, **params) -> JSON-ready result, where
+    progress(fraction, message) updates the job's status. Finished jobs (and their results)
+    are kept for result_ttl seconds. With store_path set, statuses are also written to a
+    small SQLite file so any server worker process can answer a status poll.
+    """
+
+    def __init__(self, name: str = 'dashboard', max_workers: int = 2, result_ttl: float = 600.0,
+                 store_path: Optional[str] = None, registry: MetricsRegistry = REGISTRY):
+        self.name = name
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self.store_path = store_path
+        self._kinds: Dict[str, Callable[..., Any]] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[str, Job] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.submitted = registry.counter('govmon_jobs_submitted_total', 'Dashboard jobs submitted', ['app', 'kind'])
+        self.coalesced = registry.counter('govmon_jobs_coalesced_total',
+                                          'Job requests served by an identical queued or running job', ['app', 'kind'])
+        registry.register_collector(self._collect)
+
+    def register(self, kind: str, func: Callable[..., Any]):
+        self._kinds[kind] = func
+
+    @property
+    def kinds(self):
+        return sorted(self._kinds)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so a server that forks workers after import starts each with fresh threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f'{self.name}-job')
+        return self._executor
+
+    def submit(self, kind: str, params: Optional[Dict] = None) -> Tuple[Job, bool]:
+        """(job, coalesced): a new job, or the queued/running one with the same kind and params"""
+        if kind not in self._kinds:
+            raise KeyError(kind)
+        params = params or {}
+        key = f"{kind}:{json.dumps(params, sort_keys=True, default=str)}"
+        with self._lock:
+            self._prune()
+            job = self._active.get(key)
+            if job is not None:
+                self.coalesced.inc(app=self.name, kind=kind)
+                return job, True
+            job = Job(id=uuid.uuid4().hex[:12], kind=kind, key=key, created=datetime.now().isoformat())
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._get_executor().submit(self._run, job, self._kinds[kind], params)
+        self._save(job)
+        self.submitted.inc(app=self.name, kind=kind)
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store_path:
+            return self._load(job_id)
+        return job
+
+    def _store(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.store_path, timeout=10)
+        conn.execute('CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, finished_at REAL)')
+        return conn
+
+    def _save(self, job: Job):
+        if not self.store_path:
+            return
+        try:
+            conn = self._store()
+            try:
+                with conn:
+                    conn.execute('INSERT OR REPLACE INTO jobs VALUES (?, ?, ?)',
+                                 (job.id, json.dumps(job.to_status(), default=str), job.finished_at))
+                    conn.execute('DELETE FROM jobs WHERE finished_at > 0 AND finished_at < ?',
+                                 (time.time() - self.result_ttl,))
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not store status of job {job.id}: {e}")
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        try:
+            conn = self._store()
+            try:
+                row = conn.execute('SELECT status, finished_at FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not load status of job {job_id}: {e}")
+            return None
+        if row is None:
+            return None
+        status = json.loads(row[0])
+        return Job(key='', finished_at=row[1], **status)
+
+    def _run(self, job: Job, func: Callable[..., Any], params: Dict):
+        start = time.time()
+        job.status = 'running'
+        job.started = datetime.now().isoformat()
+        self._save(job)
+
+        def progress(fraction: float, message: str = ''):
+            job.progress = max(0.0, min(1.0, fraction))
+            job.message = message
+            self._save(job)
+
+        try:
+            result = func(progress, **params)
+            job.result = result
+            job.progress = 1.0
+            job.message = ''
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+            logger.error(f"Job {job.kind} {job.id} failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            job.finished = datetime.now().isoformat()
+            job.duration = round(job.finished_at - start, 3)
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+            self._save(job)
+            logger.info(f"Job {job.kind} {job.id} finished ({job.status}) in {job.duration}s")
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _collect(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        samples = []
+        for status in ('queued', 'running'):
+            samples.append(({'app': self.name, 'status': status}, sum(job.status == status for job in jobs)))
+        return [('govmon_jobs', 'gauge', 'Dashboard jobs currently queued or running', samples)]
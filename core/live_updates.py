@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Live Dashboard Updates
+Server-Sent Events channel for open dashboards. One poller thread per process
+watches the database for commits from collection and analysis runs (a cheap
+PRAGMA data_version check), asks the dashboard for a diff, and fans it out
+to every subscriber. Server load stays flat however many tabs are open:
+tabs only wait on a queue.
+"""
+
+import os
+import math
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+def _json_safe(value: Any) -> Any:
+    """NaN/inf become null: EventSource payloads go through JSON.parse, which rejects them"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+def format_event(event: str, data: Any, event_id: Optional[str] = None) -> str:
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.extend(f'data: {line}' for line in json.dumps(_json_safe(data), default=str).splitlines())
+    return '\n'.join(lines) + '\n\n'
+
+class _Subscriber:
+    def __init__(self, maxsize: int):
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+class LiveUpdates:
+    """
+    probe(conn) returns a cheap token that changes when the dashboard's data does;
+    compute(previous_state) returns (state, diff or None) and is only called when the
+    token moves. The first compute after the poller (re)starts has previous_state None
+    and just sets the baseline.
+    """
+
+    def __init__(self, db_path: str, probe: Callable[[sqlite3.Connection], Any],
+                 compute: Callable[[Optional[Dict]], Tuple[Dict, Optional[Dict]]], name: str = 'dashboard',
+                 interval: float = 2.0, probe_interval: float = 60.0, heartbeat: float = 15.0,
+                 history: int = 100, queue_size: int = 50, registry: MetricsRegistry = REGISTRY):
+        self.db_path = db_path
+        self.probe = probe
+        self.compute = compute
+        self.name = name
+        self.interval = interval
+        self.probe_interval = probe_interval
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self.history = history
+        self._reset()
+
+        self.events = registry.counter('govmon_live_update_events_total', 'Diffs pushed to live dashboards', ['app'])
+        registry.register_collector(self._collect)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # Event ids are prefixed per process, so a client reconnecting to another server
+        # worker (or after a restart) is recognised and told to reload
+        self._instance = uuid.uuid4().hex[:8]
+        self._history: deque = deque(maxlen=self.history)
+        self._subscribers = set()
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _ensure_started(self):
+        # Started by the first subscriber so forked server workers each run their own poller
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=f'{self.name}-live-updates', daemon=True)
+                self._thread.start()
+
+    def _open(self) -> sqlite3.Connection:
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def _run(self):
+        state, token, data_version, probed = None, None, None, 0.0
+        conn = None
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                idle = not self._subscribers
+            if idle:
+                # Nobody is listening: drop the baseline rather than diffing against a stale one later
+                state, token, data_version = None, None, None
+                continue
+            try:
+                if conn is None:
+                    conn = self._open()
+                # data_version moves whenever another connection commits; the periodic probe
+                # catches date rollovers that shift relative windows without any write
+                current_version = conn.execute('PRAGMA data_version').fetchone()[0]
+                unchanged = current_version == data_version and time.monotonic() - probed < self.probe_interval
+                if state is not None and unchanged:
+                    continue
+                data_version, probed = current_version, time.monotonic()
+                current_token = self.probe(conn)
+                if state is not None and current_token == token:
+                    continue
+                token = current_token
+                state, diff = self.compute(state)
+                if diff:
+                    self.publish('update', diff)
+            except sqlite3.Error as e:
+                logger.warning(f"Live update poll failed for {self.name}: {e}")
+                if conn is not None:
+                    conn.close()
+                conn = None
+            except Exception as e:
+                logger.error(f"Live update diff failed for {self.name}: {e}")
+        if conn is not None:
+            conn.close()
+
+    def publish(self, event: str, data: Any):
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            text = format_event(event, data, f'{self._instance}-{event_id}')
+            self._history.append((event_id, text))
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(text)
+            except queue.Full:
+                # A client that stopped reading is told to reload instead of holding memory
+                subscriber.overflowed = True
+        self.events.inc(app=self.name)
+
+    def _subscribe(self, last_event_id: Optional[str]) -> Tuple[_Subscriber, list]:
+        subscriber = _Subscriber(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if not last_event_id:
+                return subscriber, []
+            instance, _, sequence = last_event_id.partition('-')
+            last = int(sequence) if sequence.isdigit() else -1
+            oldest = self._history[0][0] if self._history else self._next_id
+            if instance != self._instance or last < oldest - 1 or last >= self._next_id:
+                # Missed more than the history holds, or the events came from another process
+                return subscriber, [format_event('reload', {})]
+            return subscriber, [text for event_id, text in self._history if event_id > last]
+
+    def stream(self, last_event_id: Optional[str] = None, retry_ms: int = 5000) -> Iterator[str]:
+        """SSE body for one client; replays missed events when it reconnects with Last-Event-ID"""
+        self._ensure_started()
+        subscriber, backlog = self._subscribe(last_event_id)
+        try:
+            yield f'retry: {retry_ms}\n\n'
+            for text in backlog:
+                yield text
+            while True:
+                if subscriber.overflowed:
+                    yield format_event('reload', {})
+                    return
+                try:
+                    text = subscriber.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if text is None:
+                    return  # stopped: the client reconnects, possibly to a fresh server worker
+                yield text
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def response(self, last_event_id: Optional[str] = None):
+        from flask import Response, stream_with_context
+
+        return Response(stream_with_context(self.stream(last_event_id)), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    def stop(self):
+        """Stop polling and end every open stream"""
+        self._stop.set()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(None)
+            except queue.Full:
+                subscriber.overflowed = True
+
+    def _collect(self):
+        with self._lock:
+            subscribers = len(self._subscribers)
+        return [('govmon_live_update_subscribers', 'gauge', 'Open live-update streams',
+                 [({'app': self.name}, subscribers)])]
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Prometheus Metrics
+Dependency-free counters, gauges and histograms rendered in the Prometheus
+text exposition format, plus a /metrics endpoint and request-latency
+instrumentation for the Flask dashboards
+"""
+
+import math
+import time
+import sqlite3
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return 'NaN'
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}']
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, sum, count
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, key, state) -> List[str]:
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, ('le', _format_value(float(bound))))
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, ("le", "+Inf"))} {count}')
+        lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+        lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {count}')
+        return lines
+
+class MetricsRegistry:
+    """
+    Named metrics plus collector callbacks evaluated at scrape time. Callbacks return
+    (name, kind, documentation, [(labels dict, value), ...]) families for values that
+    live elsewhere (cache counters, pool gauges, persisted run data).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict, float]]]]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = REQUEST_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        # Merge collector output by family so each HELP/TYPE appears once
+        families: Dict[str, Tuple[str, str, List]] = {}
+        for collector in collectors:
+            try:
+                for name, kind, documentation, samples in collector():
+                    families.setdefault(name, (kind, documentation, []))[2].extend(samples)
+            except Exception as e:
+                # A broken collector should not take down the whole scrape
+                logger.error(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+        for name, (kind, documentation, samples) in families.items():
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {kind}')
+            seen = set()
+            for labels, value in samples:
+                # Both dashboards in one process register the same persisted-data collectors
+                key = tuple(labels.items())
+                if key in seen:
+                    continue
+                seen.add(key)
+                lines.append(f'{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+# Process-wide registry shared by the dashboards, the connection pool and caches
+REGISTRY = MetricsRegistry()
+
+def last_run_collector(db_path: str, connect: Optional[Callable[[], sqlite3.Connection]] = None):
+    """
+    Collector exposing the most recent run of each run_type from the run_metrics table:
+    per phase/source durations, CPU, items, rows written and HTTP traffic
+    """
+    fields = [
+        ('wall_seconds', 'last_run_duration_seconds', 'Wall time of each phase/source in the last run'),
+        ('cpu_seconds', 'last_run_cpu_seconds', 'CPU time of each phase/source in the last run'),
+        ('items', 'last_run_items', 'Contracts fetched (or alerts produced) per phase/source in the last run'),
+        ('rows_written', 'last_run_rows_written', 'Rows written per phase/source in the last run'),
+        ('db_seconds', 'last_run_db_seconds', 'Database time per phase/source in the last run'),
+        ('http_requests', 'last_run_http_requests', 'HTTP requests per phase/source in the last run'),
+        ('http_bytes', 'last_run_http_bytes', 'HTTP response bytes per phase/source in the last run'),
+        ('peak_rss_mb', 'last_run_peak_rss_megabytes', 'Process peak RSS at the end of each phase/source')
+    ]
+
+    def collect():
+        conn = connect() if connect else sqlite3.connect(db_path)
+        try:
+            rows = conn.execute(f'''
+                SELECT m.run_type, m.phase, m.source, {', '.join('m.' + field for field, _, _ in fields)},
+                       latest.recorded_date
+                FROM run_metrics m
+                JOIN (
+                    SELECT run_type, MAX(recorded_date) AS recorded_date FROM run_metrics GROUP BY run_type
+                ) latest ON latest.run_type = m.run_type AND latest.recorded_date = m.recorded_date
+            ''').fetchall()
+        except sqlite3.OperationalError:
+            # No run has been recorded yet
+            rows = []
+        finally:
+            conn.close()
+
+        families = []
+        for index, (field, name, documentation) in enumerate(fields, start=3):
+            samples = [({'run_type': row[0], 'phase': row[1], 'source': row[2]}, row[index])
+                       for row in rows if row[index] is not None]
+            families.append((f'govmon_{name}', 'gauge', documentation, samples))
+
+        finished = {}
+        for row in rows:
+            finished[row[0]] = row[-1]
+        families.append(('govmon_last_run_timestamp_seconds', 'gauge', 'When the last run of each type was recorded',
+                         [({'run_type': run_type}, _iso_to_epoch(recorded))
+                          for run_type, recorded in sorted(finished.items())]))
+        return families
+
+    return collect
+
+def _iso_to_epoch(value: str) -> float:
+    from datetime import datetime
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return math.nan
+
+def instrument_app(app, app_name: str, registry: MetricsRegistry = REGISTRY):
+    """
+    Time every request into a per-route latency histogram and add GET /metrics.
+    Routes are labelled by their rule ('/api/company/<company_name>'), not the raw path,
+    so label cardinality stays bounded.
+    """
+    from flask import Response, g, request
+
+    latency = registry.histogram('govmon_http_request_duration_seconds', 'Dashboard request latency by route',
+                                 ['app', 'route', 'method', 'status'])
+    in_flight = registry.gauge('govmon_http_requests_in_flight', 'Requests currently being served', ['app'])
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+        in_flight.inc(app=app_name)
+
+    @app.after_request
+    def _observe(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            latency.observe(time.perf_counter() - start, app=app_name, route=route,
+                            method=request.method, status=str(response.status_code))
+            in_flight.dec(app=app_name)
+        return response
+
+    @app.teardown_request
+    def _teardown(error):
+        # after_request is skipped when a view raises; keep the in-flight gauge honest
+        if g.pop('_metrics_start', None) is not None:
+            in_flight.dec(app=app_name)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    return registry
+
+def figure_cache_collector(figure_cache, app_name: str):
+    def collect():
+        return [
+            ('govmon_figure_cache_hits_total', 'counter', 'Chart figure cache hits',
+             [({'app': app_name}, figure_cache.hits)]),
+            ('govmon_figure_cache_misses_total', 'counter', 'Chart figure cache misses (figure rebuilt)',
+             [({'app': app_name}, figure_cache.misses)])
+        ]
+    return collect
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Outbound Notification Queue
+Persists alert notifications in SQLite and delivers them from a background
+worker so collection runs never wait on the mail server
+"""
+
+import sqlite3
+import smtplib
+import threading
+import time
+import json
+import logging
+from datetime import datetime
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from typing import List, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class NotificationQueue:
+    """SQLite-backed queue of pending alert notifications"""
+
+    def __init__(self, db_path: str = "government_monitor.db", stale_claim_seconds: int = 600):
+        self.db_path = db_path
+        self.init_queue(stale_claim_seconds)
+
+    def init_queue(self, stale_claim_seconds: int = 600):
+        """Create the queue table and release claims left behind by a crashed worker"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notification_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT,
+                recipient TEXT,
+                message TEXT,
+                data TEXT,
+                created_date TEXT,
+                enqueued_at REAL,
+                available_at REAL,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                claimed_at REAL,
+                last_error TEXT,
+                sent_date TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_notification_queue_status
+            ON notification_queue (status, available_at)
+        ''')
+
+        cursor.execute('''
+            UPDATE notification_queue
+            SET status = 'pending', claimed_at = NULL
+            WHERE status = 'sending' AND claimed_at < ?
+        ''', (time.time() - stale_claim_seconds,))
+
+        conn.commit()
+        conn.close()
+
+    def enqueue(self, recipient: str, messages: List[str], payloads: List[Dict], channel: str = 'email') -> int:
+        """Add one queue entry per alert message"""
+        now = time.time()
+        created_date = datetime.now().isoformat()
+
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany('''
+            INSERT INTO notification_queue
+            (channel, recipient, message, data, created_date, enqueued_at, available_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (channel, recipient, message, json.dumps(payload, default=str), created_date, now, now)
+            for message, payload in zip(messages, payloads)
+        ])
+        conn.commit()
+        conn.close()
+
+        return len(messages)
+
+    def claim_digest(self, digest_window: float, max_batch: int = 200, flush: bool = False) -> List[Dict]:
+        """Claim due entries for the recipient whose oldest pending alert has waited a full window"""
+        now = time.time()
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                SELECT channel, recipient, MIN(enqueued_at)
+                FROM notification_queue
+                WHERE status = 'pending' AND available_at <= ?
+                GROUP BY channel, recipient
+                ORDER BY MIN(enqueued_at)
+                LIMIT 1
+            ''', (now,))
+            row = cursor.fetchone()
+
+            if not row or (not flush and now - row[2] < digest_window):
+                cursor.execute('COMMIT')
+                return []
+
+            channel, recipient = row[0], row[1]
+            cursor.execute('''
+                SELECT id, message, data, attempts
+                FROM notification_queue
+                WHERE status = 'pending' AND available_at <= ?
+                  AND channel = ? AND recipient = ?
+                ORDER BY id
+                LIMIT ?
+            ''', (now, channel, recipient, max_batch))
+            entries = [{
+                'id': entry[0],
+                'channel': channel,
+                'recipient': recipient,
+                'message': entry[1],
+                'data': json.loads(entry[2]) if entry[2] else {},
+                'attempts': entry[3]
+            } for entry in cursor.fetchall()]
+
+            cursor.executemany('''
+                UPDATE notification_queue SET status = 'sending', claimed_at = ? WHERE id = ?
+            ''', [(now, entry['id']) for entry in entries])
+            cursor.execute('COMMIT')
+            return entries
+
+        except sqlite3.Error:
+            cursor.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def mark_sent(self, entry_ids: List[int]):
+        """Mark delivered entries"""
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany('''
+            UPDATE notification_queue SET status = 'sent', sent_date = ?, claimed_at = NULL WHERE id = ?
+        ''', [(datetime.now().isoformat(), entry_id) for entry_id in entry_ids])
+        conn.commit()
+        conn.close()
+
+    def mark_failed(self, entries: List[Dict], error: str, backoff_base: float = 30.0,
+                    backoff_max: float = 3600.0, max_attempts: int = 8):
+        """Reschedule entries with exponential backoff, giving up after max_attempts"""
+        now = time.time()
+        updates = []
+        for entry in entries:
+            attempts = entry['attempts'] + 1
+            status = 'failed' if attempts >= max_attempts else 'pending'
+            delay = min(backoff_max, backoff_base * (2 ** (attempts - 1)))
+            updates.append((status, attempts, now + delay, error[:500], entry['id']))
+
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany('''
+            UPDATE notification_queue
+            SET status = ?, attempts = ?, available_at = ?, last_error = ?, claimed_at = NULL
+            WHERE id = ?
+        ''', updates)
+        conn.commit()
+        conn.close()
+
+    def pending_count(self) -> int:
+        """Number of entries still waiting for delivery"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM notification_queue WHERE status IN ('pending', 'sending')")
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+
+class SMTPConnectionPool:
+    """Keeps a single authenticated SMTP connection open between digests"""
+
+    def __init__(self, email_config: Dict, idle_timeout: float = 120.0):
+        self.email_config = email_config
+        self.idle_timeout = idle_timeout
+        self._server = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        """Open, secure and authenticate a new connection"""
+        server = smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port'], timeout=30)
+        if self.email_config.get('use_tls', True):
+            server.starttls()
+        if self.email_config.get('username'):
+            server.login(self.email_config['username'], self.email_config['password'])
+        return server
+
+    def get(self):
+        """Return a live connection, reconnecting if the old one went idle or dropped"""
+        if self._server is not None:
+            idle = time.time() - self._last_used
+            try:
+                if idle > self.idle_timeout or self._server.noop()[0] != 250:
+                    self.close()
+            except smtplib.SMTPException:
+                self._server = None
+            except OSError:
+                self._server = None
+
+        if self._server is None:
+            self._server = self._connect()
+
+        self._last_used = time.time()
+        return self._server
+
+    def send_message(self, msg):
+        """Send through the pooled connection"""
+        self.get().send_message(msg)
+        self._last_used = time.time()
+
+    def discard(self):
+        """Drop a connection that failed mid-send without a QUIT round trip"""
+        if self._server is not None:
+            try:
+                self._server.close()
+            except OSError:
+                pass
+            self._server = None
+
+    def close(self):
+        """Politely close the pooled connection"""
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+class NotificationWorker(threading.Thread):
+    """Background thread that drains the queue as per-recipient email digests"""
+
+    def __init__(self, queue: NotificationQueue, email_config: Dict):
+        super().__init__(name='notification-worker', daemon=True)
+        self.queue = queue
+        self.email_config = email_config
+        self.pool = SMTPConnectionPool(email_config, email_config.get('smtp_idle_timeout', 120.0))
+        self.digest_window = email_config.get('digest_window', 300)
+        self.poll_interval = email_config.get('poll_interval', 5)
+        self.max_batch = email_config.get('digest_max_alerts', 200)
+        self.backoff_base = email_config.get('retry_backoff', 30.0)
+        self.max_attempts = email_config.get('max_attempts', 8)
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._flush = False
+
+    def wake(self):
+        """Re-check the queue without waiting for the next poll"""
+        self._wake_event.set()
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                if not self.drain_once():
+                    self._wake_event.wait(self.poll_interval)
+                    self._wake_event.clear()
+
+            # Final flush ignores the digest window so nothing waits for the next process
+            if self._flush:
+                while self.drain_once(flush=True):
+                    pass
+        finally:
+            self.pool.close()
+
+    def drain_once(self, flush: bool = False) -> bool:
+        """Send one digest if one is due; returns True when something was sent"""
+        try:
+            entries = self.queue.claim_digest(self.digest_window, self.max_batch, flush=flush)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read notification queue: {e}")
+            return False
+
+        if not entries:
+            return False
+
+        try:
+            self.pool.send_message(self._build_digest(entries))
+            self.queue.mark_sent([entry['id'] for entry in entries])
+            logger.info(f"Sent email digest with {len(entries)} alerts to {entries[0]['recipient']}")
+            return True
+        except Exception as e:
+            self.pool.discard()
+            self.queue.mark_failed(entries, str(e), self.backoff_base, max_attempts=self.max_attempts)
+            logger.error(f"Failed to send email digest, will retry: {e}")
+            return False
+
+    def _build_digest(self, entries: List[Dict]):
+        """Coalesce queued alerts into a single message"""
+        msg = MIMEMultipart()
+        msg['From'] = self.email_config['from_email']
+        msg['To'] = entries[0]['recipient']
+        msg['Subject'] = f"Government Contract Alerts - {len(entries)} new alerts"
+
+        body = "New government contracting alerts:\n\n"
+        for entry in entries:
+            body += f"• {entry['message']}\n"
+
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
+
+    def stop(self, flush: bool = True, timeout: Optional[float] = 30.0):
+        """Stop the worker, optionally sending everything still pending first"""
+        self._flush = flush
+        self._stop_event.set()
+        self._wake_event.set()
+        self.join(timeout)
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Fiscal-Year Partitions
+The main database keeps the hot contracts (current and previous fiscal year);
+older fiscal years are moved into one sealed, read-only SQLite file each,
+listed in the contract_partitions catalog. Archives hold contract_facts rows;
+the recipients/agencies dimensions stay in the main database. Statements run
+through a LoggedConnection are routed: the award_date bounds already in the SQL
+decide which archives are needed, those are ATTACHed on first use, and TEMP
+views named `contract_facts` and `contracts` (which shadow the main ones) union
+them with the hot table. Statements whose bounds fall inside the hot window run
+against the main schema untouched, and writes always do.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import functools
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import star_schema
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TABLE = 'contract_partitions'
+DEFAULT_HOT_YEARS = 2
+# SQLite attaches at most 10 databases per connection; older archives are merged beyond this
+MAX_ARCHIVES = 8
+
+_CONTRACT_READ = re.compile(r'\b(?:FROM|JOIN)\s+(?:contracts|contract_facts)\b', re.I)
+_CONTRACT_ANY = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE|TABLE|ON)\s+(?:contracts|contract_facts)\b', re.I)
+_WRITE = re.compile(r'^\s*(?:INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b', re.I)
+_ROWID = re.compile(r'\browid\b', re.I)
+_WHERE = re.compile(r'\bWHERE\b', re.I)
+# What decides whether a WHERE term is one of its top-level ANDed filters: string literals are skipped,
+# parentheses and CASE...END nest, and a clause keyword (or an unmatched ')') ends the WHERE
+_WHERE_TOKEN = re.compile(r"'(?:[^']|'')*'|[()]|\b(?:CASE|END|OR|GROUP|ORDER|LIMIT|HAVING|WINDOW|UNION|EXCEPT|"
+                          r"INTERSECT)\b", re.I)
+_BOUND = re.compile(r"\baward_date\s*(>=|>|<=|<)\s*(?:(\?)|date\(\s*'now'\s*,\s*(?:'([^']*)'|(\?))\s*\)|'([^']*)')",
+                    re.I)
+_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+class Statement(NamedTuple):
+    reads: int                  # FROM/JOIN contracts (or contract_facts) references
+    writes: bool
+    uses_rowid: bool
+    bounds: Optional[Tuple[tuple, ...]]  # (op, kind, value) filters on award_date; None when they can't be trusted
+
+class Archive(NamedTuple):
+    name: str
+    path: str
+    first_fy: int
+    last_fy: int
+    min_date: str
+    max_date: str
+    row_count: int
+    sealed_date: str
+
+    def overlaps(self, lower: Optional[str], upper: Optional[str]) -> bool:
+        return (lower is None or self.max_date >= lower) and (upper is None or self.min_date <= upper)
+
+def fiscal_year(award_date: str) -> int:
+    """Federal fiscal year: FY2025 runs 2024-10-01 to 2025-09-30"""
+    year, month = int(award_date[:4]), int(award_date[5:7])
+    return year + 1 if month >= 10 else year
+
+def fiscal_year_start(fy: int) -> str:
+    return f'{fy - 1}-10-01'
+
+def archive_name(first_fy: int, last_fy: int) -> str:
+    return f'fy{first_fy}' if first_fy == last_fy else f'fy{first_fy}_{last_fy}'
+
+def archive_path(db_path: str, name: str) -> str:
+    """Archives live in partitions/ next to the main database"""
+    directory = os.path.join(os.path.dirname(os.path.abspath(db_path)), 'partitions')
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return os.path.join(directory, f'{stem}_{name}.db')
+
+@functools.lru_cache(maxsize=1024)
+def analyze(sql: str) -> Statement:
+    """What the router needs to know about a statement, cached per SQL text"""
+    reads = len(_CONTRACT_READ.findall(sql))
+    touches = reads or _CONTRACT_ANY.search(sql) is not None
+    if not touches:
+        return Statement(0, False, False, ())
+    writes = _WRITE.match(sql) is not None or not reads
+    bounds = None
+    # Bounds are only trusted as top-level ANDed filters on a single contracts reference: one under an
+    # OR or inside a CASE could be loosened, and a second reference may carry none at all
+    spans = None
+    if reads == 1:
+        where = _WHERE.search(sql, _CONTRACT_READ.search(sql).end())
+        spans = _top_level_filters(sql, where.end()) if where else []
+    if spans is not None:
+        bounds = []
+        for match in _BOUND.finditer(sql, spans[0][0] if spans else len(sql)):
+            if not any(start <= match.start() < end for start, end in spans):
+                continue
+            op, param, modifier, modifier_param, literal = match.groups()
+            if param or modifier_param:
+                bounds.append((op, 'param' if param else 'modifier_param', sql.count('?', 0, match.start())))
+            elif modifier is not None:
+                bounds.append((op, 'modifier', modifier))
+            else:
+                bounds.append((op, 'literal', literal))
+        bounds = tuple(bounds)
+    return Statement(reads, writes, _ROWID.search(sql) is not None, bounds)
+
+def _top_level_filters(sql: str, start: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Spans of the WHERE clause starting at `start` that lie outside any parentheses or CASE, so
+    `(a OR b) AND award_date >= ?` keeps its bound. None when the clause itself has a top-level OR.
+    """
+    spans, depth, begin, end = [], 0, start, len(sql)
+    for token in _WHERE_TOKEN.finditer(sql, start):
+        word = token.group().upper()
+        if word.startswith("'"):
+            continue
+        if word in ('(', 'CASE'):
+            if depth == 0:
+                spans.append((begin, token.start()))
+            depth += 1
+        elif word in (')', 'END'):
+            depth -= 1
+            if depth < 0:
+                end = token.start()
+                break
+            if depth == 0:
+                begin = token.end()
+        elif depth == 0:
+            if word == 'OR':
+                return None
+            end = token.start()
+            break
+    if depth <= 0:
+        spans.append((begin, end))
+    return spans
+
+_date_lock = threading.Lock()
+_date_conn = None
+
+@functools.lru_cache(maxsize=256)
+def _sqlite_date(modifier: str, utc_day: str) -> Optional[str]:
+    """date('now', modifier) exactly as SQLite computes it (utc_day only keys the cache)"""
+    global _date_conn
+    with _date_lock:
+        if _date_conn is None:
+            _date_conn = sqlite3.connect(':memory:', check_same_thread=False)
+        return _date_conn.execute("SELECT date('now', ?)", (modifier,)).fetchone()[0]
+
+def _bound_value(kind: str, value, params) -> Optional[str]:
+    if kind == 'literal':
+        text = value
+    elif kind == 'modifier':
+        text = _sqlite_date(value, time.strftime('%Y-%m-%d', time.gmtime()))
+    else:
+        if not isinstance(params, (list, tuple)) or value >= len(params):
+            return None
+        text = params[value]
+        if kind == 'modifier_param':
+            text = _sqlite_date(str(text), time.strftime('%Y-%m-%d', time.gmtime()))
+    text = text.isoformat() if isinstance(text, (date, datetime)) else text
+    return text if isinstance(text, str) and _DATE.match(text) else None
+
+def date_range(statement: Statement, params) -> Tuple[Optional[str], Optional[str]]:
+    """(lower, upper) award_date bounds of the statement, None where unbounded"""
+    lowers, uppers = [], []
+    for op, kind, value in statement.bounds or ():
+        bound = _bound_value(kind, value, params)
+        if bound is not None:
+            (lowers if op.startswith('>') else uppers).append(bound)
+    return max(lowers, default=None), min(uppers, default=None)
+
+def _raw(conn: sqlite3.Connection, sql: str, params=()) -> sqlite3.Cursor:
+    """Internal statements bypass the LoggedCursor (and so the router and the query log)"""
+    return sqlite3.Connection.cursor(conn).execute(sql, params)
+
+def load_catalog(conn: sqlite3.Connection, schema: str = 'main') -> List[Archive]:
+    if not _raw(conn, f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?",
+                (CATALOG_TABLE,)).fetchone():
+        return []
+    return [Archive(*row) for row in _raw(conn, f'''
+        SELECT name, path, first_fy, last_fy, min_date, max_date, row_count, sealed_date
+        FROM {schema}.{CATALOG_TABLE} ORDER BY first_fy
+    ''')]
+
+def archived_award_ids(conn: sqlite3.Connection, contracts: Sequence[Any]) -> Set[str]:
+    """
+    award_ids of contracts (anything with award_id/award_date) already sealed in the archive covering
+    their fiscal year: one indexed lookup per archived year the batch touches, none when it touches
+    only hot years. Writes land in the hot table, so these would otherwise become duplicates.
+    Needs an ATTACH, so call it before the connection starts a write transaction.
+    """
+    archives = load_catalog(conn)
+    if not archives:
+        return set()
+    by_archive: Dict[Archive, List[str]] = {}
+    for contract in contracts:
+        if not contract.award_date or not _DATE.match(contract.award_date):
+            continue
+        fy = fiscal_year(contract.award_date)
+        for archive in archives:
+            if archive.first_fy <= fy <= archive.last_fy:
+                by_archive.setdefault(archive, []).append(contract.award_id)
+                break
+    if not by_archive:
+        return set()
+    main_file = next((row[2] for row in _raw(conn, 'PRAGMA database_list') if row[1] == 'main'), '')
+    found = set()
+    for archive, award_ids in by_archive.items():
+        path = archive.path if os.path.isabs(archive.path) else \
+            os.path.join(os.path.dirname(main_file or '.'), archive.path)
+        _raw(conn, 'ATTACH DATABASE ? AS sealed_check', (f"{_file_uri(path)}?mode=ro&immutable=1",))
+        try:
+            for i in range(0, len(award_ids), 500):
+                chunk = award_ids[i:i + 500]
+                found.update(row[0] for row in _raw(
+                    conn, f"SELECT award_id FROM sealed_check.contract_facts WHERE award_id IN ({','.join('?' * len(chunk))})",
+                    tuple(chunk)))
+        finally:
+            _raw(conn, 'DETACH DATABASE sealed_check')
+    return found
+
+class PartitionRouter:
+    """Per-connection routing state: the catalog, attached archives and the current TEMP view"""
+
+    def __init__(self):
+        self._data_version = None
+        self._main_file = None
+        self._archives: Dict[str, Archive] = {}
+        self._attached: Dict[str, str] = {}  # archive name -> schema alias
+        self._view: Tuple[str, ...] = ()
+
+    def route(self, conn: sqlite3.Connection, sql: str, params):
+        statement = analyze(sql)
+        if not statement.reads and not statement.writes:
+            return
+        self._refresh(conn)
+        needed = ()
+        if self._archives and not statement.writes and not statement.uses_rowid:
+            # Writes and rowid-based change tokens stay on the hot table, where all new rows land
+            lower, upper = date_range(statement, params)
+            needed = tuple(name for name, archive in self._archives.items() if archive.overlaps(lower, upper))
+        if needed != self._view:
+            self._set_view(conn, needed)
+
+    def _refresh(self, conn: sqlite3.Connection):
+        # data_version moves when another connection commits, e.g. a roll changing the catalog
+        version = _raw(conn, 'PRAGMA data_version').fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        if self._main_file is None:
+            self._main_file = next((row[2] for row in _raw(conn, 'PRAGMA database_list') if row[1] == 'main'), '')
+        archives = {archive.name: archive for archive in load_catalog(conn)}
+        if archives != self._archives:
+            previous, self._archives = self._archives, archives
+            if self._view:
+                self._set_view(conn, ())
+            # Removed or rewritten archives are detached so the next use opens the current file
+            for name in [name for name in self._attached if archives.get(name) != previous.get(name)]:
+                if not conn.in_transaction:
+                    _raw(conn, f'DETACH DATABASE {self._attached.pop(name)}')
+
+    def _attach(self, conn: sqlite3.Connection, archive: Archive) -> str:
+        alias = self._attached.get(archive.name)
+        if alias is not None:
+            return alias
+        if conn.in_transaction:
+            raise sqlite3.OperationalError(f"Reading contracts archived in {archive.name} needs an ATTACH, which "
+                                           f"SQLite does not allow inside a transaction; commit first")
+        alias = f'part_{archive.name}'
+        path = archive.path if os.path.isabs(archive.path) else \
+            os.path.join(os.path.dirname(self._main_file or '.'), archive.path)
+        # Sealed archives never change, so SQLite can skip locking and change detection
+        _raw(conn, 'ATTACH DATABASE ? AS ' + alias, (f"{_file_uri(path)}?mode=ro&immutable=1",))
+        self._attached[archive.name] = alias
+        return alias
+
+    def _set_view(self, conn: sqlite3.Connection, needed: Sequence[str]):
+        _raw(conn, 'DROP VIEW IF EXISTS temp.contracts')
+        _raw(conn, 'DROP VIEW IF EXISTS temp.contract_facts')
+        self._view = ()
+        if not needed:
+            return
+        columns = [row[1] for row in _raw(conn, 'PRAGMA main.table_info(contract_facts)')]
+        selects = [f"SELECT {', '.join(columns)} FROM main.contract_facts"]
+        for name in needed:
+            alias = self._attach(conn, self._archives[name])
+            present = {row[1] for row in _raw(conn, f'PRAGMA {alias}.table_info(contract_facts)')}
+            # Archives are immutable, so columns added to the hot table later read as NULL there
+            select_list = ', '.join(column if column in present else f'NULL AS {column}' for column in columns)
+            selects.append(f'SELECT {select_list} FROM {alias}.contract_facts')
+        _raw(conn, 'CREATE TEMP VIEW contract_facts AS ' + ' UNION ALL '.join(selects))
+        # The main contracts view only sees main.contract_facts, so it is shadowed as well
+        _raw(conn, 'CREATE TEMP VIEW contracts AS ' + star_schema.contracts_select('temp.contract_facts', 'main'))
+        self._view = tuple(needed)
+
+def _file_uri(path: str) -> str:
+    from pathlib import Path
+
+    return Path(path).resolve().as_uri()
+
+class PartitionStore:
+    """Moves fiscal years out of the hot table into sealed archive files"""
+
+    def __init__(self, db_path: str = 'government_monitor.db', hot_years: int = DEFAULT_HOT_YEARS,
+                 max_archives: int = MAX_ARCHIVES):
+        self.db_path = db_path
+        self.hot_years = hot_years
+        self.max_archives = max_archives
+
+    def init_catalog(self, conn: sqlite3.Connection):
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {CATALOG_TABLE} (
+                name TEXT PRIMARY KEY,
+                path TEXT,
+                first_fy INTEGER,
+                last_fy INTEGER,
+                min_date TEXT,
+                max_date TEXT,
+                row_count INTEGER,
+                sealed_date TEXT
+            )
+        ''')
+        conn.commit()
+
+    def hot_cutoff(self, today: Optional[str] = None) -> str:
+        """First award_date kept in the hot table"""
+        today = today or date.today().isoformat()
+        return fiscal_year_start(fiscal_year(today) - self.hot_years + 1)
+
+    def status(self) -> Dict:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            hot_rows, hot_min, hot_max = conn.execute(
+                "SELECT COUNT(*), MIN(NULLIF(award_date, '')), MAX(award_date) FROM contracts").fetchone()
+            stale = conn.execute("SELECT COUNT(*) FROM contracts WHERE award_date != '' AND award_date < ?",
+                                 (self.hot_cutoff(),)).fetchone()[0]
+            return {
+                'hot_cutoff': self.hot_cutoff(),
+                'hot_rows': hot_rows,
+                'hot_min_date': hot_min,
+                'hot_max_date': hot_max,
+                'rows_to_archive': stale,
+                'archives': [archive._asdict() for archive in load_catalog(conn)]
+            }
+        finally:
+            conn.close()
+
+    def roll(self, today: Optional[str] = None, dry_run: bool = False) -> Dict:
+        """
+        Archive every fiscal year that has left the hot window. Rows for a year whose archive is
+        already sealed (late-arriving old awards) stay in the hot table, which reads union in.
+        """
+        cutoff = self.hot_cutoff(today)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        summary = {'hot_cutoff': cutoff, 'archived': [], 'left_in_hot': 0, 'merged': []}
+        try:
+            # Archives copy contract_facts as is, so a flat database must be upgraded first
+            star_schema.ensure_star_schema(conn)
+            self.init_catalog(conn)
+            years = conn.execute('''
+                SELECT CAST(substr(award_date, 1, 4) AS INTEGER) + (substr(award_date, 6, 2) >= '10') AS fy,
+                       COUNT(*)
+                FROM contracts
+                WHERE award_date != '' AND award_date < ?
+                GROUP BY fy ORDER BY fy
+            ''', (cutoff,)).fetchall()
+            archives = load_catalog(conn)
+            for fy, rows in years:
+                if any(archive.first_fy <= fy <= archive.last_fy for archive in archives):
+                    summary['left_in_hot'] += rows
+                    continue
+                summary['archived'].append({'fiscal_year': fy, 'rows': rows})
+                if not dry_run:
+                    self._archive_year(conn, fy)
+            if not dry_run:
+                while len(load_catalog(conn)) > self.max_archives:
+                    summary['merged'].append(self._merge_oldest(conn))
+        finally:
+            conn.close()
+        return summary
+
+    def _create_archive(self, conn: sqlite3.Connection, name: str, copy_sql: List[Tuple[str, tuple]]
+                        ) -> Tuple[str, int]:
+        """Build, fill and seal an archive file; returns (path, rows). Not yet in the catalog."""
+        path = archive_path(self.db_path, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)  # left over from an interrupted roll; never catalogued
+        conn.execute('ATTACH DATABASE ? AS staging', (path,))
+        try:
+            table_sql, = conn.execute(
+                "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = 'contract_facts'").fetchone()
+            conn.execute(re.sub(r'^\s*CREATE TABLE\s+(?:IF NOT EXISTS\s+)?"?contract_facts"?',
+                                'CREATE TABLE staging.contract_facts', table_sql, count=1, flags=re.I))
+            rows = 0
+            for sql, params in copy_sql:
+                rows += conn.execute(sql, params).rowcount
+            for index_name, index_sql in conn.execute('''
+                SELECT name, sql FROM main.sqlite_master
+                WHERE type = 'index' AND tbl_name = 'contract_facts' AND sql IS NOT NULL
+            ''').fetchall():
+                conn.execute(index_sql.replace(index_name, f'staging.{index_name}', 1))
+            conn.commit()
+            conn.execute('ANALYZE staging')
+            conn.commit()
+        finally:
+            conn.execute('DETACH DATABASE staging')
+        os.chmod(path, 0o444)
+        return path, rows
+
+    def _catalog_entry(self, conn: sqlite3.Connection, name: str, path: str, first_fy: int, last_fy: int,
+                       rows: int) -> tuple:
+        uri = f"{_file_uri(path)}?mode=ro&immutable=1"
+        check = sqlite3.connect(uri, uri=True)
+        try:
+            min_date, max_date = check.execute('SELECT MIN(award_date), MAX(award_date) FROM contract_facts'
+                                               ).fetchone()
+        finally:
+            check.close()
+        relative = os.path.relpath(path, os.path.dirname(os.path.abspath(self.db_path)))
+        return (name, relative, first_fy, last_fy, min_date, max_date, rows, datetime.now().isoformat())
+
+    def _archive_year(self, conn: sqlite3.Connection, fy: int):
+        start, end = fiscal_year_start(fy), fiscal_year_start(fy + 1)
+        name = archive_name(fy, fy)
+        path, rows = self._create_archive(conn, name, [
+            ('INSERT INTO staging.contract_facts SELECT * FROM main.contract_facts '
+             'WHERE award_date >= ? AND award_date < ?', (start, end))
+        ])
+        # The archive is durable before the hot rows go: a crash in between leaves an
+        # uncatalogued file that the next roll rebuilds, never a lost year
+        with conn:
+            conn.execute(f'INSERT INTO {CATALOG_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                         self._catalog_entry(conn, name, path, fy, fy, rows))
+            conn.execute('DELETE FROM main.contract_facts WHERE award_date >= ? AND award_date < ?', (start, end))
+        logger.info(f"Archived FY{fy}: {rows} contracts -> {path}")
+
+    def _merge_oldest(self, conn: sqlite3.Connection) -> str:
+        first, second = load_catalog(conn)[:2]
+        name = archive_name(first.first_fy, second.last_fy)
+        base = os.path.dirname(os.path.abspath(self.db_path))
+        sources = [os.path.join(base, archive.path) for archive in (first, second)]
+        for index, source in enumerate(sources):
+            conn.execute(f'ATTACH DATABASE ? AS source{index}', (f"{_file_uri(source)}?mode=ro&immutable=1",))
+        try:
+            path, rows = self._create_archive(conn, name, [
+                (f'INSERT INTO staging.contract_facts SELECT * FROM source{index}.contract_facts', ())
+                for index in range(len(sources))
+            ])
+        finally:
+            for index in range(len(sources)):
+                conn.execute(f'DETACH DATABASE source{index}')
+        with conn:
+            conn.execute(f'DELETE FROM {CATALOG_TABLE} WHERE name IN (?, ?)', (first.name, second.name))
+            conn.execute(f'INSERT INTO {CATALOG_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                         self._catalog_entry(conn, name, path, first.first_fy, second.last_fy, rows))
+        for source in sources:
+            os.remove(source)  # readers holding it attached keep their open handle until they re-route
+        logger.info(f"Merged {first.name} and {second.name} into {name}")
+        return name
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Prefork Dashboard Server
+Production serving mode without extra dependencies: a master process binds the
+port, imports the app once and forks N workers that accept on the shared
+socket, each running Werkzeug's threaded WSGI server (installed with Flask).
+Workers warm their own pooled read-only connections and figure caches before
+taking traffic. A reload (SIGHUP, or automatically when a collection run
+finishes) starts a warmed new generation before the old one drains and exits.
+"""
+
+import os
+import time
+import signal
+import socket
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_RUN_TYPES = ('ultimate_collection', 'daily_collection')
+
+class _InFlight:
+    """WSGI middleware counting requests whose response has not been closed yet (streams included)"""
+
+    def __init__(self, app):
+        self.app = app
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        from werkzeug.wsgi import ClosingIterator
+
+        with self._lock:
+            self.count += 1
+        try:
+            return ClosingIterator(self.app(environ, start_response), self._done)
+        except BaseException:
+            self._done()
+            raise
+
+    def _done(self):
+        with self._lock:
+            self.count -= 1
+
+class PreforkServer:
+    """
+    Master/worker process manager. shutdown_hooks run in each worker when it starts
+    draining, e.g. to end long-lived event streams so the drain can finish.
+    """
+
+    def __init__(self, app, host: str = '127.0.0.1', port: int = 8080, workers: int = 4,
+                 warm_paths: Sequence[str] = ('/',), db_path: Optional[str] = 'government_monitor.db',
+                 reload_on_collection: bool = True, check_interval: float = 10.0,
+                 graceful_timeout: float = 30.0, ready_timeout: float = 120.0):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.warm_paths = list(warm_paths)
+        self.db_path = db_path
+        self.reload_on_collection = reload_on_collection
+        self.check_interval = check_interval
+        self.graceful_timeout = graceful_timeout
+        self.ready_timeout = ready_timeout
+        self.shutdown_hooks: List[Callable[[], Any]] = []
+        self.generation = 0
+        self._socket: Optional[socket.socket] = None
+        self._children: Dict[int, int] = {}  # pid -> generation
+        self._reload_requested = False
+        self._stop_requested = False
+
+    # Master
+
+    def bind(self):
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen(128)
+        self._socket.set_inheritable(True)
+        self.port = self._socket.getsockname()[1]
+
+    def serve_forever(self):
+        if self._socket is None:
+            self.bind()
+        signal.signal(signal.SIGHUP, lambda *_: self.request_reload())
+        signal.signal(signal.SIGTERM, lambda *_: self.request_stop())
+        signal.signal(signal.SIGINT, lambda *_: self.request_stop())
+
+        logger.info(f"Master {os.getpid()} serving http://{self.host}:{self.port} with {self.workers} workers")
+        self.generation = 1
+        self._spawn_generation(self.generation)
+        last_run = self._last_collection_run()
+        next_check = time.monotonic() + self.check_interval
+        try:
+            while not self._stop_requested:
+                time.sleep(0.5)
+                self._reap()
+                if self.reload_on_collection and time.monotonic() >= next_check:
+                    next_check = time.monotonic() + self.check_interval
+                    latest = self._last_collection_run()
+                    if latest != last_run:
+                        logger.info(f"Collection run recorded at {latest}; reloading workers")
+                        last_run = latest
+                        self._reload_requested = True
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self.reload()
+        finally:
+            self._stop_all()
+            self._socket.close()
+
+    def request_reload(self):
+        self._reload_requested = True
+
+    def request_stop(self):
+        self._stop_requested = True
+
+    def reload(self) -> bool:
+        """Start a new generation; retire the old one only once every new worker is warm"""
+        generation = self.generation + 1
+        pending = self._spawn_generation(generation)
+        if not self._wait_ready(pending):
+            logger.error(f"Generation {generation} did not become ready; keeping generation {self.generation}")
+            for pid in pending:
+                self._signal(pid, signal.SIGKILL)
+            return False
+        old = [pid for pid, gen in self._children.items() if gen != generation]
+        self.generation = generation
+        for pid in old:
+            self._signal(pid, signal.SIGTERM)
+        logger.info(f"Reloaded: generation {generation} serving, {len(old)} old workers draining")
+        return True
+
+    def _spawn_generation(self, generation: int) -> Dict[int, int]:
+        """pid -> read end of the worker's ready pipe"""
+        return dict(self._spawn(generation) for _ in range(self.workers))
+
+    def _spawn(self, generation: int):
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            code = 1
+            try:
+                self._worker(ready_write)
+                code = 0
+            except BaseException as e:
+                logger.error(f"Worker {os.getpid()} crashed: {e}")
+            finally:
+                os._exit(code)
+        os.close(ready_write)
+        self._children[pid] = generation
+        return pid, ready_read
+
+    def _wait_ready(self, pending: Dict[int, int]) -> bool:
+        import select
+
+        deadline = time.monotonic() + self.ready_timeout
+        ready = True
+        remaining = dict(pending)
+        while remaining and time.monotonic() < deadline:
+            readable, _, _ = select.select(list(remaining.values()), [], [], 0.5)
+            for pid, fd in list(remaining.items()):
+                if fd in readable:
+                    if not os.read(fd, 1):
+                        ready = False  # worker exited before signalling
+                    os.close(fd)
+                    del remaining[pid]
+        for fd in remaining.values():
+            os.close(fd)
+        return ready and not remaining
+
+    def _reap(self):
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            generation = self._children.pop(pid, None)
+            if generation == self.generation and not self._stop_requested:
+                logger.warning(f"Worker {pid} exited unexpectedly (status {status}); starting a replacement")
+                time.sleep(1)
+                _, fd = self._spawn(generation)
+                os.close(fd)
+
+    def _signal(self, pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            self._children.pop(pid, None)
+
+    def _stop_all(self):
+        for pid in list(self._children):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.2)
+        for pid in list(self._children):
+            self._signal(pid, signal.SIGKILL)
+        self._reap()
+
+    def _last_collection_run(self) -> Optional[str]:
+        if not self.db_path or not os.path.exists(self.db_path):
+            return None
+        try:
+            conn = sqlite3.connect(f"{Path(self.db_path).resolve().as_uri()}?mode=ro", uri=True)
+            try:
+                placeholders = ','.join('?' * len(COLLECTION_RUN_TYPES))
+                return conn.execute(f'SELECT MAX(recorded_date) FROM run_metrics WHERE run_type IN ({placeholders})',
+                                    COLLECTION_RUN_TYPES).fetchone()[0]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None  # no run recorded yet
+
+    # Worker
+
+    def _worker(self, ready_fd: int):
+        from werkzeug.serving import make_server
+
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C reaches the master, which drains workers
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+        # Warm this worker's pooled connections, SQLite page cache and figure caches before taking traffic
+        client = self.app.test_client()
+        for path in self.warm_paths:
+            try:
+                client.get(path)
+            except Exception as e:
+                logger.warning(f"Warm-up request {path} failed: {e}")
+
+        in_flight = _InFlight(self.app)
+        server = make_server(self.host, self.port, in_flight, threaded=True, fd=self._socket.fileno())
+        thread = threading.Thread(target=server.serve_forever, name='wsgi-server', daemon=True)
+        thread.start()
+        try:
+            os.write(ready_fd, b'1')
+        except OSError:
+            pass  # replacement workers are not waited on
+        os.close(ready_fd)
+
+        while not stop.wait(1.0):
+            pass
+
+        server.shutdown()
+        for hook in self.shutdown_hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.error(f"Shutdown hook failed: {e}")
+        deadline = time.monotonic() + self.graceful_timeout
+        while in_flight.count > 0 and time.monotonic() < deadline:
+            time.sleep(0.1)
+        server.server_close()
+        # Workers leave through os._exit, which skips atexit handlers
+        import query_log
+        query_log.QUERY_LOG.flush()
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Query Log
+Times every SQLite statement run through a LoggedConnection (fetching included),
+aggregates per-statement stats (calls, total, max, latency buckets for p95) and
+records statements slower than a threshold with their normalized SQL, parameters
+and EXPLAIN QUERY PLAN. Both are flushed to a small SQLite file next to the
+monitored database that scripts/query_stats.py reads; slow queries are only
+logged at DEBUG.
+
+    GOVMON_SLOW_QUERY_MS   slow threshold in milliseconds (default 100)
+    GOVMON_QUERY_STATS_DB  stats file (default <database>_query_stats.db beside the first database
+                           opened, 'off' keeps stats in memory only)
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import atexit
+import hashlib
+import sqlite3
+import functools
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_THRESHOLD_MS = 100.0
+STATS_SUFFIX = '_query_stats.db'
+
+# Latency buckets: upper bound of bucket i is BUCKET_BASE_MS * BUCKET_GROWTH ** i (0.01 ms to ~2 min)
+BUCKET_BASE_MS = 0.01
+BUCKET_GROWTH = 1.25
+BUCKET_COUNT = 74
+
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+MAX_SLOW_QUERIES = 10_000
+
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])\d+(?:\.\d+)?(?![\w.])')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+_SPACE = re.compile(r'\s+')
+
+# Frames skipped when attributing a statement to the code that issued it
+_INTERNAL_MODULES = ('query_log', 'db_pool', 'fast_json')
+
+@functools.lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> Tuple[str, str]:
+    """
+    (normalized SQL, fingerprint): comments dropped, whitespace collapsed, literals
+    replaced by ? and IN lists folded, so statements differing only in values group together
+    """
+    normalized = _COMMENT.sub(' ', sql)
+    normalized = _STRING.sub('?', normalized)
+    normalized = _NUMBER.sub('?', normalized)
+    normalized = _IN_LIST.sub('IN (...)', normalized)
+    normalized = _SPACE.sub(' ', normalized).strip()
+    return normalized, hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+def bucket_index(ms: float) -> int:
+    if ms <= BUCKET_BASE_MS:
+        return 0
+    return min(BUCKET_COUNT - 1, math.ceil(math.log(ms / BUCKET_BASE_MS, BUCKET_GROWTH)))
+
+def bucket_percentile(buckets: Dict, pct: float, max_ms: float = None) -> Optional[float]:
+    """Upper bound of the bucket holding the pct-th percentile (within 25%), capped at the observed max"""
+    counts = {int(index): count for index, count in buckets.items()}
+    total = sum(counts.values())
+    if not total:
+        return None
+    rank = math.ceil(pct / 100 * total)
+    seen = 0
+    for index in sorted(counts):
+        seen += counts[index]
+        if seen >= rank:
+            bound = BUCKET_BASE_MS * BUCKET_GROWTH ** index
+            return min(bound, max_ms) if max_ms is not None else bound
+    return max_ms
+
+def format_plan(rows: Sequence[tuple]) -> str:
+    """EXPLAIN QUERY PLAN rows (id, parent, notused, detail) as an indented tree"""
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return '\n'.join(lines)
+
+def stats_path_for(database: str) -> Optional[str]:
+    """Stats file beside a database path or file: URI (government_monitor.db -> government_monitor_query_stats.db)"""
+    if database.startswith('file:'):
+        database = database[len('file:'):].split('?', 1)[0]
+        if database.startswith('//'):
+            database = database[2:]
+    if not database or database == ':memory:':
+        return None
+    root, _ = os.path.splitext(os.path.abspath(database))
+    return root + STATS_SUFFIX
+
+def _caller_name() -> str:
+    """Qualified name of the first frame outside the logging/pooling/pandas layers"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__') or ''
+        if module not in _INTERNAL_MODULES and not module.startswith('pandas'):
+            break
+        frame = frame.f_back
+    if frame is None:
+        return 'unknown'
+    code = frame.f_code
+    return getattr(code, 'co_qualname', code.co_name)
+
+def _logger():
+    # logging alone roughly doubles this module's import time, and view_contracts.py is meant to start instantly
+    import logging
+    return logging.getLogger(__name__)
+
+def _format_params(params) -> str:
+    try:
+        text = json.dumps(params, default=str)
+    except (TypeError, ValueError):
+        text = repr(params)
+    return text if len(text) <= 1000 else text[:1000] + '...'
+
+class QueryLog:
+    """
+    Process-wide statement stats and slow-query buffer, flushed to `path` every flush_interval seconds.
+    Without a path (argument or GOVMON_QUERY_STATS_DB) it is placed beside the first database bound
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold_ms: Optional[float] = None,
+                 flush_interval: float = 30.0, plan_ttl: float = 300.0):
+        if path is None:
+            path = os.environ.get('GOVMON_QUERY_STATS_DB')
+        if threshold_ms is None:
+            threshold_ms = float(os.environ.get('GOVMON_SLOW_QUERY_MS', DEFAULT_THRESHOLD_MS))
+        self._unbound = path is None
+        self.path = None
+        self.threshold_ms = threshold_ms
+        self.flush_interval = flush_interval
+        self.plan_ttl = plan_ttl
+        self._reset()
+        if path not in (None, '', 'off'):
+            self._set_path(os.path.abspath(path))
+        if hasattr(os, 'register_at_fork'):
+            # Forked pool workers must not flush the parent's pending stats a second time
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _set_path(self, path: str):
+        self.path = path
+        atexit.register(self.flush)
+
+    def bind(self, database: str):
+        """Use the stats file beside database, unless a path was configured or already chosen"""
+        if self._unbound:
+            self._unbound = False
+            path = stats_path_for(database)
+            if path:
+                self._set_path(path)
+
+    def _reset(self):
+        self._stats: Dict[str, Dict] = {}
+        self._slow: List[tuple] = []
+        self._plans: Dict[str, Tuple[float, str]] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, conn: sqlite3.Connection, sql: str, params, caller: str, seconds: float):
+        normalized, fingerprint = normalize_sql(sql)
+        ms = seconds * 1000
+        slow = ms >= self.threshold_ms
+        with self._lock:
+            stat = self._stats.get(fingerprint)
+            if stat is None:
+                stat = self._stats[fingerprint] = {'sql': normalized, 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                                   'slow_calls': 0, 'buckets': {}, 'caller': caller,
+                                                   'first_seen': datetime.now().isoformat()}
+            stat['calls'] += 1
+            stat['total_ms'] += ms
+            stat['max_ms'] = max(stat['max_ms'], ms)
+            stat['slow_calls'] += slow
+            stat['caller'] = caller
+            index = bucket_index(ms)
+            stat['buckets'][index] = stat['buckets'].get(index, 0) + 1
+
+        if slow:
+            plan = self._plan(conn, sql, params, fingerprint)
+            params_text = _format_params(params)
+            # Kept in the stats file for query_stats.py; a log line per slow statement would flood stderr
+            _logger().debug(f"Slow query ({ms:.1f} ms) in {caller}: {normalized} params={params_text}"
+                            + (f"\n{plan}" if plan else ''))
+            with self._lock:
+                self._slow.append((datetime.now().isoformat(), fingerprint, normalized, sql[:10_000],
+                                   params_text, round(ms, 3), caller, plan))
+
+        if self.path and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _plan(self, conn: sqlite3.Connection, sql: str, params, fingerprint: str) -> Optional[str]:
+        """EXPLAIN QUERY PLAN on the same connection (temp tables stay visible), cached per statement"""
+        if not sql.lstrip().upper().startswith(EXPLAINABLE):
+            return None
+        cached = self._plans.get(fingerprint)
+        if cached and time.monotonic() - cached[0] < self.plan_ttl:
+            return cached[1]
+        if getattr(conn, '_pool', None) is not None and not conn._checked_out:
+            return None  # already handed back to the pool; another thread may be using it
+        try:
+            rows = sqlite3.Connection.cursor(conn).execute('EXPLAIN QUERY PLAN ' + sql, params or ()).fetchall()
+        except (sqlite3.Error, ValueError) as e:
+            _logger().debug(f"Could not explain {fingerprint}: {e}")
+            return None
+        plan = format_plan(rows)
+        self._plans[fingerprint] = (time.monotonic(), plan)
+        return plan
+
+    @staticmethod
+    def init_tables(conn: sqlite3.Connection):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS query_stats (
+                fingerprint TEXT PRIMARY KEY,
+                normalized_sql TEXT,
+                calls INTEGER,
+                total_ms REAL,
+                max_ms REAL,
+                slow_calls INTEGER,
+                buckets TEXT,
+                last_caller TEXT,
+                first_seen TEXT,
+                last_seen TEXT
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS slow_queries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                logged_at TEXT,
+                fingerprint TEXT,
+                normalized_sql TEXT,
+                sql TEXT,
+                params TEXT,
+                duration_ms REAL,
+                caller TEXT,
+                query_plan TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_slow_queries_fingerprint ON slow_queries (fingerprint, id)')
+
+    def flush(self):
+        """Merge pending stats and slow queries into the stats file"""
+        with self._lock:
+            stats, self._stats = self._stats, {}
+            slow, self._slow = self._slow, []
+            self._last_flush = time.monotonic()
+        if not self.path or not (stats or slow):
+            return
+
+        now = datetime.now().isoformat()
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            self.init_tables(conn)
+            conn.execute('BEGIN IMMEDIATE')
+            for fingerprint, stat in stats.items():
+                row = conn.execute('SELECT calls, total_ms, max_ms, slow_calls, buckets, first_seen '
+                                   'FROM query_stats WHERE fingerprint = ?', (fingerprint,)).fetchone()
+                buckets = {str(index): count for index, count in stat['buckets'].items()}
+                calls, total_ms, max_ms, slow_calls = stat['calls'], stat['total_ms'], stat['max_ms'], stat['slow_calls']
+                first_seen = stat['first_seen']
+                if row:
+                    for index, count in json.loads(row[4]).items():
+                        buckets[index] = buckets.get(index, 0) + count
+                    calls += row[0]
+                    total_ms += row[1]
+                    max_ms = max(max_ms, row[2])
+                    slow_calls += row[3]
+                    first_seen = row[5]
+                conn.execute('''
+                    INSERT OR REPLACE INTO query_stats
+                    (fingerprint, normalized_sql, calls, total_ms, max_ms, slow_calls, buckets,
+                     last_caller, first_seen, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (fingerprint, stat['sql'], calls, total_ms, max_ms, slow_calls,
+                      json.dumps(buckets, sort_keys=True), stat['caller'], first_seen, now))
+            if slow:
+                conn.executemany('''
+                    INSERT INTO slow_queries
+                    (logged_at, fingerprint, normalized_sql, sql, params, duration_ms, caller, query_plan)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', slow)
+                conn.execute('DELETE FROM slow_queries WHERE id <= (SELECT MAX(id) FROM slow_queries) - ?',
+                             (MAX_SLOW_QUERIES,))
+            conn.commit()
+        except sqlite3.Error as e:
+            # Statistics must never break the queries they describe
+            _logger().error(f"Could not flush query stats to {self.path}: {e}")
+        finally:
+            conn.close()
+
+QUERY_LOG = QueryLog()
+
+class LoggedCursor(sqlite3.Cursor):
+    """
+    Cursor timing each statement from execute() until its rows are exhausted (or the cursor
+    is reused, closed or dropped), so SELECTs are charged for fetching as well as stepping
+    """
+
+    _pending = None
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        self.connection._route(sql, parameters)
+        caller = _caller_name()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._pending = [sql, parameters, caller, time.perf_counter() - start]
+            if self.description is None:
+                self._finish()
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        self.connection._route(sql, ())
+        caller = _caller_name()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._pending = [sql, (), caller, time.perf_counter() - start]
+            self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._charge(start, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._charge(start, not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._charge(start, True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._charge(start, True)
+            raise
+        self._charge(start, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass  # interpreter shutdown
+
+    def _charge(self, start: float, done: bool):
+        if self._pending is not None:
+            self._pending[3] += time.perf_counter() - start
+            if done:
+                self._finish()
+
+    def _finish(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            self.connection._observe(*pending)
+
+class LoggedConnection(sqlite3.Connection):
+    """sqlite3.Connection whose statements all go through LoggedCursor"""
+
+    _router = None
+
+    def _route(self, sql: str, params):
+        # Reads of contracts union in the fiscal-year archives their date bounds need (partitions.py)
+        if self._router is None:
+            from partitions import PartitionRouter
+            self._router = PartitionRouter()
+        self._router.route(self, sql, params)
+
+    def _observe(self, sql: str, params, caller: str, seconds: float):
+        QUERY_LOG.record(self, sql, params, caller, seconds)
+
+    def cursor(self, factory=LoggedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        # Connection.execute would bypass LoggedCursor.execute, so go through cursor()
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def connect(database: str, **kwargs) -> LoggedConnection:
+    """sqlite3.connect() returning a LoggedConnection"""
+    QUERY_LOG.bind(database)
+    return sqlite3.connect(database, factory=LoggedConnection, **kwargs)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Run Metrics
+Per-phase and per-source instrumentation for collection and analysis runs:
+wall and CPU time, HTTP requests/bytes, rows written, DB time and peak RSS,
+persisted to a run_metrics table and exportable as Chrome trace-event JSON
+(chrome://tracing, Perfetto, speedscope)
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('wall_seconds', 'cpu_seconds', 'http_requests', 'http_bytes', 'rows_written', 'db_seconds', 'items')
+
+def peak_rss_mb() -> Optional[float]:
+    """Process high-water RSS so far (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+class RunMetrics:
+    """
+    Thread-safe accumulator keyed by (phase, source). source is '' for phase-level rows.
+    Phases may run concurrently on different threads; CPU time is measured per thread.
+    """
+
+    def __init__(self, run_type: str, db_path: str = "government_monitor.db"):
+        self.run_type = run_type
+        self.db_path = db_path
+        self.run_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.started = time.time()
+        self._origin = time.perf_counter()
+        self._entries: Dict[tuple, Dict[str, Any]] = {}
+        self._spans: List[Dict[str, Any]] = []
+        self._attached_hooks = []
+        self._lock = threading.Lock()
+
+    def _entry(self, phase: str, source: str) -> Dict[str, Any]:
+        key = (phase, source or '')
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = {'phase': phase, 'source': source or '', 'started': None, 'peak_rss_mb': None}
+            entry.update({counter: 0 for counter in COUNTERS})
+            self._entries[key] = entry
+        return entry
+
+    def add(self, phase: str, source: str = '', **counters):
+        """Increment counters (any of COUNTERS) for a phase/source"""
+        with self._lock:
+            entry = self._entry(phase, source)
+            for name, value in counters.items():
+                entry[name] += value
+
+    @contextmanager
+    def measure(self, phase: str, source: str = '', process_cpu: bool = False, **args):
+        """
+        Time a block: wall and CPU time accumulate into (phase, source) and a trace span is recorded.
+        CPU is the calling thread's unless process_cpu is set (for phases that fan out to threads).
+        """
+        cpu_clock = time.process_time if process_cpu else time.thread_time
+        start_wall = time.perf_counter()
+        start_cpu = cpu_clock()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = cpu_clock() - start_cpu
+            rss = peak_rss_mb()
+            with self._lock:
+                entry = self._entry(phase, source)
+                if entry['started'] is None:
+                    entry['started'] = datetime.fromtimestamp(self.started + start_wall - self._origin).isoformat()
+                entry['wall_seconds'] += wall
+                entry['cpu_seconds'] += cpu
+                entry['peak_rss_mb'] = rss
+                self._spans.append({
+                    'name': f"{phase}:{source}" if source else phase,
+                    'cat': phase,
+                    'start': start_wall - self._origin,
+                    'duration': wall,
+                    'tid': threading.get_ident(),
+                    'thread': threading.current_thread().name,
+                    'args': dict(args, cpu_seconds=round(cpu, 6))
+                })
+
+    def http_hook(self, source: str, phase: str = 'fetch'):
+        """requests response hook counting requests and body bytes for a source"""
+        def hook(response, *args, **kwargs):
+            # Reading .content here is what Session.send does next anyway, except for streamed bodies
+            if kwargs.get('stream'):
+                size = int(response.headers.get('Content-Length') or 0)
+            else:
+                size = len(response.content)
+            self.add(phase, source, http_requests=1, http_bytes=size)
+            return response
+        return hook
+
+    def instrument_session(self, session, source: str, phase: str = 'fetch'):
+        hook = self.http_hook(source, phase)
+        session.hooks.setdefault('response', []).append(hook)
+        self._attached_hooks.append((session, hook))
+
+    def instrument_collector(self, collector, phase_source: str):
+        """
+        Attach HTTP hooks to every requests.Session a collector holds: its own session is
+        attributed to phase_source, sub-collectors' sessions to their attribute names
+        """
+        import requests
+
+        for name, value in vars(collector).items():
+            if isinstance(value, requests.Session):
+                self.instrument_session(value, phase_source)
+            elif isinstance(getattr(value, 'session', None), requests.Session):
+                self.instrument_session(value.session, name)
+
+    def detach(self):
+        """Remove this run's HTTP hooks; long-lived collectors outlive a single run"""
+        for session, hook in self._attached_hooks:
+            try:
+                session.hooks['response'].remove(hook)
+            except (KeyError, ValueError):
+                pass
+        self._attached_hooks = []
+
+    def finish(self, trace_path: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Detach hooks, persist the rows and optionally write the trace; returns the rows"""
+        self.detach()
+        rows = self.save()
+        if trace_path:
+            self.export_trace(trace_path)
+        return rows
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        """One row per phase/source, phase-level rows first"""
+        with self._lock:
+            rows = [dict(entry) for entry in self._entries.values()]
+        for row in rows:
+            row['wall_seconds'] = round(row['wall_seconds'], 3)
+            row['cpu_seconds'] = round(row['cpu_seconds'], 3)
+            row['db_seconds'] = round(row['db_seconds'], 3)
+        return sorted(rows, key=lambda row: (row['source'] != '', row['started'] or '', row['phase'], row['source']))
+
+    @staticmethod
+    def init_table(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS run_metrics (
+                run_id TEXT,
+                run_type TEXT,
+                phase TEXT,
+                source TEXT,
+                started TEXT,
+                wall_seconds REAL,
+                cpu_seconds REAL,
+                http_requests INTEGER,
+                http_bytes INTEGER,
+                rows_written INTEGER,
+                db_seconds REAL,
+                items INTEGER,
+                peak_rss_mb REAL,
+                recorded_date TEXT,
+                PRIMARY KEY (run_id, phase, source)
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_run_metrics_type_date ON run_metrics (run_type, recorded_date)')
+
+    def save(self) -> List[Dict[str, Any]]:
+        """Persist every phase/source row and return them"""
+        rows = self.to_dict()
+        recorded = datetime.now().isoformat()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self.init_table(conn)
+            conn.executemany('''
+                INSERT OR REPLACE INTO run_metrics
+                (run_id, run_type, phase, source, started, wall_seconds, cpu_seconds, http_requests,
+                 http_bytes, rows_written, db_seconds, items, peak_rss_mb, recorded_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(self.run_id, self.run_type, row['phase'], row['source'], row['started'],
+                   row['wall_seconds'], row['cpu_seconds'], row['http_requests'], row['http_bytes'],
+                   row['rows_written'], row['db_seconds'], row['items'], row['peak_rss_mb'], recorded)
+                  for row in rows])
+            conn.commit()
+        except sqlite3.Error as e:
+            # Metrics must never fail the run they describe
+            logger.error(f"Could not save run metrics for {self.run_id}: {e}")
+        finally:
+            conn.close()
+        return rows
+
+    def export_trace(self, path: str) -> str:
+        """Write Chrome trace-event JSON (complete 'X' events, microseconds) for the recorded spans"""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self._spans)
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': f"{self.run_type} {self.run_id}"}}]
+        for tid, thread_name in {span['tid']: span['thread'] for span in spans}.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': thread_name}})
+        for span in spans:
+            events.append({
+                'name': span['name'],
+                'cat': span['cat'],
+                'ph': 'X',
+                'ts': round(span['start'] * 1_000_000),
+                'dur': round(span['duration'] * 1_000_000),
+                'pid': pid,
+                'tid': span['tid'],
+                'args': span['args']
+            })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        logger.info(f"Wrote trace for run {self.run_id} to {path}")
+        return path
@@ -8,13 +8,26 @@ Pattern analysis tool for independent verification and oversight
 import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 import logging
 import re
-from dataclasses import dataclass
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict
+from streaming_detector import AccumulationWindow
+from incremental_analysis import IncrementalAnalysis
+from baselines import BaselineStore, Baselines
+from run_metrics import RunMetrics
+import query_log
 
 logger = logging.getLogger(__name__)
 
+# "Large" means above these percentiles of the award's agency/award-type baseline; the
+# dollar amounts are used while an agency has too few awards for a baseline
+EMERGENCY_LARGE_PERCENTILE, EMERGENCY_LARGE_AMOUNT = 0.99, 100_000_000
+PATRIOTISM_LARGE_PERCENTILE, PATRIOTISM_LARGE_AMOUNT = 0.95, 50_000_000
+
 @dataclass
 class ScenarioAlert:
     scenario_type: str
@@ -25,12 +38,65 @@ class ScenarioAlert:
     pattern_detected: str
     evidence: List[str]
     risk_score: int
+    award_id: Optional[str] = None
+
+# Candidate filters per scenario; matching rows are scored by ScenarioMonitor._score_<scenario>
+SCENARIO_FILTERS = {
+    # Look for emergency contracts with specific patterns
+    'national_emergency': '''
+                LOWER(description) LIKE '%emergency%' OR
+                LOWER(description) LIKE '%border%' OR
+                LOWER(description) LIKE '%cybersecurity%' OR
+                LOWER(description) LIKE '%food security%' OR
+                LOWER(competition_type) LIKE '%sole%source%' OR
+                LOWER(competition_type) LIKE '%no%bid%'
+    ''',
+    # Look for "Buy American" and infrastructure contracts
+    'economic_patriotism': '''
+                LOWER(description) LIKE '%buy american%' OR
+                LOWER(description) LIKE '%infrastructure%' OR
+                LOWER(description) LIKE '%energy independence%' OR
+                LOWER(description) LIKE '%manufacturing%' OR
+                LOWER(description) LIKE '%domestic%'
+    ''',
+    # Look for data/information/media contracts
+    'information_sovereignty': '''
+                LOWER(description) LIKE '%data%' OR
+                LOWER(description) LIKE '%information%' OR
+                LOWER(description) LIKE '%social media%' OR
+                LOWER(description) LIKE '%platform%' OR
+                LOWER(description) LIKE '%educational%' OR
+                LOWER(description) LIKE '%media%' OR
+                LOWER(description) LIKE '%communication%'
+    ''',
+    # Look for financial services contracts
+    'financial_consolidation': '''
+                LOWER(description) LIKE '%financial%' OR
+                LOWER(description) LIKE '%banking%' OR
+                LOWER(description) LIKE '%payment%' OR
+                LOWER(description) LIKE '%crypto%' OR
+                LOWER(description) LIKE '%currency%' OR
+                LOWER(awarding_agency) LIKE '%treasury%' OR
+                LOWER(awarding_agency) LIKE '%federal reserve%'
+    '''
+}
 
 class ScenarioMonitor:
     """Monitor for unusual contracting patterns and anomalies"""
     
-    def __init__(self, db_path: str = "government_monitor.db", custom_watchlist: List[str] = None):
+    def __init__(self, db_path: str = "government_monitor.db", custom_watchlist: List[str] = None,
+                 workers: int = 1, partition_by: str = 'month'):
         self.db_path = db_path
+        # workers > 1 evaluates full passes in a process pool, one task per month (or agency) slice
+        if partition_by not in ('month', 'agency'):
+            raise ValueError("partition_by must be 'month' or 'agency'")
+        self.workers = workers
+        self.partition_by = partition_by
+        self.last_changed_alerts: Dict[str, List[ScenarioAlert]] = {}
+        # Per-agency amount baselines, reloaded at the start of every scoring pass
+        self.baselines = Baselines({})
+        # Per-scenario timing rows of the last run_full_scenario_analysis (also saved to run_metrics)
+        self.last_run_metrics: List[Dict] = []
         
         # User-configurable watchlist (optional)
         # Users can provide their own list of companies to monitor
@@ -65,371 +131,477 @@ class ScenarioMonitor:
             'urgent requirement', 'national emergency', 'executive order'
         ]
     
-    def analyze_scenario_1_national_emergency(self) -> List[ScenarioAlert]:
-        """Detect 'National Emergency' acceleration patterns"""
-        alerts = []
-        
-        conn = sqlite3.connect(self.db_path)
-        
-        # Look for emergency contracts with specific patterns
-        query = '''
+    def _fetch_scenario_rows(self, conn, scenario: str, scope_sql: str = '', params: tuple = ()) -> pd.DataFrame:
+        """Candidate contracts for a scenario in the 180-day window, optionally narrowed by extra SQL"""
+        query = f'''
             SELECT recipient_name, award_amount, awarding_agency, award_date,
-                   competition_type, description, award_id
+                   competition_type, description, award_id, award_type
             FROM contracts 
-            WHERE (
-                LOWER(description) LIKE '%emergency%' OR
-                LOWER(description) LIKE '%border%' OR
-                LOWER(description) LIKE '%cybersecurity%' OR
-                LOWER(description) LIKE '%food security%' OR
-                LOWER(competition_type) LIKE '%sole%source%' OR
-                LOWER(competition_type) LIKE '%no%bid%'
-            )
+            WHERE ({SCENARIO_FILTERS[scenario]})
             AND award_date >= date('now', '-180 days')
-            ORDER BY award_amount DESC
+            {scope_sql}
+            ORDER BY award_amount DESC, award_id
         '''
-        
-        df = pd.read_sql_query(query, conn)
+        return pd.read_sql_query(query, conn, params=params)
+    
+    def _scenario_rows(self, conn, scenario: str, scope_sql: str = '',
+                       params: tuple = ()) -> List[Tuple[str, str, float, ScenarioAlert]]:
+        """Score a scenario over the (optionally narrowed) window as (key, award_date, sort_value, alert) rows"""
+        rows = []
+        if scenario == 'connected_accumulation':
+            for _, row in self._fetch_accumulation_rows(conn, scope_sql, params).iterrows():
+                total = float(row['total_amount'] or 0)
+                alert = self.score_connected_accumulation(row['recipient_name'], int(row['contract_count']), total)
+                if alert:
+                    rows.append((str(row['entity_id']), row['last_contract'], total, alert))
+            return rows
+        
+        scorer = getattr(self, f'_score_{scenario}')
+        self.baselines = BaselineStore(self.db_path).load(conn)
+        for _, row in self._fetch_scenario_rows(conn, scenario, scope_sql, params).iterrows():
+            alert = scorer(row)
+            if alert:
+                alert.amount = float(alert.amount)
+                rows.append((alert.award_id, row['award_date'], alert.amount, alert))
+        return rows
+    
+    def _evaluate(self, scenario: str, pool: Optional[ProcessPoolExecutor] = None
+                  ) -> List[Tuple[str, str, float, ScenarioAlert]]:
+        """Full-window rows for a scenario, fanned out over the process pool when workers > 1"""
+        if self.workers > 1 and scenario != 'connected_accumulation':
+            return self._evaluate_parallel([scenario], pool)[scenario]
+        conn = query_log.connect(self.db_path)
+        try:
+            return self._scenario_rows(conn, scenario)
+        finally:
+            conn.close()
+    
+    def _partitions(self) -> List[Tuple[str, tuple]]:
+        """Disjoint (scope_sql, params) slices that together cover the 180-day window"""
+        conn = query_log.connect(self.db_path)
+        if self.partition_by == 'agency':
+            agencies = [row[0] for row in conn.execute('''
+                SELECT DISTINCT awarding_agency FROM contracts WHERE award_date >= date('now', '-180 days')
+            ''')]
+            conn.close()
+            return [('AND awarding_agency IS ?', (agency,)) for agency in agencies]
+        
+        # Month boundaries after the window start; the first and last slices are open-ended
+        # so awards before the first boundary (already bounded by the window) and future-dated
+        # awards are still covered exactly once
+        boundaries = [row[0] for row in conn.execute('''
+            WITH RECURSIVE months(m) AS (
+                SELECT date('now', '-180 days', 'start of month', '+1 month')
+                UNION ALL
+                SELECT date(m, '+1 month') FROM months WHERE m <= date('now')
+            )
+            SELECT m FROM months
+        ''')]
         conn.close()
-        
-        for _, row in df.iterrows():
-            evidence = []
-            risk_score = 0
-            
-            # Check for custom watchlist companies (if configured)
-            company_upper = row['recipient_name'].upper()
-            if self.custom_watchlist and any(watched in company_upper for watched in self.custom_watchlist):
-                evidence.append("Company on custom watchlist")
-                risk_score += 30
-            
-            # Check for emergency procurement
-            desc_lower = str(row['description']).lower()
-            comp_lower = str(row['competition_type']).lower()
-            
-            if any(keyword in desc_lower for keyword in self.emergency_keywords):
-                evidence.append("Contract justified by emergency/crisis language")
-                risk_score += 30
-            
-            if any(pattern in comp_lower for pattern in self.no_bid_patterns):
-                evidence.append("No-bid or sole-source procurement")
-                risk_score += 35
-            
-            # Large contract amount
-            if row['award_amount'] > 100_000_000:  # >$100M
-                evidence.append(f"Large contract amount: ${row['award_amount']:,.0f}")
-                risk_score += 20
-            
-            # Create alert if risk score is high enough
-            if risk_score >= 50 and evidence:
-                alert = ScenarioAlert(
-                    scenario_type="National Emergency Acceleration",
-                    severity="HIGH" if risk_score >= 80 else "MEDIUM",
-                    company=row['recipient_name'],
-                    amount=row['award_amount'],
-                    agency=row['awarding_agency'],
-                    pattern_detected="Emergency procurement bypassing normal competition",
-                    evidence=evidence,
-                    risk_score=risk_score
-                )
-                alerts.append(alert)
-        
-        return alerts
+        partitions = [('AND award_date < ?', (boundaries[0],))]
+        for start, end in zip(boundaries, boundaries[1:]):
+            partitions.append(('AND award_date >= ? AND award_date < ?', (start, end)))
+        partitions.append(('AND award_date >= ?', (boundaries[-1],)))
+        return partitions
     
-    def analyze_scenario_2_economic_patriotism(self) -> List[ScenarioAlert]:
-        """Detect 'Economic Patriotism' trap patterns"""
-        alerts = []
+    def _evaluate_parallel(self, scenarios: List[str], pool: Optional[ProcessPoolExecutor] = None
+                           ) -> Dict[str, List[Tuple[str, str, float, ScenarioAlert]]]:
+        """
+        Run each per-award scenario on every partition in a process pool and merge in single-process
+        order. Pass the run's pool to reuse it; without one a pool is started just for this call.
+        """
+        if pool is None:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                return self._evaluate_parallel(scenarios, pool)
+        partitions = self._partitions()
+        results = {scenario: [] for scenario in scenarios}
+        
+        futures = {}
+        for scenario in scenarios:
+            # Per-recipient aggregates can't be split by month/agency, so it runs as one task
+            scopes = [('', ())] if scenario == 'connected_accumulation' else partitions
+            for scope_sql, params in scopes:
+                future = pool.submit(_evaluate_partition, self, scenario, scope_sql, params)
+                futures[future] = scenario
+        for future in as_completed(futures):
+            results[futures[future]].extend(future.result())
+        
+        for scenario, rows in results.items():
+            if scenario != 'connected_accumulation':
+                # Same order as ORDER BY award_amount DESC, award_id (NULL amounts last)
+                rows.sort(key=lambda row: (-row[2] if row[2] == row[2] else float('inf'), row[0]))
+        return results
+    
+    def _run_scenario(self, scenario: str) -> List[ScenarioAlert]:
+        return [alert for *_, alert in self._evaluate(scenario)]
+    
+    def _size_note(self, row) -> str:
+        rank = self.baselines.percentile_rank(row['awarding_agency'], row['award_type'], row['award_amount'])
+        return f" ({rank * 100:.1f}th percentile for the agency)" if rank is not None else ''
+    
+    def _score_national_emergency(self, row) -> Optional[ScenarioAlert]:
+        evidence = []
+        risk_score = 0
+        
+        # Check for custom watchlist companies (if configured)
+        company_upper = row['recipient_name'].upper()
+        if self.custom_watchlist and any(watched in company_upper for watched in self.custom_watchlist):
+            evidence.append("Company on custom watchlist")
+            risk_score += 30
+        
+        # Check for emergency procurement
+        desc_lower = str(row['description']).lower()
+        comp_lower = str(row['competition_type']).lower()
+        
+        if any(keyword in desc_lower for keyword in self.emergency_keywords):
+            evidence.append("Contract justified by emergency/crisis language")
+            risk_score += 30
+        
+        if any(pattern in comp_lower for pattern in self.no_bid_patterns):
+            evidence.append("No-bid or sole-source procurement")
+            risk_score += 35
+        
+        # Large contract amount for this agency and award type (top 1%)
+        if self.baselines.is_large(row['awarding_agency'], row['award_type'], row['award_amount'],
+                                   EMERGENCY_LARGE_PERCENTILE, EMERGENCY_LARGE_AMOUNT):
+            evidence.append(f"Large contract amount: ${row['award_amount']:,.0f}{self._size_note(row)}")
+            risk_score += 20
+        
+        # Create alert if risk score is high enough
+        if risk_score >= 50 and evidence:
+            return ScenarioAlert(
+                scenario_type="National Emergency Acceleration",
+                severity="HIGH" if risk_score >= 80 else "MEDIUM",
+                company=row['recipient_name'],
+                amount=row['award_amount'],
+                agency=row['awarding_agency'],
+                pattern_detected="Emergency procurement bypassing normal competition",
+                evidence=evidence,
+                risk_score=risk_score,
+                award_id=row['award_id']
+            )
         
-        conn = sqlite3.connect(self.db_path)
+        return None
+    
+    def _score_economic_patriotism(self, row) -> Optional[ScenarioAlert]:
+        evidence = []
+        risk_score = 0
+        
+        # Check for connected companies getting "patriotic" contracts
+        company_upper = row['recipient_name'].upper()
+        desc_lower = str(row['description']).lower()
+        
+        # Patriotic branding
+        patriotic_keywords = ['american', 'patriot', 'freedom', 'independence', 'domestic']
+        if any(keyword in desc_lower for keyword in patriotic_keywords):
+            evidence.append("Contract uses patriotic/nationalist branding")
+            risk_score += 25
+        
+        # Large (top 5% for the agency) infrastructure or manufacturing deals
+        if (any(word in desc_lower for word in ['infrastructure', 'manufacturing', 'energy']) and
+                self.baselines.is_large(row['awarding_agency'], row['award_type'], row['award_amount'],
+                                        PATRIOTISM_LARGE_PERCENTILE, PATRIOTISM_LARGE_AMOUNT)):
+            evidence.append(f"Large infrastructure/manufacturing contract{self._size_note(row)}")
+            risk_score += 30
+        
+        # Check for monopolistic advantages
+        if 'exclusive' in desc_lower or 'sole' in desc_lower:
+            evidence.append("Contract grants exclusive or monopolistic rights")
+            risk_score += 35
+        
+        if risk_score >= 40 and evidence:
+            return ScenarioAlert(
+                scenario_type="Economic Patriotism Trap",
+                severity="MEDIUM" if risk_score >= 60 else "LOW",
+                company=row['recipient_name'],
+                amount=row['award_amount'],
+                agency=row['awarding_agency'],
+                pattern_detected="Patriotic branding masking preferential treatment",
+                evidence=evidence,
+                risk_score=risk_score,
+                award_id=row['award_id']
+            )
         
-        # Look for "Buy American" and infrastructure contracts
-        query = '''
-            SELECT recipient_name, award_amount, awarding_agency, award_date,
-                   competition_type, description, award_id
-            FROM contracts 
-            WHERE (
-                LOWER(description) LIKE '%buy american%' OR
-                LOWER(description) LIKE '%infrastructure%' OR
-                LOWER(description) LIKE '%energy independence%' OR
-                LOWER(description) LIKE '%manufacturing%' OR
-                LOWER(description) LIKE '%domestic%'
+        return None
+    
+    def _score_information_sovereignty(self, row) -> Optional[ScenarioAlert]:
+        evidence = []
+        risk_score = 0
+        
+        company_upper = row['recipient_name'].upper()
+        desc_lower = str(row['description']).lower()
+        
+        # Check for tech sector companies
+        if any(tech_co in company_upper for tech_co in self.tech_sector_companies):
+            evidence.append("Contract with major tech sector company")
+            risk_score += 35
+        
+        # Check for custom watchlist platforms (if configured)
+        if self.custom_watchlist and any(watched_co in company_upper for watched_co in self.custom_watchlist):
+            evidence.append("Contract with watchlist company")
+            risk_score += 35
+        
+        # Data sovereignty language
+        sovereignty_keywords = ['american data', 'data sovereignty', 'protect data', 'information security']
+        if any(keyword in desc_lower for keyword in sovereignty_keywords):
+            evidence.append("Uses data sovereignty/protection justification")
+            risk_score += 30
+        
+        # Educational or media contracts
+        if any(word in desc_lower for word in ['education', 'school', 'media', 'journalism']):
+            evidence.append("Involves education or media sector")
+            risk_score += 25
+        
+        if risk_score >= 45 and evidence:
+            return ScenarioAlert(
+                scenario_type="Information Sovereignty Gambit",
+                severity="HIGH" if risk_score >= 70 else "MEDIUM",
+                company=row['recipient_name'],
+                amount=row['award_amount'],
+                agency=row['awarding_agency'],
+                pattern_detected="Data/platform consolidation under sovereignty pretext",
+                evidence=evidence,
+                risk_score=risk_score,
+                award_id=row['award_id']
             )
-            AND award_date >= date('now', '-180 days')
-            ORDER BY award_amount DESC
-        '''
         
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        return None
+    
+    def _score_financial_consolidation(self, row) -> Optional[ScenarioAlert]:
+        evidence = []
+        risk_score = 0
+        
+        company_upper = row['recipient_name'].upper()
+        desc_lower = str(row['description']).lower()
+        
+        # Check for major financial institutions
+        if any(fin_co in company_upper for fin_co in self.financial_sector_companies):
+            evidence.append("Contract with major financial institution")
+            risk_score += 35
+        
+        # Populist branding with financial consolidation
+        populist_keywords = ['small town', 'community', 'local', 'main street', 'working families']
+        if any(keyword in desc_lower for keyword in populist_keywords):
+            evidence.append("Uses populist branding")
+            risk_score += 25
+        
+        # Regulatory advantage language
+        if any(word in desc_lower for word in ['regulation', 'compliance', 'oversight', 'exclusive']):
+            evidence.append("Involves regulatory or compliance advantages")
+            risk_score += 30
+        
+        # Cryptocurrency/digital currency
+        if any(word in desc_lower for word in ['crypto', 'digital currency', 'blockchain']):
+            evidence.append("Involves cryptocurrency or digital currency")
+            risk_score += 25
+        
+        if risk_score >= 40 and evidence:
+            return ScenarioAlert(
+                scenario_type="Financial Security Consolidation",
+                severity="MEDIUM" if risk_score >= 60 else "LOW",
+                company=row['recipient_name'],
+                amount=row['award_amount'],
+                agency=row['awarding_agency'],
+                pattern_detected="Financial consolidation under security/populist pretext",
+                evidence=evidence,
+                risk_score=risk_score,
+                award_id=row['award_id']
+            )
         
-        for _, row in df.iterrows():
-            evidence = []
-            risk_score = 0
-            
-            # Check for connected companies getting "patriotic" contracts
-            company_upper = row['recipient_name'].upper()
-            desc_lower = str(row['description']).lower()
-            
-            # Patriotic branding
-            patriotic_keywords = ['american', 'patriot', 'freedom', 'independence', 'domestic']
-            if any(keyword in desc_lower for keyword in patriotic_keywords):
-                evidence.append("Contract uses patriotic/nationalist branding")
-                risk_score += 25
-            
-            # Large infrastructure or manufacturing deals
-            if row['award_amount'] > 50_000_000 and any(word in desc_lower for word in ['infrastructure', 'manufacturing', 'energy']):
-                evidence.append("Large infrastructure/manufacturing contract")
-                risk_score += 30
-            
-            # Check for monopolistic advantages
-            if 'exclusive' in desc_lower or 'sole' in desc_lower:
-                evidence.append("Contract grants exclusive or monopolistic rights")
-                risk_score += 35
-            
-            if risk_score >= 40 and evidence:
-                alert = ScenarioAlert(
-                    scenario_type="Economic Patriotism Trap",
-                    severity="MEDIUM" if risk_score >= 60 else "LOW",
-                    company=row['recipient_name'],
-                    amount=row['award_amount'],
-                    agency=row['awarding_agency'],
-                    pattern_detected="Patriotic branding masking preferential treatment",
-                    evidence=evidence,
-                    risk_score=risk_score
-                )
-                alerts.append(alert)
-        
-        return alerts
+        return None
+    
+    def analyze_scenario_1_national_emergency(self) -> List[ScenarioAlert]:
+        """Detect 'National Emergency' acceleration patterns"""
+        return self._run_scenario('national_emergency')
+    
+    def analyze_scenario_2_economic_patriotism(self) -> List[ScenarioAlert]:
+        """Detect 'Economic Patriotism' trap patterns"""
+        return self._run_scenario('economic_patriotism')
     
     def analyze_scenario_3_information_sovereignty(self) -> List[ScenarioAlert]:
         """Detect 'Information Sovereignty' gambit patterns"""
-        alerts = []
-        
-        conn = sqlite3.connect(self.db_path)
-        
-        # Look for data/information/media contracts
-        query = '''
-            SELECT recipient_name, award_amount, awarding_agency, award_date,
-                   competition_type, description, award_id
-            FROM contracts 
-            WHERE (
-                LOWER(description) LIKE '%data%' OR
-                LOWER(description) LIKE '%information%' OR
-                LOWER(description) LIKE '%social media%' OR
-                LOWER(description) LIKE '%platform%' OR
-                LOWER(description) LIKE '%educational%' OR
-                LOWER(description) LIKE '%media%' OR
-                LOWER(description) LIKE '%communication%'
-            )
-            AND award_date >= date('now', '-180 days')
-            ORDER BY award_amount DESC
-        '''
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        for _, row in df.iterrows():
-            evidence = []
-            risk_score = 0
-            
-            company_upper = row['recipient_name'].upper()
-            desc_lower = str(row['description']).lower()
-            
-            # Check for tech sector companies
-            if any(tech_co in company_upper for tech_co in self.tech_sector_companies):
-                evidence.append("Contract with major tech sector company")
-                risk_score += 35
-            
-            # Check for custom watchlist platforms (if configured)
-            if self.custom_watchlist and any(watched_co in company_upper for watched_co in self.custom_watchlist):
-                evidence.append("Contract with watchlist company")
-                risk_score += 35
-            
-            # Data sovereignty language
-            sovereignty_keywords = ['american data', 'data sovereignty', 'protect data', 'information security']
-            if any(keyword in desc_lower for keyword in sovereignty_keywords):
-                evidence.append("Uses data sovereignty/protection justification")
-                risk_score += 30
-            
-            # Educational or media contracts
-            if any(word in desc_lower for word in ['education', 'school', 'media', 'journalism']):
-                evidence.append("Involves education or media sector")
-                risk_score += 25
-            
-            if risk_score >= 45 and evidence:
-                alert = ScenarioAlert(
-                    scenario_type="Information Sovereignty Gambit",
-                    severity="HIGH" if risk_score >= 70 else "MEDIUM",
-                    company=row['recipient_name'],
-                    amount=row['award_amount'],
-                    agency=row['awarding_agency'],
-                    pattern_detected="Data/platform consolidation under sovereignty pretext",
-                    evidence=evidence,
-                    risk_score=risk_score
-                )
-                alerts.append(alert)
-        
-        return alerts
+        return self._run_scenario('information_sovereignty')
     
     def analyze_scenario_4_financial_consolidation(self) -> List[ScenarioAlert]:
         """Detect 'Financial Security' consolidation patterns"""
-        alerts = []
-        
-        conn = sqlite3.connect(self.db_path)
-        
-        # Look for financial services contracts
-        query = '''
-            SELECT recipient_name, award_amount, awarding_agency, award_date,
-                   competition_type, description, award_id
-            FROM contracts 
-            WHERE (
-                LOWER(description) LIKE '%financial%' OR
-                LOWER(description) LIKE '%banking%' OR
-                LOWER(description) LIKE '%payment%' OR
-                LOWER(description) LIKE '%crypto%' OR
-                LOWER(description) LIKE '%currency%' OR
-                LOWER(awarding_agency) LIKE '%treasury%' OR
-                LOWER(awarding_agency) LIKE '%federal reserve%'
-            )
-            AND award_date >= date('now', '-180 days')
-            ORDER BY award_amount DESC
-        '''
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        for _, row in df.iterrows():
-            evidence = []
-            risk_score = 0
-            
-            company_upper = row['recipient_name'].upper()
-            desc_lower = str(row['description']).lower()
-            
-            # Check for major financial institutions
-            if any(fin_co in company_upper for fin_co in self.financial_sector_companies):
-                evidence.append("Contract with major financial institution")
-                risk_score += 35
-            
-            # Populist branding with financial consolidation
-            populist_keywords = ['small town', 'community', 'local', 'main street', 'working families']
-            if any(keyword in desc_lower for keyword in populist_keywords):
-                evidence.append("Uses populist branding")
-                risk_score += 25
-            
-            # Regulatory advantage language
-            if any(word in desc_lower for word in ['regulation', 'compliance', 'oversight', 'exclusive']):
-                evidence.append("Involves regulatory or compliance advantages")
-                risk_score += 30
-            
-            # Cryptocurrency/digital currency
-            if any(word in desc_lower for word in ['crypto', 'digital currency', 'blockchain']):
-                evidence.append("Involves cryptocurrency or digital currency")
-                risk_score += 25
-            
-            if risk_score >= 40 and evidence:
-                alert = ScenarioAlert(
-                    scenario_type="Financial Security Consolidation",
-                    severity="MEDIUM" if risk_score >= 60 else "LOW",
-                    company=row['recipient_name'],
-                    amount=row['award_amount'],
-                    agency=row['awarding_agency'],
-                    pattern_detected="Financial consolidation under security/populist pretext",
-                    evidence=evidence,
-                    risk_score=risk_score
-                )
-                alerts.append(alert)
-        
-        return alerts
+        return self._run_scenario('financial_consolidation')
     
     def detect_rapid_connected_accumulation(self) -> List[ScenarioAlert]:
         """Detect rapid accumulation of contracts by connected networks"""
-        alerts = []
-        
-        conn = sqlite3.connect(self.db_path)
-        
-        # Look for companies getting multiple contracts quickly
-        query = '''
-            SELECT recipient_name, 
-                   COUNT(*) as contract_count,
-                   SUM(award_amount) as total_amount,
-                   MIN(award_date) as first_contract,
-                   MAX(award_date) as last_contract
-            FROM contracts 
-            WHERE award_date >= date('now', '-90 days')
-            GROUP BY recipient_name
-            HAVING COUNT(*) >= 2
-            ORDER BY total_amount DESC
+        return self._run_scenario('connected_accumulation')
+    
+    def _fetch_accumulation_rows(self, conn, scope_sql: str = '', params: tuple = ()) -> pd.DataFrame:
+        # Look for companies getting multiple contracts quickly, name variants grouped on their entity
+        query = f'''
+            SELECT g.entity_id, e.name as recipient_name,
+                   g.contract_count, g.total_amount, g.first_contract, g.last_contract
+            FROM (
+                SELECT a.entity_id,
+                       COUNT(*) as contract_count,
+                       SUM(f.award_amount) as total_amount,
+                       MIN(f.award_date) as first_contract,
+                       MAX(f.award_date) as last_contract
+                FROM contract_facts f
+                JOIN entity_aliases a ON a.recipient_id = f.recipient_id
+                WHERE f.award_date >= date('now', '-90 days')
+                {scope_sql}
+                GROUP BY a.entity_id
+                HAVING COUNT(*) >= 2
+            ) g
+            LEFT JOIN entities e ON e.id = g.entity_id
+            ORDER BY g.total_amount DESC, recipient_name
         '''
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        for _, row in df.iterrows():
-            evidence = []
-            risk_score = 0
-            
-            company_upper = row['recipient_name'].upper()
-            
-            # Check if company is in any monitored sector
-            monitored_sectors = []
-            if self.custom_watchlist and any(watched_co in company_upper for watched_co in self.custom_watchlist):
-                monitored_sectors.append("Custom watchlist")
-                risk_score += 40
-            
-            if any(tech_co in company_upper for tech_co in self.tech_sector_companies):
-                monitored_sectors.append("Tech sector")
-                risk_score += 30
-            
-            if any(def_co in company_upper for def_co in self.defense_sector_companies):
-                monitored_sectors.append("Defense sector")
-                risk_score += 25
-            
-            if any(fin_co in company_upper for fin_co in self.financial_sector_companies):
-                monitored_sectors.append("Financial sector")
-                risk_score += 30
-            
-            if connected_networks:
-                evidence.append(f"Company in connected network: {', '.join(connected_networks)}")
-                evidence.append(f"Received {row['contract_count']} contracts in 90 days")
-                evidence.append(f"Total value: ${row['total_amount']:,.0f}")
-                
-                # High accumulation rate
-                if row['contract_count'] >= 3:
-                    risk_score += 25
-                
-                # Large total amount
-                if row['total_amount'] > 10_000_000:
-                    risk_score += 20
-                
-                if risk_score >= 60:
-                    alert = ScenarioAlert(
-                        scenario_type="Connected Network Accumulation",
-                        severity="HIGH" if risk_score >= 80 else "MEDIUM",
-                        company=row['recipient_name'],
-                        amount=row['total_amount'],
-                        agency="Multiple Agencies",
-                        pattern_detected="Rapid contract accumulation by connected company",
-                        evidence=evidence,
-                        risk_score=risk_score
-                    )
-                    alerts.append(alert)
-        
-        return alerts
+        return pd.read_sql_query(query, conn, params=params)
     
-    def run_full_scenario_analysis(self) -> Dict[str, List[ScenarioAlert]]:
-        """Run all scenario analyses"""
+    def score_connected_accumulation(self, company: str, contract_count: int, total_amount: float,
+                                     days: int = 90) -> Optional[ScenarioAlert]:
+        """Score one company's contract accumulation over the window; None if below threshold"""
+        evidence = []
+        risk_score = 0
+        
+        company_upper = company.upper()
+        
+        # Check if company is in any monitored sector
+        monitored_sectors = []
+        if self.custom_watchlist and any(watched_co in company_upper for watched_co in self.custom_watchlist):
+            monitored_sectors.append("Custom watchlist")
+            risk_score += 40
+        
+        if any(tech_co in company_upper for tech_co in self.tech_sector_companies):
+            monitored_sectors.append("Tech sector")
+            risk_score += 30
+        
+        if any(def_co in company_upper for def_co in self.defense_sector_companies):
+            monitored_sectors.append("Defense sector")
+            risk_score += 25
+        
+        if any(fin_co in company_upper for fin_co in self.financial_sector_companies):
+            monitored_sectors.append("Financial sector")
+            risk_score += 30
+        
+        if not monitored_sectors:
+            return None
+        
+        evidence.append(f"Company in connected network: {', '.join(monitored_sectors)}")
+        evidence.append(f"Received {contract_count} contracts in {days} days")
+        evidence.append(f"Total value: ${total_amount:,.0f}")
+        
+        # High accumulation rate
+        if contract_count >= 3:
+            risk_score += 25
+        
+        # Large total amount
+        if total_amount > 10_000_000:
+            risk_score += 20
+        
+        if risk_score < 60:
+            return None
+        
+        return ScenarioAlert(
+            scenario_type="Connected Network Accumulation",
+            severity="HIGH" if risk_score >= 80 else "MEDIUM",
+            company=company,
+            amount=total_amount,
+            agency="Multiple Agencies",
+            pattern_detected="Rapid contract accumulation by connected company",
+            evidence=evidence,
+            risk_score=risk_score
+        )
+    
+    def accumulation_window(self) -> AccumulationWindow:
+        """Streaming equivalent of detect_rapid_connected_accumulation, for StreamingAccumulationDetector"""
+        def scorer(company, contract_count, total_amount, first_date, last_date, window):
+            alert = self.score_connected_accumulation(company, contract_count, total_amount, window.days)
+            if alert is None:
+                return None
+            payload = asdict(alert)
+            payload.update({'type': 'connected_accumulation', 'contract_count': contract_count,
+                            'time_span_days': window.days})
+            return alert.severity, payload
+        
+        return AccumulationWindow('connected_accumulation', 90, 2, scorer)
+    
+    def run_full_scenario_analysis(self, incremental: bool = True,
+                                   progress: Optional[Callable[[float, str], None]] = None) -> Dict[str, List[ScenarioAlert]]:
+        """
+        Run all scenario analyses. With incremental=True only contracts written since the
+        last run (and aggregates whose window moved) are rescored; results for everything
+        else come from analysis_results. self.last_changed_alerts holds the new/changed ones.
+        progress(fraction, scenario) is called before each scenario is evaluated.
+        """
         logger.info("Running comprehensive scenario analysis...")
         
-        results = {
-            'national_emergency': self.analyze_scenario_1_national_emergency(),
-            'economic_patriotism': self.analyze_scenario_2_economic_patriotism(),
-            'information_sovereignty': self.analyze_scenario_3_information_sovereignty(),
-            'financial_consolidation': self.analyze_scenario_4_financial_consolidation(),
-            'connected_accumulation': self.detect_rapid_connected_accumulation()
-        }
+        scenarios = list(SCENARIO_FILTERS) + ['connected_accumulation']
+        metrics = RunMetrics('scenario_analysis', self.db_path)
+        
+        if not incremental:
+            if self.workers > 1:
+                with metrics.measure('scenario', 'all', process_cpu=True, workers=self.workers):
+                    evaluated = self._evaluate_parallel(scenarios)
+            else:
+                evaluated = {}
+                for index, scenario in enumerate(scenarios):
+                    if progress:
+                        progress(index / len(scenarios), scenario)
+                    with metrics.measure('scenario', scenario):
+                        evaluated[scenario] = self._evaluate(scenario)
+            results = {scenario: [alert for *_, alert in rows] for scenario, rows in evaluated.items()}
+            self.last_changed_alerts = results
+        else:
+            results = {}
+            self.last_changed_alerts = {}
+            fingerprint = self._fingerprint()
+            # One pool for the whole run: full passes happen inside each analyzer's write
+            # transaction, so starting worker processes per scenario would hold it longer
+            pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+            try:
+                for index, scenario in enumerate(scenarios):
+                    if progress:
+                        progress(index / len(scenarios), scenario)
+                    
+                    def compute(conn, scope_sql, scenario=scenario):
+                        # Dirty-key passes use the run's temp table, so only full passes go to the pool
+                        rows = self._evaluate(scenario, pool) if not scope_sql else \
+                            self._scenario_rows(conn, scenario, scope_sql)
+                        return [(key, award_date, sort_value, asdict(alert))
+                                for key, award_date, sort_value, alert in rows]
+                    
+                    if scenario == 'connected_accumulation':
+                        analysis = IncrementalAnalysis(self.db_path, f'scenario_{scenario}', '-90 days',
+                                                       'entity_id', fingerprint)
+                    else:
+                        analysis = IncrementalAnalysis(self.db_path, f'scenario_{scenario}', '-180 days',
+                                                       'award_id', fingerprint)
+                    with metrics.measure('scenario', scenario):
+                        current, changed = analysis.run(compute)
+                    results[scenario] = [ScenarioAlert(**payload) for payload in current]
+                    self.last_changed_alerts[scenario] = [ScenarioAlert(**payload) for payload in changed]
+            finally:
+                if pool:
+                    pool.shutdown()
+        
+        for scenario, alerts in results.items():
+            metrics.add('scenario', scenario, items=len(alerts))
+        self.last_run_metrics = metrics.finish()
         
         total_alerts = sum(len(alerts) for alerts in results.values())
         logger.info(f"Scenario analysis complete: {total_alerts} alerts generated")
         
         return results
     
+    def _fingerprint(self) -> str:
+        """Changes whenever scoring inputs change (baseline thresholds included), forcing a full re-evaluation"""
+        conn = query_log.connect(self.db_path)
+        try:
+            quantiles = [EMERGENCY_LARGE_PERCENTILE, PATRIOTISM_LARGE_PERCENTILE]
+            baseline_version = BaselineStore(self.db_path).load(conn).version(quantiles)
+        finally:
+            conn.close()
+        config = [self.custom_watchlist, self.tech_sector_companies, self.defense_sector_companies,
+                  self.financial_sector_companies, self.emergency_keywords, self.no_bid_patterns,
+                  [EMERGENCY_LARGE_PERCENTILE, PATRIOTISM_LARGE_PERCENTILE], baseline_version]
+        return hashlib.sha1(json.dumps(config).encode()).hexdigest()
+    
     def generate_scenario_report(self) -> str:
         """Generate comprehensive scenario monitoring report"""
         results = self.run_full_scenario_analysis()
@@ -457,6 +629,17 @@ class ScenarioMonitor:
         
         return "\n".join(report)
 
+def _evaluate_partition(monitor: ScenarioMonitor, scenario: str, scope_sql: str,
+                        params: tuple) -> List[Tuple[str, str, float, ScenarioAlert]]:
+    """Process-pool worker: score one scenario over one slice, reading it straight from SQLite"""
+    conn = query_log.connect(monitor.db_path)
+    try:
+        return monitor._scenario_rows(conn, scenario, scope_sql, params)
+    finally:
+        conn.close()
+        # Pool workers exit without running atexit handlers
+        query_log.QUERY_LOG.flush()
+
 def main():
     """Test scenario monitoring"""
     monitor = ScenarioMonitor()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Resident Scheduler Daemon
+Keeps collectors, HTTP sessions and analyzers warm in one long-running process
+and runs collection/analysis jobs on configurable intervals
+"""
+
+import os
+import json
+import time
+import random
+import signal
+import socket
+import socketserver
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTROL_SOCKET = "scheduler.sock"
+
+# Interval defaults mirror the old cron entries
+DEFAULT_JOB_CONFIG = {
+    'daily_collection': {'interval_minutes': 1440, 'jitter_minutes': 10, 'enabled': False},
+    'ultimate_collection': {'interval_minutes': 1440, 'jitter_minutes': 15, 'days_back': 30},
+    'scenario_analysis': {'interval_minutes': 360, 'jitter_minutes': 5, 'workers': 1, 'partition_by': 'month'}
+}
+
+@dataclass
+class ScheduledJob:
+    name: str
+    func: Callable[[], Any]
+    interval: float
+    jitter: float = 0.0
+    run_on_start: bool = False
+    group: Optional[str] = None  # jobs in the same group never run at the same time
+    next_run: float = 0.0
+    running: bool = False
+    run_count: int = 0
+    last_started: Optional[str] = None
+    last_finished: Optional[str] = None
+    last_duration: Optional[float] = None
+    last_status: Optional[str] = None
+    last_error: Optional[str] = None
+    last_result: Any = None
+
+    def schedule_next(self, now: float):
+        """Pick the next run time, spreading runs with random jitter"""
+        self.next_run = now + self.interval + random.uniform(0, self.jitter)
+
+    def to_status(self) -> Dict:
+        return {
+            'name': self.name,
+            'interval_seconds': self.interval,
+            'jitter_seconds': self.jitter,
+            'group': self.group,
+            'running': self.running,
+            'run_count': self.run_count,
+            'next_run': datetime.fromtimestamp(self.next_run).isoformat() if self.next_run else None,
+            'last_started': self.last_started,
+            'last_finished': self.last_finished,
+            'last_duration': self.last_duration,
+            'last_status': self.last_status,
+            'last_error': self.last_error
+        }
+
+class SchedulerDaemon:
+    """Interval scheduler with a concurrency cap and no overlapping runs of the same job (or job group)"""
+
+    def __init__(self, max_concurrent: int = 2, control_socket: str = DEFAULT_CONTROL_SOCKET):
+        self.max_concurrent = max_concurrent
+        self.control_socket = control_socket
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self.started = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='scheduler-job')
+        self._control_server = None
+        self.shutdown_hooks: List[Callable[[], Any]] = []
+
+    def add_job(self, job: ScheduledJob):
+        """Register a job; first run is immediate if run_on_start, otherwise after one interval"""
+        now = time.time()
+        if job.run_on_start:
+            job.next_run = now
+        else:
+            job.schedule_next(now)
+        self.jobs[job.name] = job
+
+    def trigger(self, name: str) -> Dict:
+        """Run a job now unless it is already running"""
+        with self._lock:
+            job = self.jobs.get(name)
+            if job is None:
+                return {'ok': False, 'error': f"Unknown job: {name}", 'jobs': sorted(self.jobs)}
+            if job.running:
+                return {'ok': False, 'error': f"Job already running: {name}"}
+            job.next_run = time.time()
+        self._wake_event.set()
+        return {'ok': True, 'triggered': name}
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                'ok': True,
+                'pid': os.getpid(),
+                'started': self.started,
+                'max_concurrent': self.max_concurrent,
+                'jobs': [job.to_status() for job in self.jobs.values()]
+            }
+
+    def _run_job(self, job: ScheduledJob):
+        """Execute a job in a worker thread and record its outcome"""
+        start = time.time()
+        try:
+            job.last_result = job.func()
+            job.last_status = 'success'
+            job.last_error = None
+        except Exception as e:
+            job.last_status = 'failed'
+            job.last_error = str(e)
+            logger.error(f"Scheduled job {job.name} failed: {e}")
+        finally:
+            with self._lock:
+                job.running = False
+                job.run_count += 1
+                job.last_finished = datetime.now().isoformat()
+                job.last_duration = round(time.time() - start, 3)
+                job.schedule_next(time.time())
+            self._slots.release()
+            self._wake_event.set()
+            logger.info(f"Job {job.name} finished ({job.last_status}) in {job.last_duration}s")
+
+    def _dispatch_due_jobs(self) -> float:
+        """Start every due job that has a free slot; returns seconds until the next check"""
+        now = time.time()
+        next_check = 60.0
+
+        with self._lock:
+            due = sorted((job for job in self.jobs.values() if not job.running and job.next_run <= now),
+                         key=lambda job: job.next_run)
+            busy_groups = {job.group for job in self.jobs.values() if job.running and job.group}
+            for job in due:
+                if job.group in busy_groups or not self._slots.acquire(blocking=False):
+                    continue
+                job.running = True
+                job.last_started = datetime.now().isoformat()
+                if job.group:
+                    busy_groups.add(job.group)
+                logger.info(f"Starting job {job.name}")
+                self._executor.submit(self._run_job, job)
+
+            # Due jobs still waiting for a slot or their group are woken by the finishing job
+            for job in self.jobs.values():
+                if not job.running and job.next_run > now:
+                    next_check = min(next_check, job.next_run - now)
+
+        return next_check
+
+    def serve_forever(self):
+        """Main loop; returns after stop() or SIGTERM/SIGINT"""
+        self.started = datetime.now().isoformat()
+        self._start_control_server()
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+            signal.signal(signal.SIGINT, lambda signum, frame: self.stop())
+
+        logger.info(f"Scheduler started with {len(self.jobs)} jobs, control socket {self.control_socket}")
+        try:
+            while not self._stop_event.is_set():
+                wait = self._dispatch_due_jobs()
+                self._wake_event.wait(wait)
+                self._wake_event.clear()
+        finally:
+            self._shutdown()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def _shutdown(self):
+        """Stop accepting commands and wait for running jobs to finish"""
+        if self._control_server is not None:
+            self._control_server.shutdown()
+            self._control_server.server_close()
+            if os.path.exists(self.control_socket):
+                os.remove(self.control_socket)
+        self._executor.shutdown(wait=True)
+        for hook in self.shutdown_hooks:
+            hook()
+        logger.info("Scheduler stopped")
+
+    def handle_command(self, request: Dict) -> Dict:
+        command = request.get('command')
+        if command == 'status':
+            return self.status()
+        if command == 'trigger':
+            return self.trigger(request.get('job', ''))
+        if command == 'stop':
+            self.stop()
+            return {'ok': True, 'stopping': True}
+        return {'ok': False, 'error': f"Unknown command: {command}"}
+
+    def _start_control_server(self):
+        """Listen for newline-delimited JSON commands on a local Unix socket"""
+        if os.path.exists(self.control_socket):
+            # Refuse to steal the socket from a live daemon
+            try:
+                send_command('status', socket_path=self.control_socket, timeout=2)
+                raise RuntimeError(f"Scheduler already running on {self.control_socket}")
+            except (ConnectionError, FileNotFoundError, socket.timeout):
+                os.remove(self.control_socket)
+
+        daemon = self
+
+        class ControlHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                try:
+                    response = daemon.handle_command(json.loads(line or b'{}'))
+                except ValueError as e:
+                    response = {'ok': False, 'error': f"Bad request: {e}"}
+                self.wfile.write(json.dumps(response, default=str).encode() + b'\n')
+
+        self._control_server = socketserver.ThreadingUnixStreamServer(self.control_socket, ControlHandler)
+        self._control_server.daemon_threads = True
+        os.chmod(self.control_socket, 0o600)
+        threading.Thread(target=self._control_server.serve_forever, name='scheduler-control', daemon=True).start()
+
+def send_command(command: str, socket_path: str = DEFAULT_CONTROL_SOCKET, timeout: float = 10, **kwargs) -> Dict:
+    """Send one command to a running daemon and return its JSON response"""
+    request = dict(kwargs, command=command)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        response = b''
+        while not response.endswith(b'\n'):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            response += chunk
+    return json.loads(response)
+
+def load_config(config_path: Optional[str] = None) -> Dict:
+    """Merge an optional JSON config file over the default job settings"""
+    config = {
+        'max_concurrent': 2,
+        'control_socket': DEFAULT_CONTROL_SOCKET,
+        'db_path': 'government_monitor.db',
+        'jobs': {name: dict(settings) for name, settings in DEFAULT_JOB_CONFIG.items()}
+    }
+    if config_path:
+        with open(config_path) as f:
+            user_config = json.load(f)
+        for name, settings in user_config.pop('jobs', {}).items():
+            config['jobs'].setdefault(name, {}).update(settings)
+        config.update(user_config)
+    return config
+
+def register_default_jobs(daemon: SchedulerDaemon, config: Dict, email_config: Optional[Dict] = None):
+    """
+    Add collection/analysis jobs sharing one set of warm monitor objects. The collection jobs
+    share the monitor (its collectors, alert manager and streaming detector), so they form one group.
+    """
+    from comprehensive_collector import UltimateGovernmentMonitor
+    from scenario_monitoring import ScenarioMonitor
+
+    # Built once and reused by every run: HTTP sessions, collectors and analyzers stay warm
+    # Collection and analysis both use the configured database
+    monitor = UltimateGovernmentMonitor(email_config, db_path=config['db_path'])
+    scenario_settings = config['jobs'].get('scenario_analysis', {})
+    scenario_monitor = ScenarioMonitor(config['db_path'], workers=scenario_settings.get('workers', 1),
+                                       partition_by=scenario_settings.get('partition_by', 'month'))
+    monitor.streaming_detector.add_window(scenario_monitor.accumulation_window())
+    jobs_config = config['jobs']
+
+    job_functions = {
+        'daily_collection': lambda: monitor.run_daily_collection(),
+        'ultimate_collection': lambda: monitor.run_ultimate_collection(
+            days_back=jobs_config['ultimate_collection'].get('days_back', 30)),
+        'scenario_analysis': lambda: {
+            name: len(alerts) for name, alerts in scenario_monitor.run_full_scenario_analysis().items()
+        }
+    }
+
+    job_groups = {'daily_collection': 'collection', 'ultimate_collection': 'collection'}
+
+    for name, func in job_functions.items():
+        settings = jobs_config.get(name, {})
+        if not settings.get('enabled', True):
+            continue
+        daemon.add_job(ScheduledJob(
+            name=name,
+            func=func,
+            interval=settings.get('interval_minutes', 1440) * 60,
+            jitter=settings.get('jitter_minutes', 0) * 60,
+            run_on_start=settings.get('run_on_start', False),
+            group=job_groups.get(name)
+        ))
+
+    daemon.shutdown_hooks.append(monitor.close)
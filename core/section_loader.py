@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Dashboard Section Loader
+Computes a page's independent sections (summary stats, tables, cached figures)
+concurrently on a bounded thread pool, so time-to-first-byte follows the
+slowest section instead of their sum. SQLite releases the GIL while it steps
+a statement, and each section reads through its own pooled read-only
+connection, so the queries genuinely overlap.
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from metrics import REQUEST_BUCKETS, REGISTRY, MetricsRegistry
+
+class SectionLoader:
+    """
+    One executor per app, shared by all requests: concurrent page loads queue behind
+    max_workers threads rather than multiplying database work
+    """
+
+    def __init__(self, name: str, max_workers: int = 6, registry: MetricsRegistry = REGISTRY):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.section_seconds = registry.histogram('govmon_dashboard_section_duration_seconds',
+                                                  'Time to compute each page section', ['app', 'section'],
+                                                  buckets=REQUEST_BUCKETS)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so a server that forks workers after import starts each with fresh threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix=f'{self.name}-section')
+            return self._executor
+
+    def _run(self, section: str, builder: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return builder()
+        finally:
+            self.section_seconds.observe(time.perf_counter() - start, app=self.name, section=section)
+
+    def load(self, sections: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """Run every builder concurrently; results keyed like `sections`. The first failure is re-raised."""
+        executor = self._get_executor()
+        futures = {section: executor.submit(self._run, section, builder) for section, builder in sections.items()}
+        return {section: future.result() for section, future in futures.items()}
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Mergeable Sketches
+HyperLogLog counts of distinct recipients per agency and award month, and t-digests
+of award amounts per agency, folded in as contracts are saved and stored in SQLite.
+Summary cards and percentile thresholds read a handful of small blobs instead of
+scanning contracts, and every estimate comes with its error bounds.
+"""
+
+import sqlite3
+import math
+import zlib
+import struct
+import hashlib
+import logging
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+HLL_PRECISION = 12            # 4096 registers: ~1.6% standard error
+TDIGEST_COMPRESSION = 100     # under 100 centroids; quantile rank error well under 1%
+
+ALL_AGENCIES = 0              # agency_id of the rollup rows (real keys start at 1)
+ALL_MONTHS = ''               # month of the per-agency and overall totals
+
+Z_95 = 1.96
+
+class Estimate(NamedTuple):
+    """An approximate value with a ~95% interval around it"""
+    value: float
+    low: float
+    high: float
+
+    @classmethod
+    def exact(cls, value: float) -> 'Estimate':
+        return cls(value, value, value)
+
+def _hash64(item) -> int:
+    # blake2b rather than hash(): stable across processes, so persisted sketches stay mergeable
+    return int.from_bytes(hashlib.blake2b(str(item).encode('utf-8'), digest_size=8).digest(), 'big')
+
+class HyperLogLog:
+    """Distinct-count sketch; two sketches of the same precision merge into their union's sketch"""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    def add_hash(self, hashed: int):
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, item):
+        self.add_hash(_hash64(item))
+
+    def update(self, items: Iterable):
+        for item in items:
+            self.add_hash(_hash64(item))
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLogs of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> float:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is far more accurate while many registers are still empty
+            return m * math.log(m / zeros)
+        return raw
+
+    def estimate(self) -> Estimate:
+        value = self.count()
+        if not any(self.registers):
+            return Estimate.exact(0.0)
+        margin = Z_95 * 1.04 / math.sqrt(self.m) * value
+        return Estimate(value, max(value - margin, 0.0), value + margin)
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> 'HyperLogLog':
+        sketch = cls(blob[0])
+        sketch.registers = bytearray(zlib.decompress(blob[1:]))
+        return sketch
+
+class TDigest:
+    """Merging t-digest of a value distribution: accurate tails, mergeable across agencies"""
+
+    _HEADER = struct.Struct('<dddd')   # compression, min, max, total weight
+
+    def __init__(self, compression: float = TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[Tuple[float, float]] = []
+
+    def add(self, value: float, weight: float = 1.0):
+        self._buffer.append((value, weight))
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= 10 * self.compression:
+            self._compress()
+
+    def update(self, values: Iterable[float]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        other._compress()
+        self._buffer.extend(zip(other.means, other.weights))
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _scale(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _scale_inverse(self, k: float) -> float:
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        items = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+        total = sum(weight for _, weight in items)
+        means, weights = [], []
+        mean, weight = items[0]
+        seen = 0.0
+        limit = self._scale_inverse(self._scale(0.0) + 1) * total
+        for next_mean, next_weight in items[1:]:
+            if seen + weight + next_weight <= limit:
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                seen += weight
+                limit = self._scale_inverse(self._scale(seen / total) + 1) * total
+                mean, weight = next_mean, next_weight
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights, self.total = means, weights, total
+
+    def _value_at(self, rank: float) -> float:
+        """Interpolated value at a rank in [0, total]"""
+        means, weights = self.means, self.weights
+        if rank <= weights[0] / 2:
+            return self.min + (means[0] - self.min) * rank / (weights[0] / 2)
+        seen = weights[0] / 2
+        for i in range(len(means) - 1):
+            step = (weights[i] + weights[i + 1]) / 2
+            if rank <= seen + step:
+                return means[i] + (means[i + 1] - means[i]) * (rank - seen) / step
+            seen += step
+        tail = weights[-1] / 2
+        return means[-1] + (self.max - means[-1]) * min((rank - seen) / tail, 1.0)
+
+    def quantile(self, q: float) -> Estimate:
+        """
+        Value at quantile q. The bounds are the values at the ranks half a centroid to
+        either side: the digest cannot place q more precisely than the centroid holding it.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        self._compress()
+        if not self.total:
+            return Estimate(math.nan, math.nan, math.nan)
+        rank = q * self.total
+        seen, uncertainty = 0.0, 0.0
+        for weight in self.weights:
+            if rank <= seen + weight:
+                uncertainty = weight / 2
+                break
+            seen += weight
+        value = self._value_at(rank)
+        return Estimate(value, self._value_at(max(rank - uncertainty, 0.0)),
+                        self._value_at(min(rank + uncertainty, self.total)))
+
+    def cdf(self, value: float) -> float:
+        """Fraction of the weight at or below value (the inverse of quantile)"""
+        self._compress()
+        if not self.total:
+            return math.nan
+        if value < self.min:
+            return 0.0
+        if value >= self.max:
+            return 1.0
+        means, weights = self.means, self.weights
+        if value < means[0]:
+            span = means[0] - self.min
+            return weights[0] / 2 * ((value - self.min) / span if span else 1.0) / self.total
+        seen = weights[0] / 2
+        for i in range(len(means) - 1):
+            step = (weights[i] + weights[i + 1]) / 2
+            if value < means[i + 1]:
+                span = means[i + 1] - means[i]
+                return (seen + step * ((value - means[i]) / span if span else 1.0)) / self.total
+            seen += step
+        span = self.max - means[-1]
+        return min((seen + weights[-1] / 2 * ((value - means[-1]) / span if span else 1.0)) / self.total, 1.0)
+
+    def to_bytes(self) -> bytes:
+        self._compress()
+        centroids = array('d', self.means + self.weights)
+        return self._HEADER.pack(self.compression, self.min, self.max, self.total) + centroids.tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> 'TDigest':
+        compression, low, high, total = cls._HEADER.unpack_from(blob)
+        digest = cls(compression)
+        centroids = array('d')
+        centroids.frombytes(blob[cls._HEADER.size:])
+        half = len(centroids) // 2
+        digest.means, digest.weights = list(centroids[:half]), list(centroids[half:])
+        digest.min, digest.max, digest.total = low, high, total
+        return digest
+
+class SketchStore:
+    """
+    Sketch rows keyed by agency_id (ALL_AGENCIES for the rollup) and, for recipients, award
+    month (ALL_MONTHS for the totals), so the common reads are single rows. Writers fold
+    contracts in on their own connection and transaction.
+    """
+
+    def __init__(self, db_path: str = "government_monitor.db"):
+        self.db_path = db_path
+
+    @staticmethod
+    def init_tables(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS recipient_sketches (
+                agency_id INTEGER NOT NULL,
+                month TEXT NOT NULL,
+                sketch BLOB NOT NULL,
+                PRIMARY KEY (agency_id, month)
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS amount_sketches (
+                agency_id INTEGER PRIMARY KEY,
+                sketch BLOB NOT NULL
+            )
+        ''')
+
+    @staticmethod
+    def is_built(conn) -> bool:
+        try:
+            return conn.execute('SELECT 1 FROM recipient_sketches WHERE agency_id = ? AND month = ?',
+                                (ALL_AGENCIES, ALL_MONTHS)).fetchone() is not None
+        except sqlite3.OperationalError:
+            return False
+
+    def ensure_built(self, conn) -> bool:
+        """One-time build for a database that has contracts but no sketches yet"""
+        self.init_tables(conn)
+        if self.is_built(conn) or not conn.execute('SELECT 1 FROM contract_facts LIMIT 1').fetchone():
+            return False
+        self.rebuild(conn)
+        return True
+
+    def rebuild(self, conn):
+        """Recompute every sketch from contract_facts (pass a query_log connection to include archives)"""
+        self.init_tables(conn)
+        rows = conn.execute('SELECT recipient_id, agency_id, award_date, award_amount FROM contract_facts')
+        recipients, amounts = self._fold(rows, {}, {})
+        conn.execute('DELETE FROM recipient_sketches')
+        conn.execute('DELETE FROM amount_sketches')
+        self._write(conn, recipients, amounts)
+        logger.info(f"Rebuilt {len(recipients)} recipient and {len(amounts)} amount sketches")
+
+    def observe(self, conn, award_ids: Sequence[str], new_ids: Optional[Iterable[str]] = None):
+        """
+        Fold just-written contracts into their sketches. Only new_ids (all of award_ids when None)
+        add their amounts, so a re-collected award is not counted twice; distinct counts are
+        unaffected by repeats. Amounts an update replaced stay in the digest until a rebuild.
+        """
+        if not award_ids:
+            return
+        if not self.is_built(conn):
+            # First contracts in a new database (or sketches dropped): everything is in the rebuild
+            self.rebuild(conn)
+            return
+        new_ids = set(award_ids) if new_ids is None else set(new_ids)
+        rows = []
+        for i in range(0, len(award_ids), 500):
+            chunk = list(award_ids[i:i + 500])
+            placeholders = ','.join('?' * len(chunk))
+            rows.extend(conn.execute(f'''
+                SELECT award_id, recipient_id, agency_id, award_date, award_amount
+                FROM contract_facts WHERE award_id IN ({placeholders})
+            ''', chunk))
+        facts = [(recipient, agency, date, amount if award_id in new_ids else None)
+                 for award_id, recipient, agency, date, amount in rows]
+
+        keys = {(agency, month) for _, agency, date, _ in facts
+                for agency, month in self._cells(agency, date)}
+        recipients = self._load_recipients(conn, keys)
+        amounts = self._load_amounts(conn, {agency for agency, month in keys if month == ALL_MONTHS})
+        recipients, amounts = self._fold(facts, recipients, amounts)
+        self._write(conn, recipients, amounts)
+
+    @staticmethod
+    def _cells(agency_id: Optional[int], award_date: Optional[str]) -> List[Tuple[int, str]]:
+        """Sketch rows a contract contributes to"""
+        agencies = [ALL_AGENCIES] + ([agency_id] if agency_id is not None else [])
+        months = [ALL_MONTHS] + ([award_date[:7]] if award_date else [])
+        return [(agency, month) for agency in agencies for month in months]
+
+    def _fold(self, facts, recipients: Dict, amounts: Dict) -> Tuple[Dict, Dict]:
+        for recipient_id, agency_id, award_date, amount in facts:
+            cells = self._cells(agency_id, award_date)
+            if recipient_id is not None:
+                hashed = _hash64(recipient_id)
+                for cell in cells:
+                    if cell not in recipients:
+                        recipients[cell] = HyperLogLog()
+                    recipients[cell].add_hash(hashed)
+            if amount is not None:
+                for agency, month in cells:
+                    if month == ALL_MONTHS:
+                        if agency not in amounts:
+                            amounts[agency] = TDigest()
+                        amounts[agency].add(amount)
+        return recipients, amounts
+
+    def _load_recipients(self, conn, keys: Iterable[Tuple[int, str]]) -> Dict:
+        sketches = {}
+        for agency_id, month in keys:
+            row = conn.execute('SELECT sketch FROM recipient_sketches WHERE agency_id = ? AND month = ?',
+                               (agency_id, month)).fetchone()
+            if row:
+                sketches[(agency_id, month)] = HyperLogLog.from_bytes(row[0])
+        return sketches
+
+    def _load_amounts(self, conn, agency_ids: Iterable[int]) -> Dict:
+        agency_ids = list(agency_ids)
+        if not agency_ids:
+            return {}
+        placeholders = ','.join('?' * len(agency_ids))
+        return {agency_id: TDigest.from_bytes(blob) for agency_id, blob in conn.execute(
+            f'SELECT agency_id, sketch FROM amount_sketches WHERE agency_id IN ({placeholders})', agency_ids)}
+
+    @staticmethod
+    def _write(conn, recipients: Dict, amounts: Dict):
+        conn.executemany('INSERT OR REPLACE INTO recipient_sketches (agency_id, month, sketch) VALUES (?, ?, ?)',
+                         [(agency, month, sketch.to_bytes()) for (agency, month), sketch in recipients.items()])
+        conn.executemany('INSERT OR REPLACE INTO amount_sketches (agency_id, sketch) VALUES (?, ?)',
+                         [(agency, sketch.to_bytes()) for agency, sketch in amounts.items()])
+
+    def distinct_recipients(self, conn, agency_id: Optional[int] = None,
+                            months: Optional[Iterable[str]] = None) -> Estimate:
+        """
+        Distinct recipients overall or for one agency, optionally over a set of 'YYYY-MM'
+        months (merged, so a recipient active in several months counts once). Counted
+        exactly from contracts when the sketches have not been built yet.
+        """
+        agency = ALL_AGENCIES if agency_id is None else agency_id
+        cells = [(agency, ALL_MONTHS)] if months is None else [(agency, month) for month in months]
+        if not self.is_built(conn):
+            return self._exact_distinct(conn, agency_id, months)
+        merged = HyperLogLog()
+        for sketch in self._load_recipients(conn, cells).values():
+            merged.merge(sketch)
+        return merged.estimate()
+
+    @staticmethod
+    def _exact_distinct(conn, agency_id: Optional[int], months: Optional[Iterable[str]]) -> Estimate:
+        where, params = [], []
+        if agency_id is not None:
+            where.append('agency_id = ?')
+            params.append(agency_id)
+        if months is not None:
+            months = list(months)
+            where.append(f"substr(award_date, 1, 7) IN ({','.join('?' * len(months))})")
+            params.extend(months)
+        clause = f"WHERE {' AND '.join(where)}" if where else ''
+        return Estimate.exact(conn.execute(f'SELECT COUNT(DISTINCT recipient_id) FROM contracts {clause}',
+                                           params).fetchone()[0])
+
+    def amount_quantiles(self, conn, quantiles: Sequence[float],
+                         agency_ids: Optional[Iterable[int]] = None) -> Optional[Dict[int, Dict[float, Estimate]]]:
+        """
+        {agency_id: {q: Estimate}} for the given agencies (ALL_AGENCIES for every contract);
+        agencies without a digest are left out. None until the sketches have been built.
+        """
+        if not self.is_built(conn):
+            return None
+        agency_ids = [ALL_AGENCIES] if agency_ids is None else list(agency_ids)
+        return {agency_id: {q: digest.quantile(q) for q in quantiles}
+                for agency_id, digest in self._load_amounts(conn, agency_ids).items()}
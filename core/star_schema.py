@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Star Schema
+contract_facts stores each award with integer surrogate keys into the recipients
+and agencies dimension tables instead of repeating their names on every row.
+A `contracts` view joins the names back (with INSTEAD OF triggers for writes),
+so existing queries and writers keep working unchanged, while hot aggregations
+group on the integer keys and join the names onto the few result rows.
+"""
+
+import sqlite3
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+FACT_COLUMNS = ['award_id', 'recipient_id', 'award_amount', 'agency_id', 'award_date', 'award_type',
+                'competition_type', 'description', 'collected_date', 'data_source']
+
+# Column order of the original contracts table, which the view keeps (data_source was added later by ALTER)
+CONTRACT_COLUMNS = ['award_id', 'recipient_name', 'award_amount', 'awarding_agency', 'award_date', 'award_type',
+                    'competition_type', 'description', 'collected_date', 'data_source']
+
+# dimension table -> contracts column holding its name, fact key column
+DIMENSIONS = {
+    'recipients': ('recipient_name', 'recipient_id'),
+    'agencies': ('awarding_agency', 'agency_id')
+}
+
+# The key indexes carry award_amount so per-recipient/per-agency totals are covering index scans
+FACT_INDEXES = {
+    'idx_facts_date_id': 'contract_facts (award_date, award_id)',
+    'idx_facts_amount_id': 'contract_facts (award_amount, award_id)',
+    'idx_facts_agency_date': 'contract_facts (agency_id, award_date, award_amount)',
+    'idx_facts_recipient_date': 'contract_facts (recipient_id, award_date, award_amount)'
+}
+
+def contracts_select(facts: str = 'contract_facts', dimension_schema: str = '') -> str:
+    """
+    The denormalized contracts rows over a fact table (or a union of fact tables). Names are
+    scalar subqueries rather than joins so queries that never mention them (counts, sums,
+    date ranges) pay nothing for them; filters on a name are better written against the key.
+    """
+    prefix = f'{dimension_schema}.' if dimension_schema else ''
+    return f'''
+        SELECT f.award_id,
+               (SELECT name FROM {prefix}recipients WHERE id = f.recipient_id) AS recipient_name,
+               f.award_amount,
+               (SELECT name FROM {prefix}agencies WHERE id = f.agency_id) AS awarding_agency,
+               f.award_date, f.award_type, f.competition_type, f.description, f.collected_date,
+               f.data_source, f.recipient_id, f.agency_id
+        FROM {facts} f
+    '''
+
+def _dimension_upserts(row: str) -> str:
+    # NOT EXISTS rather than OR IGNORE: an outer INSERT OR REPLACE would turn OR IGNORE into
+    # REPLACE, giving an existing name a new id and orphaning its facts
+    return '\n'.join(f'''
+            INSERT INTO {table} (name) SELECT {row}.{column}
+            WHERE {row}.{column} IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {table} WHERE name = {row}.{column});'''
+                     for table, (column, _) in DIMENSIONS.items())
+
+def _fact_values(row: str) -> List[str]:
+    values = []
+    for column in FACT_COLUMNS:
+        dimension = next((table for table, (name, key) in DIMENSIONS.items() if key == column), None)
+        if dimension:
+            name_column = DIMENSIONS[dimension][0]
+            values.append(f'(SELECT id FROM {dimension} WHERE name = {row}.{name_column})')
+        else:
+            values.append(f'{row}.{column}')
+    return values
+
+SCHEMA_SQL = f'''
+    CREATE TABLE IF NOT EXISTS recipients (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS agencies (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS contract_facts (
+        award_id TEXT PRIMARY KEY,
+        recipient_id INTEGER REFERENCES recipients (id),
+        award_amount REAL,
+        agency_id INTEGER REFERENCES agencies (id),
+        award_date TEXT,
+        award_type TEXT,
+        competition_type TEXT,
+        description TEXT,
+        collected_date TEXT,
+        data_source TEXT
+    );
+'''
+
+VIEW_SQL = f'''
+    CREATE VIEW IF NOT EXISTS contracts AS {contracts_select()};
+
+    CREATE TRIGGER IF NOT EXISTS contracts_insert INSTEAD OF INSERT ON contracts
+    BEGIN
+        {_dimension_upserts('NEW')}
+        INSERT INTO contract_facts ({', '.join(FACT_COLUMNS)})
+        VALUES ({', '.join(_fact_values('NEW'))});
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS contracts_update INSTEAD OF UPDATE ON contracts
+    BEGIN
+        {_dimension_upserts('NEW')}
+        UPDATE contract_facts SET ({', '.join(FACT_COLUMNS)}) = ({', '.join(_fact_values('NEW'))})
+        WHERE award_id = OLD.award_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS contracts_delete INSTEAD OF DELETE ON contracts
+    BEGIN
+        DELETE FROM contract_facts WHERE award_id = OLD.award_id;
+    END;
+'''
+
+def _object_type(conn: sqlite3.Connection, name: str) -> Optional[str]:
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+def create_fact_indexes(conn: sqlite3.Connection):
+    for name, target in FACT_INDEXES.items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+
+def drop_fact_indexes(conn: sqlite3.Connection):
+    """For bulk loads, which are much faster with the indexes built afterwards"""
+    for name in FACT_INDEXES:
+        conn.execute(f'DROP INDEX IF EXISTS {name}')
+
+class FlatContractsTable(RuntimeError):
+    """The database still has the contracts table from before the star schema"""
+
+def ensure_star_schema(conn: sqlite3.Connection, indexes: bool = True):
+    """
+    Create the star schema in a new database. One still holding a flat contracts table
+    raises FlatContractsTable: converting it rewrites every row, so it is left to the
+    explicit upgrade_database (scripts/upgrade_database.py) rather than whoever opens it first.
+    """
+    if _object_type(conn, 'contracts') == 'view' and _object_type(conn, 'contract_facts') == 'table':
+        if indexes:
+            create_fact_indexes(conn)
+            conn.commit()
+        return
+    if _object_type(conn, 'contracts') == 'table':
+        raise FlatContractsTable("The contracts table predates the star schema; "
+                                 "run scripts/upgrade_database.py to convert it")
+    _create(conn, indexes)
+
+def _create(conn: sqlite3.Connection, indexes: bool, migrate: bool = False):
+    conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # One statement at a time: executescript() would commit the transaction midway
+        for statement in _statements(SCHEMA_SQL):
+            conn.execute(statement)
+        if migrate:
+            _migrate(conn)
+        for statement in _statements(VIEW_SQL):
+            conn.execute(statement)
+        if indexes:
+            create_fact_indexes(conn)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+def _statements(script: str) -> List[str]:
+    """Split a DDL script on the ';' that end statements (trigger bodies keep theirs)"""
+    statements, current = [], []
+    for line in script.splitlines(keepends=True):
+        current.append(line)
+        text = ''.join(current).strip()
+        if text.endswith(';') and sqlite3.complete_statement(text):
+            statements.append(text)
+            current = []
+    return statements
+
+def _migrate(conn: sqlite3.Connection):
+    """Move a plain contracts table into dimensions + facts, keeping rowid order"""
+    for table, (column, _) in DIMENSIONS.items():
+        conn.execute(f'''
+            INSERT INTO {table} (name)
+            SELECT DISTINCT {column} FROM contracts
+            WHERE {column} IS NOT NULL AND {column} NOT IN (SELECT name FROM {table})
+        ''')
+    present = {row[1] for row in conn.execute('PRAGMA table_info(contracts)')}
+    select = []
+    for column in FACT_COLUMNS:
+        if column == 'recipient_id':
+            select.append('r.id')
+        elif column == 'agency_id':
+            select.append('a.id')
+        else:
+            select.append(f'c.{column}' if column in present else 'NULL')
+    conn.execute(f'''
+        INSERT INTO contract_facts ({', '.join(FACT_COLUMNS)})
+        SELECT {', '.join(select)}
+        FROM contracts c
+        LEFT JOIN recipients r ON r.name = c.recipient_name
+        LEFT JOIN agencies a ON a.name = c.awarding_agency
+        ORDER BY c.rowid
+    ''')
+    conn.execute('DROP TABLE contracts')
+
+def upgrade_database(db_path: str) -> bool:
+    """
+    Convert a database with the flat contracts table to the star schema, then ANALYZE and
+    VACUUM it. A maintenance step (scripts/upgrade_database.py): it rewrites and copies the
+    whole file, so run it with collectors and dashboards stopped. Returns True when it converted.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        if _object_type(conn, 'contracts') != 'table':
+            ensure_star_schema(conn)
+            return False
+        _create(conn, indexes=True, migrate=True)
+        logger.info(f"Converted the contracts table in {db_path} to recipients/agencies/contract_facts")
+        # Statistics for the new indexes (the old ones went with the table), then give the space back
+        conn.execute('ANALYZE')
+        conn.commit()
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+    return True
+
+class DimensionKeys:
+    """Name -> surrogate key lookups for one connection, creating keys for new names at ingest"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._keys: Dict[str, Dict[str, int]] = {table: {} for table in DIMENSIONS}
+
+    def resolve(self, table: str, names: Iterable[Optional[str]]) -> Dict[str, int]:
+        cache = self._keys[table]
+        missing = sorted({name for name in names if name is not None and name not in cache})
+        for i in range(0, len(missing), 500):
+            chunk = missing[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            cache.update((name, key) for key, name in self.conn.execute(
+                f'SELECT id, name FROM {table} WHERE name IN ({placeholders})', chunk))
+        new = [name for name in missing if name not in cache]
+        if new:
+            # OR IGNORE: another writer may have added the same name since the lookup above
+            self.conn.executemany(f'INSERT OR IGNORE INTO {table} (name) VALUES (?)', [(name,) for name in new])
+            for i in range(0, len(new), 500):
+                chunk = new[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cache.update((name, key) for key, name in self.conn.execute(
+                    f'SELECT id, name FROM {table} WHERE name IN ({placeholders})', chunk))
+        return cache
+
+def insert_contracts(conn: sqlite3.Connection, rows: Sequence[Sequence], keys: Optional[DimensionKeys] = None,
+                     replace: bool = True) -> int:
+    """
+    Write rows in CONTRACT_COLUMNS order (data_source optional) straight into contract_facts,
+    resolving names to keys in bulk instead of per row through the view's trigger
+    """
+    if not rows:
+        return 0
+    keys = keys or DimensionKeys(conn)
+    recipients = keys.resolve('recipients', (row[1] for row in rows))
+    agencies = keys.resolve('agencies', (row[3] for row in rows))
+    facts = [(row[0], recipients.get(row[1]), row[2], agencies.get(row[3]), row[4], row[5], row[6], row[7],
+              row[8], row[9] if len(row) > 9 else None) for row in rows]
+    verb = 'INSERT OR REPLACE' if replace else 'INSERT'
+    conn.executemany(f'''
+        {verb} INTO contract_facts ({', '.join(FACT_COLUMNS)})
+        VALUES ({', '.join('?' * len(FACT_COLUMNS))})
+    ''', facts)
+    return len(facts)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Local Static Assets
+Serves the Plotly bundle from disk instead of the CDN, with content-hashed
+URLs, long-lived cache headers and precompressed gzip variants, so the
+dashboards load quickly and work without internet access
+"""
+
+import os
+import gzip
+import hashlib
+import logging
+import importlib.util
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+VENDOR_DIR = os.path.join(REPO_ROOT, 'static', 'vendor')
+PLOTLY_CDN_URL = 'https://cdn.plot.ly/plotly-latest.min.js'
+ONE_YEAR = 365 * 24 * 3600
+
+def find_plotly_bundle() -> Optional[str]:
+    """static/vendor/plotly.min.js if vendored, else the copy shipped inside the plotly package"""
+    vendored = os.path.join(VENDOR_DIR, 'plotly.min.js')
+    if os.path.exists(vendored):
+        return vendored
+    # Locate the package without importing it; plotly itself is never needed server-side
+    spec = importlib.util.find_spec('plotly')
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    for location in spec.submodule_search_locations:
+        packaged = os.path.join(location, 'package_data', 'plotly.min.js')
+        if os.path.exists(packaged):
+            return packaged
+    return None
+
+class StaticAsset:
+    """One file held in memory with its gzip variant and content hash"""
+
+    def __init__(self, path: str, content_type: str):
+        self.path = path
+        self.content_type = content_type
+        with open(path, 'rb') as f:
+            self.body = f.read()
+        self.etag = hashlib.sha1(self.body).hexdigest()[:16]
+        self._gzip_body = None
+
+    @property
+    def gzip_body(self) -> bytes:
+        """Precompressed path.gz when present and current, otherwise compressed once on first use"""
+        if self._gzip_body is None:
+            gz_path = self.path + '.gz'
+            if os.path.exists(gz_path) and os.path.getmtime(gz_path) >= os.path.getmtime(self.path):
+                with open(gz_path, 'rb') as f:
+                    self._gzip_body = f.read()
+            else:
+                self._gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        return self._gzip_body
+
+def precompress(path: str) -> str:
+    """Write path.gz next to path (used when vendoring assets)"""
+    with open(path, 'rb') as f:
+        body = f.read()
+    gz_path = path + '.gz'
+    with open(gz_path, 'wb') as f:
+        f.write(gzip.compress(body, compresslevel=9, mtime=0))
+    return gz_path
+
+def register_static_assets(app) -> Dict[str, str]:
+    """
+    Add /assets/<name> routes to a Flask app and return template URLs for each asset.
+    Falls back to the CDN URL when no local Plotly bundle is available.
+    """
+    from flask import Response, request
+
+    assets: Dict[str, StaticAsset] = {}
+    bundle = find_plotly_bundle()
+    if bundle:
+        assets['plotly.min.js'] = StaticAsset(bundle, 'application/javascript')
+    else:
+        logger.warning("No local Plotly bundle found (pip install plotly or run scripts/vendor_static_assets.py); "
+                       "dashboards will load it from the CDN")
+
+    @app.route('/assets/<name>')
+    def static_asset(name):
+        asset = assets.get(name)
+        if asset is None:
+            return Response('Not found', status=404)
+
+        headers = {
+            # URLs carry the content hash, so the browser never needs to revalidate
+            'Cache-Control': f'public, max-age={ONE_YEAR}, immutable',
+            'ETag': f'"{asset.etag}"',
+            'Vary': 'Accept-Encoding'
+        }
+        if request.headers.get('If-None-Match') == f'"{asset.etag}"':
+            return Response(status=304, headers=headers)
+
+        body = asset.body
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            body = asset.gzip_body
+            headers['Content-Encoding'] = 'gzip'
+        return Response(body, content_type=asset.content_type, headers=headers)
+
+    urls = {'plotly_src': PLOTLY_CDN_URL}
+    if 'plotly.min.js' in assets:
+        urls['plotly_src'] = f"/assets/plotly.min.js?v={assets['plotly.min.js'].etag}"
+    return urls
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Streaming Accumulation Detector
+Keeps per-recipient sliding windows of recent awards and raises rapid
+accumulation alerts as contracts are written, instead of re-running the
+GROUP BY over the whole window after every collection. Windows and alert state
+are keyed on the resolved entity (entity_resolution.py), so name variants of
+one company share a window, as in the batch analyzers. Every contract write
+(DatabaseManager.save_contracts, and rebuild_summaries after a bulk import)
+appends to the persisted event log, so the windows see awards that did not
+come through observe().
+"""
+
+import sqlite3
+import bisect
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from entity_resolution import EntityResolver
+
+logger = logging.getLogger(__name__)
+
+# scorer(entity name, contract_count, total_amount, first_date, last_date, window) -> (severity, alert) or None
+Scorer = Callable[[str, int, float, str, str, 'AccumulationWindow'], Optional[Tuple[str, Any]]]
+
+@dataclass
+class AccumulationWindow:
+    name: str
+    days: int
+    min_contracts: int
+    scorer: Optional[Scorer] = None
+
+def rapid_accumulation_scorer(recipient: str, contract_count: int, total_amount: float,
+                              first_date: str, last_date: str, window: AccumulationWindow):
+    """Same alert shape and severity rule as PatternAnalyzer.detect_rapid_accumulation"""
+    severity = 'high' if contract_count >= 5 else 'medium'
+    return severity, {
+        'type': 'rapid_accumulation',
+        'company': recipient,
+        'contract_count': contract_count,
+        'total_amount': total_amount,
+        'time_span_days': window.days,
+        'severity': severity
+    }
+
+DEFAULT_WINDOWS = [AccumulationWindow('rapid_accumulation', 30, 3, rapid_accumulation_scorer)]
+
+def _cutoff(days: int) -> str:
+    # date('now') in SQLite is UTC; match it so stream and batch agree on window edges
+    return (datetime.now(timezone.utc).date() - timedelta(days=days)).isoformat()
+
+def record_events(conn, award_ids: Optional[List[str]] = None) -> int:
+    """
+    Copy saved contracts inside the tracked window into accumulation_events, in the writer's
+    transaction, after the writer has resolved their recipients to entities. No alerts are
+    raised here; the next observe() touching the entity scores its full window. All contracts
+    in the window when award_ids is None (after bulk loads). A no-op until a detector has
+    created its tables.
+    """
+    try:
+        row = conn.execute("SELECT value FROM accumulation_meta WHERE key = 'seeded_days'").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    if not row:
+        return 0
+    cutoff = _cutoff(int(row[0]))
+    query = '''
+        INSERT OR IGNORE INTO accumulation_events (entity_id, award_id, award_date, award_amount)
+        SELECT a.entity_id, f.award_id, f.award_date, f.award_amount
+        FROM contract_facts f
+        JOIN entity_aliases a ON a.recipient_id = f.recipient_id
+        WHERE f.award_date >= ?
+    '''
+    if award_ids is None:
+        return conn.execute(query, (cutoff,)).rowcount
+    recorded = 0
+    for i in range(0, len(award_ids), 500):
+        chunk = award_ids[i:i + 500]
+        recorded += conn.execute(f"{query} AND f.award_id IN ({','.join('?' * len(chunk))})",
+                                 [cutoff] + chunk).rowcount
+    return recorded
+
+class RecipientWindow:
+    """Time-ordered awards for one recipient entity, covering the longest configured window"""
+
+    __slots__ = ('entries', 'award_ids')
+
+    def __init__(self):
+        self.entries: List[Tuple[str, str, float]] = []
+        self.award_ids = set()
+
+    def add(self, award_date: str, award_id: str, amount: float) -> bool:
+        if award_id in self.award_ids:
+            return False
+        bisect.insort(self.entries, (award_date, award_id, amount))
+        self.award_ids.add(award_id)
+        return True
+
+    def evict_before(self, cutoff: str):
+        index = bisect.bisect_left(self.entries, (cutoff,))
+        for _, award_id, _ in self.entries[:index]:
+            self.award_ids.discard(award_id)
+        del self.entries[:index]
+
+    def stats_since(self, cutoff: str) -> Tuple[int, float, Optional[str], Optional[str]]:
+        index = bisect.bisect_left(self.entries, (cutoff,))
+        window = self.entries[index:]
+        if not window:
+            return 0, 0.0, None, None
+        return len(window), sum(entry[2] for entry in window), window[0][0], window[-1][0]
+
+class StreamingAccumulationDetector:
+    """Incremental rapid-accumulation detector with state persisted in SQLite"""
+
+    def __init__(self, db_path: str = "government_monitor.db", windows: Optional[List[AccumulationWindow]] = None):
+        self.db_path = db_path
+        self.windows = list(windows or DEFAULT_WINDOWS)
+        self._recipients: Dict[int, RecipientWindow] = {}
+        self._names: Dict[int, str] = {}
+        self._alerted: Dict[Tuple[str, int], str] = {}
+        self._loaded_state = set()
+        self.init_state()
+
+    def add_window(self, window: AccumulationWindow):
+        """Track an additional window (e.g. the scenario monitor's 90-day rule)"""
+        self.windows = [w for w in self.windows if w.name != window.name] + [window]
+        self._recipients.clear()
+        self._loaded_state.clear()
+        self._alerted.clear()
+        self._bootstrap()
+
+    def init_state(self):
+        """Create state tables and seed them from existing contracts on first use"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS accumulation_events (
+                entity_id INTEGER,
+                award_id TEXT,
+                award_date TEXT,
+                award_amount REAL,
+                PRIMARY KEY (entity_id, award_id)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_accumulation_events_date ON accumulation_events (award_date)')
+
+        # Severity last alerted per window/entity, so restarts don't re-alert
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS accumulation_state (
+                window_name TEXT,
+                entity_id INTEGER,
+                alerted_severity TEXT,
+                contract_count INTEGER,
+                total_amount REAL,
+                updated_date TEXT,
+                PRIMARY KEY (window_name, entity_id)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS accumulation_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+        self._bootstrap()
+
+    def _max_days(self) -> int:
+        return max(window.days for window in self.windows)
+
+    def _bootstrap(self):
+        """Seed events and alert state from the contracts table once per window length, without emitting alerts"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT value FROM accumulation_meta WHERE key = 'seeded_days'")
+        row = cursor.fetchone()
+        seeded_days = int(row[0]) if row else 0
+        if seeded_days >= self._max_days():
+            conn.close()
+            return
+
+        cursor.execute("INSERT OR REPLACE INTO accumulation_meta (key, value) VALUES ('seeded_days', ?)",
+                       (str(self._max_days()),))
+        seeded = 0
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name = 'contracts'")
+        if cursor.fetchone():
+            EntityResolver(self.db_path).ensure_built(conn)
+            seeded = record_events(conn)
+        conn.commit()
+        conn.close()
+
+        if seeded > 0:
+            # Everything over threshold at seed time was already reported by batch runs
+            entities = self._entities_in_events()
+            self.evaluate(entities, emit=False)
+            logger.info(f"Seeded streaming detector with {seeded} awards for {len(entities)} recipient entities")
+
+    def _entities_in_events(self) -> List[int]:
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT DISTINCT entity_id FROM accumulation_events')
+        entities = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return entities
+
+    @staticmethod
+    def _entity_ids(conn, names: List[str]) -> Dict[str, int]:
+        """Entity of each recipient name; names never saved fall back to their match key"""
+        entity_ids = {}
+        for i in range(0, len(names), 500):
+            chunk = names[i:i + 500]
+            entity_ids.update(conn.execute(f'''
+                SELECT r.name, a.entity_id FROM recipients r
+                JOIN entity_aliases a ON a.recipient_id = r.id
+                WHERE r.name IN ({','.join('?' * len(chunk))})
+            ''', chunk))
+        for name in names:
+            if name not in entity_ids:
+                entity_id = EntityResolver.find(conn, name)
+                if entity_id is not None:
+                    entity_ids[name] = entity_id
+        return entity_ids
+
+    def _load(self, conn, entities: List[int], reload: bool = False, exclude: frozenset = frozenset()):
+        """
+        Pull persisted window entries, alert state and canonical names for entities not yet cached
+        (all of them with reload, since writers append events outside the detector), leaving out
+        award_ids in exclude
+        """
+        missing = list(entities) if reload else [entity_id for entity_id in entities if entity_id not in self._recipients]
+        cutoff = _cutoff(self._max_days())
+        for i in range(0, len(missing), 500):
+            chunk = missing[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for entity_id in chunk:
+                self._recipients[entity_id] = RecipientWindow()
+            for entity_id, award_id, award_date, amount in conn.execute(f'''
+                SELECT entity_id, award_id, award_date, award_amount
+                FROM accumulation_events
+                WHERE entity_id IN ({placeholders}) AND award_date >= ?
+            ''', chunk + [cutoff]):
+                if award_id not in exclude:
+                    self._recipients[entity_id].add(award_date, award_id, amount or 0.0)
+
+        unnamed = [entity_id for entity_id in entities if entity_id not in self._names]
+        for i in range(0, len(unnamed), 500):
+            chunk = unnamed[i:i + 500]
+            self._names.update(conn.execute(
+                f"SELECT id, name FROM entities WHERE id IN ({','.join('?' * len(chunk))})", chunk))
+
+        missing_state = [entity_id for entity_id in entities if entity_id not in self._loaded_state]
+        for i in range(0, len(missing_state), 500):
+            chunk = missing_state[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for window_name, entity_id, severity in conn.execute(f'''
+                SELECT window_name, entity_id, alerted_severity
+                FROM accumulation_state WHERE entity_id IN ({placeholders})
+            ''', chunk):
+                self._alerted[(window_name, entity_id)] = severity
+            self._loaded_state.update(chunk)
+
+    def observe(self, contracts: List[Any]) -> List[Any]:
+        """Add newly written contracts to their recipient entities' windows and return any new alerts"""
+        max_cutoff = _cutoff(self._max_days())
+        fresh = [c for c in contracts if c.recipient_name and c.award_date and c.award_date >= max_cutoff]
+        if not fresh:
+            return []
+
+        conn = sqlite3.connect(self.db_path)
+        entity_ids = self._entity_ids(conn, sorted({c.recipient_name for c in fresh}))
+        fresh = [c for c in fresh if c.recipient_name in entity_ids]
+        touched = sorted({entity_ids[c.recipient_name] for c in fresh})
+        # save_contracts may already have logged this batch; keep it out until after the re-check
+        self._load(conn, touched, reload=True, exclude=frozenset(c.award_id for c in fresh))
+
+        # Re-check before adding so windows that aged below threshold can alert again
+        self._evaluate(conn, touched, emit=False, clear_only=True)
+
+        new_rows = []
+        for contract in fresh:
+            amount = float(contract.award_amount or 0)
+            entity_id = entity_ids[contract.recipient_name]
+            if self._recipients[entity_id].add(contract.award_date, contract.award_id, amount):
+                new_rows.append((entity_id, contract.award_id, contract.award_date, amount))
+
+        conn.executemany('''
+            INSERT OR IGNORE INTO accumulation_events (entity_id, award_id, award_date, award_amount)
+            VALUES (?, ?, ?, ?)
+        ''', new_rows)
+        conn.execute('DELETE FROM accumulation_events WHERE award_date < ?', (max_cutoff,))
+
+        alerts = self._evaluate(conn, touched, emit=True)
+        conn.commit()
+        conn.close()
+
+        if alerts:
+            logger.info(f"Streaming detector raised {len(alerts)} alerts from {len(fresh)} new contracts")
+        return alerts
+
+    def evaluate(self, entities: List[int], emit: bool = True) -> List[Any]:
+        """Score the given recipient entities' current windows"""
+        conn = sqlite3.connect(self.db_path)
+        self._load(conn, entities)
+        alerts = self._evaluate(conn, entities, emit=emit)
+        conn.commit()
+        conn.close()
+        return alerts
+
+    def _evaluate(self, conn, entities: List[int], emit: bool, clear_only: bool = False) -> List[Any]:
+        alerts = []
+        state_updates = []
+        state_clears = []
+        now = datetime.now().isoformat()
+        max_cutoff = _cutoff(self._max_days())
+
+        for entity_id in entities:
+            window_state = self._recipients[entity_id]
+            window_state.evict_before(max_cutoff)
+
+            for window in self.windows:
+                key = (window.name, entity_id)
+                count, total, first_date, last_date = window_state.stats_since(_cutoff(window.days))
+                scored = None
+                if count >= window.min_contracts:
+                    scorer = window.scorer or rapid_accumulation_scorer
+                    scored = scorer(self._names.get(entity_id, ''), count, total, first_date, last_date, window)
+
+                previous = self._alerted.get(key)
+                if scored is None:
+                    if previous is not None:
+                        del self._alerted[key]
+                        state_clears.append(key)
+                    continue
+                if clear_only:
+                    continue
+
+                severity, alert = scored
+                # Alert on first crossing and on escalation, not on every new contract
+                if previous is None or _severity_rank(severity) > _severity_rank(previous):
+                    if emit:
+                        alerts.append(alert)
+                    self._alerted[key] = severity
+                    state_updates.append((window.name, entity_id, severity, count, total, now))
+
+        conn.executemany('''
+            INSERT OR REPLACE INTO accumulation_state
+            (window_name, entity_id, alerted_severity, contract_count, total_amount, updated_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', state_updates)
+        conn.executemany('DELETE FROM accumulation_state WHERE window_name = ? AND entity_id = ?',
+                         state_clears)
+        return alerts
+
+def _severity_rank(severity: str) -> int:
+    return {'low': 1, 'medium': 2, 'high': 3}.get(str(severity).lower(), 0)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Synthetic Contract Data
+Deterministic generator of realistic-looking contracts (Zipf-skewed recipients
+and agencies, log-normal amounts, weighted competition types and description
+vocabulary that exercises every detector) and builder for benchmark fixtures
+"""
+
+import os
+import random
+import sqlite3
+import logging
+from datetime import date, datetime
+from itertools import accumulate
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import star_schema
+
+logger = logging.getLogger(__name__)
+
+FIXTURE_SIZES = {
+    '10k': 10_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000
+}
+
+# Large named contractors sit at the head of the recipient distribution, including the
+# sector lists ScenarioMonitor watches, so scenarios and the watchlist produce hits
+NAMED_RECIPIENTS = [
+    'LOCKHEED MARTIN CORPORATION', 'BOEING COMPANY, THE', 'RAYTHEON COMPANY', 'GENERAL DYNAMICS CORPORATION',
+    'NORTHROP GRUMMAN SYSTEMS CORPORATION', 'BAE SYSTEMS INC', 'L3HARRIS TECHNOLOGIES INC',
+    'PALANTIR TECHNOLOGIES INC', 'PALANTIR USG INC', 'ANDURIL INDUSTRIES INC', 'MICROSOFT CORPORATION',
+    'AMAZON WEB SERVICES INC', 'ORACLE AMERICA INC', 'GOOGLE PUBLIC SECTOR LLC', 'CLEARVIEW AI INC',
+    'BOOZ ALLEN HAMILTON INC', 'LEIDOS INC', 'SAIC', 'JPMORGAN CHASE BANK', 'GOLDMAN SACHS & CO LLC',
+    'BLACKROCK FINANCIAL MANAGEMENT INC', 'WELLS FARGO BANK', 'BANK OF AMERICA NA', 'FIDELITY INVESTMENTS'
+]
+
+NAME_WORDS = [
+    'ADVANCED', 'ALLIED', 'AMERICAN', 'APEX', 'ATLAS', 'BLUE', 'CAPITAL', 'CASCADE', 'CENTURY', 'COASTAL',
+    'CONTINENTAL', 'DELTA', 'EAGLE', 'FEDERAL', 'FRONTIER', 'GLOBAL', 'GRANITE', 'HERITAGE', 'HORIZON',
+    'INTEGRATED', 'KEYSTONE', 'LIBERTY', 'MERIDIAN', 'NATIONAL', 'NORTHSTAR', 'PACIFIC', 'PATRIOT', 'PINNACLE',
+    'PRECISION', 'RIVERSIDE', 'SUMMIT', 'STRATEGIC', 'TRIDENT', 'UNITED', 'VANGUARD', 'VECTOR', 'WESTERN'
+]
+NAME_TRADES = [
+    'SOLUTIONS', 'SYSTEMS', 'TECHNOLOGIES', 'LOGISTICS', 'CONSTRUCTION', 'CONSULTING', 'SERVICES',
+    'ENGINEERING', 'MEDICAL SUPPLY', 'DEFENSE', 'ANALYTICS', 'ENERGY', 'MANUFACTURING', 'GROUP'
+]
+NAME_SUFFIXES = ['INC', 'LLC', 'CORP', 'CORPORATION', 'CO', 'LTD', 'LP']
+
+AGENCIES = [
+    'Department of Defense', 'Department of Veterans Affairs', 'Department of Health and Human Services',
+    'Department of Homeland Security', 'Department of Energy', 'General Services Administration',
+    'National Aeronautics and Space Administration', 'Department of Justice', 'Department of State',
+    'Department of Agriculture', 'Department of the Treasury', 'Department of Transportation',
+    'Department of the Interior', 'Department of Commerce', 'Department of Education',
+    'Environmental Protection Agency', 'Department of Labor', 'Small Business Administration',
+    'Social Security Administration', 'Department of Housing and Urban Development'
+]
+
+AWARD_TYPES = [('Definitive Contract', 30), ('Delivery Order', 40), ('Purchase Order', 20), ('BPA Call', 10)]
+
+# Shares loosely follow FPDS extent-competed reporting
+COMPETITION_TYPES = [
+    ('FULL AND OPEN COMPETITION', 45),
+    ('FULL AND OPEN COMPETITION AFTER EXCLUSION OF SOURCES', 12),
+    ('COMPETED UNDER SAP', 10),
+    ('NOT COMPETED', 14),
+    ('NOT AVAILABLE FOR COMPETITION', 8),
+    ('SOLE SOURCE', 7),
+    ('NO BID', 2),
+    (None, 2)
+]
+
+DESCRIPTION_SUBJECTS = [
+    'IT support services', 'software licenses', 'cloud hosting', 'data analytics platform', 'aircraft parts',
+    'vehicle maintenance', 'medical supplies', 'facility construction', 'engineering services',
+    'professional services', 'training services', 'research and development', 'fuel delivery',
+    'janitorial services', 'satellite communications', 'body armor', 'laboratory equipment',
+    'network modernization', 'records management', 'financial advisory services'
+]
+
+# Rare modifiers that trip the keyword-based detectors; (phrase, weight)
+DESCRIPTION_MODIFIERS = [
+    (None, 900), ('emergency', 20), ('urgent', 15), ('national security', 10), ('critical infrastructure', 8),
+    ('border security', 6), ('cybersecurity', 12), ('american data', 3), ('data sovereignty', 2),
+    ('domestic', 8), ('patriot', 3), ('small town', 3), ('community', 6), ('main street', 2)
+]
+
+def _zipf_cum_weights(count: int, exponent: float) -> List[float]:
+    return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+def _cum_weights(pairs) -> Tuple[List, List[float]]:
+    values = [value for value, _ in pairs]
+    return values, list(accumulate(weight for _, weight in pairs))
+
+class SyntheticContractGenerator:
+    """Reproducible stream of contract rows; the same seed and end date give the same data"""
+
+    def __init__(self, seed: int = 42, days: int = 730, recipients: int = 50_000,
+                 end_date: Optional[date] = None):
+        self.seed = seed
+        self.days = days
+        self.end_date = end_date or date.today()
+        rng = random.Random(seed)
+
+        # Named contractors first, then generated small and mid-size firms
+        names = list(NAMED_RECIPIENTS)
+        seen = set(names)
+        while len(names) < max(recipients, len(NAMED_RECIPIENTS)):
+            word, trade, suffix = rng.choice(NAME_WORDS), rng.choice(NAME_TRADES), rng.choice(NAME_SUFFIXES)
+            name = f"{word} {trade} {suffix}"
+            if name in seen:
+                name = f"{word} {trade} {rng.randint(2, 9999)} {suffix}"
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+        self.recipients = names
+        self._recipient_weights = _zipf_cum_weights(len(names), 1.1)
+        self._agency_weights = _zipf_cum_weights(len(AGENCIES), 0.9)
+        self._award_types, self._award_type_weights = _cum_weights(AWARD_TYPES)
+        self._competition, self._competition_weights = _cum_weights(COMPETITION_TYPES)
+        self._modifiers, self._modifier_weights = _cum_weights(DESCRIPTION_MODIFIERS)
+
+        # Recipients keep a home agency most of the time, as real vendors do
+        self._home_agency = [rng.choices(AGENCIES, cum_weights=self._agency_weights)[0] for _ in names]
+
+    def rows(self, count: int, start_index: int = 0) -> Iterator[tuple]:
+        """
+        Contract tuples in Contract field order. Rows depend only on (seed, index),
+        so any slice of the stream can be regenerated independently.
+        """
+        recipient_indexes = range(len(self.recipients))
+        end_ordinal = self.end_date.toordinal()
+        for index in range(start_index, start_index + count):
+            rng = random.Random(self.seed * 1_000_003 + index)
+            recipient_index = rng.choices(recipient_indexes, cum_weights=self._recipient_weights)[0]
+            if rng.random() < 0.75:
+                agency = self._home_agency[recipient_index]
+            else:
+                agency = rng.choices(AGENCIES, cum_weights=self._agency_weights)[0]
+
+            # Recent awards are denser than old ones
+            age_days = int(self.days * (rng.random() ** 1.3))
+            award_date = date.fromordinal(end_ordinal - age_days).isoformat()
+
+            # Log-normal around ~$160k with a heavy tail into the billions; the head recipients win larger awards
+            amount = rng.lognormvariate(12.0 + (1.5 if recipient_index < len(NAMED_RECIPIENTS) else 0.0), 2.1)
+            amount = round(min(amount, 5_000_000_000.0), 2)
+
+            competition = rng.choices(self._competition, cum_weights=self._competition_weights)[0]
+            modifier = rng.choices(self._modifiers, cum_weights=self._modifier_weights)[0]
+            subject = DESCRIPTION_SUBJECTS[rng.randrange(len(DESCRIPTION_SUBJECTS))]
+            description = f"{modifier} {subject}".upper() if modifier else subject.upper()
+
+            yield (
+                f"SYN-{self.seed}-{index:09d}",
+                self.recipients[recipient_index],
+                amount,
+                agency,
+                award_date,
+                rng.choices(self._award_types, cum_weights=self._award_type_weights)[0],
+                competition,
+                description
+            )
+
+    def batches(self, count: int, batch_size: int = 10_000, start_index: int = 0) -> Iterator[List[tuple]]:
+        end = start_index + count
+        for offset in range(start_index, end, batch_size):
+            yield list(self.rows(min(batch_size, end - offset), offset))
+
+    def contracts(self, count: int, start_index: int = 0):
+        """Contract objects, for exercising DatabaseManager.save_contracts"""
+        from government_monitor_system import Contract
+        return [Contract(*row) for row in self.rows(count, start_index)]
+
+def fixture_info(db_path: str) -> Optional[Dict]:
+    """Metadata recorded by build_fixture, or None if db_path is not a complete fixture"""
+    if not os.path.exists(db_path):
+        return None
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute('SELECT rows, seed, end_date, built_date FROM synthetic_fixture').fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return {'rows': row[0], 'seed': row[1], 'end_date': row[2], 'built_date': row[3]}
+
+def build_fixture(db_path: str, rows: int, seed: int = 42, batch_size: int = 50_000,
+                  progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    Write a fresh government_monitor.db-compatible database with `rows` synthetic contracts.
+    Bulk-loads with journaling off (the file is disposable until the metadata row is written)
+    and creates the listing indexes, summary sketches, baselines and recipient entities
+    afterwards, which is much faster than maintaining them per row.
+    """
+    from government_monitor_system import DatabaseManager
+    from contract_listing import ensure_indexes
+    from sketches import SketchStore
+    from baselines import BaselineStore
+    from entity_resolution import EntityResolver
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    DatabaseManager(db_path)
+    generator = SyntheticContractGenerator(seed=seed, recipients=max(1_000, min(200_000, rows // 20)))
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    star_schema.drop_fact_indexes(conn)
+    keys = star_schema.DimensionKeys(conn)
+    collected = datetime.now().isoformat()
+    written = 0
+    for batch in generator.batches(rows, batch_size):
+        star_schema.insert_contracts(conn, [row + (collected,) for row in batch], keys, replace=False)
+        conn.commit()
+        written += len(batch)
+        if progress:
+            progress(written, rows)
+    conn.close()
+
+    ensure_indexes(db_path)
+    conn = sqlite3.connect(db_path)
+    SketchStore(db_path).rebuild(conn)
+    BaselineStore(db_path).rebuild(conn)
+    EntityResolver(db_path).rebuild(conn)
+    conn.execute('ANALYZE')
+    conn.execute('''
+        CREATE TABLE synthetic_fixture (rows INTEGER, seed INTEGER, end_date TEXT, built_date TEXT)
+    ''')
+    conn.execute('INSERT INTO synthetic_fixture VALUES (?, ?, ?, ?)',
+                 (rows, seed, generator.end_date.isoformat(), datetime.now().isoformat()))
+    conn.commit()
+    conn.close()
+    logger.info(f"Built synthetic fixture {db_path} with {rows:,} contracts")
+    return fixture_info(db_path)
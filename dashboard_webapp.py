@@ -4,34 +4,53 @@ Simple Flask web dashboard for Government Contract Monitor
 Run this to get a web interface for your monitoring data
 """
 
-from flask import Flask, render_template_string, jsonify, request
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
+
+from flask import Flask, render_template_string, request
 import sqlite3
-import pandas as pd
 import json
 from datetime import datetime, timedelta
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.utils import PlotlyJSONEncoder
+from figure_cache import FigureCache, data_version
+from static_assets import register_static_assets
+from fast_json import query_records, json_response
+from db_pool import ConnectionPool
+from contract_listing import ensure_indexes
+from section_loader import SectionLoader
+from metrics import instrument_app, figure_cache_collector, last_run_collector
+from sketches import SketchStore
+from entity_resolution import ensure_entities
 
 app = Flask(__name__)
+asset_urls = register_static_assets(app)
+metrics_registry = instrument_app(app, 'dashboard_webapp')
 
 class DashboardData:
     def __init__(self, db_path: str = "government_monitor.db"):
         self.db_path = db_path
+        # Read-only pooled connections; each statement is timed for /metrics
+        self.pool = ConnectionPool(db_path, name='dashboard_webapp')
+        self.sketches = SketchStore(db_path)
+        try:
+            ensure_indexes(self.db_path)
+            ensure_entities(self.db_path)
+        except sqlite3.OperationalError:
+            pass  # database locked or not writable; queries still work once it has been converted
     
     def get_summary_stats(self):
         """Get high-level summary statistics"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.pool.connect()
         cursor = conn.cursor()
         
-        # Total contracts and spending
+        # Total contracts and spending; distinct recipients from the HyperLogLog rollup kept at ingest
         cursor.execute('''
             SELECT COUNT(*) as total_contracts,
-                   SUM(award_amount) as total_spending,
-                   COUNT(DISTINCT recipient_name) as unique_companies
+                   SUM(award_amount) as total_spending
             FROM contracts
         ''')
         totals = cursor.fetchone()
+        unique_companies = round(self.sketches.distinct_recipients(conn).value)
         
         # Recent activity (last 30 days)
         cursor.execute('''
@@ -62,7 +81,7 @@ class DashboardData:
         return {
             'total_contracts': totals[0],
             'total_spending': totals[1] or 0,
-            'unique_companies': totals[2],
+            'unique_companies': unique_companies,
             'recent_contracts': recent[0],
             'recent_spending': recent[1] or 0,
             'no_bid_percentage': round(no_bid_percentage, 1)
@@ -70,8 +89,8 @@ class DashboardData:
     
     def get_spending_trends(self):
         """Get monthly spending trends"""
-        conn = sqlite3.connect(self.db_path)
-        df = pd.read_sql_query('''
+        conn = self.pool.connect()
+        records = query_records(conn, '''
             SELECT DATE(award_date, 'start of month') as month,
                    COUNT(*) as contract_count,
                    SUM(award_amount) as total_amount,
@@ -82,46 +101,59 @@ class DashboardData:
             WHERE award_date >= date('now', '-12 months')
             GROUP BY month
             ORDER BY month
-        ''', conn)
+        ''')
         conn.close()
         
-        return df.to_dict('records')
+        return records
     
     def get_top_contractors(self, days=90, limit=15):
         """Get top contractors by spending"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.pool.connect()
         
         # First try last 90 days, if no data, expand to all data
-        df = pd.read_sql_query('''
-            SELECT recipient_name,
-                   COUNT(*) as contract_count,
-                   SUM(award_amount) as total_amount,
-                   AVG(award_amount) as avg_amount
-            FROM contracts 
-            WHERE award_date >= date('now', '-{} days')
-            GROUP BY recipient_name
-            ORDER BY total_amount DESC
-            LIMIT {}
-        '''.format(days, limit), conn)
+        # Both group on the resolved entity (name variants together) and join names onto the top rows only
+        records = query_records(conn, '''
+            SELECT e.name as recipient_name, g.contract_count, g.total_amount, g.avg_amount
+            FROM (
+                SELECT a.entity_id,
+                       COUNT(*) as contract_count,
+                       SUM(f.award_amount) as total_amount,
+                       AVG(f.award_amount) as avg_amount
+                FROM contract_facts f
+                JOIN entity_aliases a ON a.recipient_id = f.recipient_id
+                WHERE f.award_date >= date('now', '-{} days')
+                GROUP BY a.entity_id
+                ORDER BY total_amount DESC
+                LIMIT {}
+            ) g
+            LEFT JOIN entities e ON e.id = g.entity_id
+            ORDER BY g.total_amount DESC
+        '''.format(days, limit))
         
         # Always show all-time data since most contracts are historical
-        df = pd.read_sql_query('''
-            SELECT recipient_name,
-                   COUNT(*) as contract_count,
-                   SUM(award_amount) as total_amount,
-                   AVG(award_amount) as avg_amount
-            FROM contracts 
-            GROUP BY recipient_name
-            ORDER BY total_amount DESC
-            LIMIT {}
-        '''.format(limit), conn)
+        records = query_records(conn, '''
+            SELECT e.name as recipient_name, g.contract_count, g.total_amount, g.avg_amount
+            FROM (
+                SELECT a.entity_id,
+                       COUNT(*) as contract_count,
+                       SUM(f.award_amount) as total_amount,
+                       AVG(f.award_amount) as avg_amount
+                FROM contract_facts f
+                JOIN entity_aliases a ON a.recipient_id = f.recipient_id
+                GROUP BY a.entity_id
+                ORDER BY total_amount DESC
+                LIMIT {}
+            ) g
+            LEFT JOIN entities e ON e.id = g.entity_id
+            ORDER BY g.total_amount DESC
+        '''.format(limit))
         
         conn.close()
-        return df.to_dict('records')
+        return records
     
     def get_recent_alerts(self, limit=20):
         """Get recent alerts"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.pool.connect()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT alert_type, message, created_date, data
@@ -145,35 +177,106 @@ class DashboardData:
     
     def get_agency_breakdown(self):
         """Get spending breakdown by agency"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.pool.connect()
         
         # First try last 90 days, if no data, expand to all data
-        df = pd.read_sql_query('''
-            SELECT awarding_agency,
-                   COUNT(*) as contract_count,
-                   SUM(award_amount) as total_amount
-            FROM contracts 
-            WHERE award_date >= date('now', '-90 days')
-            GROUP BY awarding_agency
-            ORDER BY total_amount DESC
-            LIMIT 10
-        ''', conn)
+        records = query_records(conn, '''
+            SELECT a.name as awarding_agency, g.contract_count, g.total_amount
+            FROM (
+                SELECT agency_id,
+                       COUNT(*) as contract_count,
+                       SUM(award_amount) as total_amount
+                FROM contract_facts 
+                WHERE award_date >= date('now', '-90 days')
+                GROUP BY agency_id
+                ORDER BY total_amount DESC
+                LIMIT 10
+            ) g
+            LEFT JOIN agencies a ON a.id = g.agency_id
+            ORDER BY g.total_amount DESC
+        ''')
         
         # Always show all-time data since most contracts are historical  
-        df = pd.read_sql_query('''
-            SELECT awarding_agency,
-                   COUNT(*) as contract_count,
-                   SUM(award_amount) as total_amount
-            FROM contracts 
-            GROUP BY awarding_agency
-            ORDER BY total_amount DESC
-            LIMIT 10
-        ''', conn)
+        records = query_records(conn, '''
+            SELECT a.name as awarding_agency, g.contract_count, g.total_amount
+            FROM (
+                SELECT agency_id,
+                       COUNT(*) as contract_count,
+                       SUM(award_amount) as total_amount
+                FROM contract_facts 
+                GROUP BY agency_id
+                ORDER BY total_amount DESC
+                LIMIT 10
+            ) g
+            LEFT JOIN agencies a ON a.id = g.agency_id
+            ORDER BY g.total_amount DESC
+        ''')
         
         conn.close()
-        return df.to_dict('records')
+        return records
+    
+    def get_spending_trend_figure(self):
+        """Plotly figure (data + layout) for the monthly spending chart"""
+        spending_data = self.get_spending_trends()
+        return {
+            'data': [{
+                'x': [d['month'] for d in spending_data],
+                'y': [_millions(d['total_amount']) for d in spending_data],
+                'type': 'scatter',
+                'mode': 'lines+markers',
+                'name': 'Monthly Spending ($M)',
+                'line': {'color': '#007bff'}
+            }],
+            'layout': {
+                'title': '',
+                'xaxis': {'title': 'Month'},
+                'yaxis': {'title': 'Spending (Millions $)'},
+                'showlegend': False
+            }
+        }
+    
+    def get_top_contractors_figure(self):
+        """Plotly figure (data + layout) for the top contractors chart"""
+        contractors_data = self.get_top_contractors()
+        return {
+            'data': [{
+                'x': [_millions(d['total_amount']) for d in contractors_data],
+                'y': [(d['recipient_name'] or '')[:30] for d in contractors_data],
+                'type': 'bar',
+                'orientation': 'h',
+                'marker': {'color': '#28a745'}
+            }],
+            'layout': {
+                'title': '',
+                'xaxis': {'title': 'Total Amount (Millions $)'},
+                'yaxis': {'title': ''},
+                'margin': {'l': 200}
+            }
+        }
+    
+    def get_agency_breakdown_figure(self):
+        """Plotly figure (data + layout) for the agency breakdown pie chart"""
+        agency_data = self.get_agency_breakdown()
+        return {
+            'data': [{
+                'labels': [(d['awarding_agency'] or '')[:20] for d in agency_data],
+                'values': [d['total_amount'] for d in agency_data],
+                'type': 'pie'
+            }],
+            'layout': {
+                'title': ''
+            }
+        }
+
+def _millions(amount):
+    return amount / 1000000 if amount is not None else None
 
 dashboard_data = DashboardData()
+figure_cache = FigureCache(dashboard_data.db_path)
+metrics_registry.register_collector(figure_cache_collector(figure_cache, 'dashboard_webapp'))
+metrics_registry.register_collector(last_run_collector(dashboard_data.db_path, dashboard_data.pool.connect))
+# Home-page sections load concurrently, each on its own pooled connection
+section_loader = SectionLoader('dashboard_webapp')
 
 # HTML Template for the dashboard
 DASHBOARD_HTML = """
@@ -181,7 +284,7 @@ DASHBOARD_HTML = """
 <html>
 <head>
     <title>Government Contract Monitor</title>
-    <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+    <script src="{{ plotly_src }}"></script>
     <style>
         body { font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }
         .container { max-width: 1200px; margin: 0 auto; }
@@ -264,52 +367,15 @@ DASHBOARD_HTML = """
     </div>
     
     <script>
-        // Spending trends chart
-        var spendingData = {{ spending_trends | safe }};
-        var spendingTrace = {
-            x: spendingData.map(d => d.month),
-            y: spendingData.map(d => d.total_amount / 1000000),
-            type: 'scatter',
-            mode: 'lines+markers',
-            name: 'Monthly Spending ($M)',
-            line: {color: '#007bff'}
-        };
-        var spendingLayout = {
-            title: '',
-            xaxis: {title: 'Month'},
-            yaxis: {title: 'Spending (Millions $)'},
-            showlegend: false
-        };
-        Plotly.newPlot('spending-chart', [spendingTrace], spendingLayout);
+        // Charts (figures are prebuilt server-side and cached per data version)
+        var spendingFigure = {{ spending_figure | safe }};
+        Plotly.newPlot('spending-chart', spendingFigure.data, spendingFigure.layout);
         
-        // Top contractors chart
-        var contractorsData = {{ top_contractors | safe }};
-        var contractorsTrace = {
-            x: contractorsData.map(d => d.total_amount / 1000000),
-            y: contractorsData.map(d => d.recipient_name.substring(0, 30)),
-            type: 'bar',
-            orientation: 'h',
-            marker: {color: '#28a745'}
-        };
-        var contractorsLayout = {
-            title: '',
-            xaxis: {title: 'Total Amount (Millions $)'},
-            yaxis: {title: ''},
-            margin: {l: 200}
-        };
-        Plotly.newPlot('contractors-chart', [contractorsTrace], contractorsLayout);
+        var contractorsFigure = {{ contractors_figure | safe }};
+        Plotly.newPlot('contractors-chart', contractorsFigure.data, contractorsFigure.layout);
         
-        // Agency breakdown chart
-        var agencyData = {{ agency_breakdown | safe }};
-        var agencyTrace = {
-            labels: agencyData.map(d => d.awarding_agency.substring(0, 20)),
-            values: agencyData.map(d => d.total_amount),
-            type: 'pie'
-        };
-        var agencyLayout = {
-            title: ''
-        };
-        Plotly.newPlot('agency-chart', [agencyTrace], agencyLayout);
+        var agencyFigure = {{ agency_figure | safe }};
+        Plotly.newPlot('agency-chart', agencyFigure.data, agencyFigure.layout);
     </script>
 </body>
 </html>
@@ -317,25 +383,27 @@ DASHBOARD_HTML = """
 
 @app.route('/')
 def dashboard():
-    stats = dashboard_data.get_summary_stats()
-    spending_trends = dashboard_data.get_spending_trends()
-    top_contractors = dashboard_data.get_top_contractors()
-    alerts = dashboard_data.get_recent_alerts()
-    agency_breakdown = dashboard_data.get_agency_breakdown()
+    version = data_version(dashboard_data.db_path)
+    sections = section_loader.load({
+        'stats': dashboard_data.get_summary_stats,
+        'spending_figure': lambda: figure_cache.get('spending_trend', dashboard_data.get_spending_trend_figure, version),
+        'contractors_figure': lambda: figure_cache.get('top_contractors', dashboard_data.get_top_contractors_figure,
+                                                       version),
+        'alerts': dashboard_data.get_recent_alerts,
+        'agency_figure': lambda: figure_cache.get('agency_breakdown', dashboard_data.get_agency_breakdown_figure,
+                                                  version)
+    })
     
     return render_template_string(
         DASHBOARD_HTML,
-        stats=stats,
-        spending_trends=json.dumps(spending_trends),
-        top_contractors=json.dumps(top_contractors),
-        alerts=alerts,
-        agency_breakdown=json.dumps(agency_breakdown)
+        **sections,
+        plotly_src=asset_urls['plotly_src']
     )
 
 @app.route('/api/company/<company_name>')
 def company_api(company_name):
     """API endpoint for company-specific data"""
-    conn = sqlite3.connect(dashboard_data.db_path)
+    conn = dashboard_data.pool.connect()
     
     # Company summary
     summary_query = '''
@@ -348,7 +416,7 @@ def company_api(company_name):
                        OR competition_type LIKE '%sole%source%' 
                        THEN 1 END) as no_bid_count
         FROM contracts 
-        WHERE recipient_name LIKE ?
+        WHERE recipient_id IN (SELECT id FROM recipients WHERE name LIKE ?)
     '''
     
     cursor = conn.cursor()
@@ -359,16 +427,16 @@ def company_api(company_name):
     recent_query = '''
         SELECT award_id, award_amount, awarding_agency, award_date, competition_type
         FROM contracts 
-        WHERE recipient_name LIKE ?
+        WHERE recipient_id IN (SELECT id FROM recipients WHERE name LIKE ?)
           AND award_date >= date('now', '-90 days')
         ORDER BY award_date DESC
         LIMIT 20
     '''
     
-    df = pd.read_sql_query(recent_query, conn, params=[f'%{company_name}%'])
+    recent_contracts = query_records(conn, recent_query, [f'%{company_name}%'])
     conn.close()
     
-    return jsonify({
+    return json_response({
         'company': company_name,
         'summary': {
             'total_contracts': summary[0],
@@ -377,28 +445,53 @@ def company_api(company_name):
             'last_contract': summary[3],
             'no_bid_contracts': summary[4]
         },
-        'recent_contracts': df.to_dict('records')
+        'recent_contracts': recent_contracts
     })
 
 @app.route('/api/alerts')
 def alerts_api():
     """API endpoint for recent alerts"""
     alerts = dashboard_data.get_recent_alerts()
-    return jsonify(alerts)
+    return json_response(alerts)
 
 @app.route('/api/trends')
 def trends_api():
     """API endpoint for trend data"""
-    return jsonify({
+    return json_response({
         'spending_trends': dashboard_data.get_spending_trends(),
         'top_contractors': dashboard_data.get_top_contractors(),
         'agency_breakdown': dashboard_data.get_agency_breakdown()
     })
 
+# Requested by each server worker before it takes traffic
+WARM_PATHS = ['/', '/api/trends', '/api/alerts']
+
+def serve(host: str = '127.0.0.1', port: int = 8080, workers: int = 0, reload_on_collection: bool = True):
+    """Flask's development server, or with workers > 0 the prefork production server"""
+    if not workers:
+        app.run(debug=False, host=host, port=port)
+        return
+    import logging
+    from prefork_server import PreforkServer
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(process)d] %(levelname)s %(message)s')
+    
+    server = PreforkServer(app, host, port, workers, warm_paths=WARM_PATHS, db_path=dashboard_data.db_path,
+                           reload_on_collection=reload_on_collection)
+    server.serve_forever()
+
 if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Government contract dashboard')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (0: development server)')
+    args = parser.parse_args()
+    
     print("📊 Government Contract Dashboard")
     print("=" * 35)
-    print("Dashboard URL: http://127.0.0.1:8080")
+    print(f"Dashboard URL: http://{args.host}:{args.port}")
     print("Press Ctrl+C to stop the server")
     print()
-    app.run(debug=False, host='127.0.0.1', port=8080)
\ No newline at end of file
+    serve(args.host, args.port, args.workers)
\ No newline at end of file
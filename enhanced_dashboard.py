@@ -8,29 +8,68 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
 
-from flask import Flask, render_template_string, jsonify, request
+from flask import Flask, render_template_string, request, stream_with_context
 import sqlite3
-import pandas as pd
 import json
+import math
 from datetime import datetime, timedelta
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.utils import PlotlyJSONEncoder
+from contract_listing import ListingFilters, ensure_indexes, page_query, next_cursor
+from contract_export import FORMATS as EXPORT_FORMATS, export_filename, stream_export
+from figure_cache import FigureCache, data_version
+from static_assets import register_static_assets
+from fast_json import query_records, json_response
+from db_pool import ConnectionPool
+from section_loader import SectionLoader
+from live_updates import LiveUpdates
+from job_queue import JobQueue
+from metrics import instrument_app, figure_cache_collector, last_run_collector
+from sketches import SketchStore
+from baselines import ALL_TYPES, BaselineStore
+from entity_resolution import ensure_entities
 
 app = Flask(__name__)
+asset_urls = register_static_assets(app)
+metrics_registry = instrument_app(app, 'enhanced_dashboard')
+
+LISTING_COLUMNS = ['recipient_name', 'award_amount', 'awarding_agency', 'award_date', 'competition_type']
+
+def sqlite_date(modifier: str) -> str:
+    """date('now', modifier) as SQLite computes it, for default window filters"""
+    conn = sqlite3.connect(':memory:')
+    value = conn.execute("SELECT date('now', ?)", (modifier,)).fetchone()[0]
+    conn.close()
+    return value
 
 class CronyismDashboard:
     def __init__(self, db_path: str = "government_monitor.db"):
         self.db_path = db_path
+        # Read-only pooled connections; each statement is timed for /metrics
+        self.pool = ConnectionPool(db_path, name='enhanced_dashboard')
+        self.sketches = SketchStore(db_path)
+        self.baselines = BaselineStore(db_path)
+        try:
+            ensure_indexes(self.db_path)
+            ensure_entities(self.db_path)
+        except sqlite3.OperationalError:
+            pass  # database locked or not writable; queries still work once it has been converted
+    
+    def get_contract_page(self, columns, order, filters, cursor=None, limit=50):
+        """One keyset page of contracts: (records, cursor for the next page or None)"""
+        query, params, limit = page_query(columns, order, filters, cursor, limit)
+        conn = self.pool.connect()
+        records = query_records(conn, query, params)
+        conn.close()
+        return next_cursor(records, order, limit)
     
     def get_cronyism_summary(self):
         """Get cronyism-focused summary statistics"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.pool.connect()
         cursor = conn.cursor()
         
-        # Basic stats
-        cursor.execute('SELECT COUNT(*), SUM(award_amount), COUNT(DISTINCT recipient_name) FROM contracts')
-        total_contracts, total_spending, unique_companies = cursor.fetchone()
+        # Basic stats; distinct recipients come from the HyperLogLog rollup kept at ingest
+        cursor.execute('SELECT COUNT(*), SUM(award_amount) FROM contracts')
+        total_contracts, total_spending = cursor.fetchone()
+        unique_companies = round(self.sketches.distinct_recipients(conn).value)
         
         # Emergency/No-bid contracts
         cursor.execute('''
@@ -49,13 +88,14 @@ class CronyismDashboard:
         ''')
         recent_large = cursor.fetchone()[0]
         
-        # Rapid accumulation companies
+        # Rapid accumulation companies, counting name variants of one entity together
         cursor.execute('''
-            SELECT COUNT(DISTINCT recipient_name) FROM (
-                SELECT recipient_name, COUNT(*) as contract_count
-                FROM contracts 
-                WHERE award_date >= date('now', '-90 days')
-                GROUP BY recipient_name
+            SELECT COUNT(*) FROM (
+                SELECT a.entity_id
+                FROM contract_facts f
+                JOIN entity_aliases a ON a.recipient_id = f.recipient_id
+                WHERE f.award_date >= date('now', '-90 days')
+                GROUP BY a.entity_id
                 HAVING COUNT(*) >= 3
             )
         ''')
@@ -81,21 +121,23 @@ class CronyismDashboard:
             'SPACEX', 'TESLA', 'NEURALINK'
         ]
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self.pool.connect()
         results = []
         
         for pattern in watchlist_patterns:
-            df = pd.read_sql_query('''
-                SELECT recipient_name, COUNT(*) as contract_count, 
-                       SUM(award_amount) as total_amount,
-                       MAX(award_date) as latest_contract
-                FROM contracts 
-                WHERE UPPER(recipient_name) LIKE ?
-                GROUP BY recipient_name
+            # The LIKE runs over the recipients dimension, then their contracts come by key
+            rows = query_records(conn, '''
+                SELECT r.name as recipient_name, COUNT(*) as contract_count, 
+                       SUM(f.award_amount) as total_amount,
+                       MAX(f.award_date) as latest_contract
+                FROM recipients r
+                JOIN contract_facts f ON f.recipient_id = r.id
+                WHERE UPPER(r.name) LIKE ?
+                GROUP BY r.id
                 ORDER BY total_amount DESC
-            ''', conn, params=[f'%{pattern}%'])
+            ''', [f'%{pattern}%'])
             
-            for _, row in df.iterrows():
+            for row in rows:
                 results.append({
                     'company': row['recipient_name'],
                     'contract_count': row['contract_count'],
@@ -107,50 +149,25 @@ class CronyismDashboard:
         conn.close()
         return results
     
-    def get_emergency_contracts(self):
+    def get_emergency_contracts(self, filters=None, cursor=None, limit=20):
         """Get emergency/no-bid contracts for analysis (last 12 months)"""
-        conn = sqlite3.connect(self.db_path)
-        
-        df = pd.read_sql_query('''
-            SELECT recipient_name, award_amount, awarding_agency, 
-                   award_date, competition_type, description
-            FROM contracts 
-            WHERE (LOWER(competition_type) LIKE '%sole%source%' 
-                   OR LOWER(competition_type) LIKE '%no%bid%'
-                   OR LOWER(description) LIKE '%emergency%'
-                   OR LOWER(description) LIKE '%urgent%')
-            AND award_date >= date('now', '-12 months')
-            ORDER BY award_amount DESC
-            LIMIT 20
-        ''', conn)
-        
-        conn.close()
-        return df.to_dict('records')
+        filters = filters or ListingFilters(start_date=sqlite_date('-12 months'), competition='emergency')
+        records, _ = self.get_contract_page(LISTING_COLUMNS + ['description'], 'amount', filters, cursor, limit)
+        return records
     
-    def get_recent_contracts_table(self):
-        """Get table of recent contracts"""
-        conn = sqlite3.connect(self.db_path)
-        
-        query = '''
-            SELECT 
-                recipient_name,
-                award_amount,
-                awarding_agency,
-                award_date,
-                competition_type,
-                substr(description, 1, 100) as description
-            FROM contracts 
-            WHERE award_date >= date('now', '-30 days')
-            ORDER BY award_date DESC
-            LIMIT 50
-        '''
+    def get_recent_contracts_table(self, filters=None, cursor=None, limit=50):
+        """Get table of recent contracts (one page; the dashboard pages through /api/recent-contracts)"""
+        filters = filters or ListingFilters(start_date=sqlite_date('-30 days'))
+        records, _ = self.get_contract_page(
+            LISTING_COLUMNS + ['substr(description, 1, 100) as description'], 'date', filters, cursor, limit)
         
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        
-        if df.empty:
+        if not records:
             return "<p>No contracts in the last 30 days</p>"
         
+        import pandas as pd
+        df = pd.DataFrame(records, columns=['recipient_name', 'award_amount', 'awarding_agency',
+                                            'award_date', 'competition_type', 'description'])
+        
         # Format amounts
         df['award_amount'] = df['award_amount'].apply(lambda x: f"${x:,.0f}")
         
@@ -161,30 +178,50 @@ class CronyismDashboard:
     
     def get_agency_risk_analysis(self):
         """Analyze agencies by risk factors (last 12 months)"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.pool.connect()
         
-        df = pd.read_sql_query('''
-            SELECT 
-                awarding_agency,
-                COUNT(*) as total_contracts,
-                SUM(award_amount) as total_amount,
-                COUNT(CASE WHEN LOWER(competition_type) LIKE '%sole%source%' 
-                           OR LOWER(competition_type) LIKE '%no%bid%' 
-                           THEN 1 END) as no_bid_contracts,
-                AVG(award_amount) as avg_amount
-            FROM contracts 
-            WHERE award_date >= date('now', '-12 months')
-            GROUP BY awarding_agency
-            HAVING COUNT(*) >= 5
-            ORDER BY total_amount DESC
-            LIMIT 15
-        ''', conn)
+        # Grouped on the integer agency key; only the 15 result rows get their names joined
+        rows = query_records(conn, '''
+            SELECT g.agency_id, a.name as awarding_agency, g.total_contracts, g.total_amount,
+                   g.no_bid_contracts, g.avg_amount
+            FROM (
+                SELECT 
+                    agency_id,
+                    COUNT(*) as total_contracts,
+                    SUM(award_amount) as total_amount,
+                    COUNT(CASE WHEN LOWER(competition_type) LIKE '%sole%source%' 
+                               OR LOWER(competition_type) LIKE '%no%bid%' 
+                               THEN 1 END) as no_bid_contracts,
+                    AVG(award_amount) as avg_amount
+                FROM contract_facts 
+                WHERE award_date >= date('now', '-12 months')
+                GROUP BY agency_id
+                HAVING COUNT(*) >= 5
+                ORDER BY total_amount DESC
+                LIMIT 15
+            ) g
+            LEFT JOIN agencies a ON a.id = g.agency_id
+            ORDER BY g.total_amount DESC
+        ''')
+        
+        # Amount percentiles per agency (all years) from the t-digests kept at ingest
+        percentiles = self.sketches.amount_quantiles(conn, (0.5, 0.9), [row['agency_id'] for row in rows]) or {}
+        baselines = self.baselines.load(conn)
         
         # Calculate risk scores
         results = []
-        for _, row in df.iterrows():
+        for row in rows:
+            quantiles = percentiles.get(row['agency_id'], {})
             no_bid_rate = (row['no_bid_contracts'] / row['total_contracts']) * 100
-            risk_score = min(100, no_bid_rate * 2 + (row['avg_amount'] / 10000000))  # Simplified risk scoring
+            # Award size counts against the agency's own norm: 10 points per doubling of its
+            # baseline average (up to 20), so large agencies aren't risky just for being large
+            baseline = baselines.rows.get((row['awarding_agency'], ALL_TYPES))
+            size_ratio = row['avg_amount'] / baseline.mean_amount if baseline and baseline.mean_amount else None
+            if size_ratio:
+                size_score = min(20, max(0, 10 * math.log2(size_ratio)))
+            else:
+                size_score = row['avg_amount'] / 10000000  # no baseline yet
+            risk_score = min(100, no_bid_rate * 2 + size_score)  # Simplified risk scoring
             
             results.append({
                 'agency': row['awarding_agency'],
@@ -192,6 +229,9 @@ class CronyismDashboard:
                 'total_amount': row['total_amount'],
                 'no_bid_rate': round(no_bid_rate, 1),
                 'avg_amount': row['avg_amount'],
+                'median_amount': quantiles[0.5].value if quantiles else None,
+                'p90_amount': quantiles[0.9].value if quantiles else None,
+                'amount_vs_baseline': round(size_ratio, 2) if size_ratio else None,
                 'risk_score': round(risk_score, 1)
             })
         
@@ -200,9 +240,9 @@ class CronyismDashboard:
     
     def get_timeline_analysis(self):
         """Get timeline of concerning contract patterns"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.pool.connect()
         
-        df = pd.read_sql_query('''
+        records = query_records(conn, '''
             SELECT 
                 DATE(award_date, 'start of month') as month,
                 COUNT(*) as total_contracts,
@@ -215,12 +255,142 @@ class CronyismDashboard:
             WHERE award_date >= date('now', '-24 months')
             GROUP BY month
             ORDER BY month
-        ''', conn)
+        ''')
         
         conn.close()
-        return df.to_dict('records')
+        return records
+    
+    def get_live_token(self, conn):
+        """Changes when contracts or alerts are written, or the day rolls over"""
+        try:
+            return conn.execute('''
+                SELECT (SELECT MAX(rowid) FROM contract_facts), (SELECT MAX(id) FROM alerts), date('now')
+            ''').fetchone()
+        except sqlite3.OperationalError:
+            return None  # tables not created yet
+    
+    def get_live_diff(self, previous=None):
+        """
+        (state, diff) for live updates: changed summary counters, new or changed timeline
+        points, months that left the window and alerts added since `previous`
+        """
+        summary = self.get_cronyism_summary()
+        timeline = {point['month']: point for point in self.get_timeline_analysis()}
+        
+        conn = self.pool.connect()
+        try:
+            if previous is None:
+                alerts = []
+                last_alert_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM alerts').fetchone()[0]
+            else:
+                alerts = query_records(conn, '''
+                    SELECT id, alert_type, message, created_date FROM alerts WHERE id > ? ORDER BY id
+                ''', [previous['last_alert_id']])
+                last_alert_id = alerts[-1]['id'] if alerts else previous['last_alert_id']
+        except sqlite3.OperationalError:
+            alerts, last_alert_id = [], 0  # no alerts table yet
+        finally:
+            conn.close()
+        
+        state = {'summary': summary, 'timeline': timeline, 'last_alert_id': last_alert_id}
+        if previous is None:
+            return state, None
+        
+        diff = {}
+        changed_summary = {key: value for key, value in summary.items() if previous['summary'].get(key) != value}
+        if changed_summary:
+            diff['summary'] = changed_summary
+        # Compared as JSON: months with no amounts carry NaN, which never equals itself
+        changed_points = [point for month, point in timeline.items()
+                          if json.dumps(previous['timeline'].get(month)) != json.dumps(point)]
+        if changed_points:
+            diff['timeline'] = changed_points
+        removed_months = sorted(set(previous['timeline']) - set(timeline))
+        if removed_months:
+            diff['timeline_removed'] = removed_months
+        if alerts:
+            diff['alerts'] = alerts
+        return state, diff or None
+    
+    def get_timeline_figure(self):
+        """Plotly figure (data + layout) for the contract timeline chart"""
+        timeline_data = self.get_timeline_analysis()
+        months = [d['month'] for d in timeline_data]
+        return {
+            'data': [
+                {'x': months, 'y': [d['total_contracts'] for d in timeline_data],
+                 'type': 'scatter', 'mode': 'lines+markers', 'name': 'Total Contracts',
+                 'line': {'color': '#3498db', 'width': 3}},
+                {'x': months, 'y': [d['no_bid_contracts'] for d in timeline_data],
+                 'type': 'scatter', 'mode': 'lines+markers', 'name': 'No-Bid Contracts',
+                 'line': {'color': '#e74c3c', 'width': 3}}
+            ],
+            'layout': {
+                'title': '',
+                'xaxis': {'title': 'Month'},
+                'yaxis': {'title': 'Number of Contracts'},
+                'showlegend': True,
+                'legend': {'x': 0, 'y': 1}
+            }
+        }
+    
+    def get_agency_risk_figure(self):
+        """Plotly figure (data + layout) for the agency risk chart"""
+        agency_data = self.get_agency_risk_analysis()
+        return {
+            'data': [{
+                'x': [d['risk_score'] for d in agency_data],
+                'y': [(d['agency'] or '')[:30] for d in agency_data],
+                'text': [f"median ${d['median_amount'] / 1e6:,.1f}M, p90 ${d['p90_amount'] / 1e6:,.1f}M"
+                         if d['median_amount'] is not None else '' for d in agency_data],
+                'hoverinfo': 'x+y+text',
+                'type': 'bar',
+                'orientation': 'h',
+                'marker': {
+                    'color': ['#e74c3c' if d['risk_score'] > 50 else '#f39c12' if d['risk_score'] > 25 else '#27ae60'
+                              for d in agency_data]
+                }
+            }],
+            'layout': {
+                'title': '',
+                'xaxis': {'title': 'Risk Score'},
+                'yaxis': {'title': ''},
+                'margin': {'l': 250}
+            }
+        }
 
 dashboard_data = CronyismDashboard()
+figure_cache = FigureCache(dashboard_data.db_path)
+metrics_registry.register_collector(figure_cache_collector(figure_cache, 'enhanced_dashboard'))
+metrics_registry.register_collector(last_run_collector(dashboard_data.db_path, dashboard_data.pool.connect))
+# Home-page sections load concurrently, each on its own pooled connection
+section_loader = SectionLoader('enhanced_dashboard')
+# One poller per process pushes diffs to every open page over /api/live
+live_updates = LiveUpdates(dashboard_data.db_path, dashboard_data.get_live_token, dashboard_data.get_live_diff,
+                           name='enhanced_dashboard')
+
+def refresh_analysis_job(progress):
+    """Re-run the (incremental) scenario analysis, then recompute the summary and timeline"""
+    from scenario_monitoring import ScenarioMonitor
+    
+    monitor = ScenarioMonitor(dashboard_data.db_path)
+    results = monitor.run_full_scenario_analysis(progress=lambda fraction, scenario: progress(
+        0.8 * fraction, f"Scoring {scenario.replace('_', ' ')}"))
+    progress(0.8, 'Rebuilding dashboard sections')
+    sections = section_loader.load({
+        'summary': dashboard_data.get_cronyism_summary,
+        'timeline': dashboard_data.get_timeline_analysis
+    })
+    return {
+        'scenarios': {scenario: len(alerts) for scenario, alerts in results.items()},
+        'new_alerts': sum(len(alerts) for alerts in monitor.last_changed_alerts.values()),
+        'summary': sections['summary'],
+        'timeline': sections['timeline']
+    }
+
+# Heavy analysis runs on a small worker pool; the page polls /api/jobs/<id>
+jobs = JobQueue('enhanced_dashboard', max_workers=2)
+jobs.register('refresh_analysis', refresh_analysis_job)
 
 # Enhanced HTML Template with cronyism focus
 CRONYISM_DASHBOARD_HTML = """
@@ -228,7 +398,7 @@ CRONYISM_DASHBOARD_HTML = """
 <html>
 <head>
     <title>Government Contract Cronyism Monitor</title>
-    <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+    <script src="{{ plotly_src }}"></script>
     <style>
         body { 
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; 
@@ -467,33 +637,38 @@ CRONYISM_DASHBOARD_HTML = """
     <div class="container">
         <div class="stats-grid">
             <div class="stat-card">
-                <div class="stat-number">{{ stats.total_contracts }}</div>
+                <div class="stat-number" id="stat-total_contracts">{{ stats.total_contracts }}</div>
                 <div class="stat-label">Total Contracts Monitored</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">${{ "%.1f"|format(stats.total_spending/1000000000) }}B</div>
+                <div class="stat-number" id="stat-total_spending">${{ "%.1f"|format(stats.total_spending/1000000000) }}B</div>
                 <div class="stat-label">Total Contract Value</div>
             </div>
             <div class="stat-card alert">
-                <div class="stat-number alert">{{ stats.emergency_contracts }}</div>
+                <div class="stat-number alert" id="stat-emergency_contracts">{{ stats.emergency_contracts }}</div>
                 <div class="stat-label">Emergency/No-Bid Contracts</div>
             </div>
             <div class="stat-card warning clickable" onclick="showRapidAccumulation()">
-                <div class="stat-number warning">{{ stats.rapid_accumulation_companies }}</div>
+                <div class="stat-number warning" id="stat-rapid_accumulation_companies">{{ stats.rapid_accumulation_companies }}</div>
                 <div class="stat-label">Rapid Accumulation Companies</div>
                 <div class="click-hint">Click to view details</div>
             </div>
             <div class="stat-card alert clickable" onclick="showLargeContracts()">
-                <div class="stat-number alert">{{ stats.recent_large_contracts }}</div>
+                <div class="stat-number alert" id="stat-recent_large_contracts">{{ stats.recent_large_contracts }}</div>
                 <div class="stat-label">Large Contracts (6mo, >$50M)</div>
                 <div class="click-hint">Click to view details</div>
             </div>
             <div class="stat-card">
-                <div class="stat-number">{{ stats.emergency_percentage }}%</div>
+                <div class="stat-number" id="stat-emergency_percentage">{{ stats.emergency_percentage }}%</div>
                 <div class="stat-label">Emergency Contract Rate</div>
             </div>
         </div>
         
+        <div class="alerts-section" id="live-alerts-section" style="display:none;">
+            <h3>🔔 New Alerts</h3>
+            <div id="live-alerts"></div>
+        </div>
+        
         <div class="chart-container">
             <h3>📊 Contract Timeline Analysis</h3>
             <div id="timeline-chart"></div>
@@ -582,58 +757,12 @@ CRONYISM_DASHBOARD_HTML = """
     </div>
     
     <script>
-        // Timeline chart
-        var timelineData = {{ timeline_data | safe }};
-        
-        var contractsTrace = {
-            x: timelineData.map(d => d.month),
-            y: timelineData.map(d => d.total_contracts),
-            type: 'scatter',
-            mode: 'lines+markers',
-            name: 'Total Contracts',
-            line: {color: '#3498db', width: 3}
-        };
-        
-        var noBidTrace = {
-            x: timelineData.map(d => d.month),
-            y: timelineData.map(d => d.no_bid_contracts),
-            type: 'scatter',
-            mode: 'lines+markers',
-            name: 'No-Bid Contracts',
-            line: {color: '#e74c3c', width: 3}
-        };
-        
-        var timelineLayout = {
-            title: '',
-            xaxis: {title: 'Month'},
-            yaxis: {title: 'Number of Contracts'},
-            showlegend: true,
-            legend: {x: 0, y: 1}
-        };
-        
-        Plotly.newPlot('timeline-chart', [contractsTrace, noBidTrace], timelineLayout);
-        
-        // Agency risk chart
-        var agencyData = {{ agency_risk_data | safe }};
-        
-        var agencyTrace = {
-            x: agencyData.map(d => d.risk_score),
-            y: agencyData.map(d => d.agency.substring(0, 30)),
-            type: 'bar',
-            orientation: 'h',
-            marker: {
-                color: agencyData.map(d => d.risk_score > 50 ? '#e74c3c' : d.risk_score > 25 ? '#f39c12' : '#27ae60')
-            }
-        };
-        
-        var agencyLayout = {
-            title: '',
-            xaxis: {title: 'Risk Score'},
-            yaxis: {title: ''},
-            margin: {l: 250}
-        };
+        // Charts (figures are prebuilt server-side and cached per data version)
+        var timelineFigure = {{ timeline_figure | safe }};
+        Plotly.newPlot('timeline-chart', timelineFigure.data, timelineFigure.layout);
         
-        Plotly.newPlot('agency-risk-chart', [agencyTrace], agencyLayout);
+        var agencyRiskFigure = {{ agency_risk_figure | safe }};
+        Plotly.newPlot('agency-risk-chart', agencyRiskFigure.data, agencyRiskFigure.layout);
         
         // Modal functions
         function showRapidAccumulation() {
@@ -717,43 +846,90 @@ CRONYISM_DASHBOARD_HTML = """
         // Refresh analysis function
         function refreshAnalysis() {
             const refreshBtn = document.getElementById('refreshBtn');
-            const lastUpdated = document.getElementById('lastUpdated');
             
             // Show loading state
             refreshBtn.disabled = true;
-            refreshBtn.innerHTML = '⏳ Refreshing...';
+            refreshBtn.innerHTML = '⏳ Queued...';
             
-            // Refresh all data by reloading the page (ensures fresh database queries)
-            setTimeout(() => {
-                location.reload();
-            }, 500);
+            // The analysis runs as a background job; identical clicks from other tabs share it
+            fetch('/api/jobs', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({kind: 'refresh_analysis'})
+            })
+                .then(response => response.json())
+                .then(job => pollJob(job.id))
+                .catch(error => finishRefresh('Refresh failed: ' + error));
+        }
+        
+        function pollJob(jobId) {
+            fetch('/api/jobs/' + jobId)
+                .then(response => response.json())
+                .then(job => {
+                    if (job.status === 'done') {
+                        const months = job.result.timeline.map(point => point.month);
+                        applyLiveUpdate({
+                            summary: job.result.summary,
+                            timeline: job.result.timeline,
+                            timeline_removed: timelineFigure.data[0].x.filter(month => !months.includes(month))
+                        });
+                        finishRefresh('Last updated: ' + new Date().toLocaleString() +
+                                      ` (${job.result.new_alerts} new scenario alerts)`);
+                    } else if (job.status === 'failed' || job.error) {
+                        finishRefresh('Refresh failed: ' + (job.error || 'unknown error'));
+                    } else {
+                        document.getElementById('refreshBtn').innerHTML =
+                            `⏳ ${Math.round(job.progress * 100)}% ${job.message || ''}`;
+                        setTimeout(() => pollJob(jobId), 1000);
+                    }
+                })
+                .catch(error => finishRefresh('Refresh failed: ' + error));
+        }
+        
+        function finishRefresh(message) {
+            const refreshBtn = document.getElementById('refreshBtn');
+            refreshBtn.disabled = false;
+            refreshBtn.innerHTML = '🔄 Refresh Analysis';
+            document.getElementById('lastUpdated').innerHTML = message;
+        }
+        
+        // Load recent contracts (one keyset page at a time)
+        let recentContractsCursor = null;
+        
+        function recentContractRow(contract) {
+            let html = '<tr>';
+            html += `<td><strong>${contract.recipient_name}</strong></td>`;
+            html += `<td>$${(contract.award_amount/1000000).toFixed(2)}M</td>`;
+            html += `<td style="font-size:0.85em;">${contract.awarding_agency}</td>`;
+            html += `<td>${contract.award_date}</td>`;
+            html += `<td style="font-size:0.85em;"><span class="risk-medium">${contract.competition_type || 'N/A'}</span></td>`;
+            html += `<td style="font-size:0.8em;">${contract.description ? contract.description.substring(0, 70) + '...' : 'No description'}</td>`;
+            html += '</tr>';
+            return html;
         }
         
-        // Load recent contracts
         function loadRecentContracts() {
             fetch('/api/recent-contracts')
-                .then(response => response.json())
+                .then(response => {
+                    recentContractsCursor = response.headers.get('X-Next-Cursor');
+                    return response.json();
+                })
                 .then(data => {
                     let html = '<table class="watchlist-table"><thead><tr>';
                     html += '<th>Company</th><th>Amount</th><th>Agency</th><th>Date</th><th>Competition</th><th>Description</th>';
-                    html += '</tr></thead><tbody>';
+                    html += '</tr></thead><tbody id="recent-contracts-body">';
                     
                     if (data.length === 0) {
                         html += '<tr><td colspan="6" style="text-align:center; padding:20px;">No contracts in the last 120 days. Run data collection to update.</td></tr>';
                     } else {
                         data.forEach(contract => {
-                            html += '<tr>';
-                            html += `<td><strong>${contract.recipient_name}</strong></td>`;
-                            html += `<td>$${(contract.award_amount/1000000).toFixed(2)}M</td>`;
-                            html += `<td style="font-size:0.85em;">${contract.awarding_agency}</td>`;
-                            html += `<td>${contract.award_date}</td>`;
-                            html += `<td style="font-size:0.85em;"><span class="risk-medium">${contract.competition_type || 'N/A'}</span></td>`;
-                            html += `<td style="font-size:0.8em;">${contract.description ? contract.description.substring(0, 70) + '...' : 'No description'}</td>`;
-                            html += '</tr>';
+                            html += recentContractRow(contract);
                         });
                     }
                     
                     html += '</tbody></table>';
+                    html += '<button id="recent-contracts-more" class="refresh-btn" onclick="loadMoreRecentContracts()"' +
+                            (recentContractsCursor ? '' : ' style="display:none;"') + '>Load more</button>';
                     document.getElementById('recent-contracts-container').innerHTML = html;
                 })
                 .catch(error => {
@@ -762,17 +938,86 @@ CRONYISM_DASHBOARD_HTML = """
                 });
         }
         
+        function loadMoreRecentContracts() {
+            if (!recentContractsCursor) return;
+            fetch('/api/recent-contracts?cursor=' + encodeURIComponent(recentContractsCursor))
+                .then(response => {
+                    recentContractsCursor = response.headers.get('X-Next-Cursor');
+                    return response.json();
+                })
+                .then(data => {
+                    document.getElementById('recent-contracts-body').insertAdjacentHTML(
+                        'beforeend', data.map(recentContractRow).join(''));
+                    if (!recentContractsCursor) {
+                        document.getElementById('recent-contracts-more').style.display = 'none';
+                    }
+                });
+        }
+        
         // Load recent contracts on page load
         window.addEventListener('DOMContentLoaded', loadRecentContracts);
         
-        // Auto-refresh every 5 minutes
-        setInterval(() => {
-            const lastUpdated = document.getElementById('lastUpdated');
-            lastUpdated.innerHTML = 'Auto-refreshing...';
-            setTimeout(() => {
-                location.reload();
-            }, 1000);
-        }, 300000); // 5 minutes
+        // Live updates: the server pushes small diffs whenever a collection or analysis run commits
+        function formatStat(key, value) {
+            if (key === 'total_spending') return '$' + (value / 1000000000).toFixed(1) + 'B';
+            if (key === 'emergency_percentage') return value + '%';
+            return value;
+        }
+        
+        function applyLiveUpdate(diff) {
+            Object.entries(diff.summary || {}).forEach(([key, value]) => {
+                const element = document.getElementById('stat-' + key);
+                if (element) element.innerHTML = formatStat(key, value);
+            });
+            
+            if (diff.timeline || diff.timeline_removed) {
+                const points = {};
+                timelineFigure.data[0].x.forEach((month, i) => {
+                    points[month] = {total_contracts: timelineFigure.data[0].y[i],
+                                     no_bid_contracts: timelineFigure.data[1].y[i]};
+                });
+                (diff.timeline_removed || []).forEach(month => { delete points[month]; });
+                (diff.timeline || []).forEach(point => { points[point.month] = point; });
+                const months = Object.keys(points).sort();
+                timelineFigure.data.forEach((trace, i) => {
+                    const field = i === 0 ? 'total_contracts' : 'no_bid_contracts';
+                    trace.x = months;
+                    trace.y = months.map(month => points[month][field]);
+                });
+                Plotly.react('timeline-chart', timelineFigure.data, timelineFigure.layout);
+            }
+            
+            if (diff.alerts) {
+                const list = document.getElementById('live-alerts');
+                diff.alerts.forEach(alert => {
+                    list.insertAdjacentHTML('afterbegin', `
+                        <div class="alert-item">
+                            <strong>${alert.alert_type}</strong> - ${alert.message}
+                            <br><small>${alert.created_date}</small>
+                        </div>
+                    `);
+                });
+                document.getElementById('live-alerts-section').style.display = 'block';
+            }
+            
+            document.getElementById('lastUpdated').innerHTML = 'Last updated: ' + new Date().toLocaleString() + ' (live)';
+        }
+        
+        if (window.EventSource) {
+            const liveUpdates = new EventSource('/api/live');
+            liveUpdates.addEventListener('update', event => applyLiveUpdate(JSON.parse(event.data)));
+            // Sent when this page missed more updates than the server keeps
+            liveUpdates.addEventListener('reload', () => location.reload());
+        } else {
+            // Auto-refresh every 5 minutes
+            setInterval(() => {
+                const lastUpdated = document.getElementById('lastUpdated');
+                lastUpdated.innerHTML = 'Auto-refreshing...';
+                setTimeout(() => {
+                    location.reload();
+                }, 1000);
+            }, 300000); // 5 minutes
+        }
     </script>
 </body>
 </html>
@@ -782,61 +1027,126 @@ CRONYISM_DASHBOARD_HTML = """
 def cronyism_dashboard():
     from datetime import datetime
     
-    stats = dashboard_data.get_cronyism_summary()
-    watchlist_companies = dashboard_data.get_watchlist_companies()
-    emergency_contracts = dashboard_data.get_emergency_contracts()
-    agency_risk_data = dashboard_data.get_agency_risk_analysis()
-    timeline_data = dashboard_data.get_timeline_analysis()
+    version = data_version(dashboard_data.db_path)
+    sections = section_loader.load({
+        'stats': dashboard_data.get_cronyism_summary,
+        'watchlist_companies': dashboard_data.get_watchlist_companies,
+        'emergency_contracts': dashboard_data.get_emergency_contracts,
+        'agency_risk_figure': lambda: figure_cache.get('agency_risk', dashboard_data.get_agency_risk_figure, version),
+        'timeline_figure': lambda: figure_cache.get('timeline', dashboard_data.get_timeline_figure, version)
+    })
     current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
     return render_template_string(
         CRONYISM_DASHBOARD_HTML,
-        stats=stats,
-        watchlist_companies=watchlist_companies,
-        emergency_contracts=emergency_contracts,
-        agency_risk_data=json.dumps(agency_risk_data),
-        timeline_data=json.dumps(timeline_data),
+        **sections,
+        plotly_src=asset_urls['plotly_src'],
         current_time=current_time
     )
 
+@app.route('/api/live')
+def live_updates_stream():
+    return live_updates.response(request.headers.get('Last-Event-ID'))
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    payload = request.get_json(silent=True) or {}
+    kind = payload.get('kind', 'refresh_analysis')
+    try:
+        job, coalesced = jobs.submit(kind, payload.get('params'))
+    except KeyError:
+        return json_response({'error': f"Unknown job kind: {kind}", 'kinds': jobs.kinds}, 400)
+    return json_response(dict(job.to_status(), coalesced=coalesced), 202)
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return json_response({'error': f"Unknown or expired job: {job_id}"}, 404)
+    return json_response(job.to_status())
+
 @app.route('/api/cronyism-summary')
 def cronyism_summary_api():
-    return jsonify(dashboard_data.get_cronyism_summary())
+    return json_response(dashboard_data.get_cronyism_summary())
 
 @app.route('/api/watchlist')
 def watchlist_api():
-    return jsonify(dashboard_data.get_watchlist_companies())
+    return json_response(dashboard_data.get_watchlist_companies())
+
+def contract_page_response(columns, order, default_limit, **defaults):
+    """
+    Keyset-paged listing response. Query args: cursor, limit, agency, start_date, end_date,
+    min_amount, competition (no_bid/competed/emergency). The body stays a plain JSON list;
+    the cursor for the next page, if any, is returned in the X-Next-Cursor header.
+    """
+    try:
+        filters = ListingFilters.from_args(request.args, **defaults)
+        records, cursor = dashboard_data.get_contract_page(
+            columns, order, filters, request.args.get('cursor'), request.args.get('limit', default_limit))
+    except ValueError as e:
+        return json_response({'error': str(e)}, 400)
+    
+    response = json_response(records)
+    if cursor:
+        response.headers['X-Next-Cursor'] = cursor
+    return response
+
+@app.route('/api/contracts/export')
+def contracts_export_api():
+    """
+    Every contract matching the listing filters (agency, start_date, end_date, min_amount,
+    competition), streamed as format=csv (default) or ndjson in order=date/amount. No window
+    is applied by default, so an unfiltered export is the whole database.
+    """
+    fmt = request.args.get('format', 'csv')
+    try:
+        filters = ListingFilters.from_args(request.args)
+        chunks = stream_export(dashboard_data.db_path, fmt, filters, request.args.get('order', 'date'))
+    except ValueError as e:
+        return json_response({'error': str(e)}, 400)
+
+    response = app.response_class(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{export_filename(fmt, filters)}"'
+    return response
 
 @app.route('/api/emergency-contracts')
 def emergency_contracts_api():
-    return jsonify(dashboard_data.get_emergency_contracts())
+    return contract_page_response(LISTING_COLUMNS + ['description'], 'amount', 20,
+                                  start_date=sqlite_date('-12 months'), competition='emergency')
 
 @app.route('/api/rapid-accumulation')
 def rapid_accumulation_api():
     """Get companies with rapid contract accumulation"""
-    conn = sqlite3.connect(dashboard_data.db_path)
+    conn = dashboard_data.pool.connect()
     
-    df = pd.read_sql_query('''
-        SELECT 
-            recipient_name,
-            COUNT(*) as contract_count,
-            SUM(award_amount) as total_amount,
-            AVG(award_amount) as avg_amount,
-            MIN(award_date) as first_contract,
-            MAX(award_date) as latest_contract,
-            JULIANDAY(MAX(award_date)) - JULIANDAY(MIN(award_date)) as days_span
-        FROM contracts 
-        WHERE award_date >= date('now', '-90 days')
-        GROUP BY recipient_name
-        HAVING COUNT(*) >= 2
-        ORDER BY contract_count DESC, total_amount DESC
-        LIMIT 20
-    ''', conn)
+    rows = query_records(conn, '''
+        SELECT e.name as recipient_name, g.contract_count, g.total_amount, g.avg_amount,
+               g.first_contract, g.latest_contract, g.days_span
+        FROM (
+            SELECT 
+                a.entity_id,
+                COUNT(*) as contract_count,
+                SUM(f.award_amount) as total_amount,
+                AVG(f.award_amount) as avg_amount,
+                MIN(f.award_date) as first_contract,
+                MAX(f.award_date) as latest_contract,
+                JULIANDAY(MAX(f.award_date)) - JULIANDAY(MIN(f.award_date)) as days_span
+            FROM contract_facts f
+            JOIN entity_aliases a ON a.recipient_id = f.recipient_id
+            WHERE f.award_date >= date('now', '-90 days')
+            GROUP BY a.entity_id
+            HAVING COUNT(*) >= 2
+            ORDER BY contract_count DESC, total_amount DESC
+            LIMIT 20
+        ) g
+        LEFT JOIN entities e ON e.id = g.entity_id
+        ORDER BY g.contract_count DESC, g.total_amount DESC
+    ''')
     
     conn.close()
     
     results = []
-    for _, row in df.iterrows():
+    for row in rows:
         results.append({
             'company': row['recipient_name'],
             'contract_count': int(row['contract_count']),
@@ -847,60 +1157,51 @@ def rapid_accumulation_api():
             'days_span': int(row['days_span']) if row['days_span'] else 0
         })
     
-    return jsonify(results)
+    return json_response(results)
 
 @app.route('/api/recent-contracts')
 def recent_contracts_api():
     """Get recent contracts from last 120 days"""
-    conn = sqlite3.connect(dashboard_data.db_path)
-    
-    df = pd.read_sql_query('''
-        SELECT 
-            recipient_name,
-            award_amount,
-            awarding_agency,
-            award_date,
-            competition_type,
-            substr(description, 1, 100) as description
-        FROM contracts 
-        WHERE award_date >= date('now', '-120 days')
-        ORDER BY award_date DESC
-        LIMIT 50
-    ''', conn)
-    
-    conn.close()
-    
-    # Convert to list of dictionaries
-    contracts = df.to_dict('records')
-    return jsonify(contracts)
+    return contract_page_response(LISTING_COLUMNS + ['substr(description, 1, 100) as description'], 'date', 50,
+                                  start_date=sqlite_date('-120 days'))
 
 @app.route('/api/large-contracts')
 def large_contracts_api():
     """Get large contracts (>$50M) from last 6 months"""
-    conn = sqlite3.connect(dashboard_data.db_path)
-    
-    df = pd.read_sql_query('''
-        SELECT 
-            recipient_name,
-            award_amount,
-            awarding_agency,
-            award_date,
-            competition_type,
-            description
-        FROM contracts 
-        WHERE award_amount > 50000000
-        AND award_date >= date('now', '-6 months')
-        ORDER BY award_amount DESC
-        LIMIT 50
-    ''', conn)
+    return contract_page_response(LISTING_COLUMNS + ['description'], 'amount', 50,
+                                  start_date=sqlite_date('-6 months'), min_amount=50000000)
+
+# Requested by each server worker before it takes traffic
+WARM_PATHS = ['/', '/api/cronyism-summary', '/api/watchlist', '/api/recent-contracts']
+
+def serve(host: str = '127.0.0.1', port: int = 8080, workers: int = 0, reload_on_collection: bool = True):
+    """Flask's development server, or with workers > 0 the prefork production server"""
+    if not workers:
+        app.run(debug=False, host=host, port=port)
+        return
+    import logging
+    from prefork_server import PreforkServer
     
-    conn.close()
-    return jsonify(df.to_dict('records'))
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(process)d] %(levelname)s %(message)s')
+    # Job status polls may reach a different worker than the one running the job
+    jobs.store_path = 'dashboard_jobs.db'
+    server = PreforkServer(app, host, port, workers, warm_paths=WARM_PATHS, db_path=dashboard_data.db_path,
+                           reload_on_collection=reload_on_collection)
+    server.shutdown_hooks.append(live_updates.stop)
+    server.serve_forever()
 
 if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Enhanced cronyism dashboard')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (0: development server)')
+    args = parser.parse_args()
+    
     print("🔍 Enhanced Cronyism Dashboard")
     print("=" * 40)
-    print("Dashboard URL: http://127.0.0.1:8080")
+    print(f"Dashboard URL: http://{args.host}:{args.port}")
     print("Press Ctrl+C to stop the server")
     print()
-    app.run(debug=False, host='127.0.0.1', port=8080)
+    serve(args.host, args.port, args.workers)
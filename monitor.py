@@ -11,8 +11,8 @@ from datetime import datetime
 # Add core directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
 
-from comprehensive_collector import UltimateGovernmentMonitor
-from scenario_monitoring import ScenarioMonitor
+# Collectors, pandas and Flask are imported inside the modes that use them, so the
+# menu and the status check start without loading them
 
 def main():
     """Main interface for government contract monitoring"""
@@ -26,7 +26,8 @@ def main():
     print()
     
     try:
-        choice = input("Enter choice (1-4): ").strip()
+        # A choice can also be passed on the command line (e.g. `monitor.py 4` from cron)
+        choice = sys.argv[1] if len(sys.argv) > 1 else input("Enter choice (1-4): ").strip()
         
         if choice == "1":
             run_cronyism_detection()
@@ -54,14 +55,19 @@ def run_cronyism_detection():
     print("\n🚨 CRONYISM DETECTION MODE")
     print("-" * 30)
     
+    from comprehensive_collector import UltimateGovernmentMonitor
+    from scenario_monitoring import ScenarioMonitor
+    
     # Data collection
     print("📊 Collecting data from all sources...")
     monitor = UltimateGovernmentMonitor()
+    scenario_monitor = ScenarioMonitor()
+    # Connected-network accumulation is also flagged at ingest time
+    monitor.streaming_detector.add_window(scenario_monitor.accumulation_window())
     results = monitor.run_ultimate_collection(days_back=30)
     
     # Scenario analysis
     print("🔍 Analyzing for corruption patterns...")
-    scenario_monitor = ScenarioMonitor()
     scenarios = scenario_monitor.run_full_scenario_analysis()
     
     # Results
@@ -85,6 +91,8 @@ def run_data_collection():
     print("\n📊 DATA COLLECTION MODE")
     print("-" * 25)
     
+    from comprehensive_collector import UltimateGovernmentMonitor
+    
     monitor = UltimateGovernmentMonitor()
     results = monitor.run_ultimate_collection(days_back=7)
     
@@ -109,20 +117,23 @@ def run_dashboard():
     
     threading.Thread(target=open_browser, daemon=True).start()
     
+    # `monitor.py 3 --workers 4` serves with worker processes instead of the development server
+    workers = int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else 0
+    
     # Import and run dashboard
-    from dashboard_webapp import app
+    from dashboard_webapp import serve
     print("Dashboard available at: http://127.0.0.1:8080")
     print("Press Ctrl+C to stop")
-    app.run(host='127.0.0.1', port=8080, debug=False)
+    serve('127.0.0.1', 8080, workers)
 
 def show_status():
     """Show quick system status"""
     print("\n📊 SYSTEM STATUS")
     print("-" * 15)
     
-    import sqlite3
+    import query_log
     try:
-        conn = sqlite3.connect('government_monitor.db')
+        conn = query_log.connect('government_monitor.db')
         cursor = conn.cursor()
         
         cursor.execute('SELECT COUNT(*) FROM contracts')
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON serialization of large listing responses:
+pandas DataFrame -> to_dict('records') -> jsonify versus the cursor-tuple fast path.
+Reports p50/p99 latency over repeated 10k-row responses and checks the bodies match.
+"""
+
+import sys
+import os
+import time
+import random
+import sqlite3
+import argparse
+import statistics
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+import pandas as pd
+from flask import Flask, jsonify
+from fast_json import query_records, json_response
+
+QUERY = '''
+    SELECT recipient_name, award_amount, awarding_agency, award_date,
+           competition_type, substr(description, 1, 100) as description
+    FROM contracts
+    ORDER BY award_date DESC
+    LIMIT ?
+'''
+
+def build_database(rows: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(':memory:')
+    conn.execute('''
+        CREATE TABLE contracts (
+            award_id TEXT PRIMARY KEY, recipient_name TEXT, award_amount REAL,
+            awarding_agency TEXT, award_date TEXT, competition_type TEXT, description TEXT
+        )
+    ''')
+    rng = random.Random(42)
+    agencies = ['Department of Defense', 'Department of Homeland Security', 'Department of Energy']
+    competition = ['Full and Open Competition', 'Sole Source', 'Not Competed', None]
+    conn.executemany('INSERT INTO contracts VALUES (?, ?, ?, ?, ?, ?, ?)', [
+        (f'AWD-{i:07d}', f'Contractor {rng.randint(1, 2000)} Inc',
+         None if rng.random() < 0.02 else round(rng.uniform(1e4, 5e8), 2),
+         rng.choice(agencies), f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+         rng.choice(competition),
+         rng.choice(['Emergency procurement of equipment ', 'Matériel de sécurité ']) * rng.randint(1, 5))
+        for i in range(rows)
+    ])
+    conn.execute('CREATE INDEX idx_contracts_date_id ON contracts (award_date, award_id)')
+    return conn
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def measure(func, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+    
+    conn = build_database(args.rows)
+    app = Flask(__name__)
+    
+    def pandas_path():
+        return jsonify(pd.read_sql_query(QUERY, conn, params=[args.rows]).to_dict('records')).get_data()
+    
+    def fast_path():
+        return json_response(query_records(conn, QUERY, [args.rows])).get_data()
+    
+    with app.app_context():
+        if pandas_path() != fast_path():
+            print("❌ Response bodies differ")
+            return 1
+        
+        print(f"📊 JSON serialization, {args.rows} rows x {args.iterations} iterations")
+        results = {}
+        for name, func in (('pandas + jsonify', pandas_path), ('cursor fast path', fast_path)):
+            func()  # warm up
+            samples = measure(func, args.iterations)
+            results[name] = samples
+            print(f"   {name:18} p50 {statistics.median(samples):7.1f} ms   p99 {percentile(samples, 99):7.1f} ms")
+    
+    speedup = statistics.median(results['pandas + jsonify']) / statistics.median(results['cursor fast path'])
+    print(f"   ✅ Identical bodies, {speedup:.1f}x faster at p50")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
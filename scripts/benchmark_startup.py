@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the CLI and dashboard entry points
+Runs each entry point under `python -X importtime`, reports import and wall time,
+and fails if a heavy dependency leaks onto a light path or a budget is exceeded
+"""
+
+import sys
+import os
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+import star_schema
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY_MODULES = {'pandas', 'numpy', 'requests', 'flask', 'plotly', 'bs4', 'feedparser'}
+
+# (name, argv relative to the repo, modules that must not be imported, import budget in ms)
+ENTRY_POINTS = [
+    ('monitor.py status', ['monitor.py', '4'], HEAVY_MODULES, 40),
+    ('view_contracts.py recent', ['view_contracts.py', 'recent', '5'], HEAVY_MODULES, 30),
+    ('run_scheduler.py status', ['scripts/run_scheduler.py', '--socket', 'missing.sock', 'status'],
+     HEAVY_MODULES, 75),
+    ('enhanced dashboard import', ['-c', 'import enhanced_dashboard'], {'pandas', 'numpy', 'plotly', 'requests'}, 400),
+    ('dashboard import', ['-c', 'import dashboard_webapp'], {'pandas', 'numpy', 'plotly', 'requests'}, 400),
+]
+
+def parse_importtime(stderr: str, ignore=frozenset()):
+    """
+    Cumulative import time (ms) of the top-level imports not in ignore, plus every module name loaded.
+    Nesting is shown by indentation after the second '|'; only top-level entries are summed.
+    """
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        modules.add(module)
+        if not name.startswith('  ', 1) and module not in ignore:
+            total_us += int(cumulative_us)
+    return total_us / 1000, modules
+
+def interpreter_modules() -> frozenset:
+    """Modules a bare interpreter already imports at startup (site, encodings, .pth hooks...)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'pass'], capture_output=True, text=True)
+    return frozenset(parse_importtime(result.stderr)[1])
+
+def create_sample_database(path: str):
+    conn = sqlite3.connect(path)
+    star_schema.ensure_star_schema(conn)
+    conn.execute('CREATE TABLE alerts (id INTEGER PRIMARY KEY, alert_type TEXT, message TEXT, data TEXT, created_date TEXT)')
+    conn.execute("INSERT INTO contracts (award_id, recipient_name, award_amount, award_date) "
+                 "VALUES ('BENCH-1', 'Sample Contractor', 1000000, date('now'))")
+    conn.commit()
+    conn.close()
+
+def run_entry_point(argv, workdir, runs, ignore):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([REPO_ROOT, os.path.join(REPO_ROOT, 'core')]))
+    import_samples, wall_samples, packages = [], [], set()
+    for _ in range(runs):
+        command = [sys.executable, '-X', 'importtime'] + [
+            os.path.join(REPO_ROOT, arg) if i == 0 and arg.endswith('.py') else arg
+            for i, arg in enumerate(argv)
+        ]
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True,
+                                stdin=subprocess.DEVNULL, timeout=120)
+        wall_samples.append((time.perf_counter() - start) * 1000)
+        import_ms, loaded = parse_importtime(result.stderr, ignore)
+        import_samples.append(import_ms)
+        packages |= {module.split('.')[0] for module in loaded}
+    median = lambda samples: sorted(samples)[len(samples) // 2]
+    return median(import_samples), median(wall_samples), packages
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure and guard CLI/dashboard startup time")
+    parser.add_argument('--runs', type=int, default=5, help="Runs per entry point (median is reported)")
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help="Multiply every import budget (e.g. 2.0 on slow CI machines)")
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='startup-bench-')
+    failures = []
+    try:
+        create_sample_database(os.path.join(workdir, 'government_monitor.db'))
+        ignore = interpreter_modules()
+        
+        print(f"⏱️  Startup benchmark (median of {args.runs} runs, interpreter startup imports excluded)")
+        print(f"   {'entry point':28} {'imports':>10} {'budget':>8} {'wall':>9}")
+        for name, argv, forbidden, budget in ENTRY_POINTS:
+            own_ms, wall_ms, packages = run_entry_point(argv, workdir, args.runs, ignore)
+            budget_ms = budget * args.budget_scale
+            leaked = sorted(forbidden & packages)
+            status = '✅'
+            if leaked:
+                failures.append(f"{name}: imports {', '.join(leaked)}")
+                status = '❌'
+            if own_ms > budget_ms:
+                failures.append(f"{name}: imports took {own_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+                status = '❌'
+            print(f"{status} {name:28} {own_ms:8.1f}ms {budget_ms:6.0f}ms {wall_ms:7.1f}ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    if failures:
+        print("\n❌ Startup regressions:")
+        for failure in failures:
+            print(f"   • {failure}")
+        return 1
+    print("\n✅ All entry points within budget")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Bulk award import - loads USASpending bulk download files (award summary or transaction
+CSVs, plain, gzipped or zipped) into the database; interrupted imports resume
+
+    python3 scripts/import_bulk_awards.py run FY2023_All_Contracts_Full.zip --workers 4
+    python3 scripts/import_bulk_awards.py run awards.csv --restart
+    python3 scripts/import_bulk_awards.py status
+"""
+
+import sys
+import os
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from bulk_import import CHUNK_BYTES, BulkImporter
+
+def run(importer: BulkImporter, args):
+    missing = [path for path in args.paths if not os.path.exists(path)]
+    if missing:
+        print(f"❌ Not found: {', '.join(missing)}")
+        return 1
+    started = time.time()
+
+    def progress(state):
+        elapsed = max(time.time() - started, 1e-9)
+        done = f" {state['offset'] / state['total_bytes']:.0%}" if state['total_bytes'] else ''
+        print(f"\r📥 {state['label']}{done}  {state['rows_written']:,} contracts  "
+              f"({state['rows_read'] / elapsed:,.0f} rows/s)", end='', flush=True)
+
+    totals = importer.import_files(args.paths, restart=args.restart, progress=progress)
+    print()
+    print(f"✅ Imported {totals['rows_written']:,} contracts from {totals['files']} file(s) "
+          f"in {time.time() - started:.0f}s ({totals['rows_skipped']:,} unusable rows skipped)")
+    for label in totals['skipped_files']:
+        print(f"   ⏭️  Not a contract file: {label}")
+    print("ℹ️  Backfilled fiscal years stay in the hot table until `partition_contracts.py roll`")
+    return 0
+
+def status(importer: BulkImporter, args):
+    rows = importer.status()
+    if not rows:
+        print("📭 No bulk imports yet")
+        return 0
+    for row in rows:
+        name = os.path.basename(row['source']) + (f":{row['member']}" if row['member'] else '')
+        icon = '✅' if row['status'] == 'done' else '⏸️ '
+        print(f"{icon} {name:<50} {row['rows_written']:>12,} contracts  {row['rows_skipped']:>8,} skipped  "
+              f"byte {row['byte_offset']:,}  {row['updated_date'][:19]}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Import USASpending bulk award downloads")
+    parser.add_argument('--db', default='government_monitor.db')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Import (or resume importing) files")
+    run_parser.add_argument('paths', nargs='+')
+    run_parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1),
+                            help="Parser processes (default: one per spare CPU)")
+    run_parser.add_argument('--chunk-mb', type=float, default=CHUNK_BYTES / (1024 * 1024))
+    run_parser.add_argument('--restart', action='store_true', help="Ignore checkpoints and import from the start")
+
+    subparsers.add_parser('status', help="Checkpoints of every imported file")
+
+    args = parser.parse_args()
+    from government_monitor_system import DatabaseManager
+
+    importer = BulkImporter(DatabaseManager(args.db), workers=getattr(args, 'workers', 1),
+                            chunk_bytes=int(getattr(args, 'chunk_mb', 0) * 1024 * 1024) or CHUNK_BYTES)
+    return {'run': run, 'status': status}[args.command](importer, args)
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Dashboard load test - starts the production server at each worker count in
+turn, drives it with keep-alive HTTP clients for a fixed time and reports
+throughput and latency, showing how serving scales with worker processes
+
+    python3 scripts/load_test.py --app enhanced --workers 1 2 4 --duration 15
+    python3 scripts/load_test.py --paths / /api/trends --clients 4 --threads 8
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+import http.client
+import threading
+import urllib.request
+from multiprocessing import Pool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_PATHS = {
+    'basic': ['/', '/api/trends', '/api/alerts'],
+    'enhanced': ['/', '/api/cronyism-summary', '/api/watchlist', '/api/recent-contracts']
+}
+
+def start_server(app: str, workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    command = [sys.executable, os.path.join(ROOT, 'scripts', 'run_dashboard.py'), '--app', app,
+               '--workers', str(workers), '--port', str(port), '--no-browser', '--no-auto-reload']
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def wait_until_ready(port: int, path: str, timeout: float):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=5) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server on port {port} did not become ready within {timeout:.0f}s")
+
+def stop_server(process: subprocess.Popen):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def client_thread(port: int, paths, deadline: float, latencies: list, errors: list):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    index = 0
+    while time.time() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+            else:
+                latencies.append(time.perf_counter() - start)
+            if response.will_close:
+                conn.close()
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+    conn.close()
+
+def client_process(job):
+    """One load-generating process running `threads` keep-alive clients; returns (latencies, errors)"""
+    port, paths, threads, deadline = job
+    latencies, errors = [], []
+    workers = [threading.Thread(target=client_thread, args=(port, paths, deadline, latencies, errors))
+               for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return latencies, errors
+
+def percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def run_level(args, workers: int):
+    process = start_server(args.app, workers, args.port)
+    try:
+        wait_until_ready(args.port, args.paths[0], args.ready_timeout)
+        time.sleep(args.settle)  # let every worker finish warming up
+        deadline = time.time() + args.duration
+        # Client processes, not just threads, so the load generator itself isn't GIL-bound
+        with Pool(args.clients) as pool:
+            results = pool.map(client_process, [(args.port, args.paths, args.threads, deadline)] * args.clients)
+    finally:
+        stop_server(process)
+    latencies = sorted(latency for result in results for latency in result[0])
+    errors = sum(len(result[1]) for result in results)
+    return {
+        'workers': workers,
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / args.duration,
+        'p50': percentile(latencies, 0.50) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the dashboard production server')
+    parser.add_argument('--app', choices=['basic', 'enhanced'], default='basic')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to compare')
+    parser.add_argument('--paths', nargs='+', help='Request paths, cycled by every client')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per worker count')
+    parser.add_argument('--clients', type=int, default=4, help='Load-generating processes')
+    parser.add_argument('--threads', type=int, default=4, help='Keep-alive connections per client process')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--settle', type=float, default=2.0, help='Seconds to wait after the server answers')
+    parser.add_argument('--ready-timeout', type=float, default=120.0)
+    args = parser.parse_args()
+    args.paths = args.paths or DEFAULT_PATHS[args.app]
+
+    print(f"🏋️  Load testing {args.app} dashboard: {args.clients * args.threads} connections, "
+          f"{args.duration:.0f}s per level, paths {' '.join(args.paths)}")
+    print(f"   {os.cpu_count()} CPUs available")
+    print()
+
+    results = []
+    for workers in args.workers:
+        print(f"⏳ {workers} worker(s)...")
+        results.append(run_level(args, workers))
+
+    baseline = results[0]['rps'] or 1.0
+    print()
+    print(f"{'workers':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'scaling':>8}")
+    for result in results:
+        print(f"{result['workers']:>8} {result['requests']:>9} {result['errors']:>7} {result['rps']:>9.1f} "
+              f"{result['p50']:>8.1f} {result['p99']:>8.1f} {result['rps'] / baseline:>7.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Fiscal-year partitions - moves contracts older than the hot window (current and
+previous fiscal year) into sealed per-year archive files that reads attach on demand
+
+    python3 scripts/partition_contracts.py status
+    python3 scripts/partition_contracts.py roll --dry-run
+    python3 scripts/partition_contracts.py roll --vacuum
+"""
+
+import sys
+import os
+import sqlite3
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+import star_schema
+from partitions import DEFAULT_HOT_YEARS, MAX_ARCHIVES, PartitionStore
+
+def status(store: PartitionStore, args):
+    info = store.status()
+    print(f"🔥 Hot table: {info['hot_rows']:,} contracts ({info['hot_min_date']} to {info['hot_max_date']}), "
+          f"cutoff {info['hot_cutoff']}")
+    if info['rows_to_archive']:
+        print(f"   {info['rows_to_archive']:,} contracts are older than the cutoff "
+              f"(run `roll`; late arrivals for sealed years stay here)")
+    if not info['archives']:
+        print("🗄️  No archives yet")
+        return 0
+    print(f"🗄️  {len(info['archives'])} sealed archives:")
+    for archive in info['archives']:
+        print(f"   {archive['name']:<14} {archive['row_count']:>10,} contracts  "
+              f"{archive['min_date']} to {archive['max_date']}  {archive['path']}")
+    return 0
+
+def roll(store: PartitionStore, args):
+    summary = store.roll(dry_run=args.dry_run)
+    verb = "Would archive" if args.dry_run else "Archived"
+    if not summary['archived']:
+        print(f"✅ Nothing older than {summary['hot_cutoff']} to archive")
+    for year in summary['archived']:
+        print(f"📦 {verb} FY{year['fiscal_year']}: {year['rows']:,} contracts")
+    if summary['left_in_hot']:
+        print(f"ℹ️  {summary['left_in_hot']:,} late-arriving contracts for sealed years stay in the hot table")
+    for name in summary['merged']:
+        print(f"🔗 Merged the oldest archives into {name}")
+    if args.vacuum and not args.dry_run and summary['archived']:
+        print("🧹 Vacuuming the hot database...")
+        conn = sqlite3.connect(store.db_path)
+        conn.execute('VACUUM')
+        conn.close()
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage fiscal-year archive partitions of the contracts table")
+    parser.add_argument('--db', default='government_monitor.db')
+    parser.add_argument('--hot-years', type=int, default=DEFAULT_HOT_YEARS,
+                        help="Fiscal years kept in the main database (the current one included)")
+    parser.add_argument('--max-archives', type=int, default=MAX_ARCHIVES,
+                        help="Merge the oldest archives beyond this many (SQLite attaches at most 10)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('status', help="Hot table and archive overview")
+
+    roll_parser = subparsers.add_parser('roll', help="Archive fiscal years that left the hot window")
+    roll_parser.add_argument('--dry-run', action='store_true')
+    roll_parser.add_argument('--vacuum', action='store_true', help="Reclaim the archived rows' space afterwards")
+
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        print(f"❌ No database at {args.db}")
+        return 1
+    store = PartitionStore(args.db, hot_years=args.hot_years, max_archives=args.max_archives)
+    try:
+        return {'status': status, 'roll': roll}[args.command](store, args)
+    except star_schema.FlatContractsTable as e:
+        print(f"❌ {e}")
+        return 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Query stats viewer - per-statement totals/p95 and the slow-query log written
+by core/query_log.py, with the EXPLAIN QUERY PLAN captured for each slow query
+
+    python3 scripts/query_stats.py top --by p95
+    python3 scripts/query_stats.py slow --limit 5
+    python3 scripts/query_stats.py slow --fingerprint 3f2a9c
+"""
+
+import sys
+import os
+import json
+import sqlite3
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from query_log import bucket_percentile, stats_path_for
+
+ORDERINGS = {
+    'total': lambda stat: stat['total_ms'],
+    'p95': lambda stat: stat['p95_ms'] or 0,
+    'calls': lambda stat: stat['calls'],
+    'max': lambda stat: stat['max_ms'],
+    'avg': lambda stat: stat['avg_ms'],
+    'slow': lambda stat: stat['slow_calls']
+}
+
+def open_stats(path: str):
+    if not os.path.exists(path):
+        print(f"❌ No query stats at {path} yet (statements are flushed every 30s and at exit)")
+        return None
+    return sqlite3.connect(path)
+
+def full_scans(plan: str):
+    """Plan lines scanning a whole table rather than searching an index"""
+    return [line.strip() for line in (plan or '').splitlines()
+            if line.strip().startswith('SCAN ') and 'COVERING INDEX' not in line]
+
+def top(args):
+    conn = open_stats(args.db)
+    if conn is None:
+        return 1
+    rows = conn.execute('''
+        SELECT fingerprint, normalized_sql, calls, total_ms, max_ms, slow_calls, buckets, last_caller
+        FROM query_stats WHERE normalized_sql LIKE ?
+    ''', (f'%{args.match}%',)).fetchall()
+    conn.close()
+
+    stats = []
+    for fingerprint, sql, calls, total_ms, max_ms, slow_calls, buckets, caller in rows:
+        stats.append({'fingerprint': fingerprint, 'sql': sql, 'calls': calls, 'total_ms': total_ms,
+                      'avg_ms': total_ms / calls if calls else 0, 'max_ms': max_ms, 'slow_calls': slow_calls,
+                      'p95_ms': bucket_percentile(json.loads(buckets), 95, max_ms), 'caller': caller})
+    stats.sort(key=ORDERINGS[args.by], reverse=True)
+    if not stats:
+        print("No statements recorded")
+        return 0
+
+    grand_total = sum(stat['total_ms'] for stat in stats) or 1
+    print(f"📊 Top {min(args.limit, len(stats))} of {len(stats)} statements by {args.by}")
+    print(f"{'id':8} {'calls':>8} {'total ms':>11} {'share':>6} {'avg ms':>9} {'p95 ms':>9} {'max ms':>9} {'slow':>5}  caller / statement")
+    for stat in stats[:args.limit]:
+        print(f"{stat['fingerprint'][:8]} {stat['calls']:8,} {stat['total_ms']:11,.1f} "
+              f"{stat['total_ms'] / grand_total:6.1%} {stat['avg_ms']:9.2f} {stat['p95_ms'] or 0:9.2f} "
+              f"{stat['max_ms']:9.2f} {stat['slow_calls']:5,}  {stat['caller']}")
+        print(f"{'':8} {stat['sql'][:args.width]}")
+    return 0
+
+def slow(args):
+    conn = open_stats(args.db)
+    if conn is None:
+        return 1
+    rows = conn.execute('''
+        SELECT logged_at, fingerprint, normalized_sql, params, duration_ms, caller, query_plan
+        FROM slow_queries WHERE fingerprint LIKE ?
+        ORDER BY id DESC LIMIT ?
+    ''', (f'{args.fingerprint}%', args.limit)).fetchall()
+    conn.close()
+    if not rows:
+        print("No slow queries logged")
+        return 0
+
+    for logged_at, fingerprint, sql, params, duration_ms, caller, plan in rows:
+        print("=" * 100)
+        print(f"🐢 {duration_ms:,.1f} ms  {logged_at[:19]}  {caller}  [{fingerprint[:8]}]")
+        print(f"   {sql}")
+        print(f"   params: {params}")
+        if plan:
+            print("   plan:")
+            for line in plan.splitlines():
+                print(f"      {line}")
+            for scan in full_scans(plan):
+                print(f"   ⚠️  full scan: {scan}")
+        else:
+            print("   plan: (not captured)")
+    return 0
+
+def reset(args):
+    conn = open_stats(args.db)
+    if conn is None:
+        return 1
+    conn.execute('DELETE FROM query_stats')
+    conn.execute('DELETE FROM slow_queries')
+    conn.commit()
+    conn.close()
+    print(f"🧹 Cleared query stats in {args.db}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Show per-statement query stats and the slow-query log")
+    parser.add_argument('--db', default=os.environ.get('GOVMON_QUERY_STATS_DB') or stats_path_for('government_monitor.db'),
+                        help="Stats file written by the query log (default: beside government_monitor.db)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    top_parser = subparsers.add_parser('top', help="Statements ranked by time spent")
+    top_parser.add_argument('--by', choices=sorted(ORDERINGS), default='total')
+    top_parser.add_argument('--limit', type=int, default=20)
+    top_parser.add_argument('--match', default='', help="Only statements containing this text")
+    top_parser.add_argument('--width', type=int, default=140, help="Truncate statements to this many characters")
+
+    slow_parser = subparsers.add_parser('slow', help="Recent slow queries with their query plans")
+    slow_parser.add_argument('--limit', type=int, default=10)
+    slow_parser.add_argument('--fingerprint', default='', help="Only this statement (id prefix from `top`)")
+
+    subparsers.add_parser('reset', help="Clear collected stats, e.g. after adding an index")
+
+    args = parser.parse_args()
+    return {'top': top, 'slow': slow, 'reset': reset}[args.command](args)
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Recipient entities - which recipient names were resolved to the same company
+
+    python3 scripts/recipient_entities.py show "Lockheed Martin Corp"
+    python3 scripts/recipient_entities.py merged --limit 20
+    python3 scripts/recipient_entities.py rebuild
+"""
+
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+import query_log
+from entity_resolution import EntityResolver, match_key
+
+def show(resolver: EntityResolver, conn, args):
+    entity_id = resolver.find(conn, args.name)
+    if entity_id is None:
+        print(f"❌ No entity for {args.name!r} (match key {match_key(args.name)!r})")
+        return 1
+    name, key = conn.execute('SELECT name, match_key FROM entities WHERE id = ?', (entity_id,)).fetchone()
+    aliases = resolver.aliases(conn, entity_id)
+    print(f"🏢 Entity {entity_id}: {name}  (match key {key!r}, {sum(a['contract_count'] for a in aliases):,} contracts)")
+    for alias in aliases:
+        print(f"   {alias['method']:<4} {alias['name']:<60} {alias['contract_count']:>8,} contracts")
+    return 0
+
+def merged(resolver: EntityResolver, conn, args):
+    rows = conn.execute('''
+        SELECT e.id, e.name, COUNT(*) AS alias_count
+        FROM entity_aliases a
+        JOIN entities e ON e.id = a.entity_id
+        GROUP BY a.entity_id
+        HAVING COUNT(*) > 1
+        ORDER BY alias_count DESC, e.id
+        LIMIT ?
+    ''', (args.limit,)).fetchall()
+    if not rows:
+        print("📭 No recipients have been merged")
+        return 0
+    for entity_id, name, alias_count in rows:
+        others = [alias['name'] for alias in resolver.aliases(conn, entity_id) if alias['name'] != name]
+        print(f"🏢 {entity_id:>7} {name:<50} +{alias_count - 1}: {'; '.join(others[:3])}"
+              f"{' ...' if len(others) > 3 else ''}")
+    return 0
+
+def rebuild(resolver: EntityResolver, conn, args):
+    resolved = resolver.rebuild(conn)
+    conn.commit()
+    entities = conn.execute('SELECT COUNT(*) FROM entities').fetchone()[0]
+    print(f"✅ Resolved {resolved:,} recipient names into {entities:,} entities (entity ids were reassigned)")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the recipient entity table")
+    parser.add_argument('--db', default='government_monitor.db')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    show_parser = subparsers.add_parser('show', help="The entity a recipient name belongs to and all its names")
+    show_parser.add_argument('name')
+
+    merged_parser = subparsers.add_parser('merged', help="Entities with the most recipient names")
+    merged_parser.add_argument('--limit', type=int, default=20)
+
+    subparsers.add_parser('rebuild', help="Resolve every recipient again from scratch")
+
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        print(f"❌ No database at {args.db}")
+        return 1
+    resolver = EntityResolver(args.db)
+    conn = query_log.connect(args.db, timeout=30)
+    try:
+        resolver.ensure_built(conn)
+        conn.commit()
+        return {'show': show, 'merged': merged, 'rebuild': rebuild}[args.command](resolver, conn, args)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite on synthetic data: ingest throughput (DatabaseManager.save_contracts),
+PatternAnalyzer/ScenarioMonitor latency and dashboard endpoint p50/p99 through the
+Flask test client. Writes a JSON report and can compare it against an earlier one.
+
+    python3 scripts/run_benchmarks.py --size 10k
+    python3 scripts/run_benchmarks.py --size 1m --output after.json --compare before.json
+"""
+
+import sys
+import os
+import json
+import time
+import shutil
+import sqlite3
+import logging
+import platform
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'core'))
+
+from synthetic_data import FIXTURE_SIZES, SyntheticContractGenerator, build_fixture, fixture_info
+
+ENDPOINTS = {
+    'enhanced_dashboard': ['/', '/api/cronyism-summary', '/api/watchlist', '/api/emergency-contracts',
+                           '/api/rapid-accumulation', '/api/recent-contracts', '/api/large-contracts'],
+    'dashboard_webapp': ['/', '/api/trends', '/api/alerts', '/api/company/PALANTIR']
+}
+
+SCENARIOS = ['national_emergency', 'economic_patriotism', 'information_sovereignty',
+             'financial_consolidation', 'connected_accumulation']
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def summarize(samples):
+    return {
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'min_ms': round(min(samples), 3),
+        'max_ms': round(max(samples), 3),
+        'iterations': len(samples)
+    }
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def prepare_fixture(fixture_dir, rows, seed, rebuild):
+    """government_monitor.db with `rows` contracts, reused when an identical fixture already exists"""
+    os.makedirs(fixture_dir, exist_ok=True)
+    db_path = os.path.join(fixture_dir, 'government_monitor.db')
+    info = fixture_info(db_path)
+    if not rebuild and info and info['rows'] == rows and info['seed'] == seed:
+        print(f"📦 Reusing fixture {db_path} ({rows:,} rows, built {info['built_date'][:10]})")
+        return db_path, info, None
+
+    print(f"📦 Building fixture {db_path} ({rows:,} rows)...")
+
+    def progress(written, total):
+        if written == total or written % 1_000_000 == 0:
+            print(f"   {written:,}/{total:,} rows")
+
+    info, build_ms = timed(lambda: build_fixture(db_path, rows, seed=seed, progress=progress))
+    return db_path, info, round(build_ms / 1000, 1)
+
+def benchmark_ingest(rows, batch_size, seed):
+    """rows/sec through DatabaseManager.save_contracts, including change tracking, into an empty database"""
+    from government_monitor_system import DatabaseManager
+
+    workdir = tempfile.mkdtemp(prefix='ingest-bench-')
+    try:
+        db = DatabaseManager(os.path.join(workdir, 'government_monitor.db'))
+        generator = SyntheticContractGenerator(seed=seed + 1, recipients=max(1_000, rows // 20))
+        batch_samples = []
+        for offset in range(0, rows, batch_size):
+            contracts = generator.contracts(min(batch_size, rows - offset), offset)
+            _, elapsed = timed(lambda: db.save_contracts(contracts))
+            batch_samples.append(elapsed)
+        total_seconds = sum(batch_samples) / 1000
+        return {
+            'rows': rows,
+            'batch_size': batch_size,
+            'seconds': round(total_seconds, 3),
+            'rows_per_second': round(rows / total_seconds, 1) if total_seconds else None,
+            'batch_latency': summarize(batch_samples)
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def benchmark_analysis(db_path, iterations):
+    from government_monitor_system import DatabaseManager, PatternAnalyzer
+    from scenario_monitoring import ScenarioMonitor
+
+    results = {}
+    analyzer = PatternAnalyzer(DatabaseManager(db_path))
+    detectors = {
+        'pattern.rapid_accumulation': analyzer.detect_rapid_accumulation,
+        'pattern.no_bid_patterns': analyzer.detect_no_bid_patterns,
+        'pattern.analyze_trends': analyzer.analyze_trends
+    }
+    monitor = ScenarioMonitor(db_path)
+    for scenario in SCENARIOS:
+        detectors[f'scenario.{scenario}'] = lambda scenario=scenario: monitor._run_scenario(scenario)
+
+    for name, detector in detectors.items():
+        samples = []
+        for _ in range(iterations):
+            output, elapsed = timed(detector)
+            samples.append(elapsed)
+        results[name] = summarize(samples)
+        results[name]['results'] = len(output) if isinstance(output, list) else None
+        print(f"   {name:40} p50 {results[name]['p50_ms']:10.1f} ms")
+    return results
+
+def benchmark_endpoints(fixture_dir, iterations):
+    """
+    Both dashboards open government_monitor.db relative to the working directory at import,
+    so they are imported from inside the fixture directory
+    """
+    results = {}
+    previous_cwd = os.getcwd()
+    os.chdir(fixture_dir)
+    try:
+        import enhanced_dashboard
+        import dashboard_webapp
+        apps = {'enhanced_dashboard': enhanced_dashboard.app, 'dashboard_webapp': dashboard_webapp.app}
+        for app_name, paths in ENDPOINTS.items():
+            client = apps[app_name].test_client()
+            for path in paths:
+                # The first request pays for cold caches (figure cache, SQLite page cache)
+                response, cold_ms = timed(lambda: client.get(path))
+                samples = []
+                for _ in range(iterations):
+                    response, elapsed = timed(lambda: client.get(path))
+                    samples.append(elapsed)
+                key = f'{app_name} {path}'
+                results[key] = summarize(samples)
+                results[key].update({'cold_ms': round(cold_ms, 3), 'status': response.status_code,
+                                     'bytes': len(response.get_data())})
+                print(f"   {key:52} p50 {results[key]['p50_ms']:9.1f} ms  p99 {results[key]['p99_ms']:9.1f} ms")
+    finally:
+        os.chdir(previous_cwd)
+    return results
+
+def flatten_metrics(report):
+    """(metric name, value, higher_is_better) for every comparable number in a report"""
+    metrics = []
+    if report.get('ingest'):
+        metrics.append(('ingest.rows_per_second', report['ingest']['rows_per_second'], True))
+    for section in ('analysis', 'endpoints'):
+        for name, stats in report.get(section, {}).items():
+            metrics.append((f'{section}.{name}.p50_ms', stats['p50_ms'], False))
+            metrics.append((f'{section}.{name}.p99_ms', stats['p99_ms'], False))
+    return metrics
+
+def compare_reports(previous, current, max_regression):
+    """Print per-metric changes; return the metrics that got worse by more than max_regression percent"""
+    previous_metrics = {name: value for name, value, _ in flatten_metrics(previous)}
+    regressions = []
+    print(f"\n📊 Compared with {previous.get('git_revision') or 'previous report'} "
+          f"({previous.get('fixture', {}).get('rows', '?'):,} rows)")
+    for name, value, higher_is_better in flatten_metrics(current):
+        old = previous_metrics.get(name)
+        if not old or value is None:
+            continue
+        change = (value - old) / old * 100
+        worse = -change if higher_is_better else change
+        # p99 over a few dozen samples is too noisy to gate on; it is reported only
+        gated = not name.endswith('p99_ms')
+        marker = '❌' if gated and worse > max_regression else ('✅' if worse < -max_regression else '  ')
+        print(f"{marker} {name:70} {old:12.1f} -> {value:12.1f} ({change:+.1f}%)")
+        if gated and worse > max_regression:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingest, analysis and dashboards on synthetic data")
+    parser.add_argument('--size', choices=sorted(FIXTURE_SIZES), default='10k', help="Fixture size")
+    parser.add_argument('--rows', type=int, help="Custom fixture row count (overrides --size)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--fixture-dir', default=os.path.join(REPO_ROOT, 'benchmarks', 'fixtures'),
+                        help="Where fixtures are built and reused (one subdirectory per size)")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the fixture even if it exists")
+    parser.add_argument('--ingest-rows', type=int, default=50_000, help="Rows written in the ingest benchmark")
+    parser.add_argument('--ingest-batch', type=int, default=1_000, help="Contracts per save_contracts call")
+    parser.add_argument('--analysis-iterations', type=int, default=3)
+    parser.add_argument('--endpoint-iterations', type=int, default=30)
+    parser.add_argument('--skip', action='append', default=[], choices=['ingest', 'analysis', 'endpoints'])
+    parser.add_argument('--output', default='benchmark_report.json', help="JSON report path")
+    parser.add_argument('--compare', help="Earlier report to compare against")
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help="Percent slowdown per metric tolerated by --compare before exiting nonzero")
+    args = parser.parse_args()
+
+    # Keep per-figure and per-fixture INFO logs out of the timing output; slow queries still
+    # land in the query stats file (scripts/query_stats.py) without a warning per statement
+    logging.disable(logging.INFO)
+    logging.getLogger('query_log').setLevel(logging.ERROR)
+    rows = args.rows or FIXTURE_SIZES[args.size]
+    size_name = args.size if not args.rows else str(rows)
+
+    print("⏱️  Government Contract Monitor - Benchmarks")
+    print("=" * 50)
+    report = {
+        'generated': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sqlite': sqlite3.sqlite_version
+    }
+
+    fixture_dir = os.path.join(args.fixture_dir, size_name)
+    db_path, info, build_seconds = prepare_fixture(fixture_dir, rows, args.seed, args.rebuild)
+    report['fixture'] = dict(info, path=db_path, build_seconds=build_seconds)
+
+    if 'ingest' not in args.skip:
+        ingest_rows = min(args.ingest_rows, rows)
+        print(f"\n📥 Ingest ({ingest_rows:,} rows, batches of {args.ingest_batch:,})")
+        report['ingest'] = benchmark_ingest(ingest_rows, args.ingest_batch, args.seed)
+        print(f"   {report['ingest']['rows_per_second']:,.0f} rows/sec")
+
+    if 'analysis' not in args.skip:
+        print(f"\n🔍 Analysis ({args.analysis_iterations} iterations)")
+        report['analysis'] = benchmark_analysis(db_path, args.analysis_iterations)
+
+    if 'endpoints' not in args.skip:
+        print(f"\n🌐 Endpoints ({args.endpoint_iterations} iterations)")
+        report['endpoints'] = benchmark_endpoints(fixture_dir, args.endpoint_iterations)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        regressions = compare_reports(previous, report, args.max_regression)
+        if regressions:
+            print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.max_regression:.0f}%")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -27,11 +27,13 @@ def main():
         # Run comprehensive data collection
         print("📊 Phase 1: Comprehensive data collection...")
         monitor = UltimateGovernmentMonitor()
+        scenario_monitor = ScenarioMonitor()
+        # Connected-network accumulation is also flagged at ingest time
+        monitor.streaming_detector.add_window(scenario_monitor.accumulation_window())
         collection_results = monitor.run_ultimate_collection(days_back=30)
         
         # Run scenario-based analysis
         print("\n🚨 Phase 2: Scenario-based pattern detection...")
-        scenario_monitor = ScenarioMonitor()
         scenario_results = scenario_monitor.run_full_scenario_analysis()
         
         # Print results
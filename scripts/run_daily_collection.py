@@ -5,8 +5,13 @@ Daily collection script - run this daily to collect new contract data
 
 from government_monitor_system import GovernmentMonitor
 from datetime import datetime
+import argparse
 
 def main():
+    parser = argparse.ArgumentParser(description="Daily contract collection")
+    parser.add_argument('--trace', help="Write a trace-event JSON timeline of the run to this file")
+    args = parser.parse_args()
+    
     print(f"=== Government Contract Monitor - Daily Collection ===")
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
@@ -15,12 +20,13 @@ def main():
     
     # Run daily collection
     try:
-        results = monitor.run_daily_collection()
+        results = monitor.run_daily_collection(trace_path=args.trace)
         
         print(f"\n✅ Collection Complete:")
         print(f"   📄 Contracts collected: {results['contracts_collected']}")
         print(f"   🚨 Alerts generated: {results['alerts_generated']}")
         print(f"   📊 Database updated successfully")
+        print(f"   ⏱️  Run metrics saved as {results['run_id']}")
         
         if results['alerts_generated'] > 0:
             print(f"\n⚠️  New alerts detected! Check the dashboard for details.")
@@ -28,6 +34,9 @@ def main():
     except Exception as e:
         print(f"\n❌ Collection failed: {e}")
         return 1
+    finally:
+        # Deliver any queued alert emails before the process exits
+        monitor.close()
     
     return 0
 
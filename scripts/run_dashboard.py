@@ -1,40 +1,62 @@
 #!/usr/bin/env python3
 """
 Launch dashboard - run this to start the web interface
+Pass --workers N to serve with N worker processes (production mode).
 """
 
-from dashboard_webapp import app
+import argparse
 import webbrowser
 import time
 import threading
 import sys
 
-def open_browser():
+def open_browser(url):
     """Open browser after a short delay"""
     time.sleep(2)
-    webbrowser.open('http://127.0.0.1:8080')
+    webbrowser.open(url)
 
 def main():
+    parser = argparse.ArgumentParser(description='Start the Government Contract Monitor dashboard')
+    parser.add_argument('--app', choices=['basic', 'enhanced'], default='basic',
+                        help='basic: dashboard_webapp, enhanced: enhanced_dashboard')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Worker processes for the production server (0: development server)')
+    parser.add_argument('--no-browser', action='store_true', help="Don't open a browser")
+    parser.add_argument('--no-auto-reload', action='store_true',
+                        help="Don't reload workers when a collection run finishes")
+    args = parser.parse_args()
+    
+    if args.app == 'enhanced':
+        from enhanced_dashboard import serve
+    else:
+        from dashboard_webapp import serve
+    
+    url = f'http://{args.host}:{args.port}'
     print("=== Government Contract Monitor Dashboard ===")
     print("Starting web server...")
-    print("Dashboard URL: http://127.0.0.1:8080")
+    print(f"Dashboard URL: {url}")
+    if args.workers:
+        print(f"Production mode: {args.workers} worker processes (kill -HUP the master to reload)")
     print("Press Ctrl+C to stop the server")
     print()
     
     # Open browser automatically
-    browser_thread = threading.Thread(target=open_browser)
-    browser_thread.daemon = True
-    browser_thread.start()
+    if not args.no_browser:
+        browser_thread = threading.Thread(target=open_browser, args=(url,))
+        browser_thread.daemon = True
+        browser_thread.start()
     
     try:
-        # Start Flask app
-        app.run(debug=False, host='127.0.0.1', port=8080)
+        serve(args.host, args.port, args.workers, reload_on_collection=not args.no_auto_reload)
     except KeyboardInterrupt:
         print("\n\n👋 Dashboard stopped. Goodbye!")
         sys.exit(0)
     except Exception as e:
         print(f"\n❌ Dashboard failed to start: {e}")
         sys.exit(1)
+    print("\n👋 Dashboard stopped. Goodbye!")
 
 if __name__ == "__main__":
     main()
@@ -5,6 +5,7 @@ Enhanced Collection Script - Integrates multi-source collection with existing sy
 
 from government_monitor_system import GovernmentMonitor, DatabaseManager
 from enhanced_collectors import ComprehensiveCollector
+import query_log
 from datetime import datetime
 import logging
 
@@ -86,8 +87,7 @@ class EnhancedGovernmentMonitor(GovernmentMonitor):
     
     def _get_existing_contract_ids(self):
         """Get set of existing contract IDs to avoid duplicates"""
-        import sqlite3
-        conn = sqlite3.connect(self.db.db_path)
+        conn = query_log.connect(self.db.db_path)
         cursor = conn.cursor()
         cursor.execute('SELECT award_id FROM contracts')
         existing_ids = {row[0] for row in cursor.fetchall()}
@@ -96,23 +96,16 @@ class EnhancedGovernmentMonitor(GovernmentMonitor):
     
     def get_source_breakdown(self):
         """Get breakdown of contracts by data source"""
-        import sqlite3
-        conn = sqlite3.connect(self.db.db_path)
+        conn = query_log.connect(self.db.db_path)
         cursor = conn.cursor()
         
-        # Add data_source column if it doesn't exist
-        try:
-            cursor.execute('ALTER TABLE contracts ADD COLUMN data_source TEXT')
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
+        # data_source is a contract_facts column, so the names the contracts view joins in aren't needed
         cursor.execute('''
             SELECT 
                 COALESCE(data_source, 'legacy') as source,
                 COUNT(*) as count,
                 SUM(award_amount) as total_amount
-            FROM contracts 
+            FROM contract_facts 
             GROUP BY data_source
             ORDER BY count DESC
         ''')
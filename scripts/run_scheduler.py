@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Scheduler Daemon - keeps collectors warm and runs collection/analysis on intervals
+Replaces the cron entries for run_daily_collection.py, run_ultimate_collection.py
+and run_cronyism_detection.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+import argparse
+import json
+import logging
+from scheduler_daemon import SchedulerDaemon, load_config, register_default_jobs, send_command
+
+def main():
+    parser = argparse.ArgumentParser(description="Government contract monitor scheduler daemon")
+    parser.add_argument('--config', help="JSON config file with job intervals")
+    parser.add_argument('--socket', help="Control socket path (overrides config)")
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('serve', help="Run the scheduler in the foreground")
+    subparsers.add_parser('status', help="Show job status from a running scheduler")
+    trigger_parser = subparsers.add_parser('trigger', help="Run a job now")
+    trigger_parser.add_argument('job')
+    subparsers.add_parser('stop', help="Stop a running scheduler after current jobs finish")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    socket_path = args.socket or config['control_socket']
+    command = args.command or 'serve'
+
+    if command == 'serve':
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        print("⏰ Government Contract Monitor - Scheduler")
+        print("=" * 45)
+        daemon = SchedulerDaemon(config['max_concurrent'], socket_path)
+        register_default_jobs(daemon, config, config.get('email'))
+        for job in daemon.jobs.values():
+            print(f"   • {job.name}: every {job.interval / 60:.0f} min (+≤{job.jitter / 60:.0f} min jitter)")
+        print(f"   Control socket: {socket_path}")
+        print()
+        daemon.serve_forever()
+        return 0
+
+    try:
+        if command == 'trigger':
+            response = send_command('trigger', socket_path=socket_path, job=args.job)
+        else:
+            response = send_command(command, socket_path=socket_path)
+    except (ConnectionError, FileNotFoundError) as e:
+        print(f"❌ Scheduler not reachable on {socket_path}: {e}")
+        return 1
+
+    print(json.dumps(response, indent=2))
+    return 0 if response.get('ok') else 1
+
+if __name__ == "__main__":
+    exit(main())
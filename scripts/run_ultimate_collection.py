@@ -6,10 +6,16 @@ Runs ALL available collectors for comprehensive contract discovery
 
 from comprehensive_collector import UltimateGovernmentMonitor
 from datetime import datetime
+import argparse
 import sys
 
 def main():
     """Main ultimate collection function"""
+    parser = argparse.ArgumentParser(description="Collect from every available data source")
+    parser.add_argument('--days-back', type=int, default=30)
+    parser.add_argument('--trace', help="Write a trace-event JSON timeline of the run to this file")
+    args = parser.parse_args()
+    
     print("🚀 ULTIMATE Government Contract Collection")
     print("=" * 50)
     print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -31,7 +37,7 @@ def main():
         monitor = UltimateGovernmentMonitor()
         
         # Run ultimate collection
-        results = monitor.run_ultimate_collection(days_back=30)
+        results = monitor.run_ultimate_collection(days_back=args.days_back, trace_path=args.trace)
         
         if results.get('error'):
             print(f"\n❌ Collection failed: {results['error']}")
@@ -41,6 +47,8 @@ def main():
         print(f"\n✅ SUCCESS! Ultimate collection completed successfully.")
         print(f"   📈 Database now contains {results.get('new_contracts_saved', 0)} additional contracts")
         print(f"   🎯 Ready for dashboard analysis at http://127.0.0.1:8080")
+        if args.trace:
+            print(f"   ⏱️  Trace written to {args.trace} (open in chrome://tracing or ui.perfetto.dev)")
         
         return 0
         
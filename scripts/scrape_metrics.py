@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Local /metrics scraper - polls the dashboards' Prometheus endpoints into a
+SQLite history file and charts series in the terminal, no Prometheus needed
+
+    python3 scripts/scrape_metrics.py scrape --url http://127.0.0.1:8080/metrics --interval 15
+    python3 scripts/scrape_metrics.py show govmon_http_request_duration_seconds_sum --rate
+"""
+
+import re
+import time
+import sqlite3
+import argparse
+import urllib.request
+from datetime import datetime
+
+SAMPLE_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)$')
+SPARK = '▁▂▃▄▅▆▇█'
+
+def init_history(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS samples (
+            scraped_at REAL,
+            source TEXT,
+            name TEXT,
+            labels TEXT,
+            value REAL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_samples_name_time ON samples (name, scraped_at)')
+    return conn
+
+def parse_exposition(text: str, keep_buckets: bool = False):
+    """(name, labels, value) for every sample line; histogram buckets are skipped unless asked for"""
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = SAMPLE_LINE.match(line)
+        if not match:
+            continue
+        name, labels, value = match.groups()
+        if name.endswith('_bucket') and not keep_buckets:
+            continue
+        try:
+            yield name, labels or '', float(value)
+        except ValueError:
+            continue
+
+def scrape(args):
+    conn = init_history(args.history)
+    print(f"📈 Scraping {', '.join(args.url)} every {args.interval}s into {args.history} (Ctrl+C to stop)")
+    try:
+        while True:
+            scraped_at = time.time()
+            for url in args.url:
+                try:
+                    with urllib.request.urlopen(url, timeout=10) as response:
+                        text = response.read().decode('utf-8')
+                except OSError as e:
+                    print(f"⚠️  {url}: {e}")
+                    continue
+                rows = [(scraped_at, url, name, labels, value)
+                        for name, labels, value in parse_exposition(text, args.buckets)]
+                conn.executemany('INSERT INTO samples VALUES (?, ?, ?, ?, ?)', rows)
+                conn.commit()
+                print(f"   {datetime.fromtimestamp(scraped_at).strftime('%H:%M:%S')} {url}: {len(rows)} samples")
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+def sparkline(values):
+    finite = [v for v in values if v == v]
+    if not finite:
+        return ''
+    low, high = min(finite), max(finite)
+    span = (high - low) or 1
+    return ''.join(SPARK[int((v - low) / span * (len(SPARK) - 1))] if v == v else ' ' for v in values)
+
+def show(args):
+    conn = init_history(args.history)
+    since = time.time() - args.minutes * 60
+    rows = conn.execute('''
+        SELECT labels, scraped_at, SUM(value)
+        FROM samples
+        WHERE name = ? AND scraped_at >= ? AND labels LIKE ?
+        GROUP BY labels, scraped_at
+        ORDER BY labels, scraped_at
+    ''', (args.name, since, f'%{args.match}%')).fetchall()
+    conn.close()
+    if not rows:
+        print(f"No samples for {args.name} in the last {args.minutes} minutes")
+        return 1
+
+    series = {}
+    for labels, scraped_at, value in rows:
+        series.setdefault(labels, []).append((scraped_at, value))
+
+    print(f"📊 {args.name}{' (per-second rate)' if args.rate else ''}, last {args.minutes} min")
+    for labels, points in series.items():
+        if args.rate:
+            # Counter resets (process restarts) show as gaps rather than negative rates
+            values = [(v2 - v1) / (t2 - t1) if v2 >= v1 and t2 > t1 else float('nan')
+                      for (t1, v1), (t2, v2) in zip(points, points[1:])]
+        else:
+            values = [value for _, value in points]
+        finite = [v for v in values if v == v]
+        if not finite:
+            continue
+        print(f"   {labels or '{}'}")
+        print(f"      {sparkline(values[-args.width:])}  latest {values[-1]:.6g}  "
+              f"min {min(finite):.6g}  max {max(finite):.6g}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape dashboard /metrics into SQLite and chart trends")
+    parser.add_argument('--history', default='metrics_history.db', help="SQLite file holding scraped samples")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    scrape_parser = subparsers.add_parser('scrape', help="Poll /metrics endpoints")
+    scrape_parser.add_argument('--url', action='append', help="Metrics URL (repeatable)")
+    scrape_parser.add_argument('--interval', type=float, default=15.0)
+    scrape_parser.add_argument('--once', action='store_true', help="Scrape once and exit (for cron)")
+    scrape_parser.add_argument('--buckets', action='store_true', help="Also keep histogram buckets")
+
+    show_parser = subparsers.add_parser('show', help="Chart one metric's series")
+    show_parser.add_argument('name')
+    show_parser.add_argument('--match', default='', help="Only label sets containing this text")
+    show_parser.add_argument('--minutes', type=float, default=60.0)
+    show_parser.add_argument('--rate', action='store_true', help="Per-second rate (for counters, _sum and _count)")
+    show_parser.add_argument('--width', type=int, default=60)
+
+    args = parser.parse_args()
+    if args.command == 'scrape':
+        args.url = args.url or ['http://127.0.0.1:8080/metrics']
+        return scrape(args) or 0
+    return show(args)
+
+if __name__ == "__main__":
+    exit(main())
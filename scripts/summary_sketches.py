@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Summary sketches - approximate distinct-recipient counts and award-amount
+percentiles (with ~95% bounds) read from the sketches kept at ingest
+
+    python3 scripts/summary_sketches.py show
+    python3 scripts/summary_sketches.py show --agency "Department of Defense" --months 2025-01 2025-02
+    python3 scripts/summary_sketches.py rebuild
+"""
+
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+import query_log
+from sketches import ALL_AGENCIES, SketchStore
+from baselines import BaselineStore
+
+def show(store: SketchStore, conn, args):
+    agency_id = None
+    if args.agency:
+        row = conn.execute('SELECT id FROM agencies WHERE name = ?', (args.agency,)).fetchone()
+        if not row:
+            print(f"❌ No agency named {args.agency!r}")
+            return 1
+        agency_id = row[0]
+    if not store.is_built(conn):
+        print("ℹ️  No sketches yet (run `rebuild`); showing the exact count")
+
+    label = args.agency or 'all agencies'
+    distinct = store.distinct_recipients(conn, agency_id, args.months)
+    print(f"👥 Distinct recipients ({label}{', ' + ' '.join(args.months) if args.months else ''}): "
+          f"{distinct.value:,.0f}  [{distinct.low:,.0f} - {distinct.high:,.0f}]")
+
+    key = ALL_AGENCIES if agency_id is None else agency_id
+    quantiles = (store.amount_quantiles(conn, args.quantiles, [key]) or {}).get(key)
+    if not quantiles:
+        return 0
+    print(f"💰 Award amounts ({label}, all years):")
+    for q, estimate in quantiles.items():
+        print(f"   p{q * 100:g}: ${estimate.value:,.0f}  [${estimate.low:,.0f} - ${estimate.high:,.0f}]")
+    return 0
+
+def rebuild(store: SketchStore, conn, args):
+    store.rebuild(conn)
+    BaselineStore(store.db_path).rebuild(conn)
+    conn.commit()
+    print("✅ Rebuilt the recipient and amount sketches and the per-agency amount baselines")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Read or rebuild the summary sketches")
+    parser.add_argument('--db', default='government_monitor.db')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    show_parser = subparsers.add_parser('show', help="Estimates with their ~95% bounds")
+    show_parser.add_argument('--agency', help="Exact agency name (default: all agencies)")
+    show_parser.add_argument('--months', nargs='+', metavar='YYYY-MM', help="Count recipients over these award months")
+    show_parser.add_argument('--quantiles', nargs='+', type=float, default=[0.5, 0.9, 0.99])
+
+    subparsers.add_parser('rebuild', help="Recompute every sketch and amount baseline from contracts (archives included)")
+
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        print(f"❌ No database at {args.db}")
+        return 1
+    store = SketchStore(args.db)
+    conn = query_log.connect(args.db, timeout=30)
+    try:
+        return {'show': show, 'rebuild': rebuild}[args.command](store, conn, args)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    exit(main())
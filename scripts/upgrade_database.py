@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Database upgrade - converts a database with the old flat contracts table to the
+recipients/agencies/contract_facts star schema, then ANALYZEs and VACUUMs it.
+Collectors, dashboards and partition rolls refuse a flat database until this has run.
+
+    python3 scripts/upgrade_database.py --db government_monitor.db
+"""
+
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+import star_schema
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a flat contracts table to the star schema")
+    parser.add_argument('--db', default='government_monitor.db')
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        print(f"❌ No database at {args.db}")
+        return 1
+    # Stop collectors and dashboards first: the conversion and VACUUM rewrite the whole file
+    print(f"🔄 Upgrading {args.db}...")
+    if star_schema.upgrade_database(args.db):
+        print("✅ Converted contracts to recipients/agencies/contract_facts and vacuumed the database")
+    else:
+        print("✅ Already on the star schema; nothing to convert")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
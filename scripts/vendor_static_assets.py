@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Copy the Plotly bundle into static/vendor and precompress it, so the dashboards
+can be served on machines without internet access (or without plotly installed)
+"""
+
+import sys
+import os
+import shutil
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'core'))
+
+from static_assets import VENDOR_DIR, find_plotly_bundle, precompress
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else find_plotly_bundle()
+    if not source or not os.path.exists(source):
+        print("❌ No Plotly bundle found. Install plotly or pass the path to plotly.min.js")
+        return 1
+    
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    target = os.path.join(VENDOR_DIR, 'plotly.min.js')
+    if os.path.abspath(source) != os.path.abspath(target):
+        shutil.copyfile(source, target)
+    gz_path = precompress(target)
+    
+    print(f"✅ Vendored {target} ({os.path.getsize(target) / 1024:.0f} KB)")
+    print(f"   gzip: {gz_path} ({os.path.getsize(gz_path) / 1024:.0f} KB)")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
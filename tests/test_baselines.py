@@ -0,0 +1,32 @@
+from datetime import date
+
+from baselines import Baseline, Baselines
+
+TODAY = date(2026, 1, 15).toordinal()
+
+def baseline(amounts):
+    result = Baseline()
+    for amount in amounts:
+        result.add(amount, False, TODAY, TODAY)
+    return result
+
+def version(rows):
+    return Baselines(rows, today=TODAY).version([0.95, 0.99])
+
+def test_version_ignores_small_drift():
+    amounts = [1000.0 * (1 + i % 50) for i in range(500)]
+    before = version({(None, ''): baseline(amounts)})
+    after = version({(None, ''): baseline(amounts + [25_000.0, 30_000.0])})
+    assert before == after
+
+def test_version_changes_when_thresholds_move():
+    amounts = [1000.0 * (1 + i % 50) for i in range(500)]
+    before = version({(None, ''): baseline(amounts)})
+    after = version({(None, ''): baseline(amounts + [5_000_000.0] * 100)})
+    assert before != after
+
+def test_version_changes_when_a_baseline_becomes_trusted():
+    rollup = baseline([1000.0 * (1 + i % 50) for i in range(500)])
+    before = version({(None, ''): rollup, ('DoD', ''): baseline([2000.0] * 10)})
+    after = version({(None, ''): rollup, ('DoD', ''): baseline([2000.0] * 40)})
+    assert before != after
@@ -0,0 +1,69 @@
+import csv
+import sqlite3
+
+import pytest
+
+from bulk_import import BulkImporter, parse_chunk, record_chunks
+from government_monitor_system import DatabaseManager
+
+HEADER = ['award_id_piid', 'recipient_name', 'total_dollars_obligated', 'awarding_agency_name',
+          'action_date', 'award_type', 'extent_competed', 'award_description']
+
+@pytest.fixture(autouse=True)
+def no_query_stats(monkeypatch):
+    monkeypatch.setenv('GOVMON_QUERY_STATS_DB', 'off')
+
+def description(index):
+    # Every third award has a long first line and a quoted newline, so chunk boundaries land inside it
+    return f"{'SUPPLIES ' * 20}FOR SITE {index}\nDELIVERED IN PARTS" if index % 3 == 0 else f'SERVICES {index}'
+
+def write_csv(path, count):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(HEADER)
+        for i in range(count):
+            writer.writerow([f'AW{i:03d}', f'Vendor {i % 4}', f'{1000 + i}.50', 'Department of Defense',
+                             '2025-05-01', 'D', 'FULL AND OPEN COMPETITION', description(i)])
+
+def test_chunks_end_on_record_boundaries(tmp_path):
+    path = tmp_path / 'awards.csv'
+    write_csv(path, 30)
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+        chunks = list(record_chunks(f, chunk_bytes=100, start=len(header_line)))
+
+    assert len(chunks) > 5
+    assert chunks[-1][1] == path.stat().st_size
+    rows = [row for data, _ in chunks for row in parse_chunk(HEADER, data)[0]]
+    assert [row[0] for row in rows] == [f'AW{i:03d}' for i in range(30)]
+    assert [row[7] for row in rows] == [description(i) for i in range(30)]
+
+def test_interrupted_import_resumes_from_its_checkpoint(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    path = tmp_path / 'awards.csv'
+    write_csv(path, 30)
+    importer = BulkImporter(db, chunk_bytes=600)
+
+    def interrupt(state):
+        raise KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        importer.import_files([str(path)], progress=interrupt)
+    checkpoint, = importer.status()
+    assert checkpoint['status'] == 'running'
+    assert 0 < checkpoint['rows_written'] < 30
+
+    totals = importer.import_files([str(path)])
+    checkpoint, = importer.status()
+    # Counts carry over from the checkpoint, so re-reading the first chunk would push rows_read past 30
+    assert (checkpoint['status'], checkpoint['rows_read'], checkpoint['rows_written']) == ('done', 30, 30)
+    assert (totals['files'], totals['rows_written']) == (1, 30)
+
+    conn = sqlite3.connect(db.db_path)
+    try:
+        stored = dict(conn.execute('SELECT award_id, description FROM contracts'))
+    finally:
+        conn.close()
+    assert stored == {f'AW{i:03d}': description(i) for i in range(30)}
+
+    # A finished file is skipped on the next run
+    assert importer.import_files([str(path)])['files'] == 0
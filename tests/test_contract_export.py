@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+
+import pytest
+
+from contract_export import stream_export
+from contract_listing import ListingFilters
+from government_monitor_system import Contract, DatabaseManager
+
+@pytest.fixture(autouse=True)
+def no_query_stats(monkeypatch):
+    monkeypatch.setenv('GOVMON_QUERY_STATS_DB', 'off')
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    db.save_contracts([
+        Contract('A1', 'Acme Corp', 1000.0, 'DoD', '2025-01-01', 'A', 'full', 'plain'),
+        Contract('A2', 'Globex, Inc.', 2500.5, 'GSA', '2025-01-03', 'B', 'sole source',
+                 'quoted "part"\nand a second line'),
+        Contract('A3', 'Initech', None, 'DoD', '2025-01-02', 'A', None, 'no amount'),
+        Contract('A4', 'Acme Corp', 9000.0, 'DoD', '2024-12-01', 'A', 'full', 'too old')
+    ])
+    return db
+
+COLUMNS = ['award_id', 'recipient_name', 'award_amount', 'award_date', 'competition_type', 'description']
+FILTERS = ListingFilters(start_date='2025-01-01')
+
+def test_csv_export_round_trips(db):
+    text = ''.join(stream_export(db.db_path, 'csv', FILTERS, columns=COLUMNS, batch_rows=2))
+
+    rows = list(csv.reader(io.StringIO(text)))
+    assert rows == [
+        COLUMNS,
+        ['A2', 'Globex, Inc.', '2500.5', '2025-01-03', 'sole source', 'quoted "part"\nand a second line'],
+        ['A3', 'Initech', '', '2025-01-02', '', 'no amount'],
+        ['A1', 'Acme Corp', '1000.0', '2025-01-01', 'full', 'plain']
+    ]
+
+def test_ndjson_export_has_one_object_per_line(db):
+    chunks = list(stream_export(db.db_path, 'ndjson', FILTERS, order='amount', columns=COLUMNS, batch_rows=2))
+
+    # Two rows per chunk, and NULL amounts sort last
+    assert len(chunks) == 2
+    lines = ''.join(chunks).splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record['award_id'] for record in records] == ['A2', 'A1', 'A3']
+    assert records[2] == {'award_id': 'A3', 'recipient_name': 'Initech', 'award_amount': None,
+                          'award_date': '2025-01-02', 'competition_type': None, 'description': 'no amount'}
+    assert records[0]['description'] == 'quoted "part"\nand a second line'
+
+def test_bad_format_fails_before_opening_the_database(tmp_path):
+    with pytest.raises(ValueError):
+        stream_export(str(tmp_path / 'missing.db'), 'xml', ListingFilters())
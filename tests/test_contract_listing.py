@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+from contract_listing import ListingFilters, next_cursor, page_query
+from government_monitor_system import Contract, DatabaseManager
+
+@pytest.fixture(autouse=True)
+def no_query_stats(monkeypatch):
+    monkeypatch.setenv('GOVMON_QUERY_STATS_DB', 'off')
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    # Runs of equal dates and equal amounts, so pages have to break ties on award_id
+    db.save_contracts([
+        Contract(f'A{i:02d}', f'Vendor {i % 3}', [1000.0, 5000.0][i % 2], 'DoD',
+                 ['2025-03-01', '2025-03-02'][i // 7], 'A', 'full', 'test')
+        for i in range(14)
+    ])
+    return db
+
+def pages(db_path, order, filters, limit):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor, result = None, []
+        while True:
+            query, params, page_size = page_query(['award_id', 'award_amount', 'award_date'], order, filters,
+                                                  cursor, limit)
+            records, cursor = next_cursor([dict(row) for row in conn.execute(query, params)], order, page_size)
+            result.append(records)
+            if cursor is None:
+                return result
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize('order, column', [('date', 'award_date'), ('amount', 'award_amount')])
+def test_pages_cover_equal_sort_keys_exactly_once(db, order, column):
+    result = pages(db.db_path, order, ListingFilters(), 3)
+
+    assert [len(page) for page in result] == [3, 3, 3, 3, 2]
+    rows = [(record[column], record['award_id']) for page in result for record in page]
+    assert rows == sorted(rows, reverse=True)
+    assert len({award_id for _, award_id in rows}) == 14
+
+def test_min_amount_is_inclusive(db):
+    result = pages(db.db_path, 'amount', ListingFilters(min_amount=5000.0), 50)
+
+    assert sorted(record['award_id'] for record in result[0]) == [f'A{i:02d}' for i in range(1, 14, 2)]
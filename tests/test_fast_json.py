@@ -0,0 +1,34 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+from flask import Flask, jsonify
+
+from fast_json import dumps, json_response, query_records
+
+QUERY = 'SELECT name, amount, count, note, award_date FROM awards ORDER BY rowid'
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE awards (name TEXT, amount REAL, count INTEGER, note TEXT, award_date TEXT)')
+    conn.executemany('INSERT INTO awards VALUES (?, ?, ?, ?, ?)', [
+        ('Acme', 1000.5, 3, 'émergency', '2025-01-02'),
+        ('Globex', None, 1, None, '2025-01-03'),
+        ('Initech', 20, None, 'x', None)
+    ])
+    yield conn
+    conn.close()
+
+def test_records_serialize_like_pandas_and_jsonify(conn):
+    app = Flask(__name__)
+    expected = pd.read_sql_query(QUERY, conn).to_dict('records')
+    records = query_records(conn, QUERY)
+
+    with app.app_context():
+        assert json_response(records).get_data() == jsonify(expected).get_data()
+    assert list(records[0]) == sorted(records[0])
+
+def test_empty_results(conn):
+    assert query_records(conn, QUERY + ' LIMIT 0') == []
+    assert dumps({'b': 1, 'a': [1.5, None]}) == '{"a":[1.5,null],"b":1}'
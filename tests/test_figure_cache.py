@@ -0,0 +1,42 @@
+import sqlite3
+
+from figure_cache import FigureCache, data_version
+from government_monitor_system import Contract, DatabaseManager
+
+def builder(calls):
+    def build():
+        calls.append(1)
+        return {'data': [{'y': [len(calls)]}], 'layout': {}}
+    return build
+
+def test_figures_are_rebuilt_only_when_the_data_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv('GOVMON_QUERY_STATS_DB', 'off')
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    calls = []
+    cache = FigureCache(db.db_path)
+
+    first = cache.get('timeline', builder(calls))
+    assert cache.get('timeline', builder(calls)) == first
+    # Another process (a fresh cache) reuses the shared row
+    assert FigureCache(db.db_path).get('timeline', builder(calls)) == first
+    assert len(calls) == 1
+
+    db.save_contracts([Contract('A1', 'Acme Corp', 1000.0, 'DoD', '2025-01-02', 'A', 'full', 'test')])
+    assert cache.get('timeline', builder(calls)) != first
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_unwritable_database_falls_back_to_memory(tmp_path):
+    path = str(tmp_path / 'monitor.db')
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute('CREATE TABLE contract_facts (award_id TEXT)')
+    # An exclusive lock stands in for a read-only file (root can write through chmod)
+    holder.execute('BEGIN EXCLUSIVE')
+    try:
+        cache = FigureCache(path)
+        calls = []
+        assert not cache.shared
+        assert cache.get('timeline', builder(calls), 'v1') == cache.get('timeline', builder(calls), 'v1')
+        assert len(calls) == 1
+    finally:
+        holder.close()
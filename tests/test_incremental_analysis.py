@@ -0,0 +1,67 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import incremental_analysis
+from government_monitor_system import Contract, DatabaseManager
+from incremental_analysis import IncrementalAnalysis
+
+@pytest.fixture(autouse=True)
+def no_query_stats(monkeypatch):
+    monkeypatch.setenv('GOVMON_QUERY_STATS_DB', 'off')
+
+def contract(award_id, recipient='Acme Corp'):
+    return Contract(award_id, recipient, 1000.0, 'DoD', datetime.now().date().isoformat(), 'A', 'full', 'test')
+
+def per_recipient(conn, scope_sql):
+    return [(name, last, total, {'company': name, 'total': total})
+            for name, last, total in conn.execute(f'''
+                SELECT recipient_name, MAX(award_date), SUM(award_amount) FROM contracts
+                WHERE 1 = 1 {scope_sql} GROUP BY recipient_name
+            ''')]
+
+def change_ids(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute('SELECT id FROM contract_changes ORDER BY id')]
+    finally:
+        conn.close()
+
+def age_changes(db_path, days):
+    conn = sqlite3.connect(db_path)
+    old = (datetime.now() - timedelta(days=days)).isoformat()
+    conn.execute('UPDATE contract_changes SET changed_date = ?', (old,))
+    conn.execute('UPDATE analysis_watermarks SET evaluated_date = ?', (old,))
+    conn.commit()
+    conn.close()
+
+def test_consumed_changes_are_pruned(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    analysis = IncrementalAnalysis(db.db_path, 'totals', '-90 days', 'recipient_name')
+
+    db.save_contracts([contract('A1'), contract('A2', 'Globex')])
+    analysis.run(per_recipient)
+    assert change_ids(db.db_path) == []
+
+    db.save_contracts([contract('A3')])
+    assert len(change_ids(db.db_path)) == 1
+
+def test_unconsumed_changes_are_capped_by_age(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    # An analyzer that ran once and was never run again pins the consumed-by-all watermark
+    IncrementalAnalysis(db.db_path, 'abandoned', '-90 days', 'recipient_name').run(per_recipient)
+    analysis = IncrementalAnalysis(db.db_path, 'totals', '-90 days', 'recipient_name')
+
+    db.save_contracts([contract('A1'), contract('A2', 'Globex')])
+    analysis.run(per_recipient)
+    assert len(change_ids(db.db_path)) == 2
+
+    age_changes(db.db_path, incremental_analysis.CHANGE_RETENTION_DAYS + 1)
+    db.save_contracts([contract('A3', 'Initech')])
+    assert len(change_ids(db.db_path)) == 1
+
+    # Its last evaluation predates the cutoff, so it must not trust the pruned log
+    results, changed = analysis.run(per_recipient)
+    assert sorted(r['company'] for r in results) == ['Acme Corp', 'Globex', 'Initech']
+    assert len(changed) == 3
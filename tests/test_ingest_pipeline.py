@@ -0,0 +1,55 @@
+import sqlite3
+import time
+
+import pytest
+
+from government_monitor_system import Contract, DatabaseManager
+from ingest_pipeline import IngestPipeline
+
+@pytest.fixture(autouse=True)
+def no_query_stats(monkeypatch):
+    monkeypatch.setenv('GOVMON_QUERY_STATS_DB', 'off')
+
+def contract(award_id, recipient='Acme Corp'):
+    return Contract(award_id, recipient, 1000.0, 'DoD', '2025-06-01', 'A', 'full', 'test')
+
+def source(results, delay=0.0):
+    def collect():
+        time.sleep(delay)
+        return {name: [contract(*args) for args in rows] for name, rows in results.items()}
+    return collect
+
+def stored_sources(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute('SELECT award_id, data_source FROM contract_facts'))
+    finally:
+        conn.close()
+
+def test_earlier_source_wins_duplicates_even_when_it_finishes_last(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    written = []
+    pipeline = IngestPipeline(db, lambda c: f'{c.recipient_name}|{c.award_id}', batch_size=2,
+                              post_write_hooks=[lambda batch: written.extend(c.award_id for c in batch)])
+
+    result = pipeline.run([
+        ('primary', source({'usaspending': [('A1',), ('A2',)]}, delay=0.3)),
+        ('secondary', source({'fpds': [('A2',), ('A3',), ('A3',)]}))
+    ])
+
+    assert stored_sources(db.db_path) == {'A1': 'usaspending', 'A2': 'usaspending', 'A3': 'fpds'}
+    assert result['source_stats'] == {'usaspending': {'total': 2, 'unique': 2}, 'fpds': {'total': 3, 'unique': 1}}
+    assert result['new_contracts_saved'] == 3
+    assert sorted(written) == ['A1', 'A2', 'A3']
+
+def test_awards_already_in_the_database_are_not_rewritten(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    db.save_contracts([contract('A1')])
+
+    # Same award under a differently spelled name: a new signature, but the award_id exists
+    result = IngestPipeline(db, lambda c: f'{c.recipient_name}|{c.award_id}').run([
+        ('primary', source({'usaspending': [('A1', 'ACME CORP'), ('A2',)]}))
+    ])
+
+    assert result['new_contracts_saved'] == 1
+    assert stored_sources(db.db_path) == {'A1': None, 'A2': 'usaspending'}
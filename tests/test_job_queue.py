@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+from job_queue import JobQueue
+from metrics import MetricsRegistry
+
+@pytest.fixture
+def jobs(tmp_path):
+    jobs = JobQueue(max_workers=2, store_path=str(tmp_path / 'jobs.db'), registry=MetricsRegistry())
+    yield jobs
+    if jobs._executor is not None:
+        jobs._executor.shutdown(wait=True)
+
+def wait(jobs):
+    jobs._executor.shutdown(wait=True)
+    jobs._executor = None
+
+def test_identical_requests_coalesce_onto_one_job(jobs):
+    release = threading.Event()
+    calls = []
+
+    def analysis(progress, company):
+        calls.append(company)
+        progress(0.5, 'halfway')
+        release.wait(5)
+        return {'company': company}
+    jobs.register('analysis', analysis)
+
+    job, coalesced = jobs.submit('analysis', {'company': 'Acme'})
+    same, same_coalesced = jobs.submit('analysis', {'company': 'Acme'})
+    other, _ = jobs.submit('analysis', {'company': 'Globex'})
+    assert (coalesced, same_coalesced) == (False, True)
+    assert same is job and other is not job
+
+    release.set()
+    wait(jobs)
+    assert sorted(calls) == ['Acme', 'Globex']
+    status = jobs.get(job.id).to_status()
+    assert (status['status'], status['progress'], status['result']) == ('done', 1.0, {'company': 'Acme'})
+
+    # Once finished, the same request starts a fresh job
+    again, coalesced = jobs.submit('analysis', {'company': 'Acme'})
+    assert not coalesced and again.id != job.id
+
+def test_failures_and_statuses_are_visible_to_other_workers(jobs):
+    def broken(progress):
+        raise ValueError('no data')
+    jobs.register('broken', broken)
+
+    job, _ = jobs.submit('broken')
+    wait(jobs)
+
+    # Another server process only shares the store file
+    other = JobQueue(store_path=jobs.store_path, registry=MetricsRegistry())
+    status = other.get(job.id).to_status()
+    assert (status['status'], status['error']) == ('failed', 'no data')
+    assert other.get('missing') is None
+    with pytest.raises(KeyError):
+        jobs.submit('unknown')
@@ -0,0 +1,72 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from live_updates import LiveUpdates, format_event
+from metrics import MetricsRegistry
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'monitor.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE contracts (award_id TEXT, award_amount REAL)')
+    conn.commit()
+    conn.close()
+    return path
+
+def count_contracts(conn):
+    return conn.execute('SELECT COUNT(*) FROM contracts').fetchone()[0]
+
+def events(texts):
+    return [(event['event'], json.loads(event['data'])) for event in
+            (dict(line.split(': ', 1) for line in text.strip().splitlines()) for text in texts)]
+
+def test_commits_are_pushed_to_open_streams(db_path):
+    computed = threading.Event()
+
+    def compute(previous):
+        conn = sqlite3.connect(db_path)
+        try:
+            state = {'count': count_contracts(conn)}
+        finally:
+            conn.close()
+        computed.set()
+        return state, None if previous is None else {'new': state['count'] - previous['count'], 'avg': float('nan')}
+
+    live = LiveUpdates(db_path, count_contracts, compute, interval=0.02, heartbeat=5, registry=MetricsRegistry())
+    stream = live.stream()
+    try:
+        assert next(stream) == 'retry: 5000\n\n'
+        assert computed.wait(5)  # baseline set, no event for it
+
+        conn = sqlite3.connect(db_path)
+        conn.executemany('INSERT INTO contracts VALUES (?, ?)', [('A1', 10.0), ('A2', 20.0)])
+        conn.commit()
+        conn.close()
+
+        # NaN is sent as null, since EventSource clients parse the data with JSON.parse
+        assert events([next(stream)]) == [('update', {'new': 2, 'avg': None})]
+    finally:
+        live.stop()
+    assert list(stream) == []
+
+def test_reconnecting_clients_replay_missed_events_or_reload(db_path):
+    live = LiveUpdates(db_path, count_contracts, lambda previous: ({}, None), history=2,
+                       registry=MetricsRegistry())
+    first, _ = live._subscribe(None)
+    for count in range(1, 4):
+        live.publish('update', {'new': count})
+    ids = [first.queue.get_nowait().split('\n', 1)[0][len('id: '):] for _ in range(3)]
+    instance = ids[0].split('-')[0]
+
+    _, backlog = live._subscribe(ids[1])
+    assert events(backlog) == [('update', {'new': 3})]
+    _, backlog = live._subscribe(ids[0])
+    assert events(backlog) == [('update', {'new': 2}), ('update', {'new': 3})]
+    # The first event has dropped out of the history, and ids from another process are unknown
+    _, backlog = live._subscribe(f'{instance}-0')
+    assert backlog == [format_event('reload', {})]
+    _, backlog = live._subscribe('deadbeef-3')
+    assert backlog == [format_event('reload', {})]
@@ -0,0 +1,30 @@
+from flask import Flask
+
+from metrics import MetricsRegistry, instrument_app
+
+def test_metrics_endpoint_renders_route_histograms_and_collectors():
+    registry = MetricsRegistry()
+    app = Flask(__name__)
+    instrument_app(app, 'test_app', registry)
+
+    @app.route('/api/company/<name>')
+    def company(name):
+        return name
+
+    registry.register_collector(lambda: [('govmon_cache_hits_total', 'counter', 'Cache hits', [({'app': 'a'}, 3)])])
+    registry.register_collector(lambda: 1 / 0)
+
+    client = app.test_client()
+    client.get('/api/company/acme')
+    client.get('/api/company/globex')
+    body = client.get('/metrics').get_data(as_text=True)
+
+    # Labelled by route rule, not raw path; buckets are cumulative and end with +Inf == count
+    route = 'app="test_app",route="/api/company/<name>",method="GET",status="200"'
+    assert f'govmon_http_request_duration_seconds_count{{{route}}} 2' in body
+    assert f'govmon_http_request_duration_seconds_bucket{{{route},le="+Inf"}} 2' in body
+    assert 'acme' not in body
+    # The failing collector is skipped, the other one still rendered
+    assert '# TYPE govmon_cache_hits_total counter\ngovmon_cache_hits_total{app="a"} 3' in body
+    # /metrics itself is still in flight while it renders
+    assert 'govmon_http_requests_in_flight{app="test_app"} 1' in body
@@ -0,0 +1,164 @@
+import sqlite3
+import smtplib
+import time
+
+import pytest
+
+import notification_queue
+from notification_queue import NotificationQueue, NotificationWorker
+
+class FakeSMTP:
+    """Stands in for smtplib.SMTP; every instance and message is recorded on the class"""
+
+    instances = []
+    fail_sends = False
+
+    def __init__(self, host, port, timeout=None):
+        self.host, self.port = host, port
+        self.sent = []
+        self.closed = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        pass
+
+    def noop(self):
+        return (250, b'OK')
+
+    def send_message(self, msg):
+        if FakeSMTP.fail_sends:
+            raise smtplib.SMTPServerDisconnected("connection dropped")
+        self.sent.append(msg)
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+def sent_messages():
+    return [msg for server in FakeSMTP.instances for msg in server.sent]
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    FakeSMTP.instances = []
+    FakeSMTP.fail_sends = False
+    monkeypatch.setattr(notification_queue.smtplib, 'SMTP', FakeSMTP)
+    return NotificationQueue(str(tmp_path / 'queue.db'))
+
+def make_worker(queue, **overrides):
+    config = {'smtp_server': 'localhost', 'smtp_port': 2525, 'use_tls': False, 'from_email': 'monitor@example.org',
+              'digest_window': 0, 'poll_interval': 0.05, 'retry_backoff': 30.0, 'max_attempts': 3}
+    config.update(overrides)
+    return NotificationWorker(queue, config)
+
+def rows(queue):
+    conn = sqlite3.connect(queue.db_path)
+    result = conn.execute('SELECT recipient, status, attempts, available_at FROM notification_queue ORDER BY id').fetchall()
+    conn.close()
+    return result
+
+def make_due(queue):
+    conn = sqlite3.connect(queue.db_path)
+    conn.execute('UPDATE notification_queue SET available_at = 0')
+    conn.commit()
+    conn.close()
+
+def test_digest_groups_alerts_per_recipient(queue):
+    queue.enqueue('a@example.org', ['one', 'two', 'three'], [{}, {}, {}])
+    queue.enqueue('b@example.org', ['four'], [{'n': 4}])
+    worker = make_worker(queue)
+
+    assert worker.drain_once()
+    assert worker.drain_once()
+    assert not worker.drain_once()
+
+    messages = sent_messages()
+    assert [msg['To'] for msg in messages] == ['a@example.org', 'b@example.org']
+    assert messages[0]['Subject'] == 'Government Contract Alerts - 3 new alerts'
+    body = messages[0].get_payload()[0].get_payload(decode=True).decode()
+    assert '• one' in body and '• three' in body and 'four' not in body
+    # Both digests went over the one pooled connection
+    assert len(FakeSMTP.instances) == 1
+    assert [status for _, status, _, _ in rows(queue)] == ['sent'] * 4
+    assert queue.pending_count() == 0
+
+def test_digest_waits_for_window_unless_flushed(queue):
+    queue.enqueue('a@example.org', ['one'], [{}])
+    worker = make_worker(queue, digest_window=300)
+
+    assert not worker.drain_once()
+    assert sent_messages() == []
+    assert worker.drain_once(flush=True)
+    assert len(sent_messages()) == 1
+
+def test_failed_send_backs_off_exponentially_and_gives_up(queue):
+    queue.enqueue('a@example.org', ['one'], [{}])
+    worker = make_worker(queue, retry_backoff=30.0, max_attempts=3)
+    FakeSMTP.fail_sends = True
+
+    before = time.time()
+    assert not worker.drain_once()
+    (_, status, attempts, available_at), = rows(queue)
+    assert (status, attempts) == ('pending', 1)
+    assert before + 30 <= available_at <= time.time() + 30
+    # Not due again until the backoff has passed
+    assert not worker.drain_once()
+    assert rows(queue)[0][2] == 1
+
+    make_due(queue)
+    before = time.time()
+    assert not worker.drain_once()
+    (_, status, attempts, available_at), = rows(queue)
+    assert (status, attempts) == ('pending', 2)
+    assert before + 60 <= available_at <= time.time() + 60
+
+    make_due(queue)
+    assert not worker.drain_once()
+    (_, status, attempts, _), = rows(queue)
+    assert (status, attempts) == ('failed', 3)
+    assert queue.pending_count() == 0
+
+    # A failed entry is never retried
+    make_due(queue)
+    FakeSMTP.fail_sends = False
+    assert not worker.drain_once()
+    assert sent_messages() == []
+
+def test_retry_succeeds_after_transient_failure(queue):
+    queue.enqueue('a@example.org', ['one', 'two'], [{}, {}])
+    worker = make_worker(queue)
+    FakeSMTP.fail_sends = True
+    assert not worker.drain_once()
+
+    FakeSMTP.fail_sends = False
+    make_due(queue)
+    assert worker.drain_once()
+    assert [(status, attempts) for _, status, attempts, _ in rows(queue)] == [('sent', 1), ('sent', 1)]
+    # The connection that failed mid-send was dropped and a new one opened
+    assert len(FakeSMTP.instances) == 2
+
+def test_stop_flushes_pending_digests(queue):
+    worker = make_worker(queue, digest_window=3600)
+    worker.start()
+    queue.enqueue('a@example.org', ['one'], [{}])
+    queue.enqueue('b@example.org', ['two'], [{}])
+    worker.wake()
+    time.sleep(0.1)
+    assert sent_messages() == []
+
+    worker.stop(flush=True, timeout=5)
+    assert not worker.is_alive()
+    assert sorted(msg['To'] for msg in sent_messages()) == ['a@example.org', 'b@example.org']
+    assert all(server.closed for server in FakeSMTP.instances)
+
+def test_stale_claims_are_released_on_startup(queue):
+    queue.enqueue('a@example.org', ['one'], [{}])
+    assert queue.claim_digest(0)
+    assert rows(queue)[0][1] == 'sending'
+
+    NotificationQueue(queue.db_path, stale_claim_seconds=-1)
+    assert rows(queue)[0][1] == 'pending'
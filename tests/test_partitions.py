@@ -0,0 +1,96 @@
+import sqlite3
+from dataclasses import replace
+
+import pytest
+
+import query_log
+from government_monitor_system import DatabaseManager
+from partitions import PartitionStore, load_catalog
+from scenario_monitoring import ScenarioMonitor
+from synthetic_data import SyntheticContractGenerator
+
+@pytest.fixture(autouse=True)
+def no_query_stats(monkeypatch):
+    monkeypatch.setenv('GOVMON_QUERY_STATS_DB', 'off')
+
+def counts(db_path):
+    # Through the router, so the sealed archives are unioned in
+    conn = query_log.connect(db_path)
+    try:
+        return conn.execute('SELECT COUNT(*), COUNT(DISTINCT award_id) FROM contracts').fetchone()
+    finally:
+        conn.close()
+
+def last_change_id(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('SELECT MAX(id) FROM contract_changes').fetchone()[0]
+    finally:
+        conn.close()
+
+def attached(conn):
+    return sorted(row[1] for row in conn.execute('PRAGMA database_list') if row[1].startswith('part_'))
+
+def test_resaving_archived_awards_adds_no_duplicates(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    contracts = SyntheticContractGenerator(seed=7, days=1500, recipients=300).contracts(5000)
+    db.save_contracts(contracts)
+
+    store = PartitionStore(db.db_path)
+    summary = store.roll()
+    assert summary['archived']
+    assert counts(db.db_path) == (5000, 5000)
+
+    cutoff = store.hot_cutoff()
+    archived = [contract for contract in contracts if contract.award_date < cutoff][:3]
+    assert len(archived) == 3
+    changes_before = last_change_id(db.db_path)
+    db.save_contracts([replace(contract, award_amount=contract.award_amount + 1) for contract in archived])
+
+    assert counts(db.db_path) == (5000, 5000)
+    # Not logged as changes either, so sketches, baselines and analyzers never see them as new
+    assert last_change_id(db.db_path) == changes_before
+
+def test_hot_awards_in_the_same_batch_are_still_saved(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    generator = SyntheticContractGenerator(seed=7, days=1500, recipients=300)
+    contracts = generator.contracts(2000)
+    db.save_contracts(contracts)
+    store = PartitionStore(db.db_path)
+    store.roll()
+
+    cutoff = store.hot_cutoff()
+    archived = next(contract for contract in contracts if contract.award_date < cutoff)
+    fresh = [contract for contract in generator.contracts(50, start_index=2000) if contract.award_date >= cutoff]
+    db.save_contracts([archived] + fresh)
+
+    assert counts(db.db_path) == (2000 + len(fresh), 2000 + len(fresh))
+
+def test_scenario_queries_attach_only_the_archives_they_need(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    db.save_contracts(SyntheticContractGenerator(seed=7, days=1500, recipients=300).contracts(3000))
+    PartitionStore(db.db_path).roll()
+
+    conn = query_log.connect(db.db_path)
+    try:
+        archives = load_catalog(conn)
+        assert len(archives) >= 2
+
+        # The filters are ORed, but the 180-day award_date bound is ANDed outside them
+        ScenarioMonitor(db.db_path)._fetch_scenario_rows(conn, 'national_emergency')
+        assert attached(conn) == []
+
+        oldest = archives[0]
+        conn.execute('''
+            SELECT COUNT(*) FROM contracts
+            WHERE (LOWER(description) LIKE '%emergency%' OR competition_type = 'Sole Source')
+            AND award_date >= ? AND award_date <= ?
+        ''', (oldest.min_date, oldest.max_date)).fetchone()
+        assert attached(conn) == [f'part_{oldest.name}']
+
+        # An OR around the bound itself can't be pruned on
+        conn.execute("SELECT COUNT(*) FROM contracts WHERE award_type = 'A' OR award_date >= date('now', '-30 days')"
+                     ).fetchone()
+        assert attached(conn) == sorted(f'part_{archive.name}' for archive in archives)
+    finally:
+        conn.close()
@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import time
+import urllib.request
+
+import pytest
+from flask import Flask
+
+from prefork_server import PreforkServer
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='prefork needs os.fork')
+
+def make_app():
+    app = Flask(__name__)
+    app.config['generation'] = 'old'
+
+    @app.route('/')
+    def index():
+        return f"{app.config['generation']} {os.getpid()}"
+    return app
+
+@pytest.fixture
+def server():
+    server = PreforkServer(make_app(), port=0, workers=2, db_path=None, graceful_timeout=2, ready_timeout=20)
+    server.bind()
+    yield server
+    server._stop_all()
+    server._socket.close()
+
+def get(server):
+    with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/', timeout=5) as response:
+        generation, pid = response.read().decode().split()
+    return generation, int(pid)
+
+def test_reload_swaps_in_a_warm_generation_and_drains_the_old_one(server):
+    server.generation = 1
+    assert server._wait_ready(server._spawn_generation(1))
+    old_pids = set(server._children)
+    assert {get(server)[1] for _ in range(10)} <= old_pids
+
+    # Workers fork from the master, so the new generation sees the master's state now
+    server.app.config['generation'] = 'new'
+    assert server.reload()
+    assert server.generation == 2
+
+    deadline = time.monotonic() + 10
+    while old_pids & set(server._children) and time.monotonic() < deadline:
+        server._reap()
+        time.sleep(0.1)
+    assert len(server._children) == 2 and not old_pids & set(server._children)
+    assert {get(server)[0] for _ in range(10)} == {'new'}
+
+def test_collection_runs_are_read_from_run_metrics(tmp_path):
+    db_path = str(tmp_path / 'monitor.db')
+    server = PreforkServer(make_app(), db_path=db_path)
+    assert server._last_collection_run() is None
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE run_metrics (run_type TEXT, recorded_date TEXT)')
+    conn.executemany('INSERT INTO run_metrics VALUES (?, ?)', [
+        ('daily_collection', '2025-06-01T06:00:00'),
+        ('ultimate_collection', '2025-06-02T06:00:00'),
+        ('analysis', '2025-06-03T06:00:00')
+    ])
+    conn.commit()
+    conn.close()
+
+    # Analysis runs do not change the data the dashboards serve
+    assert server._last_collection_run() == '2025-06-02T06:00:00'
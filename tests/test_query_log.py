@@ -0,0 +1,62 @@
+import json
+import sqlite3
+
+from query_log import QueryLog, bucket_index, bucket_percentile, normalize_sql, stats_path_for
+
+def test_statements_differing_only_in_values_share_a_fingerprint():
+    first = normalize_sql("SELECT * FROM contracts -- recent\n WHERE award_amount > 100.5 "
+                          "AND agency = 'DoD' AND award_id IN (1, 2, 3)")
+    second = normalize_sql("SELECT *   FROM contracts WHERE award_amount > 7 "
+                           "AND agency = 'It''s GSA' AND award_id IN (4)")
+
+    assert first == second
+    assert first[0] == 'SELECT * FROM contracts WHERE award_amount > ? AND agency = ? AND award_id IN (...)'
+    # Digits inside identifiers are not literals
+    assert normalize_sql('SELECT fy2025 FROM t1')[0] == 'SELECT fy2025 FROM t1'
+
+def test_stats_file_sits_beside_the_database(tmp_path):
+    db_path = str(tmp_path / 'government_monitor.db')
+    expected = str(tmp_path / 'government_monitor_query_stats.db')
+
+    assert stats_path_for(db_path) == expected
+    assert stats_path_for(f'file:{db_path}?mode=ro') == expected
+    assert stats_path_for(':memory:') is None
+
+def test_percentiles_come_from_the_latency_buckets():
+    buckets = {}
+    for ms in [1.0] * 90 + [50.0] * 10:
+        index = bucket_index(ms)
+        buckets[index] = buckets.get(index, 0) + 1
+
+    assert 1.0 <= bucket_percentile(buckets, 50) < 1.25
+    assert 50.0 <= bucket_percentile(buckets, 95) < 62.5
+    # Never above the slowest call actually seen
+    assert bucket_percentile(buckets, 95, max_ms=55.0) == 55.0
+    assert bucket_percentile({}, 95) is None
+
+def test_slow_queries_are_flushed_with_their_plan(tmp_path):
+    log = QueryLog(path=str(tmp_path / 'stats.db'), threshold_ms=50)
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE awards (award_id TEXT PRIMARY KEY, amount REAL)')
+
+    log.record(conn, "SELECT amount FROM awards WHERE award_id = 'A1'", (), 'fast', 0.001)
+    log.record(conn, 'SELECT amount FROM awards WHERE award_id = ?', ('A2',), 'slow', 0.2)
+    log.flush()
+    log.record(conn, 'SELECT amount FROM awards WHERE award_id = ?', ('A3',), 'fast', 0.002)
+    log.flush()
+    conn.close()
+
+    stats = sqlite3.connect(log.path)
+    try:
+        (sql, calls, max_ms, slow_calls, buckets, caller), = stats.execute(
+            'SELECT normalized_sql, calls, max_ms, slow_calls, buckets, last_caller FROM query_stats')
+        slow = stats.execute('SELECT params, duration_ms, caller, query_plan FROM slow_queries').fetchall()
+    finally:
+        stats.close()
+
+    # Flushes merge into the existing row
+    assert (sql, calls, max_ms, slow_calls, caller) == ('SELECT amount FROM awards WHERE award_id = ?', 3, 200.0, 1, 'fast')
+    assert sum(json.loads(buckets).values()) == 3
+    (params, duration_ms, slow_caller, plan), = slow
+    assert (json.loads(params), duration_ms, slow_caller) == (['A2'], 200.0, 'slow')
+    assert 'USING INDEX' in plan
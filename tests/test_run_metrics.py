@@ -0,0 +1,44 @@
+import json
+import sqlite3
+import threading
+import time
+
+from run_metrics import RunMetrics
+
+def test_counters_accumulate_per_phase_and_source_across_threads(tmp_path):
+    metrics = RunMetrics('collection', str(tmp_path / 'monitor.db'))
+
+    def fetch(source):
+        with metrics.measure('fetch', source):
+            time.sleep(0.02)
+        for _ in range(50):
+            metrics.add('fetch', source, items=1, http_requests=2)
+
+    threads = [threading.Thread(target=fetch, args=(source,)) for source in ('usaspending', 'fpds')]
+    with metrics.measure('collection'):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    metrics.add('write', rows_written=100)
+    rows = metrics.finish(trace_path=str(tmp_path / 'trace.json'))
+
+    by_key = {(row['phase'], row['source']): row for row in rows}
+    assert by_key[('fetch', 'fpds')]['items'] == 50
+    assert by_key[('fetch', 'usaspending')]['http_requests'] == 100
+    assert by_key[('fetch', 'fpds')]['wall_seconds'] >= 0.02
+    assert by_key[('write', '')]['rows_written'] == 100
+    # Phase-level rows come first
+    assert [row['source'] for row in rows][:2] == ['', '']
+
+    conn = sqlite3.connect(metrics.db_path)
+    try:
+        saved = conn.execute('SELECT COUNT(*), SUM(items) FROM run_metrics WHERE run_id = ?', (metrics.run_id,))
+        assert saved.fetchone() == (4, 100)
+    finally:
+        conn.close()
+
+    with open(tmp_path / 'trace.json') as f:
+        events = json.load(f)['traceEvents']
+    spans = sorted(event['name'] for event in events if event['ph'] == 'X')
+    assert spans == ['collection', 'fetch:fpds', 'fetch:usaspending']
@@ -0,0 +1,37 @@
+from dataclasses import asdict
+
+import pytest
+
+from government_monitor_system import DatabaseManager
+from scenario_monitoring import ScenarioMonitor
+from synthetic_data import SyntheticContractGenerator
+
+@pytest.fixture(autouse=True)
+def no_query_stats(monkeypatch):
+    monkeypatch.setenv('GOVMON_QUERY_STATS_DB', 'off')
+
+def alerts(results):
+    return {scenario: [asdict(alert) for alert in scenario_alerts] for scenario, scenario_alerts in results.items()}
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    db.save_contracts(SyntheticContractGenerator(seed=3, days=200, recipients=200).contracts(3000))
+    return db
+
+def test_parallel_full_run_matches_sequential(db):
+    sequential = ScenarioMonitor(db.db_path).run_full_scenario_analysis(incremental=False)
+    parallel = ScenarioMonitor(db.db_path, workers=2).run_full_scenario_analysis(incremental=False)
+
+    assert sum(len(scenario_alerts) for scenario_alerts in sequential.values()) > 0
+    assert alerts(parallel) == alerts(sequential)
+
+def test_parallel_incremental_runs_match_sequential(db):
+    monitor = ScenarioMonitor(db.db_path, workers=2, partition_by='agency')
+    first = monitor.run_full_scenario_analysis()
+    assert alerts(first) == alerts(ScenarioMonitor(db.db_path).run_full_scenario_analysis(incremental=False))
+
+    db.save_contracts(SyntheticContractGenerator(seed=3, days=30, recipients=200).contracts(300, start_index=3000))
+    second = monitor.run_full_scenario_analysis()
+    expected = ScenarioMonitor(db.db_path).run_full_scenario_analysis(incremental=False)
+    assert alerts(second) == alerts(expected)
@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from scheduler_daemon import ScheduledJob, SchedulerDaemon
+
+class Blocking:
+    """A job body that runs until released, counting how many copies of itself run at once"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        self.started.release()
+        self.release.wait(5)
+        with self._lock:
+            self.active -= 1
+
+@pytest.fixture
+def daemon(tmp_path):
+    daemon = SchedulerDaemon(max_concurrent=2, control_socket=str(tmp_path / 'scheduler.sock'))
+    yield daemon
+    daemon._executor.shutdown(wait=True)
+
+def add(daemon, name, func, group=None):
+    daemon.add_job(ScheduledJob(name=name, func=func, interval=3600, run_on_start=True, group=group))
+
+def running(daemon):
+    return sorted(job['name'] for job in daemon.status()['jobs'] if job['running'])
+
+def test_a_running_job_is_not_started_again(daemon):
+    body = Blocking()
+    add(daemon, 'collect', body)
+    daemon._dispatch_due_jobs()
+    assert body.started.acquire(timeout=5)
+
+    assert daemon.trigger('collect') == {'ok': False, 'error': 'Job already running: collect'}
+    daemon.jobs['collect'].next_run = 0
+    daemon._dispatch_due_jobs()
+    body.release.set()
+    daemon._executor.shutdown(wait=True)
+
+    assert body.peak == 1
+    assert daemon.jobs['collect'].run_count == 1
+
+def test_concurrency_is_capped(daemon):
+    bodies = [Blocking() for _ in range(3)]
+    for index, body in enumerate(bodies):
+        add(daemon, f'job{index}', body)
+
+    daemon._dispatch_due_jobs()
+    assert len(running(daemon)) == 2
+    # The third job is due, but both slots are taken
+    daemon._dispatch_due_jobs()
+    assert len(running(daemon)) == 2
+
+    for body in bodies:
+        body.release.set()
+
+def test_jobs_in_one_group_never_overlap(daemon):
+    daily, ultimate = Blocking(), Blocking()
+    add(daemon, 'daily_collection', daily, group='collection')
+    add(daemon, 'ultimate_collection', ultimate, group='collection')
+
+    daemon._dispatch_due_jobs()
+    assert len(running(daemon)) == 1
+    first, second = (daily, ultimate) if running(daemon) == ['daily_collection'] else (ultimate, daily)
+    assert first.started.acquire(timeout=5)
+
+    # A free slot is not enough while the other collection job holds the group
+    daemon._dispatch_due_jobs()
+    assert len(running(daemon)) == 1
+
+    first.release.set()
+    while any(job['running'] for job in daemon.status()['jobs']):
+        daemon._wake_event.wait(1)
+        daemon._wake_event.clear()
+    daemon._dispatch_due_jobs()
+    assert second.started.acquire(timeout=5)
+    second.release.set()
@@ -0,0 +1,38 @@
+import threading
+
+import pytest
+
+from metrics import MetricsRegistry
+from section_loader import SectionLoader
+
+@pytest.fixture
+def loader():
+    loader = SectionLoader('test_app', max_workers=3, registry=MetricsRegistry())
+    yield loader
+    loader.shutdown()
+
+def test_sections_run_concurrently(loader):
+    # Each builder waits for the others, so this only finishes if all three overlap
+    barrier = threading.Barrier(3, timeout=5)
+
+    def section(value):
+        def build():
+            barrier.wait()
+            return value
+        return build
+
+    results = loader.load({'stats': section(1), 'table': section([2]), 'figure': section('3')})
+
+    assert results == {'stats': 1, 'table': [2], 'figure': '3'}
+    assert list(results) == ['stats', 'table', 'figure']
+    body = '\n'.join(loader.section_seconds.render())
+    assert 'govmon_dashboard_section_duration_seconds_count{app="test_app",section="table"} 1' in body
+
+def test_a_failing_section_is_reraised_and_still_timed(loader):
+    with pytest.raises(ZeroDivisionError):
+        loader.load({'ok': lambda: 1, 'broken': lambda: 1 / 0})
+
+    body = '\n'.join(loader.section_seconds.render())
+    assert 'govmon_dashboard_section_duration_seconds_count{app="test_app",section="broken"} 1' in body
+    # The shared executor keeps serving later requests
+    assert loader.load({'ok': lambda: 2}) == {'ok': 2}
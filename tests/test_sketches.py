@@ -0,0 +1,64 @@
+import random
+import sqlite3
+
+import pytest
+
+from government_monitor_system import Contract, DatabaseManager
+from sketches import ALL_AGENCIES, HyperLogLog, SketchStore, TDigest
+
+@pytest.fixture(autouse=True)
+def no_query_stats(monkeypatch):
+    monkeypatch.setenv('GOVMON_QUERY_STATS_DB', 'off')
+
+def test_hyperloglog_merges_into_the_union():
+    first, second = HyperLogLog(), HyperLogLog()
+    first.update(f'vendor-{i}' for i in range(0, 6000))
+    second.update(f'vendor-{i}' for i in range(4000, 10000))
+    # Repeats do not count
+    second.update(f'vendor-{i}' for i in range(4000, 5000))
+
+    union = HyperLogLog.from_bytes(first.to_bytes()).merge(second).estimate()
+    assert union.low <= 10000 <= union.high
+    assert abs(union.value - 10000) < 500
+
+def test_tdigest_quantiles_bracket_the_exact_values():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(10, 1.5) for _ in range(20000)]
+    left, right = TDigest(), TDigest()
+    left.update(values[:10000])
+    right.update(values[10000:])
+    digest = TDigest.from_bytes(left.merge(right).to_bytes())
+
+    ordered = sorted(values)
+    for q in (0.5, 0.9, 0.99):
+        exact = ordered[int(q * len(ordered))]
+        estimate = digest.quantile(q)
+        assert estimate.low <= estimate.value <= estimate.high
+        assert abs(digest.cdf(exact) - q) < 0.01
+    assert digest.quantile(0).value == ordered[0]
+    assert digest.quantile(1).value == ordered[-1]
+
+def test_saved_contracts_are_folded_into_the_sketches(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    contracts = [Contract(f'A{i}', f'Vendor {i % 50}', 1000.0 + i, 'DoD' if i % 2 else 'GSA',
+                          f'2025-0{1 + i % 3}-15', 'A', 'full', 'test') for i in range(300)]
+    db.save_contracts(contracts[:150])
+    db.save_contracts(contracts[100:])
+
+    store = SketchStore(db.db_path)
+    conn = sqlite3.connect(db.db_path)
+    try:
+        (dod,), = conn.execute("SELECT id FROM agencies WHERE name = 'DoD'")
+        overall = store.distinct_recipients(conn)
+        by_agency = store.distinct_recipients(conn, dod)
+        january = store.distinct_recipients(conn, months=['2025-01'])
+        (digest,), = conn.execute('SELECT sketch FROM amount_sketches WHERE agency_id = ?', (ALL_AGENCIES,))
+    finally:
+        conn.close()
+
+    assert round(overall.value) == 50
+    # Odd awards go to DoD, and vendor i % 50 keeps the parity of i
+    assert round(by_agency.value) == 25
+    assert round(january.value) == 50
+    # The 50 awards saved twice only add their amounts once
+    assert TDigest.from_bytes(digest).total == 300
@@ -0,0 +1,48 @@
+import sqlite3
+
+import pytest
+
+import star_schema
+from government_monitor_system import Contract, DatabaseManager
+
+@pytest.fixture(autouse=True)
+def no_query_stats(monkeypatch):
+    monkeypatch.setenv('GOVMON_QUERY_STATS_DB', 'off')
+
+def flat_database(path):
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE contracts (
+            award_id TEXT PRIMARY KEY, recipient_name TEXT, award_amount REAL, awarding_agency TEXT,
+            award_date TEXT, award_type TEXT, competition_type TEXT, description TEXT, collected_date TEXT
+        )
+    ''')
+    conn.executemany('INSERT INTO contracts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+        ('A1', 'Acme Corp', 1000.0, 'DoD', '2025-01-02', 'A', 'full', 'x', '2025-01-03'),
+        ('A2', 'Globex', 2000.0, 'DoD', '2025-01-04', 'A', 'full', 'y', '2025-01-05'),
+        ('A3', 'Acme Corp', 3000.0, 'GSA', '2025-01-06', 'A', 'sole', 'z', '2025-01-07')
+    ])
+    conn.commit()
+    conn.close()
+
+def test_flat_database_is_refused_until_upgraded(tmp_path):
+    path = str(tmp_path / 'monitor.db')
+    flat_database(path)
+
+    with pytest.raises(star_schema.FlatContractsTable):
+        DatabaseManager(path)
+
+    assert star_schema.upgrade_database(path)
+    assert not star_schema.upgrade_database(path)
+
+    db = DatabaseManager(path)
+    db.save_contracts([Contract('A4', 'Globex', 500.0, 'GSA', '2025-02-01', 'A', 'full', 'w')])
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("SELECT type FROM sqlite_master WHERE name = 'contracts'").fetchone() == ('view',)
+        rows = conn.execute('SELECT award_id, recipient_name, awarding_agency FROM contracts ORDER BY award_id')
+        assert rows.fetchall() == [('A1', 'Acme Corp', 'DoD'), ('A2', 'Globex', 'DoD'),
+                                   ('A3', 'Acme Corp', 'GSA'), ('A4', 'Globex', 'GSA')]
+        assert conn.execute('SELECT COUNT(*) FROM recipients').fetchone() == (2,)
+    finally:
+        conn.close()
@@ -0,0 +1,53 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+import star_schema
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs an entry point as __main__, then reports which top-level packages it loaded
+RUNNER = '''
+import json, runpy, sys
+path, argv = sys.argv[1], sys.argv[1:]
+sys.argv = argv
+try:
+    runpy.run_path(path, run_name='__main__')
+except SystemExit:
+    pass
+print(json.dumps(sorted({name.split('.')[0] for name in sys.modules})), file=sys.stderr)
+'''
+
+@pytest.fixture
+def workdir(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'government_monitor.db')
+    star_schema.ensure_star_schema(conn)
+    conn.execute('CREATE TABLE alerts (id INTEGER PRIMARY KEY, alert_type TEXT, message TEXT, data TEXT, created_date TEXT)')
+    conn.execute("INSERT INTO contracts (award_id, recipient_name, award_amount, award_date) "
+                 "VALUES ('A1', 'Sample Contractor', 1000000, date('now'))")
+    conn.commit()
+    conn.close()
+    return tmp_path
+
+def loaded_packages(workdir, script, *args):
+    env = dict(os.environ, GOVMON_QUERY_STATS_DB='off',
+               PYTHONPATH=os.pathsep.join([REPO_ROOT, os.path.join(REPO_ROOT, 'core')]))
+    result = subprocess.run([sys.executable, '-c', RUNNER, os.path.join(REPO_ROOT, script), *args],
+                            cwd=workdir, env=env, capture_output=True, text=True, stdin=subprocess.DEVNULL,
+                            timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout, set(json.loads(result.stderr.strip().splitlines()[-1]))
+
+@pytest.mark.parametrize('script, args, expected', [
+    ('monitor.py', ['4'], 'Contracts: 1'),
+    ('view_contracts.py', ['recent', '5'], 'Sample Contractor')
+])
+def test_light_commands_do_not_load_heavy_dependencies(workdir, script, args, expected):
+    output, packages = loaded_packages(workdir, script, *args)
+
+    assert expected in output
+    assert not {'pandas', 'numpy', 'plotly', 'flask', 'requests', 'bs4', 'feedparser'} & packages
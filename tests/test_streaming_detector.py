@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+import pytest
+
+from government_monitor_system import Contract, DatabaseManager
+from streaming_detector import StreamingAccumulationDetector
+
+@pytest.fixture(autouse=True)
+def no_query_stats(monkeypatch):
+    monkeypatch.setenv('GOVMON_QUERY_STATS_DB', 'off')
+
+def recent(award_id, recipient='Acme Corp', days_ago=1, amount=1000.0):
+    award_date = (date.today() - timedelta(days=days_ago)).isoformat()
+    return Contract(award_id, recipient, amount, 'DoD', award_date, 'A', 'full', 'test')
+
+def test_contracts_saved_outside_observe_count_toward_the_window(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    detector = StreamingAccumulationDetector(db.db_path)
+
+    # Written directly (e.g. by another tool), never passed to observe()
+    db.save_contracts([recent('A1'), recent('A2')])
+    assert detector.observe([]) == []
+
+    later = [recent('A3')]
+    db.save_contracts(later)
+    alerts = detector.observe(later)
+
+    assert [(a['company'], a['contract_count']) for a in alerts] == [('Acme Corp', 3)]
+
+def test_bulk_load_is_logged_by_rebuild_summaries(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    detector = StreamingAccumulationDetector(db.db_path)
+
+    db.save_contracts([recent(f'B{i}', 'Globex') for i in range(4)], update_summaries=False)
+    db.rebuild_summaries()
+
+    later = [recent('B9', 'Globex')]
+    db.save_contracts(later)
+    alerts = detector.observe(later)
+
+    assert [(a['company'], a['contract_count'], a['severity']) for a in alerts] == [('Globex', 5, 'high')]
+
+def test_name_variants_share_one_window(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'monitor.db'))
+    detector = StreamingAccumulationDetector(db.db_path)
+
+    contracts = [recent('C1', 'Initech Corporation'), recent('C2', 'INITECH CORP.'), recent('C3', 'The Initech Corp')]
+    db.save_contracts(contracts)
+    alerts = detector.observe(contracts)
+
+    # One alert under the entity's canonical name (the first variant resolved)
+    assert [(a['company'], a['contract_count']) for a in alerts] == [('INITECH CORP.', 3)]
@@ -0,0 +1,44 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+from sketches import SketchStore
+from synthetic_data import SyntheticContractGenerator, build_fixture, fixture_info
+
+END = date(2025, 6, 30)
+
+@pytest.fixture(autouse=True)
+def no_query_stats(monkeypatch):
+    monkeypatch.setenv('GOVMON_QUERY_STATS_DB', 'off')
+
+def test_rows_depend_only_on_seed_and_index():
+    generator = SyntheticContractGenerator(seed=7, recipients=2000, end_date=END)
+    rows = list(generator.rows(500))
+
+    assert rows == list(SyntheticContractGenerator(seed=7, recipients=2000, end_date=END).rows(500))
+    # Any slice regenerates on its own, and batches cover the stream without gaps
+    assert list(generator.rows(100, start_index=250)) == rows[250:350]
+    assert [row for batch in generator.batches(500, batch_size=64) for row in batch] == rows
+    assert rows != list(SyntheticContractGenerator(seed=8, recipients=2000, end_date=END).rows(500))
+
+    assert len({row[0] for row in rows}) == 500
+    assert all('2023-07-01' <= row[4] <= END.isoformat() for row in rows)
+    # Zipf-distributed recipients: a few vendors win many awards
+    counts = sorted((sum(row[1] == name for row in rows) for name in {row[1] for row in rows}), reverse=True)
+    assert counts[0] >= 10 and len(counts) < 500
+
+def test_fixture_is_a_complete_monitor_database(tmp_path):
+    db_path = str(tmp_path / 'fixture.db')
+    assert fixture_info(db_path) is None
+
+    info = build_fixture(db_path, rows=3000, seed=3, batch_size=1000)
+
+    assert (info['rows'], info['seed']) == (3000, 3)
+    assert fixture_info(db_path) == info
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute('SELECT COUNT(*) FROM contracts').fetchone()[0] == 3000
+        assert SketchStore.is_built(conn)
+    finally:
+        conn.close()
@@ -4,12 +4,15 @@ Simple Contract Viewer
 Shows detailed contract information from your database
 """
 
-import sqlite3
 import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'core'))
+
+import query_log
 
 def view_recent_contracts(limit=20):
     """Show most recent contracts"""
-    conn = sqlite3.connect('government_monitor.db')
+    conn = query_log.connect('government_monitor.db')
     cursor = conn.cursor()
     
     query = """
@@ -46,7 +49,7 @@ def view_recent_contracts(limit=20):
 
 def view_by_company(company_name):
     """Show all contracts for a specific company"""
-    conn = sqlite3.connect('government_monitor.db')
+    conn = query_log.connect('government_monitor.db')
     cursor = conn.cursor()
     
     query = """
@@ -95,7 +98,7 @@ def view_by_company(company_name):
 
 def view_large_contracts(min_amount=1000000):
     """Show contracts above a certain dollar amount"""
-    conn = sqlite3.connect('government_monitor.db')
+    conn = query_log.connect('government_monitor.db')
     cursor = conn.cursor()
     
     query = """
@@ -123,6 +126,44 @@ def view_large_contracts(min_amount=1000000):
     print(f"\nTotal: {len(results)} contracts\n")
     conn.close()
 
+def export_contracts(argv):
+    """Stream every matching contract to a file or stdout as CSV or NDJSON"""
+    import argparse
+    from contract_export import FORMATS, stream_export
+    from contract_listing import COMPETITION_CLASSES, ListingFilters
+    
+    parser = argparse.ArgumentParser(prog='view_contracts.py export',
+                                     description="Export contracts matching the listing filters")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+    parser.add_argument('--order', choices=['date', 'amount'], default='date')
+    parser.add_argument('--agency', help="Exact awarding agency name")
+    parser.add_argument('--start-date', metavar='YYYY-MM-DD')
+    parser.add_argument('--end-date', metavar='YYYY-MM-DD')
+    parser.add_argument('--min-amount', type=float)
+    parser.add_argument('--competition', choices=sorted(COMPETITION_CLASSES))
+    parser.add_argument('--output', '-o', help="File to write (default: stdout)")
+    parser.add_argument('--db', default='government_monitor.db')
+    args = parser.parse_args(argv)
+    
+    if not os.path.exists(args.db):
+        print(f"❌ No database at {args.db}", file=sys.stderr)
+        return 1
+    chunks = stream_export(args.db, args.format, ListingFilters.from_args(vars(args)), args.order)
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    except BrokenPipeError:
+        # Piped into head or similar: stop quietly (and keep the interpreter from complaining at exit)
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        chunks.close()
+        if args.output:
+            out.close()
+    if args.output:
+        print(f"✅ Exported to {args.output}", file=sys.stderr)
+    return 0
+
 def main():
     """Main menu"""
     if len(sys.argv) > 1:
@@ -143,17 +184,23 @@ def main():
             min_amount = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
             view_large_contracts(min_amount)
         
+        elif command == "export":
+            return export_contracts(sys.argv[2:])
+        
         else:
             print(f"Unknown command: {command}")
             print("\nAvailable commands:")
             print("  recent [limit]           - Show most recent contracts")
             print("  company <name>           - Show all contracts for a company")
             print("  large [min_amount]       - Show contracts above dollar amount")
+            print("  export [--format csv|ndjson] [--agency NAME] [--start-date D] [--end-date D]")
+            print("         [--min-amount N] [--competition TYPE] [-o FILE]")
+            print("                           - Stream matching contracts as CSV or NDJSON")
     
     else:
         # Default: show recent contracts
         view_recent_contracts(20)
 
 if __name__ == "__main__":
-    main()
+    exit(main())
 